@@ -0,0 +1,127 @@
+"""
+CCTV Frame Gate Throughput Benchmark
+
+Runs services/cctv_gate.analyze_frame over a camera-like frame sequence and
+reports frames per second per core, the gate outcome of every frame and how
+many frames would still have gone to the vision API (before: all of them).
+
+Frames are either real captures (--frames DIR of JPEGs, sorted by name, e.g.
+`ffmpeg -i rtsp://... -vf fps=1 frames/%05d.jpg`) or a synthetic gate camera:
+a static scene with sensor noise, an occasional re-posted identical frame
+and short bursts of something moving across it.
+
+  single  - one process, the camera state carried frame to frame as the
+            per-camera worker does; per-outcome latency
+  --workers N also runs N independent cameras on N processes and reports
+            the aggregate and per-core rate
+
+Usage:
+  python benchmarks/cctv_gate_benchmark.py
+  python benchmarks/cctv_gate_benchmark.py --frames ./frames --workers 4
+  CCTV_FACE_MODEL=face_detection_yunet_2023mar.onnx python benchmarks/cctv_gate_benchmark.py --frames ./frames
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from services import cctv_gate  # noqa: E402
+
+
+def synthetic_frames(count: int, width: int, height: int, seed: int = 7):
+    """JPEG frames of a gate camera: mostly still, some repeats, a few bursts of motion."""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    scene = (90 + 60 * np.sin(xx / 37.0) * np.cos(yy / 23.0) + rng.normal(0, 12, (height, width))).clip(0, 255)
+    frames, previous = [], None
+    for i in range(count):
+        if previous is not None and i % 7 == 3:
+            frames.append(previous)            # camera re-posted the same frame
+            continue
+        frame = scene + rng.normal(0, 3, scene.shape)
+        if (i // 10) % 3 == 1:                  # a burst: something walks across
+            x = int((i % 10) / 10 * (width - 160))
+            frame[height // 3:height // 3 + 220, x:x + 160] = 200 - rng.normal(0, 20, (220, 160)).clip(-60, 60)
+        rgb = np.repeat(frame.clip(0, 255).astype(np.uint8)[:, :, None], 3, axis=2)
+        buffer = BytesIO()
+        Image.fromarray(rgb).save(buffer, format="JPEG", quality=85)
+        previous = buffer.getvalue()
+        frames.append(previous)
+    return frames
+
+
+def load_frames(directory: str):
+    paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in (".jpg", ".jpeg"))
+    return [p.read_bytes() for p in paths]
+
+
+def run_camera(frames):
+    """Gate frames in order, as a camera's worker does; returns (outcome, seconds) per frame."""
+    previous_thumb, last_hash, timings = None, None, []
+    for jpeg in frames:
+        started = time.perf_counter()
+        result = cctv_gate.analyze_frame(jpeg, previous_thumb, last_hash)
+        timings.append((result["outcome"], time.perf_counter() - started))
+        previous_thumb = result["thumb"]
+        if result["outcome"] not in ("duplicate", "no_motion"):
+            last_hash = result["hash"]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", help="directory of JPEG frames from one camera (default: synthetic)")
+    parser.add_argument("--count", type=int, default=300, help="synthetic frames")
+    parser.add_argument("--size", default="1280x720", help="synthetic frame size")
+    parser.add_argument("--workers", type=int, default=0, help="also run this many cameras in parallel processes")
+    args = parser.parse_args()
+
+    if args.frames:
+        frames = load_frames(args.frames)
+    else:
+        width, height = (int(v) for v in args.size.split("x"))
+        frames = synthetic_frames(args.count, width, height)
+    if not frames:
+        sys.exit("No frames")
+    print(f"{len(frames)} frames, {sum(map(len, frames)) / len(frames) / 1024:.0f} KB avg; "
+          f"face detector: {cctv_gate.detector_kind() or 'none (frames past the gates → forward)'}")
+
+    run_camera(frames[:3])   # warm up the decoder / detector
+    started = time.perf_counter()
+    timings = run_camera(frames)
+    elapsed = time.perf_counter() - started
+
+    by_outcome = defaultdict(list)
+    for outcome, seconds in timings:
+        by_outcome[outcome].append(seconds)
+    for outcome, values in sorted(by_outcome.items(), key=lambda kv: -len(kv[1])):
+        print(f"  {outcome:15s} {len(values):5d} frames   mean {statistics.mean(values) * 1000:6.2f} ms   "
+              f"max {max(values) * 1000:6.2f} ms")
+    onward = sum(len(by_outcome[o]) for o in ("faces", "forward"))
+    print(f"single core: {len(frames) / elapsed:.1f} frames/s; "
+          f"{onward} of {len(frames)} frames go on to matching / the vision API (before: {len(frames)})")
+
+    if args.workers:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(run_camera, [frames[:3]] * args.workers))   # spawn + warm up
+            started = time.perf_counter()
+            list(pool.map(run_camera, [frames] * args.workers))
+            elapsed = time.perf_counter() - started
+        total = len(frames) * args.workers
+        print(f"{args.workers} cameras on {args.workers} processes: {total / elapsed:.1f} frames/s "
+              f"({total / elapsed / args.workers:.1f} per core, {os.cpu_count()} cores available)")
+
+
+if __name__ == "__main__":
+    main()
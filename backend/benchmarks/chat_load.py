@@ -0,0 +1,184 @@
+"""
+Group Chat Load Test
+
+Modes:
+  local  - in-process fan-out only: thousands of class groups, every member
+           holding a live subscription, senders publishing concurrently.
+           Measures publish → member delivery latency and dropped events.
+  http   - full path against a running backend: creates CHATLOAD groups,
+           sends messages concurrently to all of them, then checks that every
+           group's seqs are exactly 1..N (no gaps / duplicates under
+           concurrency) and that unread counts match.
+
+Usage:
+  python benchmarks/chat_load.py local --groups 2000 --members 40 --messages 20
+  python benchmarks/chat_load.py http --base-url http://localhost:8001 \\
+      --school-id SCH-TEST-2026 --groups 500 --members 40 --messages 10 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _report(label, latencies):
+    print(f"{label} p50/p95/p99: {_percentile(latencies, 50) * 1000:.2f} / "
+          f"{_percentile(latencies, 95) * 1000:.2f} / {_percentile(latencies, 99) * 1000:.2f} ms "
+          f"(mean {statistics.mean(latencies) * 1000:.2f} ms, n={len(latencies)})")
+
+
+# ====================== LOCAL (IN-PROCESS) ======================
+
+async def run_local(args):
+    from core.event_bus import bus
+    from core.live_events import group_topic, publish_chat_message, user_topic
+
+    rng = random.Random(args.seed)
+    groups = [f"G{g:05d}" for g in range(args.groups)]
+    latencies = []
+    received = 0
+
+    async def member(sub):
+        nonlocal received
+        async for event in sub:
+            latencies.append(time.perf_counter() - event["sent_at"])
+            received += 1
+
+    subs, tasks = [], []
+    for gid in groups:
+        for m in range(args.members):
+            sub = bus.subscribe(user_topic(f"{gid}-M{m}"), group_topic(gid))
+            subs.append(sub)
+            tasks.append(asyncio.create_task(member(sub)))
+    print(f"groups={args.groups} members/group={args.members} subscriptions={len(subs)}")
+
+    seqs = {gid: 0 for gid in groups}
+
+    async def sender(gid):
+        for _ in range(args.messages):
+            seqs[gid] += 1
+            publish_chat_message({"id": str(uuid.uuid4()), "group_id": gid, "seq": seqs[gid],
+                                  "content": "hello", "sent_at": time.perf_counter()})
+            await asyncio.sleep(rng.uniform(0, args.jitter))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(sender(g) for g in groups))
+    expected = args.groups * args.members * args.messages
+    while received + sum(s.dropped for s in subs) < expected and time.perf_counter() - t0 < 60:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - t0
+
+    print(f"messages sent:   {args.groups * args.messages}")
+    print(f"deliveries:      {received}/{expected} in {elapsed:.2f}s ({received / elapsed:,.0f}/s)")
+    print(f"dropped (slow):  {sum(s.dropped for s in subs)}")
+    _report("delivery latency", latencies)
+    for t in tasks:
+        t.cancel()
+    for s in subs:
+        s.close()
+
+
+# ====================== HTTP ======================
+
+async def run_http(args):
+    import httpx
+
+    base = f"{args.base_url}/api/chat"
+    run_id = uuid.uuid4().hex[:6]
+    async with httpx.AsyncClient(timeout=30) as client:
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def create(g):
+            async with sem:
+                members = [f"CHATLOAD-{run_id}-{g}-{m}" for m in range(args.members)]
+                r = await client.post(f"{base}/groups/create", json={
+                    "name": f"CHATLOAD {run_id} {g}", "group_type": "class",
+                    "school_id": args.school_id, "members": members, "created_by": "chat_load"
+                })
+                r.raise_for_status()
+                return r.json()["group_id"], members
+
+        t0 = time.perf_counter()
+        groups = await asyncio.gather(*(create(g) for g in range(args.groups)))
+        print(f"created {len(groups)} groups in {time.perf_counter() - t0:.1f}s")
+
+        latencies, errors = [], 0
+
+        async def send(gid, members, i):
+            nonlocal errors
+            async with sem:
+                sender = members[i % len(members)]
+                t = time.perf_counter()
+                try:
+                    r = await client.post(f"{base}/messages/send", json={
+                        "group_id": gid, "content": f"msg {i}", "sender_id": sender,
+                        "sender_name": sender, "sender_role": "student"
+                    })
+                    r.raise_for_status()
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - t)
+
+        # Interleave groups so every group has concurrent senders
+        jobs = [send(gid, members, i) for i in range(args.messages) for gid, members in groups]
+        random.Random(args.seed).shuffle(jobs)
+        t0 = time.perf_counter()
+        await asyncio.gather(*jobs)
+        elapsed = time.perf_counter() - t0
+        print(f"sent {len(jobs)} messages in {elapsed:.1f}s ({len(jobs) / elapsed:,.0f}/s), errors={errors}")
+        _report("send", latencies)
+
+        # Integrity: seqs 1..N per group, unread = N for a member who never read
+        bad = 0
+        for gid, members in groups[:args.verify]:
+            r = await client.get(f"{base}/messages/{gid}", params={"after_seq": 0, "limit": args.messages})
+            seqs = [m["seq"] for m in r.json()["messages"]]
+            if seqs != list(range(1, args.messages + 1)):
+                bad += 1
+                print(f"  {gid}: seqs {seqs[:10]}...")
+            silent = members[-1] if args.messages < args.members else None
+            if silent:
+                r = await client.get(f"{base}/unread/{args.school_id}", params={"user_id": silent})
+                if r.json()["unread"].get(gid) != args.messages:
+                    bad += 1
+                    print(f"  {gid}: unread {r.json()['unread'].get(gid)} != {args.messages}")
+        print(f"verified {min(args.verify, len(groups))} groups: {'OK' if not bad else f'{bad} problems'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group chat load test")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    for name in ("local", "http"):
+        p = sub.add_parser(name)
+        p.add_argument("--groups", type=int, default=1000)
+        p.add_argument("--members", type=int, default=40)
+        p.add_argument("--messages", type=int, default=10, help="messages per group")
+        p.add_argument("--seed", type=int, default=42)
+
+    sub.choices["local"].add_argument("--jitter", type=float, default=0.01, help="max sleep between sends (s)")
+    sub.choices["http"].add_argument("--base-url", default="http://localhost:8001")
+    sub.choices["http"].add_argument("--school-id", required=True)
+    sub.choices["http"].add_argument("--concurrency", type=int, default=64)
+    sub.choices["http"].add_argument("--verify", type=int, default=50, help="groups to integrity-check")
+
+    args = parser.parse_args()
+    asyncio.run(run_local(args) if args.mode == "local" else run_http(args))
+
+
+if __name__ == "__main__":
+    main()
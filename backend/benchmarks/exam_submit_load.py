@@ -0,0 +1,274 @@
+"""
+Online Exam Submission Load Test
+
+Simulates the bell: every student of the school submits the same online exam
+at once.
+
+Modes:
+  local  - in-process, no Mongo: 2,000 concurrent answer-key loads (must
+           collapse into one read), then grading + rank for every
+           submission with the old per-request path (loop grading + full
+           result scan for rank) and the exam-session path (answer-key
+           array + incremental leaderboard). Checks both agree.
+  http   - full path against a running backend: a teacher creates an exam,
+           2,000 student tokens (signed with the server's JWT_SECRET) submit
+           concurrently, a sample re-submits (must get 400), then the
+           leaderboard and results endpoints are checked against the
+           submitted scores.
+
+Usage:
+  python benchmarks/exam_submit_load.py local --students 2000 --questions 50
+  JWT_SECRET=... python benchmarks/exam_submit_load.py http --base-url http://localhost:8001 \\
+      --school-id SCH-TEST-2026 --students 2000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _report(label, latencies):
+    print(f"{label} p50/p95/p99: {_percentile(latencies, 50) * 1000:.2f} / "
+          f"{_percentile(latencies, 95) * 1000:.2f} / {_percentile(latencies, 99) * 1000:.2f} ms "
+          f"(mean {statistics.mean(latencies) * 1000:.2f} ms, n={len(latencies)})")
+
+
+def build_exam(args, rng):
+    questions = [{
+        "question": f"Question {i + 1}",
+        "options": ["A", "B", "C", "D"],
+        "correct_answer": rng.randrange(4),
+        "marks": rng.choice([1, 1, 2, 4])
+    } for i in range(args.questions)]
+    return {
+        "id": str(uuid.uuid4()), "title": "Load Test", "subject": "Mathematics",
+        "class_id": "LOADTEST", "school_id": "LOADTEST", "duration": 60,
+        "total_marks": sum(q["marks"] for q in questions), "questions": questions,
+        "negative_marking": True, "negative_marks": 0.25, "status": "active"
+    }
+
+
+def build_answers(exam, rng):
+    skill = rng.uniform(0.2, 0.95)
+    answers = {}
+    for i, q in enumerate(exam["questions"]):
+        roll = rng.random()
+        if roll < 0.1:
+            continue
+        answers[str(i)] = q["correct_answer"] if roll < skill else rng.randrange(4)
+    return answers
+
+
+# ====================== LOCAL (IN-PROCESS) ======================
+
+def _grade_loop(exam, answers):
+    """The pre-session submit_exam grading loop."""
+    score = 0
+    for idx, q in enumerate(exam["questions"]):
+        key = str(idx)
+        if key in answers:
+            if answers[key] == q["correct_answer"]:
+                score += q["marks"]
+            elif exam.get("negative_marking"):
+                score -= exam.get("negative_marks", 0.25)
+    return max(0, score)
+
+
+async def run_local(args):
+    from services import exam_sessions
+
+    rng = random.Random(args.seed)
+    exam = build_exam(args, rng)
+    submissions = [build_answers(exam, rng) for _ in range(args.students)]
+    print(f"exam: {args.questions} questions, {exam['total_marks']} marks; students={args.students}")
+
+    # 1. Bell rings: every request wants the answer key at the same moment
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(args.db_latency)
+        return exam_sessions.AnswerKey(exam)
+
+    inflight = {}
+    t0 = time.perf_counter()
+    keys = await asyncio.gather(*(exam_sessions._single_flight(inflight, exam["id"], load)
+                                  for _ in range(args.students)))
+    print(f"answer-key loads for {args.students} concurrent requests: {loads} "
+          f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    key = keys[0]
+
+    # 2. Old path: loop grading + scan of all stored results for the rank
+    stored, old_ranks, old_lat = [], [], []
+    t0 = time.perf_counter()
+    for answers in submissions:
+        t = time.perf_counter()
+        score = _grade_loop(exam, answers)
+        stored.append(score)
+        old_ranks.append(1 + sum(1 for s in stored if s > score))
+        old_lat.append(time.perf_counter() - t)
+    old_total = time.perf_counter() - t0
+
+    # 3. Session path: answer-key array + incremental leaderboard
+    board = exam_sessions.Leaderboard(exam["id"])
+    new_ranks, new_scores, new_lat = [], [], []
+    t0 = time.perf_counter()
+    for i, answers in enumerate(submissions):
+        t = time.perf_counter()
+        graded = key.grade(answers)
+        board.add({"id": str(i), "student_id": f"S{i}", "student_name": f"Student {i}",
+                   "score": graded["score"], "percentage": graded["percentage"],
+                   "submitted_at": f"{i:06d}"})
+        new_ranks.append(board.rank_of(graded["score"]))
+        new_scores.append(graded["score"])
+        new_lat.append(time.perf_counter() - t)
+    new_total = time.perf_counter() - t0
+
+    print(f"old path (loop grade + full scan rank): {old_total * 1000:.0f} ms total")
+    _report("  per submission", old_lat)
+    print(f"session path (key array + leaderboard): {new_total * 1000:.0f} ms total")
+    _report("  per submission", new_lat)
+
+    ok = stored == new_scores and old_ranks == new_ranks
+    top = [r["score"] for r in board.leaders(10)]
+    ok = ok and top == sorted(stored, reverse=True)[:10]
+    print(f"scores, ranks and top-10 match old path: {'OK' if ok else 'MISMATCH'}")
+
+    # Whole batch at once (e.g. re-grading after an answer-key correction)
+    import numpy as np
+    matrix = np.full((len(submissions), args.questions), exam_sessions.UNANSWERED, dtype=np.int64)
+    for r, answers in enumerate(submissions):
+        for k, v in answers.items():
+            matrix[r, int(k)] = v
+    t0 = time.perf_counter()
+    batch = key.grade_batch(matrix)
+    print(f"batch re-grade of {len(submissions)} submissions: {(time.perf_counter() - t0) * 1000:.2f} ms "
+          f"({'OK' if np.allclose(batch, stored) else 'MISMATCH'})")
+
+
+# ====================== HTTP ======================
+
+async def run_http(args):
+    import httpx
+    import jwt
+
+    secret = args.jwt_secret or os.environ.get("JWT_SECRET", "schooltino-secret-key-2024")
+    rng = random.Random(args.seed)
+    api = f"{args.base_url}/api"
+    run_id = uuid.uuid4().hex[:6]
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        r = await client.post(f"{api}/auth/login", json={"email": args.email, "password": args.password})
+        r.raise_for_status()
+        teacher = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        exam = build_exam(args, rng)
+        body = {k: exam[k] for k in ("title", "subject", "duration", "total_marks", "questions",
+                                     "negative_marking", "negative_marks")}
+        body.update({"title": f"LOADTEST {run_id}", "class_id": f"LOADTEST-{run_id}", "school_id": args.school_id})
+        r = await client.post(f"{api}/exams", json=body, headers=teacher)
+        r.raise_for_status()
+        exam_id = r.json()["id"]
+        print(f"created exam {exam_id} ({args.questions} questions)")
+
+        exp = datetime.now(timezone.utc) + timedelta(hours=2)
+        students = [f"LOADTEST-{run_id}-{i:05d}" for i in range(args.students)]
+        tokens = {sid: jwt.encode({"sub": sid, "role": "student", "school_id": args.school_id, "exp": exp},
+                                  secret, algorithm="HS256") for sid in students}
+        answers = {sid: build_answers(exam, rng) for sid in students}
+        expected = {sid: _grade_loop(exam, answers[sid]) for sid in students}
+
+        sem = asyncio.Semaphore(args.concurrency)
+        latencies, status = [], {}
+        ranks = {}
+
+        async def submit(sid):
+            async with sem:
+                t = time.perf_counter()
+                r = await client.post(f"{api}/exams/{exam_id}/submit",
+                                      json={"exam_id": exam_id, "answers": answers[sid]},
+                                      headers={"Authorization": f"Bearer {tokens[sid]}"})
+                latencies.append(time.perf_counter() - t)
+                status[r.status_code] = status.get(r.status_code, 0) + 1
+                if r.status_code == 200:
+                    data = r.json()
+                    ranks[sid] = data["rank"]
+                    if abs(data["score"] - expected[sid]) > 1e-9:
+                        print(f"  {sid}: score {data['score']} != {expected[sid]}")
+                return r.status_code
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(submit(sid) for sid in students))
+        elapsed = time.perf_counter() - t0
+        print(f"{args.students} submissions in {elapsed:.2f}s ({args.students / elapsed:,.0f}/s), status={status}")
+        _report("submit", latencies)
+
+        # Double submit must be rejected by the unique index
+        sample = rng.sample(students, min(args.resubmit, len(students)))
+        codes = await asyncio.gather(*(submit(sid) for sid in sample))
+        print(f"re-submits rejected: {sum(c == 400 for c in codes)}/{len(sample)}")
+
+        r = await client.get(f"{api}/exams/{exam_id}/leaderboard", params={"limit": 10}, headers=teacher)
+        board = [row["score"] for row in r.json()]
+        top_ok = board == sorted(expected.values(), reverse=True)[:10]
+        print(f"leaderboard top-10 matches expected scores: {'OK' if top_ok else 'MISMATCH'}")
+
+        r = await client.get(f"{api}/exams/{exam_id}/results", headers=teacher)
+        stats = r.json()["stats"]
+        print(f"results endpoint: {stats['total_submissions']} submissions "
+              f"({'OK' if stats['total_submissions'] == args.students else 'MISMATCH'})")
+
+        # A rank handed out mid-burst only counts earlier submissions, so it can
+        # never be worse than the student's final rank
+        scores = sorted(expected.values(), reverse=True)
+        final = {sid: 1 + sum(1 for s in scores if s > expected[sid]) for sid in ranks}
+        bad = sum(1 for sid in ranks if ranks[sid] > final[sid])
+        print(f"submit ranks consistent with final standings: {'OK' if not bad else f'{bad} problems'}")
+
+        await client.put(f"{api}/exams/{exam_id}/status", params={"status": "completed"}, headers=teacher)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Online exam submission load test")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    for name in ("local", "http"):
+        p = sub.add_parser(name)
+        p.add_argument("--students", type=int, default=2000)
+        p.add_argument("--questions", type=int, default=50)
+        p.add_argument("--seed", type=int, default=7)
+
+    sub.choices["local"].add_argument("--db-latency", type=float, default=0.005,
+                                      help="simulated exams.find_one latency (s)")
+    sub.choices["http"].add_argument("--base-url", default="http://localhost:8001")
+    sub.choices["http"].add_argument("--school-id", required=True)
+    sub.choices["http"].add_argument("--email", default="director@test.com")
+    sub.choices["http"].add_argument("--password", default="test1234")
+    sub.choices["http"].add_argument("--jwt-secret", help="defaults to $JWT_SECRET")
+    sub.choices["http"].add_argument("--concurrency", type=int, default=200)
+    sub.choices["http"].add_argument("--resubmit", type=int, default=50, help="students that submit twice")
+
+    args = parser.parse_args()
+    asyncio.run(run_local(args) if args.mode == "local" else run_http(args))
+
+
+if __name__ == "__main__":
+    main()
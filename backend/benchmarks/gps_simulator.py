@@ -0,0 +1,211 @@
+"""
+GPS Simulator / Load Test for transport live tracking
+
+Simulates N buses driving closed loops around a city centre and feeds their
+pings into the ingestion path.
+
+Modes:
+  local  - drives services.gps_tracking in-process (no HTTP, no Mongo writes).
+           Measures how many pings/sec one worker can apply + fan out.
+  http   - POSTs batches to /api/transport/gps/ingest on a running backend.
+           Registers SIM-xxxx vehicles for the school if there are not enough.
+
+Usage:
+  python benchmarks/gps_simulator.py local --buses 5000 --subscribers 2000 --seconds 10
+  python benchmarks/gps_simulator.py http --base-url http://localhost:8001 \\
+      --school-id SCH-TEST-2026 --buses 1000 --interval 5 --seconds 60
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+CENTER = (26.8467, 80.9462)  # Lucknow
+
+
+class SimBus:
+    """A bus driving a random closed loop of waypoints."""
+
+    def __init__(self, vehicle_id: str, rng: random.Random):
+        self.vehicle_id = vehicle_id
+        lat0 = CENTER[0] + rng.uniform(-0.1, 0.1)
+        lng0 = CENTER[1] + rng.uniform(-0.1, 0.1)
+        self.waypoints = [
+            (lat0 + rng.uniform(-0.03, 0.03), lng0 + rng.uniform(-0.03, 0.03))
+            for _ in range(rng.randint(6, 14))
+        ]
+        self.leg = 0
+        self.progress = 0.0
+        self.speed_kmh = rng.uniform(20, 45)
+        self.rng = rng
+
+    def step(self, dt: float):
+        """Advance dt seconds along the loop; returns (lat, lng, speed, heading)."""
+        (a_lat, a_lng) = self.waypoints[self.leg]
+        (b_lat, b_lng) = self.waypoints[(self.leg + 1) % len(self.waypoints)]
+        leg_m = max(1.0, math.hypot((b_lat - a_lat) * 111_000, (b_lng - a_lng) * 100_000))
+        # Occasional stop at a bus stop
+        speed = 0.0 if self.rng.random() < 0.05 else self.speed_kmh
+        self.progress += (speed / 3.6) * dt / leg_m
+        while self.progress >= 1.0:
+            self.progress -= 1.0
+            self.leg = (self.leg + 1) % len(self.waypoints)
+        (a_lat, a_lng) = self.waypoints[self.leg]
+        (b_lat, b_lng) = self.waypoints[(self.leg + 1) % len(self.waypoints)]
+        lat = a_lat + (b_lat - a_lat) * self.progress
+        lng = a_lng + (b_lng - a_lng) * self.progress
+        heading = (math.degrees(math.atan2(b_lng - a_lng, b_lat - a_lat)) + 360) % 360
+        return lat, lng, speed, round(heading)
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# ====================== LOCAL (IN-PROCESS) ======================
+
+async def run_local(args):
+    from core.event_bus import bus
+    from services import gps_tracking
+
+    rng = random.Random(args.seed)
+    school_id = "SIM-SCHOOL"
+    buses = [SimBus(f"SIM-{i:05d}", rng) for i in range(args.buses)]
+
+    # Parents/admins listening: spread subscribers across buses + one admin stream
+    subs = [bus.subscribe(gps_tracking.vehicle_topic(buses[i % len(buses)].vehicle_id))
+            for i in range(args.subscribers)]
+    subs.append(bus.subscribe(gps_tracking.school_transport_topic(school_id)))
+
+    sim_clock = time.time()
+    pings = persisted = 0
+    batch_times = []
+    deadline = time.perf_counter() + args.seconds
+
+    while time.perf_counter() < deadline:
+        sim_clock += args.interval
+        batch = []
+        for b in buses:
+            lat, lng, speed, heading = b.step(args.interval)
+            batch.append(({"vehicle_id": b.vehicle_id, "school_id": school_id},
+                          {"lat": lat, "lng": lng, "speed": speed, "heading": heading, "ts": sim_clock}))
+        t0 = time.perf_counter()
+        accepted, to_persist = gps_tracking.apply_pings(batch)
+        batch_times.append(time.perf_counter() - t0)
+        pings += len(accepted)
+        persisted += len(to_persist)
+        # Drain queues like connected clients would
+        for s in subs:
+            while not s.queue.empty():
+                s.queue.get_nowait()
+        await asyncio.sleep(0)
+
+    busy = sum(batch_times)
+    print(f"buses={args.buses} subscribers={args.subscribers} ticks={len(batch_times)}")
+    print(f"pings applied:      {pings}")
+    print(f"pings/sec (busy):   {pings / busy:,.0f}" if busy else "pings/sec: n/a")
+    print(f"tick p50/p95/p99:   {_percentile(batch_times, 50) * 1000:.1f} / "
+          f"{_percentile(batch_times, 95) * 1000:.1f} / {_percentile(batch_times, 99) * 1000:.1f} ms")
+    print(f"downsampled writes: {persisted} ({persisted / max(pings, 1):.1%} of pings)")
+    print(f"dropped (slow subs): {sum(s.dropped for s in subs)}")
+    for s in subs:
+        s.close()
+
+
+# ====================== HTTP ======================
+
+async def _ensure_vehicles(client, base_url, school_id, count):
+    resp = await client.get(f"{base_url}/api/transport/vehicles", params={"school_id": school_id})
+    resp.raise_for_status()
+    ids = [v["id"] for v in resp.json().get("vehicles", []) if v.get("vehicle_number", "").startswith("SIM-")]
+    for i in range(len(ids), count):
+        resp = await client.post(
+            f"{base_url}/api/transport/vehicles",
+            params={"school_id": school_id},
+            json={"vehicle_number": f"SIM-{i:05d}", "capacity": 40,
+                  "driver_name": "Simulator", "driver_phone": "0000000000"}
+        )
+        resp.raise_for_status()
+        ids.append(resp.json()["vehicle"]["id"])
+    return ids[:count]
+
+
+async def run_http(args):
+    import httpx
+
+    rng = random.Random(args.seed)
+    async with httpx.AsyncClient(timeout=30) as client:
+        vehicle_ids = await _ensure_vehicles(client, args.base_url, args.school_id, args.buses)
+        buses = [SimBus(vid, rng) for vid in vehicle_ids]
+        url = f"{args.base_url}/api/transport/gps/ingest"
+        latencies, sent, errors = [], 0, 0
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def post(batch):
+            nonlocal sent, errors
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post(url, json={"pings": batch})
+                    r.raise_for_status()
+                    sent += len(batch)
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.seconds:
+            tick = time.perf_counter()
+            now = datetime.now(timezone.utc).isoformat()
+            pings = []
+            for b in buses:
+                lat, lng, speed, heading = b.step(args.interval)
+                pings.append({"vehicle_id": b.vehicle_id, "lat": lat, "lng": lng,
+                              "speed": speed, "heading": heading, "ts": now})
+            await asyncio.gather(*[post(pings[i:i + args.batch_size])
+                                   for i in range(0, len(pings), args.batch_size)])
+            await asyncio.sleep(max(0.0, args.interval - (time.perf_counter() - tick)))
+
+        elapsed = time.perf_counter() - start
+        print(f"buses={len(buses)} batch_size={args.batch_size} elapsed={elapsed:.1f}s")
+        print(f"pings sent: {sent}  ({sent / elapsed:,.0f}/s)  request errors: {errors}")
+        if latencies:
+            print(f"request p50/p95/p99: {_percentile(latencies, 50) * 1000:.1f} / "
+                  f"{_percentile(latencies, 95) * 1000:.1f} / {_percentile(latencies, 99) * 1000:.1f} ms "
+                  f"(mean {statistics.mean(latencies) * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPS ingestion simulator / load test")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    for name in ("local", "http"):
+        p = sub.add_parser(name)
+        p.add_argument("--buses", type=int, default=1000)
+        p.add_argument("--interval", type=float, default=5.0, help="seconds between pings per bus")
+        p.add_argument("--seconds", type=float, default=10.0, help="test duration")
+        p.add_argument("--seed", type=int, default=42)
+
+    sub.choices["local"].add_argument("--subscribers", type=int, default=1000)
+    sub.choices["http"].add_argument("--base-url", default="http://localhost:8001")
+    sub.choices["http"].add_argument("--school-id", required=True)
+    sub.choices["http"].add_argument("--batch-size", type=int, default=200)
+    sub.choices["http"].add_argument("--concurrency", type=int, default=8)
+
+    args = parser.parse_args()
+    asyncio.run(run_local(args) if args.mode == "local" else run_http(args))
+
+
+if __name__ == "__main__":
+    main()
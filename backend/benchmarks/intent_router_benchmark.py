@@ -0,0 +1,93 @@
+"""
+Intent Router Micro-benchmark
+
+Classifies a set of typical Tino utterances (commands, typos, open
+questions) with the Tino Brain and voice-assistant routers and reports
+per-call latency plus how each utterance would be handled:
+
+  direct   - answered by its action, no LLM call
+  action   - LLM reply, then the keyword action (the pre-router behaviour)
+  llm      - LLM only
+
+Pure in-process; no server or Mongo.
+
+Usage:
+  python benchmarks/intent_router_benchmark.py
+  python benchmarks/intent_router_benchmark.py --rounds 5000 --verbose
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "schooltino")
+
+from services import intent_router  # noqa: E402
+from routes import tino_brain  # noqa: E402
+
+UTTERANCES = [
+    "aaj ki attendance", "attendence dikhao", "kitne present hain aaj", "kaun absent hai",
+    "fee pending kitne", "pendng fees", "fees pending kitni hai", "school ka status batao",
+    "koi alert hai kya", "class 10 ki condition batao", "weak students kaun hai class 8 mein",
+    "syllabus kitna hua", "sabse achhi class kaunsi hai", "kitne students hain",
+    "notice bhejo", "fee reminder bhejo", "sab bacchon ki attendance laga do",
+    "notice bhejo ki kal school band rahega", "alert banao gate khula hai",
+    "Hello Tino kaise ho", "exam ki taiyari ke liye tips do",
+    "Is there any problem with fee collection this term? Explain why and suggest fixes",
+    "Class 9 ke results pichhle saal se kaise compare karte hain?",
+    "आज कितने बच्चे अनुपस्थित हैं", "parents meeting ka agenda likh do",
+]
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _outcome(route):
+    if route is None:
+        return "llm"
+    if route.intent in tino_brain.BRAIN_DIRECT_INTENTS and route.confidence >= intent_router.DIRECT_CONFIDENCE:
+        return "direct"
+    return "action" if route.source == "keyword" else "llm"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--verbose", action="store_true", help="print the route of every utterance")
+    args = parser.parse_args()
+
+    router = tino_brain.brain_router
+    outcomes = {"direct": 0, "action": 0, "llm": 0}
+    for text in UTTERANCES:
+        route = router.classify(text)
+        outcome = _outcome(route)
+        outcomes[outcome] += 1
+        if args.verbose:
+            label = f"{route.intent} {route.confidence:.2f} ({route.source})" if route else "-"
+            print(f"  {outcome:7s} {text[:50]:50s} {label}")
+
+    latencies = []
+    for i in range(args.rounds):
+        text = UTTERANCES[i % len(UTTERANCES)]
+        started = time.perf_counter()
+        router.classify(text)
+        latencies.append(time.perf_counter() - started)
+
+    print(f"{len(UTTERANCES)} utterances: " + ", ".join(f"{k} {v}" for k, v in outcomes.items()))
+    print(f"classify() p50/p95/p99: {_percentile(latencies, 50) * 1e6:.1f} / {_percentile(latencies, 95) * 1e6:.1f} / "
+          f"{_percentile(latencies, 99) * 1e6:.1f} µs (mean {statistics.mean(latencies) * 1e6:.1f} µs)")
+
+    started = time.perf_counter()
+    intent_router.IntentRouter(tino_brain.BRAIN_INTENTS, writes=tino_brain.BRAIN_WRITE_INTENTS)
+    print(f"router build: {(time.perf_counter() - started) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""
+Schooltino Load Suite
+
+Scripted school-day workloads against a running backend whose database was
+seeded by benchmarks/seed_schools.py:
+
+  attendance  - morning rush: every class teacher marks the whole section
+                (POST /attendance/bulk) and re-reads it (GET /attendance)
+  fees        - fee collection day: accountants record payments against a
+                share of the month's invoices while parents check
+                /fee-payment/status
+  exam        - exam burst: a teacher per school publishes an online exam,
+                the students submit at once, the teacher opens the leaderboard
+  dashboard   - directors and principals poll /dashboard/stats for --duration
+
+Per endpoint the report has p50/p95/p99/mean latency, error count, and
+Mongo commands per request, taken from the /metrics counters (user-facing
+route templates) before and after each workload; against a build without
+/metrics that column is empty.
+
+Tokens are minted with the server's JWT_SECRET, so no logins are timed. The
+request mix is drawn from --seed, and every run is written to
+benchmarks/results/<time>-<commit>-<schools>s.json; `compare` diffs two of
+them, so the same seed + scale can be measured before and after a change.
+
+Usage:
+  python benchmarks/seed_schools.py --schools 10 --drop
+  JWT_SECRET=... python benchmarks/load_suite.py run --base-url http://localhost:8001
+  python benchmarks/load_suite.py run --workloads attendance,dashboard --concurrency 50
+  python benchmarks/load_suite.py compare benchmarks/results/A.json benchmarks/results/B.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+SUITE_VERSION = 1
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+WORKLOADS = ("attendance", "fees", "exam", "dashboard")
+
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{(.*)\} ([0-9.eE+\-]+|\+Inf|NaN)$')
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10,
+                              cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+# ====================== SEEDED REFERENCES ======================
+
+def load_refs(mongo_url, db_name):
+    """Ids the workloads need, read back from the seeded database."""
+    from pymongo import MongoClient
+
+    db = MongoClient(mongo_url)[db_name]
+    meta = db.bench_meta.find_one({"_id": "seed"})
+    if not meta:
+        sys.exit(f"{db_name} has no bench_meta - run benchmarks/seed_schools.py first")
+
+    schools = {s["id"]: {"id": s["id"], "users": {}, "classes": [], "students": {}, "invoices": []}
+               for s in db.schools.find({}, {"_id": 0, "id": 1})}
+    for u in db.users.find({"school_id": {"$in": list(schools)}}, {"_id": 0, "id": 1, "email": 1, "role": 1, "school_id": 1}):
+        schools[u["school_id"]]["users"].setdefault(u["role"], []).append(u)
+    for c in db.classes.find({}, {"_id": 0, "id": 1, "school_id": 1, "class_teacher_id": 1}):
+        schools[c["school_id"]]["classes"].append(c)
+    for s in db.students.find({}, {"_id": 0, "id": 1, "school_id": 1, "class_id": 1}):
+        schools[s["school_id"]]["students"].setdefault(s["class_id"], []).append(s["id"])
+    for inv in db.fee_invoices.find({"status": "pending"}, {"_id": 0, "id": 1, "school_id": 1, "student_id": 1,
+                                                            "final_amount": 1}):
+        schools[inv["school_id"]]["invoices"].append(inv)
+
+    ordered = sorted(schools.values(), key=lambda s: s["id"])
+    for school in ordered:
+        school["classes"].sort(key=lambda c: c["id"])
+        school["invoices"].sort(key=lambda i: i["id"])
+        for ids in school["students"].values():
+            ids.sort()
+    meta.pop("_id", None)
+    return meta, ordered
+
+
+# ====================== METRICS SCRAPE ======================
+
+def parse_metrics(text):
+    samples = {}
+    for line in text.splitlines():
+        m = _SAMPLE_RE.match(line)
+        if m:
+            labels = tuple(sorted(_LABEL_RE.findall(m.group(2))))
+            samples[(m.group(1), labels)] = float(m.group(3))
+    return samples
+
+
+def queries_per_route(before, after):
+    """{"METHOD route": mongo commands per request} from two /metrics scrapes."""
+    def delta(name, key_fn):
+        out = {}
+        for (metric, labels), value in after.items():
+            if metric != name:
+                continue
+            diff = value - before.get((metric, labels), 0.0)
+            if diff > 0:
+                key = key_fn(dict(labels))
+                out[key] = out.get(key, 0.0) + diff
+        return out
+
+    requests = delta("http_requests_total", lambda l: (l["method"], l["route"]))
+    commands = delta("mongo_commands_total", lambda l: l["route"])
+    # mongo_commands_total has no method label, so a route's commands are
+    # averaged over all of its requests (the suite uses one method per route)
+    route_requests = {}
+    for (method, route), n in requests.items():
+        route_requests[route] = route_requests.get(route, 0.0) + n
+    return {f"{method} {route}": round(commands.get(route, 0.0) / route_requests[route], 2)
+            for method, route in requests}
+
+
+# ====================== RUNNER ======================
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.status = {}
+
+    def add(self, endpoint, seconds, status):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        codes = self.status.setdefault(endpoint, {})
+        codes[status] = codes.get(status, 0) + 1
+
+    def summary(self, elapsed, queries):
+        out = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            codes = self.status[endpoint]
+            out[endpoint] = {
+                "requests": len(values),
+                "errors": sum(n for code, n in codes.items() if code >= 400),
+                "status": {str(k): v for k, v in sorted(codes.items())},
+                "p50_ms": round(_percentile(values, 50) * 1000, 2),
+                "p95_ms": round(_percentile(values, 95) * 1000, 2),
+                "p99_ms": round(_percentile(values, 99) * 1000, 2),
+                "mean_ms": round(statistics.mean(values) * 1000, 2),
+                "rps": round(len(values) / elapsed, 1) if elapsed else None,
+                "mongo_per_request": queries.get(endpoint),
+            }
+        return out
+
+
+class Context:
+    def __init__(self, args, client, meta, schools):
+        import jwt
+
+        self.args = args
+        self.client = client
+        self.meta = meta
+        self.schools = schools
+        self.api = f"{args.base_url}/api"
+        self.rng = random.Random(args.seed)
+        self.sem = asyncio.Semaphore(args.concurrency)
+        # The server's dashboard counts "today" in UTC, whatever base date the seed used
+        self.today = datetime.now(timezone.utc).date().isoformat()
+        self.rec = Recorder()
+        self._jwt = jwt
+        self._secret = args.jwt_secret or os.environ.get("JWT_SECRET", "schooltino-secret-key-2024")
+        self._exp = datetime.now(timezone.utc) + timedelta(hours=6)
+
+    def user_headers(self, user):
+        token = self._jwt.encode({"sub": user["id"], "email": user["email"], "role": user["role"], "exp": self._exp},
+                                 self._secret, algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+
+    def student_headers(self, student_id, school_id):
+        token = self._jwt.encode({"sub": student_id, "role": "student", "school_id": school_id, "exp": self._exp},
+                                 self._secret, algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+
+    async def call(self, method, route, path, **kwargs):
+        """route is the server's route template - it keys the report and the /metrics join."""
+        async with self.sem:
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, f"{self.api}{path}", **kwargs)
+                status = response.status_code
+            except Exception:
+                response, status = None, 599
+            self.rec.add(f"{method} /api{route}", time.perf_counter() - started, status)
+        return response
+
+
+async def attendance_rush(ctx):
+    teachers = {}
+    for school in ctx.schools:
+        for u in school["users"].get("teacher", []):
+            teachers[u["id"]] = u
+
+    async def mark(school, cls):
+        teacher = teachers.get(cls["class_teacher_id"])
+        if not teacher:
+            return
+        headers = ctx.user_headers(teacher)
+        rows = [{"student_id": sid, "status": "present" if ctx.rng.random() < 0.9 else "absent"}
+                for sid in school["students"].get(cls["id"], [])]
+        await ctx.call("POST", "/attendance/bulk", "/attendance/bulk", headers=headers, json={
+            "class_id": cls["id"], "school_id": school["id"], "date": ctx.today, "attendance": rows
+        })
+        await ctx.call("GET", "/attendance", "/attendance", headers=headers,
+                       params={"class_id": cls["id"], "date": ctx.today})
+
+    await asyncio.gather(*(mark(s, c) for s in ctx.schools for c in s["classes"]))
+
+
+async def fee_day(ctx):
+    async def collect(school, invoice, accountant):
+        await ctx.call("POST", "/fees/payments", "/fees/payments", headers=ctx.user_headers(accountant), json={
+            "invoice_id": invoice["id"], "amount": invoice["final_amount"], "payment_mode": "cash",
+            "remarks": "load suite"
+        })
+        await ctx.call("GET", "/fee-payment/status/{student_id}", f"/fee-payment/status/{invoice['student_id']}")
+
+    jobs = []
+    for school in ctx.schools:
+        accountant = (school["users"].get("accountant") or [None])[0]
+        if not accountant or not school["invoices"]:
+            continue
+        k = max(1, int(len(school["invoices"]) * ctx.args.fee_share))
+        for invoice in ctx.rng.sample(school["invoices"], k):
+            jobs.append(collect(school, invoice, accountant))
+    await asyncio.gather(*jobs)
+
+
+async def exam_burst(ctx):
+    run_id = datetime.now(timezone.utc).strftime("%H%M%S")
+
+    async def school_exam(school):
+        teacher = (school["users"].get("teacher") or [None])[0]
+        if not teacher or not school["classes"]:
+            return
+        headers = ctx.user_headers(teacher)
+        rng = random.Random(f"{ctx.args.seed}:{school['id']}")
+        questions = [{"question": f"Q{i + 1}", "options": ["A", "B", "C", "D"],
+                      "correct_answer": rng.randrange(4), "marks": 1} for i in range(ctx.args.questions)]
+        r = await ctx.call("POST", "/exams", "/exams", headers=headers, json={
+            "title": f"LOADSUITE {run_id}", "subject": "Mathematics", "class_id": school["classes"][0]["id"],
+            "school_id": school["id"], "duration": 30, "total_marks": len(questions), "questions": questions
+        })
+        if r is None or r.status_code != 200:
+            return
+        exam_id = r.json()["id"]
+        students = [sid for ids in school["students"].values() for sid in ids][:ctx.args.exam_students]
+        await asyncio.gather(*(
+            ctx.call("POST", "/exams/{exam_id}/submit", f"/exams/{exam_id}/submit",
+                     headers=ctx.student_headers(sid, school["id"]),
+                     json={"exam_id": exam_id,
+                           "answers": {str(q): rng.randrange(4) for q in range(len(questions)) if rng.random() < 0.95}})
+            for sid in students
+        ))
+        await ctx.call("GET", "/exams/{exam_id}/leaderboard", f"/exams/{exam_id}/leaderboard", headers=headers)
+        await ctx.client.put(f"{ctx.api}/exams/{exam_id}/status", params={"status": "completed"}, headers=headers)
+
+    await asyncio.gather(*(school_exam(s) for s in ctx.schools))
+
+
+async def dashboard_polling(ctx):
+    deadline = time.perf_counter() + ctx.args.duration
+
+    async def poll(school, user, offset):
+        headers = ctx.user_headers(user)
+        await asyncio.sleep(offset)
+        while time.perf_counter() < deadline:
+            await ctx.call("GET", "/dashboard/stats", "/dashboard/stats", headers=headers,
+                           params={"school_id": school["id"]})
+            await asyncio.sleep(ctx.args.poll_interval)
+
+    pollers = []
+    for school in ctx.schools:
+        for role in ("director", "principal"):
+            for user in school["users"].get(role, []):
+                pollers.append(poll(school, user, ctx.rng.random() * ctx.args.poll_interval))
+    await asyncio.gather(*pollers)
+
+
+RUNNERS = {"attendance": attendance_rush, "fees": fee_day, "exam": exam_burst, "dashboard": dashboard_polling}
+
+
+async def scrape(ctx):
+    headers = {"Authorization": f"Bearer {ctx.args.metrics_token}"} if ctx.args.metrics_token else {}
+    try:
+        r = await ctx.client.get(f"{ctx.args.base_url}/metrics", headers=headers)
+        return parse_metrics(r.text) if r.status_code == 200 else None
+    except Exception:
+        return None
+
+
+async def run(args):
+    import httpx
+
+    meta, schools = load_refs(args.mongo_url, args.db)
+    selected = [w.strip() for w in args.workloads.split(",") if w.strip()]
+    unknown = set(selected) - set(WORKLOADS)
+    if unknown:
+        sys.exit(f"unknown workloads: {', '.join(sorted(unknown))} (choose from {', '.join(WORKLOADS)})")
+    print(f"{len(schools)} schools x {meta['students_per_school']} students (seed {meta['seed']}), "
+          f"workloads: {', '.join(selected)}")
+
+    report = {
+        "suite_version": SUITE_VERSION,
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "seed_meta": {k: meta[k] for k in ("schools", "students_per_school", "seed", "generator_version")},
+        "params": {k: getattr(args, k) for k in ("seed", "concurrency", "fee_share", "questions", "exam_students",
+                                                  "duration", "poll_interval")},
+        "workloads": {},
+    }
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        for name in selected:
+            ctx = Context(args, client, meta, schools)
+            before = await scrape(ctx)
+            started = time.perf_counter()
+            await RUNNERS[name](ctx)
+            elapsed = time.perf_counter() - started
+            after = await scrape(ctx)
+            queries = queries_per_route(before, after) if before is not None and after is not None else {}
+            report["workloads"][name] = {"elapsed_s": round(elapsed, 2),
+                                         "endpoints": ctx.rec.summary(elapsed, queries)}
+            print_workload(name, report["workloads"][name])
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = out_dir / f"{stamp}-{(report['commit'] or 'nogit')[:8]}-{meta['schools']}s.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"\nresults: {path}")
+
+
+def print_workload(name, result):
+    print(f"\n{name} ({result['elapsed_s']}s)")
+    print(f"  {'endpoint':<44} {'n':>7} {'err':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6}")
+    for endpoint, s in result["endpoints"].items():
+        qpr = "-" if s["mongo_per_request"] is None else f"{s['mongo_per_request']:.1f}"
+        print(f"  {endpoint:<44} {s['requests']:>7} {s['errors']:>5} {s['p50_ms']:>8.1f} "
+              f"{s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {qpr:>6}")
+
+
+# ====================== COMPARE ======================
+
+def _change(old, new):
+    if old is None or new is None:
+        return "-"
+    if not old:
+        return f"{new}"
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def compare(args):
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    print(f"base {base['commit'][:8]}{' (dirty)' if base['dirty'] else ''}  →  "
+          f"new {new['commit'][:8]}{' (dirty)' if new['dirty'] else ''}")
+    if base["seed_meta"] != new["seed_meta"] or base["params"] != new["params"]:
+        print("WARNING: different seed/scale/params - numbers are not directly comparable")
+        print(f"  base {base['seed_meta']} {base['params']}\n  new  {new['seed_meta']} {new['params']}")
+
+    for name, result in new["workloads"].items():
+        old = base["workloads"].get(name)
+        if not old:
+            continue
+        print(f"\n{name}: {old['elapsed_s']}s → {result['elapsed_s']}s")
+        print(f"  {'endpoint':<44} {'p50':>14} {'p95':>14} {'p99':>14} {'q/req':>12}")
+        for endpoint, s in result["endpoints"].items():
+            o = old["endpoints"].get(endpoint)
+            if not o:
+                continue
+            cols = [f"{o[k]:.0f}→{s[k]:.0f} {_change(o[k], s[k])}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+            qpr = (f"{o['mongo_per_request']}→{s['mongo_per_request']}"
+                   if o["mongo_per_request"] is not None and s["mongo_per_request"] is not None else "-")
+            print(f"  {endpoint:<44} {cols[0]:>14} {cols[1]:>14} {cols[2]:>14} {qpr:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripted school-day load suite")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    p = sub.add_parser("run")
+    p.add_argument("--base-url", default="http://localhost:8001")
+    p.add_argument("--mongo-url", default="mongodb://localhost:27017", help="seeded database (read-only here)")
+    p.add_argument("--db", default="bench_schooltino")
+    p.add_argument("--workloads", default=",".join(WORKLOADS))
+    p.add_argument("--jwt-secret", help="defaults to $JWT_SECRET")
+    p.add_argument("--metrics-token", default=os.environ.get("METRICS_TOKEN", ""))
+    p.add_argument("--seed", type=int, default=11)
+    p.add_argument("--concurrency", type=int, default=100)
+    p.add_argument("--fee-share", type=float, default=0.25, help="share of invoices paid on fee day")
+    p.add_argument("--questions", type=int, default=30)
+    p.add_argument("--exam-students", type=int, default=2000, help="submitting students per school")
+    p.add_argument("--duration", type=float, default=60, help="dashboard polling seconds")
+    p.add_argument("--poll-interval", type=float, default=5)
+    p.add_argument("--out", default=str(RESULTS_DIR))
+
+    c = sub.add_parser("compare")
+    c.add_argument("base")
+    c.add_argument("new")
+
+    args = parser.parse_args()
+    if args.mode == "run":
+        asyncio.run(run(args))
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
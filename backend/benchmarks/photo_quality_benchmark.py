@@ -0,0 +1,112 @@
+"""
+Enrollment Photo Quality Benchmark
+
+Runs services/photo_quality.analyze_photo over a set of enrollment photos
+and reports latency per photo, the spread of quality scores and how many
+photos would still go to the vision API as ambiguous (before: all of them).
+
+Photos are either real ones (--photos DIR of JPEGs; the photo type is taken
+from the file name when it contains passport / front / left / right /
+full_body, else "front") or synthetic variants of one portrait (--portrait
+FILE): sharp, blurred, dark, overexposed, small and off-centre.
+
+  --workers N also analyzes the set on N processes, as enroll-multiple
+              does on the CPU pool, and reports photos per second
+
+Usage:
+  python benchmarks/photo_quality_benchmark.py --portrait face.jpg
+  python benchmarks/photo_quality_benchmark.py --photos ./enrollment --workers 4
+  CCTV_FACE_MODEL=face_detection_yunet_2023mar.onnx python benchmarks/photo_quality_benchmark.py --photos ./enrollment
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import photo_quality  # noqa: E402
+
+PHOTO_TYPES = ("passport", "front", "left", "right", "full_body")
+
+
+def jpeg(image) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def synthetic_photos(portrait: str):
+    """(name, photo_type, jpeg) variants of one portrait."""
+    from PIL import Image, ImageEnhance, ImageFilter
+    face = Image.open(portrait).convert("RGB")
+    small = Image.new("RGB", (face.width * 2, face.height * 2), (110, 110, 110))
+    small.paste(face.resize((face.width // 2, face.height // 2)), (face.width * 3 // 2 - 20, 20))
+    variants = {
+        "sharp": face,
+        "blurred": face.filter(ImageFilter.GaussianBlur(3)),
+        "dark": ImageEnhance.Brightness(face).enhance(0.25),
+        "overexposed": ImageEnhance.Brightness(face).enhance(2.2),
+        "small_off_centre": small,
+    }
+    return [(name, kind, jpeg(image)) for name, image in variants.items() for kind in ("passport", "left")]
+
+
+def load_photos(directory: str):
+    photos = []
+    for path in sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in (".jpg", ".jpeg")):
+        kind = next((t for t in PHOTO_TYPES if t in path.stem.lower()), "front")
+        photos.append((path.name, kind, path.read_bytes()))
+    return photos
+
+
+def analyze(item):
+    name, kind, data = item
+    started = time.perf_counter()
+    result = photo_quality.analyze_photo(data, kind)
+    return name, kind, result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", help="directory of JPEG enrollment photos")
+    parser.add_argument("--portrait", help="one portrait JPEG/PNG to derive synthetic variants from")
+    parser.add_argument("--workers", type=int, default=0, help="also analyze on this many processes")
+    args = parser.parse_args()
+
+    if args.photos:
+        photos = load_photos(args.photos)
+    elif args.portrait:
+        photos = synthetic_photos(args.portrait)
+    else:
+        sys.exit("Pass --photos DIR or --portrait FILE")
+    if not photos:
+        sys.exit("No photos")
+    print(f"{len(photos)} photos; face detector: {photo_quality.detector_kind() or 'none (sharpness and exposure only)'}")
+
+    analyze(photos[0])   # warm up the decoder / cascades
+    results = [analyze(item) for item in photos]
+    for name, kind, result, seconds in results:
+        print(f"  {name[:28]:28s} {kind:9s} score {result.get('quality_score', '-'):>3}   "
+              f"{'ambiguous' if result['ambiguous'] else 'decided  '}   {seconds * 1000:6.1f} ms   "
+              f"{', '.join(result.get('issues', []))}")
+    timings = [r[3] for r in results]
+    to_vision = sum(1 for r in results if r[2]["ambiguous"])
+    print(f"mean {statistics.mean(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms per photo; "
+          f"{to_vision} of {len(photos)} photos go on to the vision API (before: {len(photos)})")
+
+    if args.workers:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(analyze, photos[:args.workers]))   # spawn + warm up
+            started = time.perf_counter()
+            list(pool.map(analyze, photos))
+            elapsed = time.perf_counter() - started
+        print(f"{args.workers} processes: {len(photos) / elapsed:.1f} photos/s")
+
+
+if __name__ == "__main__":
+    main()
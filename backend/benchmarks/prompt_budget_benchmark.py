@@ -0,0 +1,248 @@
+"""
+Tino Prompt Budget Benchmark
+
+Replays recorded Tino Brain conversations offline and, for every user turn,
+builds the prompt two ways:
+
+  legacy    - the pre-budget prompt: every school status field plus the
+              last 5 turns verbatim
+  budgeted  - routes.tino_brain.build_brain_prompt: intent-scoped status,
+              rolling summary + recent turns, fitted to PROMPT_TOKEN_BUDGET
+              (the summary is folded extractively here, as when no cheap
+              model is configured)
+
+and reports prompt tokens (mean / p95 / max) per provider. With --answer it
+also sends both prompts to the configured AI provider for the first N turns
+and scores each reply against the recorded one (token F1), so a smaller
+prompt can be checked for lost answers.
+
+Conversations come from a JSONL file (one conversation per line:
+{"context": {...school status...}, "turns": [{"role": "user"|"assistant",
+"content": "..."}]}), from tino_conversations in Mongo, or from a small
+built-in sample.
+
+Usage:
+  python benchmarks/prompt_budget_benchmark.py
+  python benchmarks/prompt_budget_benchmark.py --file recorded.jsonl --budget 1200
+  python benchmarks/prompt_budget_benchmark.py --mongo-url mongodb://localhost:27017 --db schooltino \\
+      --answer 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "schooltino")
+
+from services import prompt_context  # noqa: E402
+from routes import tino_brain  # noqa: E402
+
+PROVIDERS = ["openai", "groq", "gemini", "sarvam"]
+
+SAMPLE_CONTEXT = {
+    "school_name": "Sunrise Public School", "total_students": 842, "total_staff": 46, "total_classes": 24,
+    "today_attendance": {"present": 771, "absent": 71, "total": 842, "percentage": 91.6},
+    "pending_fees_count": 63, "active_alerts": 2,
+    "recent_events": [{"type": "unknown_person", "location": "Main Gate"},
+                      {"type": "crowd", "location": "Playground"},
+                      {"type": "fight_detected", "location": "Corridor B"}],
+}
+
+SAMPLE_TURNS = [
+    ("Aaj attendance kaisi rahi?", "Aaj 91.6% attendance rahi, 771 bachche present aur 71 absent hain."),
+    ("Class 8 mein kitne absent hain?",
+     "Class 8 mein aaj 9 bachche absent hain, sabse zyada 8B se. List:\n"
+     + "\n".join(f"{n}. {name} (8{sec}) - {days} din se absent, parent contact: 98xxxxxx{n:02d}"
+                 for n, (name, sec, days) in enumerate([
+                     ("Aarav Sharma", "A", 1), ("Priya Verma", "B", 3), ("Rohan Gupta", "B", 1),
+                     ("Sneha Patel", "B", 2), ("Kabir Singh", "C", 1), ("Ananya Yadav", "A", 4),
+                     ("Vivaan Jain", "B", 1), ("Isha Mishra", "C", 2), ("Arjun Tiwari", "B", 5)], 1))
+     + "\nPriya, Ananya aur Arjun lagatar 3+ din se absent hain - inke parents se baat karna zaroori hai."),
+    ("Unke parents ko message bhej do.", "Theek hai, Class 8 ke 9 absent students ke parents ko SMS bhej diya gaya hai."),
+    ("Fees kitni pending hai?",
+     "63 students ki fees pending hai, kul ₹4,12,500 baaki hai. Poori list:\n"
+     + "\n".join(f"{n}. Student {n:02d} (Class {10 - n % 10}) - ₹{5000 + n * 137:,}, due since {n % 28 + 1} Sep"
+                 for n in range(1, 64))),
+    ("Sabse zyada pending kis class mein hai?",
+     "Class 10 mein sabse zyada - 14 students ki fees pending hai. Class-wise:\n"
+     + "\n".join(f"- Class {c}: {n} students, ₹{amt:,} baaki" for c, n, amt in [
+         (10, 14, 98000), (9, 11, 71500), (8, 9, 52000), (7, 8, 41000), (6, 7, 36500),
+         (5, 5, 24000), (4, 4, 19500), (3, 3, 14000), (2, 2, 9000), (1, 0, 0)])
+     + "\nClass 10 ke 6 students ki do quarter ki fees baaki hai. Reminder bhejoon ya installment plan offer karein?"),
+    ("Class 10 ke liye reminder bhejo.", "Class 10 ke 14 students ko fee reminder bhej diya gaya hai."),
+    ("CCTV mein kuch unusual?", "Main Gate par ek unknown person dikha aur Corridor B mein fight detect hui."),
+    ("Corridor B wali ghatna ke baare mein batao.", "Corridor B mein 11:20 par do bachchon mein jhagda hua, teacher ne sambhal liya."),
+    ("Kal ka notice banao ki PTM shanivaar ko hai.", "Notice taiyar hai: 'PTM is Saturday at 10 AM'. Bhej doon?"),
+    ("Haan bhej do, aur Class 8 ke absent bachchon ka follow up kya hua?",
+     "Notice bhej diya. Class 8 ke 9 mein se 6 parents ne reply kiya hai, 3 ka jawab baaki hai."),
+    ("फीस वाले reminder का क्या हुआ?", "Class 10 के 14 में से 5 students ने आज फीस जमा कर दी है।"),
+    ("Aaj ka summary do.", "Attendance 91.6%, 63 fees pending (5 aaj jama), PTM notice bheja, Corridor B incident resolved."),
+]
+
+
+# ====================== CONVERSATIONS ======================
+
+def _sample():
+    turns = []
+    for question, answer in SAMPLE_TURNS:
+        turns.append({"role": "user", "content": question})
+        turns.append({"role": "assistant", "content": answer})
+    return [{"context": SAMPLE_CONTEXT, "turns": turns}]
+
+
+def _from_file(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _from_mongo(url, db_name, limit):
+    from pymongo import MongoClient
+    db = MongoClient(url)[db_name]
+    sessions = db.tino_conversations.aggregate([
+        {"$sort": {"timestamp": 1}},
+        {"$group": {"_id": {"school_id": "$school_id", "user_id": "$user_id"},
+                    "turns": {"$push": {"is_user": "$is_user", "message": "$message"}}}},
+        {"$match": {"turns.3": {"$exists": True}}},
+        {"$limit": limit},
+    ])
+    return [{"context": SAMPLE_CONTEXT,
+             "turns": [{"role": "user" if t.get("is_user") else "assistant", "content": t.get("message") or ""}
+                       for t in s["turns"]]}
+            for s in sessions]
+
+
+# ====================== PROMPTS ======================
+
+def legacy_prompt(query, role, context, history, language):
+    """build_brain_prompt() as it was before the budget: all status fields, last 5 turns verbatim."""
+    system = tino_brain.TINO_SYSTEM_PROMPT.format(
+        role=role, school_name=context.get("school_name", "School"),
+        language_instruction=tino_brain.LANGUAGE_INSTRUCTIONS.get(language, tino_brain.LANGUAGE_INSTRUCTIONS["hinglish"]),
+        tone_instruction=tino_brain.GENDER_TONE["female"],
+    )
+    system += "\n\nCurrent School Status:\n"
+    system += f"- Total Students: {context.get('total_students', 0)}\n"
+    system += f"- Total Staff: {context.get('total_staff', 0)}\n"
+    system += f"- Today's Attendance: {context.get('today_attendance', {}).get('percentage', 0)}%\n"
+    system += f"- Pending Fees: {context.get('pending_fees_count', 0)} students\n"
+    system += f"- Active Alerts: {context.get('active_alerts', 0)}\n"
+    if context.get("recent_events"):
+        system += "\nRecent CCTV Events:\n"
+        for event in context["recent_events"]:
+            system += f"- {event.get('type')} at {event.get('location')}\n"
+    prompt = query
+    if history:
+        history_text = "\n".join(f"{t['role']}: {t['content']}" for t in history[-5:])
+        prompt = f"Previous conversation:\n{history_text}\n\nUser: {query}"
+    return system, prompt
+
+
+def replay(conversation):
+    """(query, recorded reply, legacy prompt, budgeted prompt) for every answered user turn."""
+    context = conversation.get("context") or SAMPLE_CONTEXT
+    turns = conversation["turns"]
+    summary, folded = "", 0
+    for i, turn in enumerate(turns[:-1]):
+        if turn["role"] != "user" or turns[i + 1]["role"] != "assistant":
+            continue
+        history = turns[:i]
+        # same fold rule as refresh_summary(): once SUMMARIZE_AFTER turns sit outside the window
+        backlog = history[folded:max(len(history) - prompt_context.RECENT_TURNS, folded)]
+        if len(backlog) >= prompt_context.SUMMARIZE_AFTER:
+            summary = prompt_context._extractive_summary(summary, backlog)
+            folded += len(backlog)
+        memory = prompt_context.ConversationMemory(summary=summary, turns=history[folded:][-prompt_context.RECENT_TURNS:])
+        language = tino_brain.detect_language_from_text(turn["content"])
+        yield (turn["content"], turns[i + 1]["content"],
+               legacy_prompt(turn["content"], "director", context, history, language),
+               tino_brain.build_brain_prompt(turn["content"], "director", context, memory, language))
+
+
+# ====================== SCORING ======================
+
+def _tokens(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def token_f1(answer, reference):
+    a, r = _tokens(answer), _tokens(reference)
+    if not a or not r:
+        return 0.0
+    common = sum(min(a.count(w), r.count(w)) for w in set(a))
+    if not common:
+        return 0.0
+    precision, recall = common / len(a), common / len(r)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+
+async def _answer(samples, limit):
+    scores = {"legacy": [], "budgeted": []}
+    latency = {"legacy": [], "budgeted": []}
+    for query, reference, legacy, budgeted in samples[:limit]:
+        for label, (system, prompt) in (("legacy", legacy), ("budgeted", budgeted)):
+            started = time.perf_counter()
+            reply = await tino_brain.get_ai_response(prompt, system)
+            latency[label].append(time.perf_counter() - started)
+            scores[label].append(token_f1(reply, reference))
+    print(f"\nAnswer quality on {len(scores['legacy'])} turns (token F1 vs recorded reply):")
+    for label in ("legacy", "budgeted"):
+        print(f"  {label:9s} F1 {statistics.mean(scores[label]):.3f}   "
+              f"latency p50 {statistics.median(latency[label]):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="recorded conversations, JSONL")
+    parser.add_argument("--mongo-url", help="read tino_conversations from this Mongo instead")
+    parser.add_argument("--db", default=os.environ["DB_NAME"])
+    parser.add_argument("--sessions", type=int, default=200, help="max sessions read from Mongo")
+    parser.add_argument("--budget", type=int, help="override PROMPT_TOKEN_BUDGET")
+    parser.add_argument("--answer", type=int, default=0, metavar="N",
+                        help="also query the AI provider for the first N turns and score the replies")
+    args = parser.parse_args()
+
+    if args.budget:
+        prompt_context.PROMPT_TOKEN_BUDGET = args.budget
+    if args.file:
+        conversations = _from_file(args.file)
+    elif args.mongo_url:
+        conversations = _from_mongo(args.mongo_url, args.db, args.sessions)
+    else:
+        conversations = _sample()
+
+    samples = [s for c in conversations for s in replay(c)]
+    if not samples:
+        print("no answered user turns found")
+        return
+    print(f"{len(conversations)} conversations, {len(samples)} user turns, budget "
+          f"{prompt_context.PROMPT_TOKEN_BUDGET} tokens, tiktoken "
+          f"{'on' if prompt_context.TIKTOKEN_AVAILABLE else 'off (estimated)'}\n")
+    print(f"{'provider':9s} {'legacy mean/p95/max':>22s} {'budgeted mean/p95/max':>24s} {'saved':>7s}")
+    for provider in PROVIDERS:
+        sizes = {"legacy": [], "budgeted": []}
+        for _, _, legacy, budgeted in samples:
+            sizes["legacy"].append(sum(prompt_context.count_tokens(p, provider) for p in legacy))
+            sizes["budgeted"].append(sum(prompt_context.count_tokens(p, provider) for p in budgeted))
+        cols = [f"{statistics.mean(v):6.0f} /{_p95(v):5d} /{max(v):5d}" for v in sizes.values()]
+        saved = 1 - sum(sizes["budgeted"]) / sum(sizes["legacy"])
+        print(f"{provider:9s} {cols[0]:>22s} {cols[1]:>24s} {saved:6.1%}")
+
+    if args.answer:
+        asyncio.run(_answer(samples, args.answer))
+
+
+if __name__ == "__main__":
+    main()
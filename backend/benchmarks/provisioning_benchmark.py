@@ -0,0 +1,143 @@
+"""
+Staff Provisioning Benchmark
+
+Modes:
+  hash  - in-process: bcrypt for N passwords one after another (what the
+          per-employee endpoints did) vs hash_passwords_async() across the
+          CPU pool. No database needed.
+  http  - against a running backend: N sequential POST /api/employees vs one
+          POST /api/employees/bulk with the same N synthetic teachers
+          (emails are unique per run). Reports wall time, per-row outcomes
+          and how long a concurrent GET /api/health took while it ran.
+
+Usage:
+  python benchmarks/provisioning_benchmark.py hash --sizes 50 200 1000 --rounds 12
+  python benchmarks/provisioning_benchmark.py http --base-url http://localhost:8001 \\
+      --token <director JWT> --school-id SCH-BENCH-0001 --sizes 50 200 1000
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _employees(n, tag):
+    return [{
+        "name": f"Bench Teacher {i:04d}",
+        "mobile": f"9{i:09d}",
+        "email": f"bench-{tag}-{i:04d}@bench.local",
+        "designation": "teacher",
+        "password": f"pw-{tag}-{i}",
+    } for i in range(n)]
+
+
+# ====================== HASH (IN-PROCESS) ======================
+
+async def run_hash(args):
+    import bcrypt
+    from core import offload
+    from core.auth import hash_passwords_async
+
+    await offload.warm_cpu_pool()
+    print(f"CPU pool workers: {offload.CPU_WORKERS}, bcrypt rounds: {args.rounds}")
+    for n in args.sizes:
+        passwords = [f"pw-{i}" for i in range(n)]
+        started = time.perf_counter()
+        if n <= args.sequential_cap:
+            for p in passwords:
+                bcrypt.hashpw(p.encode(), bcrypt.gensalt(args.rounds))
+            sequential = time.perf_counter() - started
+        else:
+            # extrapolate from the first sequential_cap hashes
+            for p in passwords[:args.sequential_cap]:
+                bcrypt.hashpw(p.encode(), bcrypt.gensalt(args.rounds))
+            sequential = (time.perf_counter() - started) * n / args.sequential_cap
+
+        started = time.perf_counter()
+        hashed = await hash_passwords_async(passwords, args.rounds)
+        pooled = time.perf_counter() - started
+        assert len(hashed) == n
+        print(f"n={n:5d}  sequential {sequential:7.2f}s  pool {pooled:7.2f}s  "
+              f"speedup {sequential / pooled:4.1f}x  ({n / pooled:.0f} hashes/s)")
+    offload.shutdown()
+
+
+# ====================== HTTP ======================
+
+def _probe_health(base_url, stop, samples):
+    import requests
+    while not stop.is_set():
+        started = time.perf_counter()
+        requests.get(f"{base_url}/api/health", timeout=30)
+        samples.append(time.perf_counter() - started)
+        time.sleep(0.05)
+
+
+def run_http(args):
+    import requests
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    for n in args.sizes:
+        for mode in ("sequential", "bulk"):
+            if mode == "sequential" and n > args.sequential_cap:
+                print(f"n={n:5d}  {mode:10s}  skipped (> --sequential-cap)")
+                continue
+            employees = _employees(n, uuid.uuid4().hex[:8])
+            stop, samples = threading.Event(), []
+            probe = threading.Thread(target=_probe_health, args=(args.base_url, stop, samples), daemon=True)
+            probe.start()
+            started = time.perf_counter()
+            if mode == "sequential":
+                outcomes = {"created": 0, "error": 0}
+                for e in employees:
+                    r = requests.post(f"{args.base_url}/api/employees", headers=headers,
+                                      json={**e, "school_id": args.school_id}, timeout=120)
+                    outcomes["created" if r.status_code == 200 else "error"] += 1
+            else:
+                r = requests.post(f"{args.base_url}/api/employees/bulk", headers=headers,
+                                  json={"school_id": args.school_id, "employees": employees}, timeout=1800)
+                r.raise_for_status()
+                body = r.json()
+                outcomes = {k: body[k] for k in ("created", "skipped", "error")}
+            elapsed = time.perf_counter() - started
+            stop.set()
+            probe.join()
+            worst = max(samples) * 1000 if samples else 0.0
+            print(f"n={n:5d}  {mode:10s}  {elapsed:7.2f}s  {outcomes}  "
+                  f"health max {worst:.0f} ms over {len(samples)} probes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    h = sub.add_parser("hash")
+    h.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    h.add_argument("--rounds", type=int, default=12)
+    h.add_argument("--sequential-cap", type=int, default=200,
+                   help="hash at most this many sequentially, extrapolate the rest")
+
+    w = sub.add_parser("http")
+    w.add_argument("--base-url", required=True)
+    w.add_argument("--token", required=True)
+    w.add_argument("--school-id", required=True)
+    w.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    w.add_argument("--sequential-cap", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.mode == "http":
+        args.base_url = args.base_url.rstrip("/")
+    if args.mode == "hash":
+        asyncio.run(run_hash(args))
+    else:
+        run_http(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Batch Report Card Benchmark
+
+Synthesises a school (class levels × sections × students × subjects), runs
+the vectorised report-card computation and renders the merged PDF through
+the shared CPU pool (core.offload.run_cpu). No Mongo needed.
+
+Usage:
+  python benchmarks/report_card_benchmark.py --levels 12 --sections 4 --students 60 --subjects 7
+  python benchmarks/report_card_benchmark.py --out /tmp/report_cards.pdf
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import offload  # noqa: E402
+from services import report_cards  # noqa: E402
+
+SUBJECTS = ["Hindi", "English", "Mathematics", "Science", "Social Science", "Sanskrit",
+            "Computer", "Drawing", "Physical Education"]
+
+
+def build_school(args, rng):
+    exams, marks, students, classes = [], [], {}, {}
+    subjects = {f"SUB-{i}": SUBJECTS[i % len(SUBJECTS)] for i in range(args.subjects)}
+    for level in range(1, args.levels + 1):
+        for section in "ABCDEFGH"[:args.sections]:
+            cid = str(uuid.uuid4())
+            classes[cid] = {"id": cid, "name": f"Class {level}", "section": section}
+            exam = {"id": str(uuid.uuid4()), "school_id": "BENCH", "class_id": cid,
+                    "name": "Half Yearly", "max_marks": 100}
+            exams.append(exam)
+            for r in range(args.students):
+                sid = str(uuid.uuid4())
+                students[sid] = {"id": sid, "name": f"Student {level}{section}{r:02d}",
+                                 "admission_no": f"{level:02d}{section}{r:03d}", "class_id": cid}
+                ability = rng.uniform(25, 95)
+                for sub in subjects:
+                    if rng.random() < args.absent_rate:
+                        continue
+                    marks.append({"student_id": sid, "subject_id": sub, "class_id": cid, "exam_id": exam["id"],
+                                  "marks": max(0, min(100, round(rng.gauss(ability, 10))))})
+    return exams, marks, students, subjects, classes
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    exams, marks, students, subjects, classes = build_school(args, rng)
+    print(f"school: {len(classes)} sections, {len(students)} students, {len(marks)} marks rows")
+
+    t0 = time.perf_counter()
+    cards = report_cards.compute_cards(exams, marks, students, subjects, classes)
+    t_compute = time.perf_counter() - t0
+    print(f"compute (totals, grades, ranks, percentiles): {len(cards)} cards in {t_compute * 1000:.0f} ms")
+
+    # Sanity: ranks are 1..n per level with ties, section sizes add up
+    top = [c for c in cards if c["class_rank"] == 1]
+    print(f"class toppers: {len(top)} (levels={args.levels})")
+
+    ordered = report_cards._print_order(cards)
+    school = {"name": "Benchmark Public School", "address": "Lucknow"}
+
+    t0 = time.perf_counter()
+    pdf = await report_cards.render_pdf(ordered, school)
+    t_pdf_pool = time.perf_counter() - t0
+    print(f"pdf (run_cpu, {offload.CPU_WORKERS} workers): {len(pdf) / 1e6:.1f} MB, "
+          f"{len(cards)} pages in {t_pdf_pool:.2f}s (includes worker start-up)")
+
+    t0 = time.perf_counter()
+    pdf = await report_cards.render_pdf(ordered, school)
+    print(f"pdf (warm pool): {time.perf_counter() - t0:.2f}s")
+
+    if args.serial:
+        from services import report_card_pdf
+        t0 = time.perf_counter()
+        report_card_pdf.assemble(report_card_pdf.render_pages(ordered, school))
+        print(f"pdf (single process): {time.perf_counter() - t0:.2f}s")
+
+    if args.out:
+        Path(args.out).write_bytes(pdf)
+        print(f"wrote {args.out}")
+    offload.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch report card benchmark")
+    parser.add_argument("--levels", type=int, default=12)
+    parser.add_argument("--sections", type=int, default=4)
+    parser.add_argument("--students", type=int, default=63, help="students per section")
+    parser.add_argument("--subjects", type=int, default=7)
+    parser.add_argument("--absent-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--serial", action="store_true", help="also time single-process rendering")
+    parser.add_argument("--out", help="write the merged PDF here")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Synthetic School Generator
+
+Seeds a local mongod with N schools of M students each, shaped like the
+documents in schooltino_dump/ (the dump supplies one template per collection;
+every generated document keeps the template's fields and types and fills in
+generated values). Used by benchmarks/load_suite.py.
+
+Per school (defaults, 2,000 students):
+  schools, users (director / principal / accountant / one teacher per
+  section), staff, classes (Nursery-12 x sections of ~45), students,
+  subject_allocations, timetable (6 days x 6 periods), fee_plans, one
+  pending fee_invoice per student for the current month, notices,
+  audit_logs and --history-days of attendance.
+
+Deterministic: the same --seed and --students always produce the same ids,
+names and values for school k, whatever --schools is, so 1 / 10 / 100
+school runs share their first schools and results compare across commits.
+No indexes are created - the suite measures what the app itself sets up.
+
+The target database must start with "bench" unless --force is given, so a
+dev or production database is never dropped by accident.
+
+Usage:
+  python benchmarks/seed_schools.py --schools 1 --drop
+  python benchmarks/seed_schools.py --schools 100 --students 2000 \\
+      --mongo-url mongodb://localhost:27017 --db bench_schooltino --drop
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from pathlib import Path
+
+import bcrypt
+import bson
+from pymongo import MongoClient
+
+DUMP_DIR = Path(__file__).resolve().parent.parent / "schooltino_dump" / "schooltino"
+GENERATOR_VERSION = 1
+BENCH_PASSWORD = "bench1234"
+
+CLASS_NAMES = ["Nursery", "LKG", "UKG"] + [f"Class {n}" for n in range(1, 13)]
+SECTION_SIZE = 45
+SUBJECTS = ["Hindi", "English", "Mathematics", "Science", "Social Science", "Sanskrit"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+PERIODS = 6
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Priya", "Rohan", "Saanvi",
+               "Arjun", "Meera", "Kabir", "Riya", "Aryan", "Pooja", "Dev", "Neha", "Yash", "Tanvi"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Yadav", "Singh", "Gupta", "Jain", "Mishra", "Tiwari", "Chouhan",
+              "Rajput", "Dubey", "Pandey", "Saxena", "Thakur"]
+CITIES = ["Indore", "Bhopal", "Jabalpur", "Gwalior", "Ujjain", "Sagar", "Rewa", "Satna"]
+BATCH = 5000
+
+
+def load_templates(dump_dir: Path = DUMP_DIR) -> dict:
+    """First document of every collection in the dump, without _id."""
+    templates = {}
+    for path in sorted(dump_dir.glob("*.bson")):
+        docs = bson.decode_all(path.read_bytes())
+        if docs:
+            docs[0].pop("_id", None)
+            templates[path.stem] = docs[0]
+    return templates
+
+
+class SchoolGenerator:
+    """All documents for school number `index`, reproducible from (seed, index)."""
+
+    def __init__(self, templates: dict, index: int, students: int, seed: int,
+                 password_hash: str, base_date: date, history_days: int):
+        self.t = templates
+        self.index = index
+        self.n_students = students
+        self.rng = random.Random(f"{seed}:{index}")
+        self.password_hash = password_hash
+        self.base_date = base_date
+        self.history_days = history_days
+        self.school_id = self.uid()
+        self.code = f"BENCH{index:04d}"
+
+    def uid(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def ts(self, days_ago: int = 0) -> str:
+        moment = datetime.combine(self.base_date - timedelta(days=days_ago), dtime(9, 0), tzinfo=timezone.utc)
+        return (moment + timedelta(seconds=self.rng.randrange(8 * 3600))).isoformat()
+
+    def name(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def mobile(self) -> str:
+        return f"9{self.rng.randrange(10 ** 9):09d}"
+
+    def like(self, collection: str, **fields) -> dict:
+        """Template document for `collection` with fields overridden."""
+        return {**self.t.get(collection, {}), **fields}
+
+    def generate(self) -> dict:
+        out = {name: [] for name in ("schools", "users", "staff", "classes", "students", "subject_allocations",
+                                     "timetable", "fee_plans", "fee_invoices", "notices", "audit_logs",
+                                     "attendance")}
+        out["schools"].append(self.like(
+            "schools", id=self.school_id, name=f"Bench Public School {self.index}", code=self.code,
+            city=self.rng.choice(CITIES), state="Madhya Pradesh", email=f"school{self.index}@bench.schooltino",
+            phone=self.mobile(), is_active=True, created_at=self.ts(400)
+        ))
+
+        def add_user(role: str, email: str) -> dict:
+            user = self.like(
+                "users", id=self.uid(), email=email, name=self.name(), role=role, mobile=self.mobile(),
+                password=self.password_hash, school_id=self.school_id, is_active=True, status="approved",
+                created_at=self.ts(365)
+            )
+            out["users"].append(user)
+            out["staff"].append({
+                "id": self.uid(), "user_id": user["id"], "name": user["name"], "email": email,
+                "mobile": user["mobile"], "designation": role.title(), "school_id": self.school_id,
+                "is_active": True, "created_at": user["created_at"]
+            })
+            return user
+
+        prefix = f"s{self.index}"
+        director = add_user("director", f"director.{prefix}@bench.schooltino")
+        add_user("principal", f"principal.{prefix}@bench.schooltino")
+        add_user("accountant", f"accountant.{prefix}@bench.schooltino")
+
+        sections_per_class = max(1, math.ceil(self.n_students / (len(CLASS_NAMES) * SECTION_SIZE)))
+        sections = []
+        for class_name in CLASS_NAMES:
+            for s in range(sections_per_class):
+                section = chr(ord("A") + s)
+                teacher = add_user("teacher", f"teacher.{prefix}.{len(sections)}@bench.schooltino")
+                cls = self.like(
+                    "classes", id=self.uid(), school_id=self.school_id, name=class_name, class_name=class_name,
+                    section=section, class_teacher_id=teacher["id"], class_teacher_name=teacher["name"],
+                    student_count=0, subjects=list(SUBJECTS), created_at=self.ts(365)
+                )
+                out["classes"].append(cls)
+                sections.append((cls, teacher))
+
+        for cls, teacher in sections:
+            for subject in SUBJECTS:
+                out["subject_allocations"].append(self.like(
+                    "subject_allocations", id=self.uid(), school_id=self.school_id, class_id=cls["id"],
+                    class_name=cls["name"], subject=subject, subject_name=subject, teacher_id=teacher["id"],
+                    teacher_name=teacher["name"], periods_per_week=PERIODS, topics_covered=0, total_topics=0,
+                    created_at=self.ts(300)
+                ))
+            for day in DAYS:
+                for period in range(1, PERIODS + 1):
+                    subject = SUBJECTS[(period + DAYS.index(day)) % len(SUBJECTS)]
+                    out["timetable"].append(self.like(
+                        "timetable", id=self.uid(), school_id=self.school_id, class_id=cls["id"],
+                        class_name=cls["name"], teacher_id=teacher["id"], teacher_name=teacher["name"],
+                        subject=subject, subject_name=subject, day=day, period=period,
+                        start_time=f"{8 + period:02d}:00", end_time=f"{9 + period:02d}:00"
+                    ))
+
+        plan_id = self.uid()
+        out["fee_plans"].append({
+            "id": plan_id, "name": "Monthly Tuition", "school_id": self.school_id, "amount": 1500.0,
+            "frequency": "monthly", "is_active": True, "created_at": self.ts(365)
+        })
+        month = self.base_date.strftime("%Y-%m")
+
+        for i in range(self.n_students):
+            cls, _ = sections[i % len(sections)]
+            cls["student_count"] += 1
+            sid = f"{self.code}-{i:05d}"
+            student = self.like(
+                "students", id=self.uid(), student_id=sid, admission_no=sid, name=self.name(),
+                class_id=cls["id"], class_name=cls["name"], section=cls["section"],
+                roll_number=f"{cls['student_count']:03d}", school_id=self.school_id,
+                father_name=self.name(), mother_name=self.name(), mobile=self.mobile(),
+                email=f"{sid.lower()}@bench.schooltino", gender=self.rng.choice(["male", "female"]),
+                dob=f"{2008 + self.rng.randrange(12)}-{1 + self.rng.randrange(12):02d}-{1 + self.rng.randrange(28):02d}",
+                password=self.password_hash, password_changed=False, status="active", is_active=True,
+                admitted_by=director["id"], admission_date=self.ts(300), created_at=self.ts(300)
+            )
+            out["students"].append(student)
+
+            amount = float(self.rng.choice([1200, 1500, 1800, 2200]))
+            out["fee_invoices"].append({
+                "id": self.uid(), "invoice_no": f"INV-{self.code}-{i:05d}", "student_id": student["id"],
+                "student_name": student["name"], "fee_plan_id": plan_id, "school_id": self.school_id,
+                "month": month, "amount": amount, "discount": 0.0, "final_amount": amount,
+                "due_date": f"{month}-10", "status": "pending", "paid_amount": 0, "payment_date": None,
+                "created_at": self.ts(20)
+            })
+
+            for days_ago in range(1, self.history_days + 1):
+                out["attendance"].append({
+                    "id": self.uid(), "student_id": student["id"], "class_id": cls["id"],
+                    "school_id": self.school_id,
+                    "date": (self.base_date - timedelta(days=days_ago)).isoformat(),
+                    "status": "present" if self.rng.random() < 0.9 else self.rng.choice(["absent", "late"]),
+                    "marked_by": cls["class_teacher_id"], "created_at": self.ts(days_ago)
+                })
+
+        for n in range(5):
+            out["notices"].append({
+                "id": self.uid(), "school_id": self.school_id, "title": f"Notice {n + 1}",
+                "content": "School will remain closed on account of a local holiday.",
+                "priority": self.rng.choice(["normal", "high"]), "is_active": True,
+                "created_by": director["id"], "created_at": self.ts(n * 3)
+            })
+        users = out["users"]
+        for n in range(20):
+            user = self.rng.choice(users)
+            out["audit_logs"].append(self.like(
+                "audit_logs", id=self.uid(), user_id=user["id"], action=self.rng.choice(["create", "update"]),
+                module=self.rng.choice(["students", "attendance", "fee_payments"]), details={},
+                ip_address=None, school_id=self.school_id, created_at=self.ts(n)
+            ))
+        return out
+
+
+def seed(args):
+    if not args.db.startswith("bench") and not args.force:
+        sys.exit(f"refusing to seed '{args.db}': database name must start with 'bench' (or pass --force)")
+
+    templates = load_templates(Path(args.dump_dir))
+    print(f"templates from {args.dump_dir}: {', '.join(sorted(templates))}")
+    # Cheap rounds: the suite mints tokens, and logins should not dominate if used
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode()
+    base_date = date.fromisoformat(args.base_date) if args.base_date else date.today()
+
+    client = MongoClient(args.mongo_url)
+    db = client[args.db]
+    if args.drop:
+        client.drop_database(args.db)
+        print(f"dropped {args.db}")
+
+    totals = {}
+    started = time.perf_counter()
+    for index in range(args.schools):
+        docs = SchoolGenerator(templates, index, args.students, args.seed, password_hash,
+                               base_date, args.history_days).generate()
+        for collection, items in docs.items():
+            for start in range(0, len(items), BATCH):
+                db[collection].insert_many(items[start:start + BATCH], ordered=False)
+            totals[collection] = totals.get(collection, 0) + len(items)
+        if (index + 1) % 10 == 0 or index + 1 == args.schools:
+            print(f"  {index + 1}/{args.schools} schools ({time.perf_counter() - started:.0f}s)")
+
+    db.bench_meta.replace_one({"_id": "seed"}, {
+        "_id": "seed",
+        "generator_version": GENERATOR_VERSION,
+        "schools": args.schools,
+        "students_per_school": args.students,
+        "seed": args.seed,
+        "base_date": base_date.isoformat(),
+        "history_days": args.history_days,
+        "password": BENCH_PASSWORD,
+        "counts": totals,
+        "seeded_at": datetime.now(timezone.utc).isoformat()
+    }, upsert=True)
+    print("seeded: " + ", ".join(f"{k}={v:,}" for k, v in sorted(totals.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic schools for the load suite")
+    parser.add_argument("--schools", type=int, default=1, help="1, 10 or 100 for the standard scales")
+    parser.add_argument("--students", type=int, default=2000, help="students per school")
+    parser.add_argument("--seed", type=int, default=2026)
+    parser.add_argument("--history-days", type=int, default=5, help="days of past attendance per student")
+    parser.add_argument("--base-date", help="YYYY-MM-DD treated as today (default: today)")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="bench_schooltino")
+    parser.add_argument("--dump-dir", default=str(DUMP_DIR))
+    parser.add_argument("--drop", action="store_true", help="drop the database first")
+    parser.add_argument("--force", action="store_true", help="allow a database name without the bench prefix")
+    seed(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Syllabus Search Micro-benchmark
+
+Compares the old linear scan (every class → subject → chapter → topic with a
+substring check, per board) against the compiled inverted index + trie, for
+search and typeahead. Pure in-process; no server or Mongo.
+
+Usage:
+  python benchmarks/syllabus_search_benchmark.py
+  python benchmarks/syllabus_search_benchmark.py --rounds 2000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.mpbse_syllabus import MPBSE_SYLLABUS_DATA  # noqa: E402
+from services.ncert_syllabus import NCERT_SYLLABUS_DATA  # noqa: E402
+from services import syllabus_index  # noqa: E402
+
+QUERIES = [
+    "photosynthesis", "light", "triangle prop", "newton laws", "quadri", "electric current",
+    "कबीर", "प्रेमचंद", "प्रकृति", "गजल", "kabir", "premchand", "prakriti", "ghazal",
+    "fractions", "motion", "democracy", "cell", "acids bases", "xyz not there",
+]
+PREFIXES = ["ph", "pho", "phot", "tri", "kab", "prem", "प्र", "प्रक", "elec", "dem", "gh", "newt"]
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _report(label, latencies):
+    print(f"{label:<28} p50/p95/p99: {_percentile(latencies, 50) * 1e6:8.1f} / "
+          f"{_percentile(latencies, 95) * 1e6:8.1f} / {_percentile(latencies, 99) * 1e6:8.1f} µs "
+          f"(mean {statistics.mean(latencies) * 1e6:.1f} µs)")
+
+
+def linear_search(data, board, query, class_num=None):
+    """The pre-index search_topics() scan."""
+    results = []
+    query_lower = query.lower()
+    for cls in ([class_num] if class_num else data.keys()):
+        if cls not in data:
+            continue
+        for subject, subject_data in data[cls]["subjects"].items():
+            for chapter in subject_data.get("chapters", []):
+                if query_lower in chapter["name"].lower():
+                    results.append({"class": cls, "subject": subject, "board": board, "chapter": chapter["name"],
+                                    "chapter_number": chapter["number"], "match_type": "chapter_name"})
+                for topic in chapter.get("topics", []):
+                    if query_lower in topic.lower():
+                        results.append({"class": cls, "subject": subject, "board": board,
+                                        "chapter": chapter["name"], "chapter_number": chapter["number"],
+                                        "topic": topic, "match_type": "topic"})
+    return results
+
+
+def linear_all(query, class_num=None):
+    return linear_search(NCERT_SYLLABUS_DATA, "NCERT", query, class_num) + \
+        linear_search(MPBSE_SYLLABUS_DATA, "MPBSE", query, class_num)
+
+
+def timed(fn, args_list, rounds):
+    latencies = []
+    for _ in range(rounds):
+        for args in args_list:
+            t = time.perf_counter()
+            fn(*args)
+            latencies.append(time.perf_counter() - t)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Syllabus search micro-benchmark")
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = syllabus_index.build_index()
+    print(f"index build: {(time.perf_counter() - t0) * 1000:.0f} ms, {len(index.docs)} entries, "
+          f"{len(index.exact)} terms, {len(index.phonetic)} phonetic keys")
+
+    queries = [(q,) for q in QUERIES]
+    _report("linear search (all boards)", timed(linear_all, queries, args.rounds))
+    _report("index search (all boards)", timed(index.search, queries, args.rounds))
+    _report("linear search (class 9)", timed(lambda q: linear_all(q, "9"), queries, args.rounds))
+    _report("index search (class 9)", timed(lambda q: index.search(q, class_num="9"), queries, args.rounds))
+    _report("linear typeahead", timed(linear_all, [(p,) for p in PREFIXES], args.rounds))
+    _report("index typeahead (top 10)", timed(index.suggest, [(p,) for p in PREFIXES], args.rounds))
+
+    print("\nhits per query (linear substring / index):")
+    for q in QUERIES:
+        print(f"  {q:<16} {len(linear_all(q)):>4} / {len(index.search(q)):>4}")
+
+
+if __name__ == "__main__":
+    main()
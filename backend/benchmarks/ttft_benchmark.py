@@ -0,0 +1,112 @@
+"""
+Time-to-First-Token Benchmark
+
+For each AI endpoint, POSTs the same request to the JSON endpoint and to its
+/stream twin (Server-Sent Events) against a running backend and reports:
+
+  json    - total time until the response body arrived (what the spinner shows)
+  ttft    - time until the first `token` event of the stream
+  stream  - time until the stream's `done` event
+
+Endpoints (pick with --endpoints):
+  brain    POST /api/tino-brain/query             (no auth)
+  chat     POST /api/voice-assistant/chat         (no auth)
+  summary  POST /api/syllabus-progress/ai/summarize-chapter
+  paper    POST /api/ai/generate-paper            (needs --token)
+
+Usage:
+  python benchmarks/ttft_benchmark.py --base-url http://localhost:8001 \\
+      --school-id SCH-BENCH-0001 --token <director JWT> --runs 3
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+import requests
+
+
+def _payloads(args):
+    return {
+        "brain": ("/api/tino-brain/query", {
+            "query": "Aaj school mein attendance kaisi rahi? Short mein batao.",
+            "school_id": args.school_id, "user_id": f"bench-{uuid.uuid4().hex[:6]}",
+            "user_role": "director",
+        }),
+        "chat": ("/api/voice-assistant/chat", {
+            "message": "Exam ki taiyari ke liye teachers ko kya tips doon?",
+            "school_id": args.school_id, "user_id": "bench", "user_role": "director",
+        }),
+        "summary": ("/api/syllabus-progress/ai/summarize-chapter", {
+            "board": "NCERT", "class_num": "10", "subject": "Science",
+            "chapter_number": 6, "chapter_name": "Life Processes", "language": "english",
+        }),
+        "paper": ("/api/ai/generate-paper", {
+            "subject": "Science", "class_name": "Class 8", "chapter": "Force and Pressure",
+            "difficulty": "medium", "question_types": ["mcq", "short", "long"],
+            "total_marks": 20, "time_duration": 45, "language": "english",
+        }),
+    }
+
+
+def _json_call(url, body, headers):
+    started = time.perf_counter()
+    r = requests.post(url, json=body, headers=headers, timeout=300)
+    r.raise_for_status()
+    return time.perf_counter() - started
+
+
+def _stream_call(url, body, headers):
+    """(seconds to first token, seconds to done, events seen by type)"""
+    started = time.perf_counter()
+    first, counts = None, {}
+    with requests.post(url, json=body, headers=headers, stream=True, timeout=300) as r:
+        r.raise_for_status()
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:])
+            counts[event["type"]] = counts.get(event["type"], 0) + 1
+            if event["type"] == "token" and first is None:
+                first = time.perf_counter() - started
+            if event["type"] == "done":
+                break
+    return first, time.perf_counter() - started, counts
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return f"{statistics.median(values):6.2f}s" if values else "     -"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", required=True)
+    parser.add_argument("--school-id", required=True)
+    parser.add_argument("--token", default="", help="director JWT (needed for paper)")
+    parser.add_argument("--endpoints", default="brain,chat,summary,paper")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    args.base_url = args.base_url.rstrip("/")
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    payloads = _payloads(args)
+    print(f"{'endpoint':10s} {'json':>8s} {'ttft':>8s} {'stream':>8s}  events")
+    for name in args.endpoints.split(","):
+        path, body = payloads[name]
+        if name == "paper" and not args.token:
+            print(f"{name:10s} skipped (no --token)")
+            continue
+        totals, ttfts, streams, counts = [], [], [], {}
+        for _ in range(args.runs):
+            totals.append(_json_call(args.base_url + path, body, headers))
+            first, total, counts = _stream_call(args.base_url + path + "/stream", body, headers)
+            ttfts.append(first)
+            streams.append(total)
+        print(f"{name:10s} {_median(totals):>8s} {_median(ttfts):>8s} {_median(streams):>8s}  {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 # ./core/__init__.py
+from . import metrics  # registers the Mongo command listener before any client is created
 from .database import db, client
-from .auth import get_current_user, create_access_token, verify_password, hash_password
+from .auth import get_current_user, create_access_token, verify_password, hash_password, verify_password_async, hash_password_async
 from .helpers import log_audit
@@ -9,13 +9,20 @@ Priority stack (cheapest first):
   5. OpenAI GPT  - Last resort (expensive)
 
 All calls are async with timeout + retry logic.
+
+stream_ai() is the streaming twin of ask_ai(): same priority stack, text
+yielded as the provider produces it (Groq / Sarvam / Ollama / Gemini all
+support streamed completions).
 """
 
 import os
 import logging
 import asyncio
+import json
 import httpx
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional
+
+from core.metrics import track_ai, track_ai_stream
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +92,7 @@ SARVAM_MODELS = {
 
 # ====================== GROQ AI (PRIMARY - FREE) ======================
 
+@track_ai("groq", enabled=lambda: bool(GROQ_API_KEY))
 async def ask_groq(
     prompt: str,
     system: str = "You are a helpful school management assistant.",
@@ -137,6 +145,7 @@ async def ask_groq(
 
 # ====================== GEMINI FLASH (SECONDARY - ULTRA CHEAP) ======================
 
+@track_ai("gemini", enabled=lambda: bool(GEMINI_API_KEY))
 async def ask_gemini(
     prompt: str,
     system: str = "You are a helpful school management assistant.",
@@ -189,6 +198,7 @@ async def ask_gemini(
 
 # ====================== SARVAM AI (HINDI/INDIAN LANGUAGES) ======================
 
+@track_ai("sarvam", enabled=lambda: bool(SARVAM_API_KEY))
 async def ask_sarvam(
     prompt: str,
     language: str = "hi-IN",   # hi-IN, mr-IN, gu-IN, ta-IN, te-IN, kn-IN, ml-IN, pa-IN, bn-IN, od-IN
@@ -224,6 +234,7 @@ async def ask_sarvam(
         return None
 
 
+@track_ai("sarvam_translate", enabled=lambda: bool(SARVAM_API_KEY))
 async def sarvam_translate(text: str, source_lang: str = "en-IN", target_lang: str = "hi-IN") -> Optional[str]:
     """
     Translate text using Sarvam AI.
@@ -251,6 +262,7 @@ async def sarvam_translate(text: str, source_lang: str = "en-IN", target_lang: s
         return None
 
 
+@track_ai("sarvam_tts", enabled=lambda: bool(SARVAM_API_KEY))
 async def sarvam_text_to_speech(text: str, language: str = "hi-IN") -> Optional[bytes]:
     """
     Convert text to speech using Sarvam AI - perfect for Indian language announcements.
@@ -285,6 +297,7 @@ async def sarvam_text_to_speech(text: str, language: str = "hi-IN") -> Optional[
 
 # ====================== OLLAMA (SELF-HOSTED, 100% FREE) ======================
 
+@track_ai("ollama")
 async def ask_ollama(
     prompt: str,
     system: str = "You are a helpful school management assistant.",
@@ -393,6 +406,184 @@ def _rule_based_fallback(prompt: str, task_type: str) -> str:
             "or contact your system administrator.")
 
 
+# ====================== STREAMING ======================
+# Each stream_* helper swallows its errors like its ask_* sibling: a provider
+# that fails before its first token yields nothing, so stream_ai() moves on
+# to the next one. A failure mid-stream just ends the text early.
+
+async def _stream_chat_completions(url: str, api_key: str, payload: Dict, timeout: int) -> AsyncIterator[str]:
+    """OpenAI-compatible `stream: true` chat completion (SSE `data:` lines)."""
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        async with client.stream(
+            "POST", url,
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            json={**payload, "stream": True}
+        ) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+
+@track_ai_stream("groq", enabled=lambda: bool(GROQ_API_KEY))
+async def stream_groq(
+    prompt: str,
+    system: str = "You are a helpful school management assistant.",
+    model: str = "smart",
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    timeout: int = 20
+) -> AsyncIterator[str]:
+    """ask_groq(), streamed."""
+    if not GROQ_API_KEY:
+        return
+    payload = {
+        "model": GROQ_MODELS.get(model, GROQ_MODELS["smart"]),
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user",   "content": prompt}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }
+    try:
+        async for text in _stream_chat_completions(
+            "https://api.groq.com/openai/v1/chat/completions", _next_groq_key(), payload, timeout
+        ):
+            yield text
+    except Exception as e:
+        logger.error(f"Groq stream error: {e}")
+
+
+@track_ai_stream("gemini", enabled=lambda: bool(GEMINI_API_KEY))
+async def stream_gemini(
+    prompt: str,
+    system: str = "You are a helpful school management assistant.",
+    model: str = "flash",
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    timeout: int = 25
+) -> AsyncIterator[str]:
+    """ask_gemini(), streamed (streamGenerateContent with alt=sse)."""
+    if not GEMINI_API_KEY:
+        return
+    model_id = GEMINI_MODELS.get(model, GEMINI_MODELS["flash"])
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_id}:streamGenerateContent"
+    payload = {
+        "contents": [{"role": "user", "parts": [{"text": f"{system}\n\n{prompt}"}]}],
+        "generationConfig": {"maxOutputTokens": max_tokens, "temperature": temperature}
+    }
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream("POST", url, params={"key": _next_gemini_key(), "alt": "sse"},
+                                     json=payload) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    candidates = json.loads(line[5:]).get("candidates") or [{}]
+                    for part in (candidates[0].get("content") or {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+    except Exception as e:
+        logger.error(f"Gemini stream error: {e}")
+
+
+@track_ai_stream("sarvam", enabled=lambda: bool(SARVAM_API_KEY))
+async def stream_sarvam_chat(
+    messages: List[Dict[str, str]],
+    model: str = "sarvam-m",
+    max_tokens: int = 3000,
+    temperature: float = 0.7,
+    timeout: int = 30
+) -> AsyncIterator[str]:
+    """Sarvam chat completion (OpenAI-compatible), streamed."""
+    if not SARVAM_API_KEY:
+        return
+    payload = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+    try:
+        async for text in _stream_chat_completions(
+            "https://api.sarvam.ai/v1/chat/completions", SARVAM_API_KEY, payload, timeout
+        ):
+            yield text
+    except Exception as e:
+        logger.error(f"Sarvam stream error: {e}")
+
+
+@track_ai_stream("ollama")
+async def stream_ollama(
+    prompt: str,
+    system: str = "You are a helpful school management assistant.",
+    model: str = "llama3.1",
+    timeout: int = 60
+) -> AsyncIterator[str]:
+    """ask_ollama(), streamed (one JSON object per line)."""
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream("POST", f"{OLLAMA_BASE_URL}/api/chat", json={
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system},
+                    {"role": "user",   "content": prompt}
+                ],
+                "stream": True
+            }) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    text = (chunk.get("message") or {}).get("content")
+                    if text:
+                        yield text
+                    if chunk.get("done"):
+                        break
+    except Exception as e:
+        logger.debug(f"Ollama not available: {e}")
+
+
+async def stream_ai(
+    prompt: str,
+    system: str = "You are a helpful school management assistant for Indian schools.",
+    task_type: str = "general",
+    max_tokens: int = 1024
+) -> AsyncIterator[str]:
+    """
+    ask_ai(), streamed: the first provider in ask_ai()'s order that produces
+    any text is used; the rule-based fallback is yielded as one piece.
+    """
+    providers = []
+    if task_type == "hindi" and SARVAM_API_KEY:
+        providers.append(lambda: stream_sarvam_chat([
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ], max_tokens=max_tokens))
+    groq_model = "fast" if task_type == "simple" else ("code" if task_type == "code" else "smart")
+    gemini_model = "flash_8b" if task_type == "simple" else "flash"
+    providers += [
+        lambda: stream_groq(prompt, system=system, model=groq_model, max_tokens=max_tokens),
+        lambda: stream_gemini(prompt, system=system, model=gemini_model, max_tokens=max_tokens),
+        lambda: stream_ollama(prompt, system=system),
+    ]
+
+    for provider in providers:
+        produced = False
+        async for text in provider():
+            produced = True
+            yield text
+        if produced:
+            return
+
+    yield _rule_based_fallback(prompt, task_type)
+
+
 # ====================== SCHOOL-SPECIFIC AI FUNCTIONS ======================
 
 async def generate_school_notice(
@@ -0,0 +1,352 @@
+"""
+audit_buffer.py - Write-behind pipeline for audit_logs.
+
+log_audit() only appends to an in-process buffer; a background task writes
+the entries with insert_many when the batch is full or the flush interval
+passes, so mutating endpoints no longer wait on an audit round-trip.
+
+    from core.audit_buffer import audit_buffer
+    audit_buffer.add(entry)           # never blocks, never raises
+    await audit_buffer.start()        # app startup
+    await audit_buffer.stop()         # app shutdown: drains the buffer
+
+If Mongo is unavailable the batch is appended to a local JSONL spill file
+(AUDIT_SPILL_PATH) and replayed on the next start / successful flush.
+Entries carry their uuid `id`, which is unique-indexed, so a replay of a
+batch that partly made it in never duplicates. Only the entries Mongo didn't
+take are spilled; an entry it rejects for itself (validation, size) is moved
+to the quarantine file (AUDIT_QUARANTINE_PATH) instead of being replayed
+forever.
+
+Retention: every entry gets a BSON `ts` date; a TTL index removes entries
+older than AUDIT_RETENTION_DAYS (0 keeps everything).
+"""
+
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH = int(os.environ.get("AUDIT_FLUSH_BATCH", "500"))
+FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "1.0"))
+MAX_PENDING = int(os.environ.get("AUDIT_MAX_PENDING", "50000"))
+RETENTION_DAYS = int(os.environ.get("AUDIT_RETENTION_DAYS", "365"))
+SPILL_PATH = Path(os.environ.get(
+    "AUDIT_SPILL_PATH",
+    str(Path(__file__).resolve().parent.parent / "logs" / "audit_spill.jsonl")
+))
+QUARANTINE_PATH = Path(os.environ.get(
+    "AUDIT_QUARANTINE_PATH", str(SPILL_PATH.with_name("audit_rejected.jsonl"))
+))
+
+DUPLICATE_KEY = 11000
+# Per-document write errors worth retrying (the server was stepping down / shutting down)
+TRANSIENT_CODES = {6, 7, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436}
+
+
+def _to_json(entry: Dict[str, Any]) -> str:
+    return json.dumps({k: v for k, v in entry.items() if k not in ("_id", "ts")}, default=str)
+
+
+def _from_json(line: str) -> Dict[str, Any]:
+    entry = json.loads(line)
+    entry["ts"] = _parse_ts(entry.get("created_at"))
+    return entry
+
+
+def _parse_ts(created_at: Optional[str]) -> datetime:
+    try:
+        return datetime.fromisoformat(created_at)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
+
+
+class AuditBuffer:
+    def __init__(
+        self,
+        batch_size: int = FLUSH_BATCH,
+        interval: float = FLUSH_INTERVAL,
+        max_pending: int = MAX_PENDING,
+        spill_path: Path = SPILL_PATH,
+        quarantine_path: Path = QUARANTINE_PATH
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.spill_path = spill_path
+        self.quarantine_path = quarantine_path
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._indexes_ready = False
+        self._stopping = False
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+
+    # ---------- write side ----------
+
+    def add(self, entry: Dict[str, Any]):
+        entry.setdefault("ts", _parse_ts(entry.get("created_at")))
+        if len(self.pending) >= self.max_pending:
+            # Mongo has been down long enough to fill memory: go straight to disk
+            self._spill([entry])
+            return
+        self.pending.append(entry)
+        if self._task is None:
+            self._start_flusher()
+        if self._wake is not None and len(self.pending) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Write everything buffered right now; returns entries written to Mongo."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        written = 0
+        async with self._flush_lock:
+            while self.pending:
+                batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+                before = self.written
+                retry = await self._insert(batch)
+                written += self.written - before
+                if retry:
+                    self._spill(retry)
+                if len(retry) == len(batch):
+                    # Mongo is down: don't try the rest now
+                    self.spill_remaining()
+                    break
+            if written and self.spill_path.exists():
+                await self.replay_spill()
+        return written
+
+    async def _insert(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert a batch; returns the entries to retry later (all of them when Mongo is down)."""
+        if not self._indexes_ready:
+            try:
+                await self.ensure_indexes()
+            except PyMongoError as e:
+                logger.warning(f"Audit log index creation failed: {e}")
+        retry: List[Dict[str, Any]] = []
+        rejected: List[Dict[str, Any]] = []
+        try:
+            await db.audit_logs.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything not listed in writeErrors is in
+            for error in (e.details or {}).get("writeErrors", []):
+                code = error.get("code")
+                if code == DUPLICATE_KEY:
+                    continue   # already written by an earlier, partly failed flush
+                entry = batch[error["index"]]
+                if code in TRANSIENT_CODES:
+                    retry.append(entry)
+                else:
+                    entry["audit_error"] = {"code": code, "errmsg": error.get("errmsg")}
+                    rejected.append(entry)
+            if retry or rejected:
+                logger.warning(f"Audit flush: {len(retry)} entries to retry, {len(rejected)} rejected "
+                               f"({(e.details or {}).get('writeErrors', [])[:1]})")
+                self.failed_flushes += 1
+        except PyMongoError as e:
+            logger.warning(f"Audit flush failed ({len(batch)} entries spilled): {e}")
+            self.failed_flushes += 1
+            return batch
+        if rejected:
+            self._quarantine(rejected)
+        for entry in batch:
+            entry.pop("_id", None)
+        self.written += len(batch) - len(retry) - len(rejected)
+        return retry
+
+    # ---------- spill file ----------
+
+    def _spill(self, entries: List[Dict[str, Any]]):
+        try:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write("".join(_to_json(e) + "\n" for e in entries))
+            self.spilled += len(entries)
+        except OSError as e:
+            logger.error(f"Audit spill to {self.spill_path} failed, {len(entries)} entries lost: {e}")
+
+    def _quarantine(self, entries: List[Dict[str, Any]]):
+        """Entries Mongo refuses outright: kept for inspection, never replayed."""
+        self.rejected += len(entries)
+        try:
+            self.quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.quarantine_path, "a", encoding="utf-8") as f:
+                f.write("".join(_to_json(e) + "\n" for e in entries))
+        except OSError as e:
+            logger.error(f"Audit quarantine to {self.quarantine_path} failed, {len(entries)} entries lost: {e}")
+
+    def spill_remaining(self):
+        """Move the whole in-memory buffer to the spill file."""
+        if self.pending:
+            entries = list(self.pending)
+            self.pending.clear()
+            self._spill(entries)
+
+    async def replay_spill(self) -> int:
+        """Insert spilled entries; the file is removed once all of them are in Mongo."""
+        if not self.spill_path.exists():
+            return 0
+        # Claim the file atomically; other workers appending keep writing a fresh one
+        replaying = self.spill_path.with_name(f"{self.spill_path.name}.replaying.{os.getpid()}")
+        try:
+            self.spill_path.replace(replaying)
+        except OSError as e:
+            logger.warning(f"Audit spill replay skipped: {e}")
+            return 0
+        return await self._replay_file(replaying)
+
+    async def _replay_file(self, replaying: Path) -> int:
+        with open(replaying, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        done = 0
+        for start in range(0, len(lines), self.batch_size):
+            chunk = lines[start:start + self.batch_size]
+            batch = []
+            for line in chunk:
+                try:
+                    batch.append(_from_json(line))
+                except ValueError:
+                    logger.warning("Audit spill: skipping corrupt line")
+            before = self.written
+            retry = await self._insert(batch) if batch else []
+            if batch and len(retry) == len(batch):
+                # Still down: put the rest back for next time
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    f.writelines(lines[start:])
+                break
+            if retry:
+                self._spill(retry)
+            done += self.written - before
+        replaying.unlink(missing_ok=True)
+        self.replayed += done
+        if done:
+            logger.info(f"Audit spill: replayed {done} entries")
+        return done
+
+    async def _adopt_orphans(self):
+        """Replay files left by a worker that died mid-replay."""
+        for path in self.spill_path.parent.glob(f"{self.spill_path.name}.replaying.*"):
+            try:
+                pid = int(path.name.rsplit(".", 1)[-1])
+                os.kill(pid, 0)
+                continue  # still alive and replaying
+            except (ValueError, ProcessLookupError):
+                pass
+            except PermissionError:
+                continue
+            await self._replay_file(path)
+
+    # ---------- lifecycle ----------
+
+    async def ensure_indexes(self):
+        if self._indexes_ready:
+            return
+        await db.audit_logs.create_index([("id", 1)], name="uniq_id", unique=True, sparse=True)
+        await db.audit_logs.create_index([("created_at", -1)])
+        await db.audit_logs.create_index([("module", 1), ("created_at", -1)])
+        await db.audit_logs.create_index([("user_id", 1), ("created_at", -1)])
+        await db.audit_logs.create_index([("school_id", 1), ("created_at", -1)])
+        await db.audit_logs.create_index([("action", 1), ("created_at", -1)])
+        if RETENTION_DAYS > 0:
+            try:
+                await db.audit_logs.create_index(
+                    [("ts", 1)], name="audit_ttl", expireAfterSeconds=RETENTION_DAYS * 86400
+                )
+            except PyMongoError:
+                # Retention period changed: update the existing TTL in place
+                await db.command({
+                    "collMod": "audit_logs",
+                    "index": {"name": "audit_ttl", "expireAfterSeconds": RETENTION_DAYS * 86400}
+                })
+        self._indexes_ready = True
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Audit flusher error: {e}")
+
+    def _start_flusher(self):
+        """Start the background flusher on the running loop (no-op outside one)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def start(self):
+        if self._task is not None:
+            return
+        try:
+            await self.ensure_indexes()
+        except PyMongoError as e:
+            logger.warning(f"Audit log index creation failed: {e}")
+        await self._adopt_orphans()
+        await self.replay_spill()
+        self._start_flusher()
+
+    async def stop(self):
+        """Let the flusher finish its current batch, then drain what is left."""
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        self.spill_remaining()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self.pending),
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "rejected": self.rejected,
+            "failed_flushes": self.failed_flushes,
+            "spill_file": str(self.spill_path) if self.spill_path.exists() else None,
+        }
+
+
+audit_buffer = AuditBuffer()
+
+
+def make_entry(user_id: str, action: str, module: str, details: dict = None,
+               ip_address: str = None, **extra) -> Dict[str, Any]:
+    """Audit document in the shape both log_audit() helpers always wrote."""
+    now = datetime.now(timezone.utc)
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "action": action,
+        "module": module,
+        "details": details or {},
+        "ip_address": ip_address,
+        **extra,
+        "created_at": now.isoformat(),
+        "ts": now
+    }
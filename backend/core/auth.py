@@ -4,10 +4,12 @@
 import jwt
 import bcrypt
 import os
+import asyncio
 from datetime import datetime, timezone, timedelta
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .database import db
+from .offload import run_cpu, CPU_WORKERS
 
 # JWT Settings
 # SECURITY: JWT_SECRET MUST be set in your .env file
@@ -38,6 +40,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+async def hash_password_async(password: str) -> str:
+    """hash_password() on the CPU pool - bcrypt costs ~250 ms and would stall the event loop"""
+    from services import cpu_tasks
+    return await run_cpu(cpu_tasks.bcrypt_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password() on the CPU pool"""
+    from services import cpu_tasks
+    return await run_cpu(cpu_tasks.bcrypt_check, plain_password, hashed_password)
+
+async def hash_passwords_async(passwords: list, rounds: int = 12) -> list:
+    """Hash many passwords at once, one chunk per CPU pool worker; order is preserved"""
+    from services import cpu_tasks
+    if not passwords:
+        return []
+    size = -(-len(passwords) // CPU_WORKERS)
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    results = await asyncio.gather(*[run_cpu(cpu_tasks.bcrypt_hash_many, chunk, rounds) for chunk in chunks])
+    return [hashed for chunk in results for hashed in chunk]
+
 def create_access_token(data: dict) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
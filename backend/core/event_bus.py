@@ -0,0 +1,358 @@
+"""
+event_bus.py - In-process pub/sub for live updates (SSE / WebSocket fan-out).
+
+Usage:
+    from core.event_bus import bus, sse_response
+
+    # Publisher (any route):
+    bus.publish(f"vehicle:{vehicle_id}", {"type": "vehicle_location", ...})
+
+    # Subscriber (SSE endpoint):
+    @router.get("/live/{vehicle_id}")
+    async def live(vehicle_id: str, request: Request):
+        sub = bus.subscribe(f"vehicle:{vehicle_id}")
+        return sse_response(sub, request)
+
+Each subscriber gets its own bounded queue. A slow client never blocks
+publishers: when its queue is full the oldest event is dropped.
+
+An event of type "subscribe" carrying {"topics": [...]} also adds those
+topics to every subscription that receives it (e.g. a user added to a chat
+group starts getting the group's messages without reconnecting).
+
+Cross-worker delivery:
+    With several uvicorn workers a publish on one worker must reach clients
+    connected to another. Set REDIS_URL (or EVENT_BUS_REDIS_URL) and call
+    `await bus.start()` on startup; every publish is then also forwarded over
+    one Redis pub/sub channel. Without Redis (or the redis package) the bus
+    stays in-process, which is correct for a single worker.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Try to import redis for cross-worker fan-out
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+SUBSCRIBER_QUEUE_SIZE = 100
+SSE_HEARTBEAT_SECONDS = 15
+REDIS_CHANNEL = "schooltino:events"
+REDIS_OUTBOX_SIZE = 10000
+REDIS_PUBLISH_BATCH = 500
+
+
+class Subscription:
+    """A subscriber's queue plus the topics it listens on."""
+
+    def __init__(self, bus: "EventBus", topics: Iterable[str], queue_size: int):
+        self.bus = bus
+        self.topics = set(topics)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    def push(self, topic: str, event: Dict[str, Any]):
+        if event.get("type") == "subscribe" and event.get("topics"):
+            self.bus.add_topics(self, event["topics"])
+        item = {"topic": topic, **event}
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Drop oldest so the client always sees the newest state
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+            self.queue.put_nowait(item)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event, or None on timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.bus.unsubscribe(self)
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        while not self.closed:
+            yield await self.queue.get()
+
+
+# ====================== BACKENDS ======================
+
+Deliver = Callable[[str, Dict[str, Any]], int]
+
+
+class LocalBackend:
+    """Single process: every subscriber is local, nothing to forward."""
+
+    name = "local"
+
+    async def start(self, deliver: Deliver):
+        pass
+
+    def send(self, topic: str, event: Dict[str, Any]):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class RedisBackend:
+    """
+    Forwards every publish over one Redis channel and delivers messages from
+    other workers locally. Publishing stays synchronous: messages go to a
+    bounded outbox that a writer task flushes in pipelined batches.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, channel: str = REDIS_CHANNEL, outbox_size: int = REDIS_OUTBOX_SIZE):
+        self.url = url
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self._outbox: Optional[asyncio.Queue] = None
+        self._outbox_size = outbox_size
+        self._redis = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self, deliver: Deliver):
+        self._redis = aioredis.from_url(self.url)
+        self._outbox = asyncio.Queue(maxsize=self._outbox_size)
+        self._tasks = [
+            asyncio.create_task(self._reader(deliver)),
+            asyncio.create_task(self._writer()),
+        ]
+        logger.info(f"Event bus forwarding via Redis channel {self.channel}")
+
+    def send(self, topic: str, event: Dict[str, Any]):
+        if self._outbox is None:
+            return
+        message = json.dumps({"o": self.origin, "t": topic, "e": event}, default=str)
+        try:
+            self._outbox.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _writer(self):
+        while True:
+            batch = [await self._outbox.get()]
+            while len(batch) < REDIS_PUBLISH_BATCH and not self._outbox.empty():
+                batch.append(self._outbox.get_nowait())
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                for message in batch:
+                    pipe.publish(self.channel, message)
+                await pipe.execute()
+                self.sent += len(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.warning(f"Event bus Redis publish failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _reader(self, deliver: Deliver):
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("o") == self.origin:
+                        continue
+                    self.received += 1
+                    deliver(payload["t"], payload["e"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event bus Redis subscription lost, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "sent": self.sent,
+            "received": self.received,
+            "dropped": self.dropped,
+            "outbox": self._outbox.qsize() if self._outbox else 0,
+        }
+
+
+def backend_from_env():
+    """RedisBackend when REDIS_URL is configured and redis is installed, else LocalBackend."""
+    url = os.environ.get("EVENT_BUS_REDIS_URL") or os.environ.get("REDIS_URL")
+    if not url:
+        return LocalBackend()
+    if not REDIS_AVAILABLE:
+        logger.warning("REDIS_URL is set but the redis package is not installed; event bus stays in-process")
+        return LocalBackend()
+    return RedisBackend(url)
+
+
+# ====================== BUS ======================
+
+class EventBus:
+    """Topic based fan-out to in-process subscribers, optionally mirrored to other workers."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, backend=None):
+        self.queue_size = queue_size
+        self.backend = backend or LocalBackend()
+        self._topics: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._started = False
+
+    async def start(self, backend=None):
+        """Attach the cross-worker backend (from env unless given). Call once on app startup."""
+        if self._started:
+            return
+        backend = backend or backend_from_env()
+        try:
+            await backend.start(self._deliver)
+            self.backend = backend
+        except Exception as e:
+            logger.error(f"Event bus backend {backend.name} failed to start, staying in-process: {e}")
+            self.backend = LocalBackend()
+        self._started = True
+
+    async def stop(self):
+        if self._started:
+            await self.backend.stop()
+            self.backend = LocalBackend()
+            self._started = False
+
+    def subscribe(self, *topics: str, queue_size: Optional[int] = None) -> Subscription:
+        sub = Subscription(self, topics, queue_size or self.queue_size)
+        for topic in sub.topics:
+            self._topics[topic].add(sub)
+        return sub
+
+    def add_topics(self, sub: Subscription, topics: Iterable[str]):
+        if sub.closed:
+            return
+        for topic in topics:
+            if topic not in sub.topics:
+                sub.topics.add(topic)
+                self._topics[topic].add(sub)
+
+    def unsubscribe(self, sub: Subscription):
+        for topic in sub.topics:
+            subs = self._topics.get(topic)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self._topics[topic]
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> int:
+        """Deliver to every subscriber of topic. Never blocks; returns local receiver count."""
+        self.backend.send(topic, event)
+        return self._deliver(topic, event)
+
+    def _deliver(self, topic: str, event: Dict[str, Any]) -> int:
+        subs = self._topics.get(topic)
+        if not subs:
+            return 0
+        for sub in list(subs):
+            sub.push(topic, event)
+        return len(subs)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._topics.get(topic))
+
+    def stats(self) -> Dict[str, Any]:
+        subs = set()
+        for topic_subs in self._topics.values():
+            subs.update(topic_subs)
+        return {"topics": len(self._topics), "subscribers": len(subs), **self.backend.stats()}
+
+
+bus = EventBus()
+
+
+# ====================== SSE ======================
+
+def sse_format(event: Dict[str, Any]) -> str:
+    name = event.get("type", "message")
+    return f"event: {name}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def _sse_events(
+    sub: Subscription,
+    request: Request,
+    initial: Optional[Iterable[Dict[str, Any]]],
+    heartbeat: int
+) -> AsyncIterator[str]:
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        for event in initial or []:
+            yield sse_format(event)
+        while True:
+            if await request.is_disconnected():
+                break
+            event = await sub.get(timeout=heartbeat)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield sse_format(event)
+    finally:
+        sub.close()
+
+
+def sse_response(
+    sub: Subscription,
+    request: Request,
+    initial: Optional[Iterable[Dict[str, Any]]] = None,
+    heartbeat: int = SSE_HEARTBEAT_SECONDS
+) -> StreamingResponse:
+    """Stream a subscription as text/event-stream. The subscription is closed on disconnect."""
+    return StreamingResponse(
+        _sse_events(sub, request, initial, heartbeat),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -0,0 +1,245 @@
+"""
+live_events.py - Topic naming + publish helpers for the per-user live channel.
+
+Write paths call these right after their insert/update so connected dashboards
+get the change pushed instead of polling:
+
+    from core.live_events import publish_notification, publish_attendance
+    await db.notifications.insert_one(notification)
+    publish_notification(notification)
+
+A client connected to /api/live/stream (or /api/live/ws) is subscribed to the
+topics returned by topics_for_user(): its own user topic, its school, its
+role within the school, its class / children, its chat groups and, for staff,
+the school's attendance and alert feeds.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.constants import UserRole
+from core.event_bus import bus
+
+# Roles that see the school-wide alert feed ("admin" is the legacy role name)
+ALERT_ROLES = set(UserRole.ADMIN_ROLES) | {"admin"}
+# Roles that see every attendance change in the school
+ATTENDANCE_ROLES = set(UserRole.STAFF_ROLES) | {"admin"}
+
+# Notice target_audience → roles it is pushed to
+AUDIENCE_ROLES = {
+    "teachers": ["teacher", "principal", "vice_principal", "director", "co_director"],
+    "students": ["student"],
+    "parents": ["parent"],
+    "staff": list(UserRole.STAFF_ROLES),
+}
+
+
+# ====================== TOPICS ======================
+
+def user_topic(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def school_topic(school_id: str) -> str:
+    return f"school:{school_id}"
+
+
+def role_topic(school_id: str, role: str) -> str:
+    return f"school:{school_id}:role:{role}"
+
+
+def class_topic(class_id: str) -> str:
+    return f"class:{class_id}"
+
+
+def student_topic(student_id: str) -> str:
+    return f"student:{student_id}"
+
+
+def group_topic(group_id: str) -> str:
+    return f"group:{group_id}"
+
+
+def attendance_topic(school_id: str) -> str:
+    return f"school:{school_id}:attendance"
+
+
+def alerts_topic(school_id: str) -> str:
+    return f"school:{school_id}:alerts"
+
+
+def topics_for_user(user: Dict[str, Any], group_ids: Iterable[str] = ()) -> List[str]:
+    """Every topic a connected user should receive."""
+    role = user.get("role")
+    school_id = user.get("school_id")
+    topics = [user_topic(user["id"])]
+    if school_id:
+        topics.append(school_topic(school_id))
+        if role:
+            topics.append(role_topic(school_id, role))
+        if role in ATTENDANCE_ROLES:
+            topics.append(attendance_topic(school_id))
+        if role in ALERT_ROLES:
+            topics.append(alerts_topic(school_id))
+
+    if role == "student":
+        topics.append(student_topic(user["id"]))
+        if user.get("class_id"):
+            topics.append(class_topic(user["class_id"]))
+    elif role == "parent":
+        topics.extend(student_topic(sid) for sid in user.get("student_ids", []))
+        topics.extend(class_topic(cid) for cid in user.get("class_ids", []))
+
+    topics.extend(group_topic(gid) for gid in group_ids)
+    return list(dict.fromkeys(topics))
+
+
+# ====================== PUBLISHERS ======================
+
+def _publish(topics: Iterable[str], event: Dict[str, Any]) -> int:
+    return sum(bus.publish(topic, event) for topic in dict.fromkeys(topics))
+
+
+def publish_notification(notification: Dict[str, Any]) -> int:
+    """
+    Route a notifications document to whoever it targets. The collection is
+    written with several shapes (target_user_id / user_id / user_ids /
+    student_id / class_id / target_roles); a document with no target is a
+    school-wide broadcast.
+    """
+    school_id = notification.get("school_id")
+    event = {
+        "type": "notification",
+        "id": notification.get("id"),
+        "school_id": school_id,
+        "title": notification.get("title"),
+        "message": notification.get("message"),
+        "notification_type": notification.get("type"),
+        "priority": notification.get("priority"),
+        "data": notification.get("data"),
+        "created_at": notification.get("created_at"),
+    }
+
+    topics = []
+    for key in ("target_user_id", "user_id"):
+        if notification.get(key):
+            topics.append(user_topic(notification[key]))
+    topics.extend(user_topic(uid) for uid in notification.get("user_ids") or [])
+    if notification.get("student_id"):
+        topics.append(student_topic(notification["student_id"]))
+    if notification.get("class_id"):
+        topics.append(class_topic(notification["class_id"]))
+    if school_id:
+        topics.extend(role_topic(school_id, role) for role in notification.get("target_roles") or [])
+        if not topics:
+            topics.append(school_topic(school_id))
+    return _publish(topics, event)
+
+
+def publish_notice(notice: Dict[str, Any]) -> int:
+    """Push a new notice to the audiences it targets."""
+    school_id = notice.get("school_id")
+    if not school_id:
+        return 0
+    event = {
+        "type": "notice",
+        "id": notice.get("id"),
+        "school_id": school_id,
+        "title": notice.get("title"),
+        "content": (notice.get("content") or "")[:280],
+        "priority": notice.get("priority"),
+        "target_audience": notice.get("target_audience"),
+        "is_popup": notice.get("is_popup", False),
+        "created_at": notice.get("created_at"),
+    }
+    audience = notice.get("target_audience") or ["all"]
+    if "all" in audience:
+        return _publish([school_topic(school_id)], event)
+    topics = [role_topic(school_id, role) for a in audience for role in AUDIENCE_ROLES.get(a, [])]
+    return _publish(topics, event)
+
+
+def publish_alert(alert: Dict[str, Any]) -> int:
+    """Push a tino_alerts document to the school's admin dashboards."""
+    if not alert.get("school_id"):
+        return 0
+    event = {
+        **{k: alert.get(k) for k in ("id", "school_id", "priority", "title",
+                                      "description", "location", "camera_id", "created_at")},
+        "type": "alert",
+        "alert_type": alert.get("type"),
+    }
+    return _publish([alerts_topic(alert["school_id"])], event)
+
+
+def publish_attendance(
+    school_id: str,
+    date: str,
+    records: List[Dict[str, Any]],
+    class_id: Optional[str] = None,
+    source: str = "manual"
+) -> int:
+    """
+    One summary event for the school's attendance feed plus a per-student event
+    (students / parents see their own status flip live).
+    """
+    if not school_id or not records:
+        return 0
+    counts: Dict[str, int] = {}
+    for r in records:
+        status = r.get("status", "present")
+        counts[status] = counts.get(status, 0) + 1
+    delivered = bus.publish(attendance_topic(school_id), {
+        "type": "attendance",
+        "school_id": school_id,
+        "class_id": class_id,
+        "date": date,
+        "source": source,
+        "count": len(records),
+        "status_counts": counts,
+        "records": records if len(records) <= 50 else None,
+    })
+    for r in records:
+        if r.get("student_id"):
+            delivered += bus.publish(student_topic(r["student_id"]), {
+                "type": "attendance",
+                "school_id": school_id,
+                "student_id": r["student_id"],
+                "date": date,
+                "status": r.get("status"),
+                "source": source,
+            })
+    return delivered
+
+
+def publish_punch(punch: Dict[str, Any]) -> int:
+    """Biometric punch → attendance feed (+ the student's own topic)."""
+    school_id = punch.get("school_id")
+    if not school_id:
+        return 0
+    event = {
+        "type": "biometric_punch",
+        **{k: punch.get(k) for k in ("id", "school_id", "person_id", "person_name", "person_type",
+                                      "device_id", "punch_type", "date", "timestamp")},
+    }
+    topics = [attendance_topic(school_id)]
+    if punch.get("person_type") == "student":
+        topics.append(student_topic(punch["person_id"]))
+    else:
+        topics.append(user_topic(punch["person_id"]))
+    return _publish(topics, event)
+
+
+def publish_group_joined(group: Dict[str, Any], member_ids: Iterable[str]) -> int:
+    """Tell connected members about a chat group; their live subscription picks up its topic."""
+    event = {
+        "type": "subscribe",
+        "topics": [group_topic(group["id"])],
+        "group_id": group["id"],
+        "group_name": group.get("name"),
+    }
+    return _publish((user_topic(uid) for uid in member_ids), event)
+
+
+def publish_chat_message(message: Dict[str, Any]) -> int:
+    """New group chat message → every connected member of the group."""
+    return bus.publish(group_topic(message["group_id"]), {"type": "chat_message", **message})
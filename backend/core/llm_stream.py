@@ -0,0 +1,90 @@
+"""
+llm_stream.py - Stream AI endpoint output over Server-Sent Events.
+
+    from core.llm_stream import sse_stream, token_event, status_event, result_event
+
+    @router.post("/summarize/stream")
+    async def summarize_stream(request: SummaryRequest):
+        async def events():
+            parts = []
+            async for text in chat.stream_message(UserMessage(text=prompt)):
+                parts.append(text)
+                yield token_event(text)
+            yield result_event({"summary": "".join(parts)})
+        return sse_stream("chapter-summary", events())
+
+Events (text/event-stream, `event:` is the type, `data:` the JSON object):
+- token   {"type": "token", "text": "..."}        - model output as it arrives
+- status  {"type": "status", "message": "..."}    - a slow step with no tokens
+- result  {"type": "result", ...}                 - the structured final payload,
+                                                    same fields as the JSON endpoint
+- error   {"type": "error", "status": 500, "detail": "..."}
+- done    {"type": "done", "first_token_ms": ..., "total_ms": ...}   - always last
+
+Checks that can fail before any output (auth, missing API key) should stay
+in the route as HTTPExceptions; anything raised once streaming has started
+becomes an `error` event. Time from the call to sse_stream() to the first
+token is recorded as ai_first_token_seconds{source=<name>}.
+"""
+
+from typing import Any, AsyncIterator, Dict, Optional
+import logging
+import time
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTasks
+
+from .event_bus import sse_format
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def token_event(text: str) -> Dict[str, Any]:
+    return {"type": "token", "text": text}
+
+
+def status_event(message: str) -> Dict[str, Any]:
+    return {"type": "status", "message": message}
+
+
+def result_event(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {**payload, "type": "result"}
+
+
+async def _frames(name: str, events: AsyncIterator[Dict[str, Any]], started: float) -> AsyncIterator[str]:
+    first_token = None
+    try:
+        async for event in events:
+            if first_token is None and event.get("type") == "token":
+                first_token = time.perf_counter() - started
+                metrics.observe_first_token(name, first_token)
+            yield sse_format(event)
+    except HTTPException as e:
+        yield sse_format({"type": "error", "status": e.status_code, "detail": e.detail})
+    except Exception as e:
+        logger.error(f"{name} stream failed: {e}")
+        yield sse_format({"type": "error", "status": 500, "detail": str(e)})
+    yield sse_format({
+        "type": "done",
+        "first_token_ms": round(first_token * 1000) if first_token is not None else None,
+        "total_ms": round((time.perf_counter() - started) * 1000)
+    })
+
+
+def sse_stream(name: str, events: AsyncIterator[Dict[str, Any]],
+               background: Optional[BackgroundTasks] = None) -> StreamingResponse:
+    """
+    Serve an async iterator of event dicts as text/event-stream (see module
+    docstring). `background` tasks run once the stream has finished.
+    """
+    return StreamingResponse(
+        _frames(name, events, time.perf_counter()),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+        background=background
+    )
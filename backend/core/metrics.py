@@ -0,0 +1,552 @@
+"""
+metrics.py - Request-level performance instrumentation.
+
+    from core import metrics                          # before any Motor client exists
+    app.add_middleware(metrics.MetricsMiddleware)     # latency / in-flight / errors
+
+    @app.get("/metrics")
+    async def prometheus_metrics(authorization: Optional[str] = Header(None)):
+        return metrics.prometheus_response(authorization)
+
+What is recorded:
+- per route template (/api/students/{student_id}, not the raw path):
+  latency histogram, request count by status, errors (5xx + unhandled)
+- requests in flight
+- Mongo commands issued while serving each route, by collection and
+  command, plus a histogram of commands per request - endpoints with a
+  high p99 here are the N+1 loops
+- AI provider calls (core/ai_cheap.py): latency and outcome per provider
+- Streamed AI responses: time to first token, per provider stream and per
+  SSE endpoint (core/llm_stream.py)
+- core.offload: calls in flight and duration per pool, event-loop lag and
+  stalls (LoopMonitor)
+- Local intent routing (services/intent_router.py): utterances answered
+  without the LLM vs sent to it, per router
+- CCTV frame gate (services/cctv_gate.py): frames by outcome (dropped as
+  duplicate / no motion / no face, sent on for matching, rejected when a
+  camera's queue is full)
+- Enrollment photo quality (services/photo_quality.py): photos judged by
+  the local analyzer vs sent on to the vision API as ambiguous
+
+Requests slower than SLOW_REQUEST_MS are logged with their Mongo breakdown.
+
+The Mongo listener is registered globally with pymongo, which only applies
+to clients created afterwards - install() runs when this module is imported
+and core/__init__.py imports it before core.database. Motor runs pymongo on
+a thread pool with the caller's context copied, so the listener sees the
+request that issued the command; commands outside a request are counted
+under route="<background>".
+
+Output is the Prometheus text format, written by hand (no client library).
+"""
+
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import contextlib
+import functools
+import logging
+import os
+import threading
+import time
+
+from fastapi.responses import PlainTextResponse
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "1000"))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+AI_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+BACKGROUND = "<background>"
+UNMATCHED = "<unmatched>"
+
+# Driver bookkeeping, not application queries
+_IGNORED_COMMANDS = frozenset({
+    "hello", "ismaster", "isMaster", "ping", "buildInfo", "buildinfo", "endSessions",
+    "saslStart", "saslContinue", "authenticate", "getnonce", "killCursors",
+})
+
+
+# ====================== PRIMITIVES ======================
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+class _RequestStats:
+    """Mongo work done while serving one request."""
+
+    __slots__ = ("queries", "mongo_seconds", "breakdown", "failures")
+
+    def __init__(self):
+        self.queries = 0
+        self.mongo_seconds = 0.0
+        self.breakdown: Dict[Tuple[str, str], List[float]] = {}   # (collection, command) → [count, seconds]
+        self.failures: List[Tuple[str, str]] = []
+
+    def add(self, collection: str, command: str, seconds: float):
+        self.queries += 1
+        self.mongo_seconds += seconds
+        entry = self.breakdown.get((collection, command))
+        if entry is None:
+            self.breakdown[(collection, command)] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def top(self, n: int = 8) -> List[str]:
+        ranked = sorted(self.breakdown.items(), key=lambda kv: -kv[1][1])[:n]
+        return [f"{coll}.{cmd} x{int(c)} {s * 1000:.1f}ms" for (coll, cmd), (c, s) in ranked]
+
+
+_current: ContextVar[Optional[_RequestStats]] = ContextVar("metrics_request", default=None)
+
+
+# ====================== REGISTRY ======================
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.requests: Dict[Tuple[str, str, str], int] = {}            # (method, route, status)
+        self.latency: Dict[Tuple[str, str], _Histogram] = {}           # (method, route)
+        self.errors: Dict[Tuple[str, str, str], int] = {}              # (method, route, kind)
+        self.route_queries: Dict[Tuple[str, str], _Histogram] = {}     # (method, route) → commands/request
+        self.mongo: Dict[Tuple[str, str, str], List[float]] = {}       # (route, collection, command) → [count, seconds]
+        self.mongo_failures: Dict[Tuple[str, str, str], int] = {}
+        self.ai: Dict[Tuple[str, str], _Histogram] = {}                # (provider, outcome)
+        self.first_token: Dict[Tuple[str], _Histogram] = {}            # (source,) provider or stream name
+        self.slow_requests = 0
+        self.offload_in_flight: Dict[str, int] = {}
+        self.offload: Dict[Tuple[str], _Histogram] = {}                # (pool,)
+        self.loop_lag = _Histogram(LOOP_LAG_BUCKETS)
+        self.loop_stalls = 0
+        self.intent_routes: Dict[Tuple[str, str], int] = {}           # (router, outcome)
+        self.cctv_frames: Dict[Tuple[str], int] = {}                   # (outcome,)
+        self.photo_quality: Dict[Tuple[str], int] = {}                 # (analyzer,)
+
+    def record_request(self, method: str, route: str, status: int, seconds: float,
+                       stats: _RequestStats, exception: bool):
+        with self.lock:
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            hist = self.latency.get((method, route))
+            if hist is None:
+                hist = self.latency[(method, route)] = _Histogram(LATENCY_BUCKETS)
+            hist.observe(seconds)
+            if exception or status >= 500:
+                kind = "exception" if exception else "5xx"
+                self.errors[(method, route, kind)] = self.errors.get((method, route, kind), 0) + 1
+            queries = self.route_queries.get((method, route))
+            if queries is None:
+                queries = self.route_queries[(method, route)] = _Histogram(QUERY_COUNT_BUCKETS)
+            queries.observe(stats.queries)
+            for (collection, command), (count, secs) in stats.breakdown.items():
+                entry = self.mongo.setdefault((route, collection, command), [0, 0.0])
+                entry[0] += count
+                entry[1] += secs
+            for collection, command in stats.failures:
+                key = (route, collection, command)
+                self.mongo_failures[key] = self.mongo_failures.get(key, 0) + 1
+
+    def record_background_command(self, collection: str, command: str, seconds: float):
+        with self.lock:
+            entry = self.mongo.setdefault((BACKGROUND, collection, command), [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def record_background_failure(self, collection: str, command: str):
+        with self.lock:
+            key = (BACKGROUND, collection, command)
+            self.mongo_failures[key] = self.mongo_failures.get(key, 0) + 1
+
+    def record_ai(self, provider: str, seconds: float, ok: bool):
+        with self.lock:
+            key = (provider, "ok" if ok else "error")
+            hist = self.ai.get(key)
+            if hist is None:
+                hist = self.ai[key] = _Histogram(AI_BUCKETS)
+            hist.observe(seconds)
+
+    def record_first_token(self, source: str, seconds: float):
+        with self.lock:
+            hist = self.first_token.get((source,))
+            if hist is None:
+                hist = self.first_token[(source,)] = _Histogram(AI_BUCKETS)
+            hist.observe(seconds)
+
+    def record_offload(self, pool: str, seconds: float):
+        with self.lock:
+            self.offload_in_flight[pool] -= 1
+            hist = self.offload.get((pool,))
+            if hist is None:
+                hist = self.offload[(pool,)] = _Histogram(LATENCY_BUCKETS)
+            hist.observe(seconds)
+
+    def record_loop_lag(self, seconds: float, stalled: bool):
+        with self.lock:
+            self.loop_lag.observe(seconds)
+            if stalled:
+                self.loop_stalls += 1
+
+    def record_intent_route(self, router: str, outcome: str):
+        with self.lock:
+            key = (router, outcome)
+            self.intent_routes[key] = self.intent_routes.get(key, 0) + 1
+
+    def record_cctv_frame(self, outcome: str):
+        with self.lock:
+            key = (outcome,)
+            self.cctv_frames[key] = self.cctv_frames.get(key, 0) + 1
+
+    def record_photo_quality(self, analyzer: str):
+        with self.lock:
+            key = (analyzer,)
+            self.photo_quality[key] = self.photo_quality.get(key, 0) + 1
+
+
+registry = _Registry()
+
+
+# ====================== MONGO LISTENER ======================
+
+def _collection_of(event: monitoring.CommandStartedEvent) -> str:
+    value = event.command.get(event.command_name)
+    if isinstance(value, str):
+        return value
+    # getMore carries the cursor id; the collection is a separate field
+    return event.command.get("collection") or "-"
+
+
+class _CommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self._pending: Dict[Tuple[int, Any], Tuple[str, str]] = {}
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        self._pending[(event.request_id, event.connection_id)] = (_collection_of(event), event.command_name)
+
+    def succeeded(self, event):
+        key = self._pending.pop((event.request_id, event.connection_id), None)
+        if key is None:
+            return
+        seconds = event.duration_micros / 1e6
+        stats = _current.get()
+        if stats is not None:
+            stats.add(key[0], key[1], seconds)
+        else:
+            registry.record_background_command(key[0], key[1], seconds)
+
+    def failed(self, event):
+        key = self._pending.pop((event.request_id, event.connection_id), None)
+        if key is None:
+            return
+        stats = _current.get()
+        if stats is not None:
+            stats.add(key[0], key[1], event.duration_micros / 1e6)
+            stats.failures.append(key)
+        else:
+            registry.record_background_failure(key[0], key[1])
+
+
+_listener: Optional[_CommandListener] = None
+
+
+def install():
+    """Register the Mongo command listener (idempotent). Clients created earlier are not instrumented."""
+    global _listener
+    if _listener is None:
+        _listener = _CommandListener()
+        monitoring.register(_listener)
+
+
+install()
+
+
+# ====================== HTTP MIDDLEWARE ======================
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    root = scope.get("root_path", "")
+    if root:
+        return root + "/*"          # mounted static files
+    return UNMATCHED
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streaming responses are not buffered."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+        token = _current.set(stats)
+        status_holder = [500]
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        exception = False
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            exception = True
+            raise
+        finally:
+            registry.in_flight -= 1
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            method = scope.get("method", "GET")
+            route = _route_label(scope)
+            registry.record_request(method, route, status_holder[0], elapsed, stats, exception)
+            if elapsed * 1000 >= SLOW_REQUEST_MS:
+                registry.slow_requests += 1
+                logger.warning(
+                    f"Slow request {method} {route} {status_holder[0]}: {elapsed * 1000:.0f} ms, "
+                    f"{stats.queries} mongo commands ({stats.mongo_seconds * 1000:.0f} ms) "
+                    f"[{', '.join(stats.top())}]"
+                )
+
+
+# ====================== AI TIMINGS ======================
+
+def observe_ai(provider: str, seconds: float, ok: bool):
+    registry.record_ai(provider, seconds, ok)
+
+
+def track_ai(provider: str, enabled: Callable[[], bool] = lambda: True):
+    """
+    Time an async provider call. The ai_cheap helpers swallow their own
+    errors and return None, so a None result counts as an error. Calls
+    skipped because the provider is not configured (enabled() false) are
+    not recorded.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not enabled():
+                return await fn(*args, **kwargs)
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = await fn(*args, **kwargs)
+                ok = result is not None
+                return result
+            finally:
+                observe_ai(provider, time.perf_counter() - started, ok)
+        return wrapper
+    return decorator
+
+
+def observe_first_token(source: str, seconds: float):
+    registry.record_first_token(source, seconds)
+
+
+def track_ai_stream(provider: str, enabled: Callable[[], bool] = lambda: True):
+    """
+    track_ai() for async generators: records time to the first item under
+    ai_first_token_seconds and the whole stream under ai_request_duration_seconds.
+    A stream that yields nothing counts as an error.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> AsyncIterator[Any]:
+            if not enabled():
+                async for item in fn(*args, **kwargs):
+                    yield item
+                return
+            started = time.perf_counter()
+            first = True
+            try:
+                async for item in fn(*args, **kwargs):
+                    if first:
+                        observe_first_token(provider, time.perf_counter() - started)
+                        first = False
+                    yield item
+            finally:
+                observe_ai(provider, time.perf_counter() - started, not first)
+        return wrapper
+    return decorator
+
+
+# ====================== OFFLOAD / LOOP ======================
+
+@contextlib.contextmanager
+def track_offload(pool: str):
+    with registry.lock:
+        registry.offload_in_flight[pool] = registry.offload_in_flight.get(pool, 0) + 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.record_offload(pool, time.perf_counter() - started)
+
+
+def observe_loop_lag(seconds: float, stalled: bool):
+    registry.record_loop_lag(seconds, stalled)
+
+
+def observe_intent_route(router: str, outcome: str):
+    """outcome: "direct" (answered locally), "command" (voice command) or "llm"."""
+    registry.record_intent_route(router, outcome)
+
+
+def observe_cctv_frame(outcome: str):
+    """outcome: duplicate, no_motion, no_faces, unidentifiable, repeat_faces, faces, forward or rejected."""
+    registry.record_cctv_frame(outcome)
+
+
+def observe_photo_quality(analyzer: str):
+    """analyzer: "local" (decided without the vision API) or "vision" (ambiguous or face not verified, sent on)."""
+    registry.record_photo_quality(analyzer)
+
+
+# ====================== EXPOSITION ======================
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_INF_LE = 'le="+Inf"'
+
+
+def _histogram_lines(name: str, label_names: Tuple[str, ...],
+                     series: Dict[Tuple[str, ...], _Histogram]) -> List[str]:
+    lines = []
+    for values, hist in sorted(series.items()):
+        running = 0
+        for bound, n in zip(hist.buckets, hist.counts):
+            running += n
+            le = 'le="' + _fmt(float(bound)) + '"'
+            lines.append(f"{name}_bucket{_labels(label_names, values, le)} {running}")
+        lines.append(f"{name}_bucket{_labels(label_names, values, _INF_LE)} {hist.count}")
+        lines.append(f"{name}_sum{_labels(label_names, values)} {_fmt(hist.sum)}")
+        lines.append(f"{name}_count{_labels(label_names, values)} {hist.count}")
+    return lines
+
+
+def render_prometheus() -> str:
+    r = registry
+    out: List[str] = []
+
+    def header(name, kind, help_text):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+
+    with r.lock:
+        header("http_requests_in_flight", "gauge", "Requests currently being served")
+        out.append(f"http_requests_in_flight {r.in_flight}")
+
+        header("http_requests_total", "counter", "Requests by route template and status")
+        for key, n in sorted(r.requests.items()):
+            out.append(f"http_requests_total{_labels(('method', 'route', 'status'), key)} {n}")
+
+        header("http_request_errors_total", "counter", "5xx responses and unhandled exceptions")
+        for key, n in sorted(r.errors.items()):
+            out.append(f"http_request_errors_total{_labels(('method', 'route', 'kind'), key)} {n}")
+
+        header("http_request_duration_seconds", "histogram", "Request latency by route template")
+        out.extend(_histogram_lines("http_request_duration_seconds", ("method", "route"), r.latency))
+
+        header("http_request_mongo_commands", "histogram", "Mongo commands issued per request")
+        out.extend(_histogram_lines("http_request_mongo_commands", ("method", "route"), r.route_queries))
+
+        header("http_slow_requests_total", "counter", f"Requests slower than {SLOW_REQUEST_MS:.0f} ms")
+        out.append(f"http_slow_requests_total {r.slow_requests}")
+
+        header("mongo_commands_total", "counter", "Mongo commands by route, collection and command")
+        for key, (n, _) in sorted(r.mongo.items()):
+            out.append(f"mongo_commands_total{_labels(('route', 'collection', 'command'), key)} {int(n)}")
+
+        header("mongo_command_seconds_total", "counter", "Time spent in Mongo commands")
+        for key, (_, secs) in sorted(r.mongo.items()):
+            out.append(f"mongo_command_seconds_total{_labels(('route', 'collection', 'command'), key)} {_fmt(secs)}")
+
+        header("mongo_command_failures_total", "counter", "Mongo commands that returned an error")
+        for key, n in sorted(r.mongo_failures.items()):
+            out.append(f"mongo_command_failures_total{_labels(('route', 'collection', 'command'), key)} {n}")
+
+        header("ai_request_duration_seconds", "histogram", "AI provider call latency")
+        out.extend(_histogram_lines("ai_request_duration_seconds", ("provider", "outcome"), r.ai))
+
+        header("ai_first_token_seconds", "histogram", "Time to first streamed token, per provider and per SSE endpoint")
+        out.extend(_histogram_lines("ai_first_token_seconds", ("source",), r.first_token))
+
+        header("offload_in_flight", "gauge", "Blocking calls queued or running on the offload pools")
+        for pool, n in sorted(r.offload_in_flight.items()):
+            out.append(f"offload_in_flight{_labels(('pool',), (pool,))} {n}")
+
+        header("offload_duration_seconds", "histogram", "Offloaded call time including queueing")
+        out.extend(_histogram_lines("offload_duration_seconds", ("pool",), r.offload))
+
+        header("event_loop_lag_seconds", "histogram", "Heartbeat delay of the event loop")
+        out.extend(_histogram_lines("event_loop_lag_seconds", (), {(): r.loop_lag}))
+
+        header("event_loop_stalls_total", "counter", "Times the event loop was blocked past the stall threshold")
+        out.append(f"event_loop_stalls_total {r.loop_stalls}")
+
+        header("intent_routes_total", "counter", "Utterances answered by the local intent router vs sent to the LLM")
+        for key, n in sorted(r.intent_routes.items()):
+            out.append(f"intent_routes_total{_labels(('router', 'outcome'), key)} {n}")
+
+        header("cctv_frames_total", "counter", "CCTV frames by gate outcome (only faces / forward reach matching or the vision API)")
+        for key, n in sorted(r.cctv_frames.items()):
+            out.append(f"cctv_frames_total{_labels(('outcome',), key)} {n}")
+
+        header("photo_quality_checks_total", "counter", "Enrollment photo quality checks by analyzer (local vs vision API)")
+        for key, n in sorted(r.photo_quality.items()):
+            out.append(f"photo_quality_checks_total{_labels(('analyzer',), key)} {n}")
+
+    return "\n".join(out) + "\n"
+
+
+def prometheus_response(authorization: Optional[str] = None) -> PlainTextResponse:
+    """/metrics body; when METRICS_TOKEN is set the scraper must send it as a bearer token."""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        return PlainTextResponse("unauthorized\n", status_code=401)
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
@@ -0,0 +1,238 @@
+"""
+offload.py - Keep blocking work off the event loop.
+
+    from core.offload import run_io, iterate_io, run_cpu
+    from services import cpu_tasks
+
+    audio = await run_io(eleven_client.text_to_speech.convert, text=text, voice_id=voice)
+    hashed = await run_cpu(cpu_tasks.bcrypt_hash, password)
+    async for chunk in iterate_io(lambda: client.stream(...)):   # sync generator
+        ...
+
+- run_io(): blocking I/O (sync SDK clients: ElevenLabs, Razorpay, ...) on a
+  bounded thread pool, sized by OFFLOAD_IO_WORKERS; the caller's contextvars
+  are copied so metrics attribution still works
+- iterate_io(): a blocking iterator (streamed SDK response) pumped from an
+  I/O worker thread, items yielded to the caller as they arrive
+- run_cpu(): CPU-bound work (bcrypt, QR rendering, XLSX parsing) on a spawn
+  process pool, sized by OFFLOAD_CPU_WORKERS. Targets must be module-level
+  and picklable - keep them in services/cpu_tasks.py, which imports nothing
+  from the app. If the pool breaks (a worker killed by the OOM killer) it is
+  rebuilt and the call is retried once
+- LoopMonitor: a heartbeat task plus a watchdog thread. When the loop misses
+  its beat by more than LOOP_STALL_MS the watchdog grabs the loop thread's
+  stack, and the stall is logged with that stack once the loop comes back,
+  so the log names the callback that blocked
+
+Started and stopped from server.py (startup_offload / shutdown_db_client).
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import traceback
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+IO_WORKERS = int(os.environ.get("OFFLOAD_IO_WORKERS", "32"))
+CPU_WORKERS = int(os.environ.get("OFFLOAD_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOOP_STALL_MS = float(os.environ.get("LOOP_STALL_MS", "100"))
+
+_io_pool: Optional[ThreadPoolExecutor] = None
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+
+
+# ====================== POOLS ======================
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    with _lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="offload-io")
+        return _io_pool
+
+
+def _get_cpu_pool() -> ProcessPoolExecutor:
+    global _cpu_pool
+    with _lock:
+        if _cpu_pool is None:
+            # spawn: workers must not inherit the event loop / Motor threads
+            _cpu_pool = ProcessPoolExecutor(max_workers=CPU_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _cpu_pool
+
+
+def _reset_cpu_pool(broken: ProcessPoolExecutor):
+    global _cpu_pool
+    with _lock:
+        if _cpu_pool is broken:
+            _cpu_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_io(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call on the I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    with metrics.track_offload("io"):
+        return await loop.run_in_executor(_get_io_pool(), call)
+
+
+async def iterate_io(factory: Callable[[], Iterable[Any]]) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator (a sync SDK's streamed response) on the I/O
+    pool and yield its items here as they arrive. factory() is called in the
+    worker thread, so building the request doesn't block either. If the
+    consumer stops early the worker stops at its next item.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def pump():
+        try:
+            for item in factory():
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    worker = asyncio.ensure_future(run_io(pump))
+    finished = False
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                finished = True
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        cancelled.set()
+        if finished:
+            await worker   # pump() has returned; it swallows its own errors, so this doesn't raise
+        else:
+            worker.cancel()   # the thread stops at its next item; don't wait for it here
+
+
+async def run_cpu(fn: Callable[..., Any], *args) -> Any:
+    """Run a picklable, module-level function on the CPU process pool."""
+    loop = asyncio.get_running_loop()
+    with metrics.track_offload("cpu"):
+        pool = _get_cpu_pool()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            logger.warning(f"CPU pool broken during {getattr(fn, '__name__', fn)} - restarting it")
+            _reset_cpu_pool(pool)
+            return await loop.run_in_executor(_get_cpu_pool(), fn, *args)
+
+
+async def warm_cpu_pool():
+    """Spawn every CPU worker now instead of on the first login after a deploy."""
+    from services import cpu_tasks
+    pool = _get_cpu_pool()
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.gather(*[loop.run_in_executor(pool, cpu_tasks.warm) for _ in range(CPU_WORKERS)])
+    except Exception as e:
+        logger.warning(f"CPU pool warm-up failed: {e}")
+
+
+def shutdown():
+    global _io_pool, _cpu_pool
+    with _lock:
+        io_pool, cpu_pool = _io_pool, _cpu_pool
+        _io_pool = _cpu_pool = None
+    if io_pool is not None:
+        io_pool.shutdown(wait=False, cancel_futures=True)
+    if cpu_pool is not None:
+        cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ====================== LOOP MONITOR ======================
+
+class LoopMonitor:
+    """Logs every stretch where the event loop was blocked for more than threshold_ms."""
+
+    def __init__(self, threshold_ms: float = LOOP_STALL_MS):
+        self.threshold = threshold_ms / 1000
+        self.interval = max(self.threshold / 4, 0.01)
+        self._beat = time.monotonic()
+        self._beat_seq = 0
+        self._stack: Optional[str] = None
+        self._stack_seq = -1
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Loop monitor started (stall threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            metrics.observe_loop_lag(lag, lag >= self.threshold)
+            if lag >= self.threshold:
+                stack = self._stack if self._stack_seq == self._beat_seq else None
+                logger.warning(
+                    f"Event loop blocked for {lag * 1000:.0f} ms"
+                    + (f"; loop thread was in:\n{stack}" if stack else " (no stack captured)")
+                )
+            self._beat = now
+            self._beat_seq += 1
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            seq = self._beat_seq
+            if seq == self._stack_seq:
+                continue   # this stall already captured
+            if time.monotonic() - self._beat < self.threshold + self.interval:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._stack = "".join(traceback.format_stack(frame, limit=25))
+            self._stack_seq = seq
+
+
+loop_monitor = LoopMonitor()
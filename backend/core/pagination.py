@@ -0,0 +1,236 @@
+"""
+pagination.py - Keyset pagination and streamed list responses.
+
+List endpoints used to cap results with to_list(500) and return the first
+N documents without saying there were more. fetch_page() walks the same
+query with a keyset cursor instead: the cursor holds the sort-key values of
+the last row, so page k costs the same as page 1 (no skip), and rows added
+or removed between requests do not shift the pages.
+
+    from core.pagination import fetch_page, stream_documents, set_next_cursor
+
+    page = await fetch_page(db.fee_invoices, query, {"_id": 0},
+                            sort=[("created_at", -1)], limit=limit, cursor=cursor)
+    set_next_cursor(response, page)           # X-Next-Cursor header
+    return page.items
+
+    # whole result set, constant memory, for exports
+    return stream_documents(db.fee_invoices.find(query, {"_id": 0}), fmt="ndjson")
+
+- `_id` is always appended to the sort as the tie-breaker, so every sort is
+  total; it is stripped from the rows again if the projection excluded it
+- cursors are opaque url-safe tokens (Extended JSON, so datetimes and
+  ObjectIds round-trip); a token minted for one sort is rejected by another
+- the sort should be backed by an index whose prefix is the equality part
+  of the query (see startup_list_indexes in server.py)
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import base64
+import json
+import logging
+from datetime import date, datetime
+
+from bson import json_util
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Sort = Sequence[Tuple[str, int]]
+
+
+class Page:
+    __slots__ = ("items", "next_cursor")
+
+    def __init__(self, items: List[Dict[str, Any]], next_cursor: Optional[str]):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+# ====================== CURSORS ======================
+
+def _full_sort(sort: Sort) -> List[Tuple[str, int]]:
+    sort = list(sort)
+    if not any(field == "_id" for field, _ in sort):
+        sort.append(("_id", sort[-1][1] if sort else 1))
+    return sort
+
+
+def _signature(sort: Sort) -> str:
+    return ",".join(f"{f}:{d}" for f, d in sort)
+
+
+def _value(doc: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def encode_cursor(doc: Dict[str, Any], sort: Sort) -> str:
+    payload = {"s": _signature(sort), "v": [_value(doc, f) for f, _ in sort]}
+    raw = json_util.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: Sort) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json_util.loads(raw)
+        values = payload["v"]
+        if payload["s"] != _signature(sort) or len(values) != len(sort):
+            raise ValueError("cursor does not match this listing")
+        return values
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def keyset_filter(sort: Sort, values: List[Any]) -> Dict[str, Any]:
+    """
+    Rows strictly after `values` in `sort` order:
+    (k1 after v1) OR (k1 = v1 AND k2 after v2) OR ...
+
+    Missing / null keys sort first in Mongo and $lt / $gt never match them,
+    so going down they are added explicitly after any value, going up
+    "after null" is "not null", and nothing comes after null going down.
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        equal = {f: values[j] for j, (f, _) in enumerate(sort[:i])}
+        value = values[i]
+        if value is None:
+            if direction > 0:
+                branches.append({**equal, field: {"$ne": None}})
+        elif direction > 0:
+            branches.append({**equal, field: {"$gt": value}})
+        else:
+            branches.append({**equal, field: {"$lt": value}})
+            branches.append({**equal, field: None})
+    if not branches:
+        return {"_id": {"$exists": False}}   # cursor was on the very last row
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+# ====================== PAGES ======================
+
+def _projection_for(projection: Optional[Dict[str, Any]], sort: Sort) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Make sure the sort keys come back; returns (projection, fields to strip afterwards)."""
+    if projection is None:
+        return None, []
+    projection = dict(projection)
+    inclusive = any(v for k, v in projection.items() if k != "_id")
+    strip = []
+    for field, _ in sort:
+        if projection.get(field) == 0:
+            del projection[field]
+            strip.append(field)
+        elif inclusive and field not in projection:
+            projection[field] = 1
+            strip.append(field)
+    return projection, strip
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    projection: Optional[Dict[str, Any]] = None,
+    sort: Sort = (("_id", 1),),
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Page:
+    sort = _full_sort(sort)
+    if cursor:
+        query = {"$and": [query, keyset_filter(sort, decode_cursor(cursor, sort))]}
+    find_projection, strip = _projection_for(projection, sort)
+    docs = await collection.find(query, find_projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort)
+    if strip:
+        for doc in docs:
+            for field in strip:
+                doc.pop(field, None)
+    return Page(docs, next_cursor)
+
+
+def set_next_cursor(response: Response, page: Page):
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+
+
+async def lookup(collection, ids: Iterable[Any], projection: Dict[str, Any], key: str = "id") -> Dict[Any, Dict]:
+    """One $in query instead of a find_one per row: {key value: doc}."""
+    ids = list({i for i in ids if i is not None})
+    if not ids:
+        return {}
+    projection = {**projection, key: 1}
+    docs = await collection.find({key: {"$in": ids}}, projection).to_list(len(ids))
+    return {d[key]: d for d in docs}
+
+
+# ====================== STREAMING ======================
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)   # ObjectId, Decimal128, ...
+
+
+def _dumps(doc: Any) -> str:
+    return json.dumps(doc, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+async def iter_batches(cursor, size: int = STREAM_BATCH) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch = []
+    async for doc in cursor.batch_size(size):
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_documents(
+    cursor,
+    fmt: str = "ndjson",
+    transform: Optional[Callable[[List[Dict[str, Any]]], Awaitable[List[Any]]]] = None,
+    batch_size: int = STREAM_BATCH,
+    filename: Optional[str] = None
+) -> StreamingResponse:
+    """
+    Stream every document of a Motor cursor, one batch in memory at a time.
+    fmt="ndjson" → one JSON object per line; fmt="json" → a JSON array.
+    transform(batch) may enrich / reshape a batch (e.g. one $in lookup per batch).
+    """
+    async def body():
+        first = True
+        if fmt == "json":
+            yield "["
+        async for batch in iter_batches(cursor, batch_size):
+            if transform is not None:
+                batch = await transform(batch)
+            if fmt == "json":
+                chunk = ",".join(_dumps(d) for d in batch)
+                yield chunk if first else "," + chunk
+            else:
+                yield "".join(_dumps(d) + "\n" for d in batch)
+            first = False
+        if fmt == "json":
+            yield "]"
+
+    media_type = "application/json" if fmt == "json" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'} if filename else None
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
@@ -0,0 +1,175 @@
+"""
+response_cache.py - Pre-serialized, pre-compressed responses for static catalogs.
+
+For endpoints whose JSON comes from module-level constants (syllabus trees,
+plan and price lists) the payload is serialized and compressed once per data
+version, then every request is a dict lookup:
+
+    from fastapi import Request
+    from core.response_cache import cached_json
+
+    @router.get("/books")
+    async def get_all_books(request: Request):
+        return cached_json(request, "ncert:books", build_books)
+
+- ETag is a hash of the serialized body, so it is identical on every worker
+  and across restarts until the data actually changes
+- If-None-Match → 304 with no body
+- Accept-Encoding picks brotli (if installed), then gzip, then identity
+- Cache-Control lets browsers / mobile clients keep the copy for max_age and
+  revalidate in the background for stale_while_revalidate afterwards
+
+The builder only runs on a cache miss; an HTTPException it raises (unknown
+class, ...) propagates and nothing is cached.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import gzip
+import hashlib
+import json
+import logging
+import threading
+
+from fastapi import Request
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    def _dumps(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    def _dumps(data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+    ORJSON_AVAILABLE = False
+    logger.info("orjson not installed - cached responses use the stdlib json encoder")
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+SYLLABUS_MAX_AGE = 86400           # syllabus only changes with a deploy
+CATALOG_MAX_AGE = 3600             # plans / prices
+STALE_WHILE_REVALIDATE = 7 * 86400
+MIN_COMPRESS_BYTES = 1024
+MAX_ENTRIES = 512
+
+
+class CachedPayload:
+    """One serialized response body in every encoding we serve."""
+
+    __slots__ = ("version", "etag", "bodies")
+
+    def __init__(self, data: Any, version: str):
+        body = _dumps(data)
+        self.version = version
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.bodies: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if BROTLI_AVAILABLE:
+                self.bodies["br"] = brotli.compress(body, quality=11)
+
+    def pick(self, accept_encoding: str) -> str:
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.partition(";")
+            q = params.strip()
+            if q.startswith("q=") and _qvalue(q[2:]) == 0:
+                continue
+            accepted.add(name.strip())
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+
+def _qvalue(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return 1.0
+
+
+_entries: "OrderedDict[str, CachedPayload]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def get_payload(key: str, build: Callable[[], Any], version: str = "static") -> CachedPayload:
+    payload = _entries.get(key)
+    if payload is not None and payload.version == version:
+        _entries.move_to_end(key)
+        return payload
+    payload = CachedPayload(build(), version)
+    with _lock:
+        _entries[key] = payload
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return payload
+
+
+def cached_json(
+    request: Request,
+    key: str,
+    build: Callable[[], Any],
+    version: str = "static",
+    max_age: int = SYLLABUS_MAX_AGE,
+    stale_while_revalidate: int = STALE_WHILE_REVALIDATE
+) -> Response:
+    """
+    Serve build()'s JSON from the cache. `key` must identify the payload
+    (include path params); bump `version` when the underlying data changes.
+    """
+    payload = get_payload(key, build, version)
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+
+    encoding = payload.pick(request.headers.get("accept-encoding", ""))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=payload.bodies[encoding], media_type="application/json", headers=headers)
+
+
+def invalidate(prefix: str = ""):
+    """Drop cached payloads whose key starts with prefix (all by default)."""
+    with _lock:
+        for key in [k for k in _entries if k.startswith(prefix)]:
+            del _entries[key]
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "entries": len(_entries),
+        "bytes": sum(len(b) for p in _entries.values() for b in p.bodies.values()),
+        "orjson": ORJSON_AVAILABLE,
+        "brotli": BROTLI_AVAILABLE,
+    }
@@ -1,4 +1,4 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, AsyncIterator
 from pydantic import BaseModel
 import os
 
@@ -48,6 +48,32 @@ class LlmChat:
         except Exception as e:
             return f"AI Error: {str(e)}"
 
+    async def stream_message(self, message) -> AsyncIterator[str]:
+        """send_message(), yielding the reply in pieces as the model produces them."""
+        text = message.text if hasattr(message, 'text') else str(message)
+        self.messages.append({"role": "user", "content": text})
+
+        parts = []
+        try:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=self.api_key)
+            stream = await client.chat.completions.create(
+                model=self.model,
+                messages=self.messages,
+                max_tokens=4000,
+                temperature=0.7,
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            yield ("\n\n" if parts else "") + f"AI Error: {str(e)}"
+            return
+        self.messages.append({"role": "assistant", "content": "".join(parts)})
+
     async def chat(self, messages: List[dict], **kwargs) -> str:
         try:
             from openai import AsyncOpenAI
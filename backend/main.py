@@ -110,6 +110,10 @@ class AppHandler(http.server.BaseHTTPRequestHandler):
                     fwd_headers[k] = v
             conn.request(self.command, self.path, body=body, headers=fwd_headers)
             resp = conn.getresponse()
+            if (resp.getheader("Content-Type") or "").startswith("text/event-stream"):
+                self._stream(resp)
+                conn.close()
+                return
             resp_body = resp.read()
             self.send_response(resp.status)
             skip = {"transfer-encoding", "connection", "content-length"}
@@ -124,6 +128,26 @@ class AppHandler(http.server.BaseHTTPRequestHandler):
             err = f'{{"error":"Backend unavailable","detail":"{str(e)}"}}'.encode()
             self._json_response(502, err)
 
+    def _stream(self, resp):
+        """Pass Server-Sent Events through chunk by chunk instead of buffering."""
+        self.send_response(resp.status)
+        skip = {"transfer-encoding", "connection", "content-length"}
+        for h, v in resp.getheaders():
+            if h.lower() not in skip:
+                self.send_header(h, v)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                chunk = resp.read1(65536)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
     def log_message(self, format, *args):
         pass
 
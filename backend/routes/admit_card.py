@@ -6,7 +6,7 @@ ADMIT CARD SYSTEM
 - Digital signature and seal support
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 from datetime import datetime, timezone, date
@@ -17,6 +17,7 @@ import sys
 import sys; from pathlib import Path; sys.path.append(str(Path(__file__).parent.parent))
 
 from core.database import db
+from core.response_cache import cached_json, CATALOG_MAX_AGE
 
 def get_database():
     return db
@@ -1277,21 +1278,29 @@ def get_instruction_level(class_name: str) -> str:
     return "secondary"  # Default
 
 @router.get("/class-subjects/{class_name}")
-async def get_class_subjects(class_name: str, school_id: str = None):
+async def get_class_subjects(class_name: str, request: Request, school_id: str = None):
     """Get default subjects for a specific class"""
     db = get_database()
     
     class_level = get_class_level(class_name)
     subjects = CLASS_SUBJECTS.get(class_level, CLASS_SUBJECTS.get("class_6", []))
     
-    # If school_id provided, try to get school's custom subjects
-    if school_id:
-        school_subjects = await db.school_subjects.find_one({
-            "school_id": school_id,
-            "class_level": class_level
-        })
-        if school_subjects and school_subjects.get("subjects"):
-            subjects = school_subjects["subjects"]
+    # Without a school the answer is the static default list
+    if not school_id:
+        return cached_json(request, f"admit_card:class_subjects:{class_name}", lambda: {
+            "success": True,
+            "class_name": class_name,
+            "class_level": class_level,
+            "subjects": subjects
+        }, max_age=CATALOG_MAX_AGE)
+    
+    # School's custom subjects, if any
+    school_subjects = await db.school_subjects.find_one({
+        "school_id": school_id,
+        "class_level": class_level
+    })
+    if school_subjects and school_subjects.get("subjects"):
+        subjects = school_subjects["subjects"]
     
     return {
         "success": True,
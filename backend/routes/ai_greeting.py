@@ -16,6 +16,13 @@ import uuid
 
 router = APIRouter(prefix="/ai-greeting", tags=["AI Greeting System"])
 
+# Fixed texts (no names) - their audio is pre-warmed by tino_voice at startup
+VISITOR_GREETINGS = {
+    "hindi": "नमस्ते! स्कूल में आपका स्वागत है।",
+    "english": "Welcome to the school! How may we assist you?",
+    "hinglish": "Namaste ji! School mein aapka swagat hai."
+}
+
 # Models
 class GreetingSettings(BaseModel):
     school_id: str
@@ -147,12 +154,7 @@ async def process_person_detection(detection: PersonDetected):
         
         elif detection.person_type == "visitor" or detection.person_type == "unknown":
             # Unknown visitor - greet and ask purpose
-            if language == "hindi":
-                greeting_text = "नमस्ते! स्कूल में आपका स्वागत है।"
-            elif language == "english":
-                greeting_text = "Welcome to the school! How may we assist you?"
-            else:
-                greeting_text = "Namaste ji! School mein aapka swagat hai."
+            greeting_text = VISITOR_GREETINGS.get(language, VISITOR_GREETINGS["hinglish"])
             
             should_ask_reason = settings.get('ask_reason_for_visitors', True)
             if should_ask_reason:
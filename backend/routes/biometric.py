@@ -12,6 +12,7 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
 from core.database import db
+from core.live_events import publish_punch
 import os
 from dotenv import load_dotenv
 import uuid
@@ -230,6 +231,7 @@ async def record_biometric_punch(
     
     # Update attendance record
     await update_attendance_from_biometric(db, school_id, person_id, enrollment, punch_type, today)
+    publish_punch(punch_doc)
     
     return {
         "success": True,
@@ -11,6 +11,9 @@ import io
 from datetime import datetime
 import json
 
+from core.offload import run_cpu
+from services import cpu_tasks, staff_provisioning
+
 router = APIRouter(prefix="/bulk-import", tags=["bulk-import"])
 
 # Sample templates
@@ -78,7 +81,7 @@ async def preview_import(
     if file.filename.endswith('.csv'):
         data = parse_csv(contents.decode('utf-8'))
     elif file.filename.endswith(('.xlsx', '.xls')):
-        data = parse_excel(contents)
+        data = await parse_excel(contents)
     else:
         raise HTTPException(status_code=400, detail="Only CSV and Excel files are supported")
     
@@ -128,7 +131,7 @@ async def execute_import(
     if file.filename.endswith('.csv'):
         data = parse_csv(contents.decode('utf-8'))
     elif file.filename.endswith(('.xlsx', '.xls')):
-        data = parse_excel(contents)
+        data = await parse_excel(contents)
     else:
         raise HTTPException(status_code=400, detail="Only CSV and Excel files are supported")
     
@@ -151,6 +154,7 @@ async def execute_import(
             # Also map without section
             classes[cls.get('name', '').lower()] = cls.get('id')
     
+    employee_entries, employee_rows = [], []
     for idx, row in enumerate(data):
         try:
             validation = validate_row(row, import_type, idx + 2)
@@ -159,10 +163,13 @@ async def execute_import(
                 errors.append({"row": idx + 2, "errors": validation["errors"]})
                 continue
             
-            if import_type == "student":
-                record = await create_student_from_row(row, school_id, classes, db)
-            else:
-                record = await create_employee_from_row(row, school_id, db)
+            if import_type != "student":
+                # written together below (one insert_many, one block of employee IDs)
+                employee_entries.append({"staff": employee_doc_from_row(row, school_id), "user": None})
+                employee_rows.append(idx + 2)
+                continue
+            
+            record = await create_student_from_row(row, school_id, classes, db)
             
             if record:
                 success_count += 1
@@ -174,6 +181,17 @@ async def execute_import(
             error_count += 1
             errors.append({"row": idx + 2, "error": str(e)})
     
+    batch = staff_provisioning.MAX_BATCH
+    for start in range(0, len(employee_entries), batch):
+        provisioned = await staff_provisioning.provision(employee_entries[start:start + batch])
+        for row_number, result in zip(employee_rows[start:start + batch], provisioned["results"]):
+            if result["status"] == "created":
+                success_count += 1
+                created_ids.append(result["id"])
+            else:
+                error_count += 1
+                errors.append({"row": row_number, "error": result.get("error")})
+    
     return {
         "success": True,
         "total_processed": len(data),
@@ -191,27 +209,10 @@ def parse_csv(content: str) -> List[dict]:
     return list(reader)
 
 
-def parse_excel(content: bytes) -> List[dict]:
-    """Parse Excel content into list of dicts"""
+async def parse_excel(content: bytes) -> List[dict]:
+    """Parse Excel content into list of dicts (workbook parsed on the CPU pool)"""
     try:
-        import openpyxl
-        from io import BytesIO
-        
-        wb = openpyxl.load_workbook(BytesIO(content), data_only=True)
-        sheet = wb.active
-        
-        headers = [cell.value for cell in sheet[1] if cell.value]
-        data = []
-        
-        for row in sheet.iter_rows(min_row=2):
-            row_data = {}
-            for idx, cell in enumerate(row):
-                if idx < len(headers):
-                    row_data[headers[idx]] = cell.value
-            if any(row_data.values()):  # Skip empty rows
-                data.append(row_data)
-        
-        return data
+        return await run_cpu(cpu_tasks.xlsx_records, content)
     except ImportError:
         # Fallback: treat as CSV
         return parse_csv(content.decode('utf-8', errors='ignore'))
@@ -327,15 +328,11 @@ async def create_student_from_row(row: dict, school_id: str, classes: dict, db)
     return student_data
 
 
-async def create_employee_from_row(row: dict, school_id: str, db) -> dict:
-    """Create an employee record from CSV row"""
+def employee_doc_from_row(row: dict, school_id: str) -> dict:
+    """Build an employee record from CSV row (employee_id is assigned by staff_provisioning)"""
     
     emp_id = f"EMP-{uuid.uuid4().hex[:8].upper()}"
     
-    year = datetime.now().year
-    count = await db.staff.count_documents({"employee_id": {"$regex": f"^EMP-{year}-"}})
-    employee_id = f"EMP-{year}-{str(count + 1).zfill(4)}"
-    
     designation_raw = str(row.get('designation', 'teacher')).strip().lower()
     
     designation_role_map = {
@@ -361,7 +358,7 @@ async def create_employee_from_row(row: dict, school_id: str, db) -> dict:
     
     employee_data = {
         "id": emp_id,
-        "employee_id": employee_id,
+        "employee_id": None,
         "name": str(row.get('name', '')).strip(),
         "designation": designation_raw,
         "mobile": mobile,
@@ -384,5 +381,4 @@ async def create_employee_from_row(row: dict, school_id: str, db) -> dict:
         "import_source": "bulk_import"
     }
     
-    await db.staff.insert_one(employee_data)
     return employee_data
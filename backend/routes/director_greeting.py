@@ -44,6 +44,29 @@ class EntryLogRequest(BaseModel):
 
 # ==================== HELPER FUNCTIONS ====================
 
+# Their audio is pre-warmed by tino_voice at startup
+TIME_GREETINGS = {
+    "english": {
+        "morning": "Good Morning",
+        "afternoon": "Good Afternoon", 
+        "evening": "Good Evening",
+        "night": "Good Night"
+    },
+    "hindi": {
+        "morning": "सुप्रभात",
+        "afternoon": "नमस्कार",
+        "evening": "शुभ संध्या",
+        "night": "शुभ रात्रि"
+    },
+    "hinglish": {
+        "morning": "Good Morning",
+        "afternoon": "Good Afternoon",
+        "evening": "Good Evening",
+        "night": "Good Night"
+    }
+}
+
+
 def get_time_greeting(language: str = "hinglish") -> Dict:
     """
     Get appropriate greeting based on current time
@@ -51,28 +74,7 @@ def get_time_greeting(language: str = "hinglish") -> Dict:
     now = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)  # IST
     hour = now.hour
     
-    greetings = {
-        "english": {
-            "morning": "Good Morning",
-            "afternoon": "Good Afternoon", 
-            "evening": "Good Evening",
-            "night": "Good Night"
-        },
-        "hindi": {
-            "morning": "सुप्रभात",
-            "afternoon": "नमस्कार",
-            "evening": "शुभ संध्या",
-            "night": "शुभ रात्रि"
-        },
-        "hinglish": {
-            "morning": "Good Morning",
-            "afternoon": "Good Afternoon",
-            "evening": "Good Evening",
-            "night": "Good Night"
-        }
-    }
-    
-    lang_greetings = greetings.get(language, greetings["hinglish"])
+    lang_greetings = TIME_GREETINGS.get(language, TIME_GREETINGS["hinglish"])
     
     if 5 <= hour < 12:
         period = "morning"
@@ -27,12 +27,14 @@ USAGE PRIORITY:
 import os
 import uuid
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional, List, Literal
 from motor.motor_asyncio import AsyncIOMotorClient
 import httpx
 
+from core.response_cache import cached_json, CATALOG_MAX_AGE
+
 router = APIRouter(prefix="/dual-credits", tags=["Dual Credits"])
 
 # ── DB
@@ -216,14 +218,14 @@ class UseCreditsRequest(BaseModel):
 # ══════════════════════════════════════════
 
 @router.get("/plans")
-async def get_all_plans():
+async def get_all_plans(request: Request):
     """Return both school plans and personal packs."""
-    return {
+    return cached_json(request, "dual_credits:plans", lambda: {
         "school_plans": SCHOOL_PLANS,
         "personal_packs": PERSONAL_PACKS,
         "credit_costs": CREDIT_COSTS,
         "pricing_note": "Personal credits 60% saste hain school credits se!"
-    }
+    }, max_age=CATALOG_MAX_AGE)
 
 # ══════════════════════════════════════════
 #  GET /dual-credits/balance/{school_id}/{user_id}
@@ -0,0 +1,151 @@
+"""
+Report Exports
+- GET  /exports/reports                      → available reports and their filters
+- GET  /exports/{report}?format=csv|xlsx     → streamed download (constant memory)
+- POST /exports/{report}/jobs                → background export for year-end sized data
+- GET  /exports/jobs/{job_id}                → job status / row progress
+- GET  /exports/jobs/{job_id}/download       → finished file (409 until ready)
+"""
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Optional
+from pathlib import Path
+import re
+
+from core.database import db
+from core.auth import get_current_user
+from core.helpers import log_audit
+from services import exports
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+EXPORT_ROLES = ["director", "principal", "accountant", "admin", "owner"]
+MONTH_PATTERN = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+def _school_for(current_user: dict, school_id: Optional[str]) -> str:
+    if current_user.get("role") not in EXPORT_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if school_id and current_user.get("role") == "owner":
+        return school_id
+    if not current_user.get("school_id"):
+        raise HTTPException(status_code=400, detail="school_id required")
+    return current_user["school_id"]
+
+
+def _job_query(job_id: str, current_user: dict) -> dict:
+    """A job of the caller's school (or their own); same roles as creating one - jobs hold fee and payroll data"""
+    if current_user.get("role") not in EXPORT_ROLES:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return {"id": job_id, "$or": [{"school_id": current_user.get("school_id")}, {"created_by": current_user["id"]}]}
+
+
+def _params(month, year, from_date, to_date, class_id, min_amount) -> dict:
+    values = {"month": month, "year": year, "from_date": from_date, "to_date": to_date,
+              "class_id": class_id, "min_amount": min_amount}
+    return {k: v for k, v in values.items() if v is not None}
+
+
+def _checked(report: str, fmt: str, params: dict) -> dict:
+    try:
+        spec = exports.get_report(report, fmt)
+    except exports.ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # month is "YYYY-MM" for fee-collection and a number for staff-attendance
+    if report == "staff-attendance" and params.get("month") is not None:
+        if not str(params["month"]).isdigit() or not 1 <= int(params["month"]) <= 12:
+            raise HTTPException(status_code=400, detail="month must be 1-12")
+        params["month"] = int(params["month"])
+    if report == "fee-collection" and params.get("month") is not None:
+        if not MONTH_PATTERN.fullmatch(str(params["month"])):
+            raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    return {k: v for k, v in params.items() if k in spec["params"]}
+
+
+@router.get("/reports")
+async def list_reports(current_user: dict = Depends(get_current_user)):
+    """Reports that can be exported, with their filters"""
+    return {
+        "reports": [
+            {"id": name, "title": r["title"], "params": r["params"], "columns": [h for _, h in r["columns"]]}
+            for name, r in exports.REPORTS.items()
+        ],
+        "formats": ["csv", "xlsx"] if exports.OPENPYXL_AVAILABLE else ["csv"]
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_export_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Status of a background export"""
+    job = await db.export_jobs.find_one(_job_query(job_id, current_user), {"_id": 0, "path": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Finished file of a background export"""
+    job = await db.export_jobs.find_one(_job_query(job_id, current_user), {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("status") != "ready":
+        raise HTTPException(status_code=409, detail=f"Export not ready (status: {job.get('status')})")
+    if not Path(job["path"]).exists():
+        raise HTTPException(status_code=410, detail="Export file expired")
+    return FileResponse(job["path"], media_type=exports.MEDIA_TYPES[job["format"]], filename=job["filename"])
+
+
+@router.get("/{report}")
+async def export_report(
+    report: str,
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    school_id: Optional[str] = None,
+    month: Optional[str] = None,
+    year: Optional[int] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    class_id: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Download a report; rows are streamed from Mongo as they are written"""
+    school = _school_for(current_user, school_id)
+    params = _checked(report, format, _params(month, year, from_date, to_date, class_id, min_amount))
+    filename = exports.filename_for(report, format, params)
+    await log_audit(current_user["id"], "export", "reports", {"report": report, "format": format, **params})
+
+    if format == "xlsx":
+        path = await exports.xlsx_tempfile(report, school, params)
+        return FileResponse(path, media_type=exports.MEDIA_TYPES["xlsx"], filename=filename,
+                            background=BackgroundTask(path.unlink, missing_ok=True))
+    return StreamingResponse(
+        exports.csv_stream(report, school, params),
+        media_type=exports.MEDIA_TYPES["csv"],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/{report}/jobs")
+async def create_export_job(
+    report: str,
+    background_tasks: BackgroundTasks,
+    format: str = Query("xlsx", pattern="^(csv|xlsx)$"),
+    school_id: Optional[str] = None,
+    month: Optional[str] = None,
+    year: Optional[int] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    class_id: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Queue a background export; poll /exports/jobs/{id} and download when ready"""
+    school = _school_for(current_user, school_id)
+    params = _checked(report, format, _params(month, year, from_date, to_date, class_id, min_amount))
+    job = await exports.create_job(report, format, school, params, current_user["id"])
+    background_tasks.add_task(exports.run_job, job["id"])
+    await log_audit(current_user["id"], "export_job", "reports", {"job_id": job["id"], "report": report})
+    return job
@@ -6,6 +6,8 @@ AI Face Recognition System for Student Attendance
 - Twin/sibling detection with high accuracy
 - OpenAI Vision for quality verification
 - Works regardless of dress/hairstyle changes
+- CCTV frames gated locally first (services/cctv_gate.py): duplicates, still
+  frames and frames without an identifiable face never reach OpenAI
 """
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
@@ -15,6 +17,7 @@ from datetime import datetime, timezone
 import uuid
 import os
 import sys
+import asyncio
 import base64
 import json
 import httpx
@@ -22,6 +25,10 @@ import httpx
 import sys; from pathlib import Path; sys.path.append(str(Path(__file__).parent.parent))
 
 from core.database import db
+from services.cctv_gate import frame_gate, CameraBusy
+from services.photo_quality import analyze_photo
+from core.offload import run_cpu
+from core.metrics import observe_photo_quality
 
 # OpenAI API
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
@@ -71,6 +78,37 @@ class FaceEnrollmentStatus(BaseModel):
 # ==================== OPENAI VISION FUNCTIONS ====================
 
 async def analyze_photo_quality(photo_base64: str, photo_type: str) -> Dict:
+    """
+    Analyze photo quality and face detection locally (services/photo_quality.py,
+    on the CPU pool); OpenAI Vision is only asked when the local verdict is
+    ambiguous or the face couldn't be verified (no face detector). Returns
+    quality score, face detected, angle verification
+    """
+    if photo_base64.startswith("data:image"):
+        photo_base64 = photo_base64.split(",", 1)[-1]
+    try:
+        local = await run_cpu(analyze_photo, base64.b64decode(photo_base64), photo_type)
+    except ValueError as e:   # bad base64 (binascii.Error) or not an image
+        return {"success": False, "face_detected": False, "quality_score": 0, "error": f"Invalid photo: {e}"}
+    # without a face detector any sharp, well-lit photo passes locally, so vision looks for the face
+    needs_vision = local["ambiguous"] or (local["face_detected"] and not face_verified(local))
+    observe_photo_quality("vision" if needs_vision and OPENAI_API_KEY else "local")
+    if not needs_vision:
+        return local
+    if OPENAI_API_KEY:
+        analysis = await vision_photo_quality(photo_base64, photo_type)
+        if analysis.get("success"):
+            analysis.update({"source": "vision", "local_analysis": local})
+            return analysis
+    return local
+
+
+def face_verified(analysis: Dict) -> bool:
+    """False only for a local analysis made without a face detector."""
+    return analysis.get("metrics", {}).get("face_verified", True)
+
+
+async def vision_photo_quality(photo_base64: str, photo_type: str) -> Dict:
     """
     Use OpenAI Vision to analyze photo quality and face detection
     Returns quality score, face detected, angle verification
@@ -333,7 +371,7 @@ async def upload_student_photo(data: PhotoUpload):
         "capture_device": data.capture_device,
         "quality_score": quality_score,
         "quality_analysis": quality_analysis,
-        "ai_verified": True,
+        "ai_verified": face_verified(quality_analysis),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
@@ -793,14 +831,42 @@ async def process_cctv_frame(data: CCTVFrame):
     """
     Process a frame from CCTV camera for face detection and attendance
     AI identifies all faces in the frame and marks attendance
+    Frames are gated per camera first (duplicate, no motion, no identifiable
+    face → "skipped"); 429 with Retry-After when the camera's queue is full
     """
     # Find device
     device = await db.cctv_devices.find_one({"id": data.device_id})
     if not device:
         raise HTTPException(status_code=404, detail="CCTV device not found")
     
-    # Analyze frame for faces using OpenAI Vision
-    analysis = await analyze_cctv_frame(data.frame_base64, data.school_id)
+    # Local gate first: duplicate / still / faceless frames never reach the vision API
+    try:
+        frame_base64 = data.frame_base64.split(",", 1)[1] if data.frame_base64.startswith("data:") else data.frame_base64
+        gate = await frame_gate.submit(data.device_id, base64.b64decode(frame_base64))
+    except CameraBusy:
+        raise HTTPException(status_code=429, detail="Camera is sending frames faster than they can be processed",
+                            headers={"Retry-After": "2"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid frame: {e}")
+    
+    if gate["outcome"] == "faces":
+        # Only identifiable face crops are matched
+        analysis = await identify_faces(gate["faces"], data.school_id)
+    elif gate["outcome"] == "forward":
+        # No local face detector - the whole frame goes to OpenAI Vision
+        analysis = await analyze_cctv_frame(frame_base64, data.school_id)
+    else:
+        return {
+            "success": True,
+            "timestamp": data.timestamp or datetime.now(timezone.utc).isoformat(),
+            "device_id": data.device_id,
+            "device_location": device.get("location"),
+            "faces_detected": gate["faces_detected"],
+            "attendance_marked": [],
+            "unknown_faces": 0,
+            "skipped": gate["outcome"],
+            "message": f"Frame skipped ({gate['outcome'].replace('_', ' ')})"
+        }
     
     # Process each detected face
     attendance_marked = []
@@ -943,27 +1009,8 @@ Respond ONLY with valid JSON."""
                 # For each identifiable face, try to match
                 for i, face in enumerate(frame_analysis.get("faces", [])):
                     if face.get("identifiable") and face.get("clarity_score", 0) >= 50:
-                        # In a real implementation, we would crop each face and compare
-                        # For now, we use the full frame comparison as a placeholder
-                        best_match = None
-                        best_score = 0
-                        
-                        for enrolled in enrolled_photos[:10]:  # Limit comparisons for speed
-                            comparison = await compare_faces(frame_base64, enrolled.get("photo_data", ""))
-                            if comparison.get("success"):
-                                score = comparison.get("similarity_score", 0)
-                                if score > best_score and score >= 70:
-                                    best_score = score
-                                    student = await db.students.find_one(
-                                        {"$or": [{"id": enrolled["student_id"]}, {"student_id": enrolled["student_id"]}]},
-                                        {"_id": 0, "name": 1, "id": 1, "student_id": 1, "class_id": 1}
-                                    )
-                                    if student:
-                                        best_match = {
-                                            "id": student.get("student_id") or student.get("id"),
-                                            "name": student.get("name"),
-                                            "class": student.get("class_id")
-                                        }
+                        # No local crop without a face detector - the full frame is compared
+                        best_match, best_score = await match_face(frame_base64, enrolled_photos)
                         
                         detected_faces.append({
                             "position": face.get("position"),
@@ -981,6 +1028,58 @@ Respond ONLY with valid JSON."""
         return {"detected_faces": [], "error": str(e)}
 
 
+async def match_face(face_base64: str, enrolled_photos: List[Dict]):
+    """(student, score) of the best enrolled passport photo scoring >= 70, else (None, 0)"""
+    best_match = None
+    best_score = 0
+    
+    for enrolled in enrolled_photos[:10]:  # Limit comparisons for speed
+        comparison = await compare_faces(face_base64, enrolled.get("photo_data", ""))
+        if comparison.get("success"):
+            score = comparison.get("similarity_score", 0)
+            if score > best_score and score >= 70:
+                best_score = score
+                student = await db.students.find_one(
+                    {"$or": [{"id": enrolled["student_id"]}, {"student_id": enrolled["student_id"]}]},
+                    {"_id": 0, "name": 1, "id": 1, "student_id": 1, "class_id": 1}
+                )
+                if student:
+                    best_match = {
+                        "id": student.get("student_id") or student.get("id"),
+                        "name": student.get("name"),
+                        "class": student.get("class_id")
+                    }
+    return best_match, best_score
+
+
+async def identify_faces(faces: List[Dict], school_id: str) -> Dict:
+    """
+    Match face crops from the local frame gate against enrolled students
+    (same result shape as analyze_cctv_frame)
+    """
+    enrolled_photos = await db.student_face_photos.find(
+        {"school_id": school_id, "photo_type": "passport"},
+        {"_id": 0, "student_id": 1, "photo_data": 1}
+    ).to_list(500)
+    
+    detected_faces = []
+    for face in faces:
+        best_match, best_score = await match_face(base64.b64encode(face["crop"]).decode(), enrolled_photos)
+        detected_faces.append({
+            "position": face["box"],
+            "matched_student": best_match,
+            "confidence": best_score if best_match else 0
+        })
+    
+    return {"detected_faces": detected_faces, "total_detected": len(detected_faces)}
+
+
+@router.get("/cctv/gate-stats")
+async def get_cctv_gate_stats():
+    """Local frame gate: face detector in use, per-camera queue depth and frame outcomes"""
+    return frame_gate.stats()
+
+
 @router.get("/cctv/attendance/{school_id}")
 async def get_cctv_attendance(school_id: str, date: Optional[str] = None):
     """Get attendance records marked via CCTV"""
@@ -1092,7 +1191,7 @@ async def upload_staff_photo(data: StaffPhotoUpload):
         "capture_device": data.capture_device,
         "quality_score": quality_score,
         "quality_analysis": quality_analysis,
-        "ai_verified": True,
+        "ai_verified": face_verified(quality_analysis),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
@@ -1288,6 +1387,7 @@ async def enroll_multiple_photos(data: MultiPhotoEnrollment):
     enrolled_photos = []
     total_quality = 0
     
+    photos = []
     for idx, photo in enumerate(data.photos):
         angle = photo.get("angle", f"photo_{idx + 1}")
         photo_data = photo.get("photo_data", "")
@@ -1298,9 +1398,12 @@ async def enroll_multiple_photos(data: MultiPhotoEnrollment):
         # Remove data URL prefix if present
         if photo_data.startswith("data:image"):
             photo_data = photo_data.split(",")[1] if "," in photo_data else photo_data
-        
-        # Analyze photo quality with AI
-        quality_analysis = await analyze_photo_quality(photo_data, angle)
+        photos.append((angle, photo_data))
+    
+    # Analyze all photos at once - spread over the CPU pool workers
+    analyses = await asyncio.gather(*(analyze_photo_quality(photo_data, angle) for angle, photo_data in photos))
+    
+    for (angle, photo_data), quality_analysis in zip(photos, analyses):
         quality_score = quality_analysis.get("quality_score", 75)
         face_detected = quality_analysis.get("face_detected", True)
         
@@ -1321,7 +1424,7 @@ async def enroll_multiple_photos(data: MultiPhotoEnrollment):
             "photo_data": photo_data,
             "quality_score": quality_score,
             "quality_analysis": quality_analysis,
-            "ai_verified": True,
+            "ai_verified": face_verified(quality_analysis),
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
@@ -2,7 +2,8 @@
 Group Chat System for Schooltino
 - Class-wise student groups
 - Staff/Admin groups
-- Real-time messaging with WebSocket support (future)
+- Real-time delivery over the per-user live channel (/api/live)
+- Per-group sequence numbers, seq cursor paging and per-member unread counts
 """
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
@@ -11,6 +12,8 @@ from datetime import datetime, timezone
 import uuid
 import os
 from core.database import db
+from core.live_events import publish_group_joined
+from services import chat_store
 
 router = APIRouter(prefix="/chat", tags=["Group Chat"])
 
@@ -35,6 +38,11 @@ class CreateGroup(BaseModel):
     members: List[str] = []
     created_by: str
 
+class MarkRead(BaseModel):
+    group_id: str
+    user_id: str
+    seq: Optional[int] = None  # None = everything so far
+
 # ============== GROUP MANAGEMENT ==============
 
 @router.post("/groups/create")
@@ -53,10 +61,13 @@ async def create_chat_group(data: CreateGroup):
         "created_at": datetime.now(timezone.utc).isoformat(),
         "is_active": True,
         "last_message": None,
-        "last_message_at": None
+        "last_message_at": None,
+        "last_seq": 0
     }
     
     await db.chat_groups.insert_one(group)
+    group.pop("_id", None)
+    publish_group_joined(group, data.members)
     
     return {"message": "Group created", "group_id": group["id"], "group": group}
 
@@ -90,7 +101,11 @@ async def get_school_groups(school_id: str, user_id: str, user_role: str):
             "members": user_id
         }, {"_id": 0}).to_list(100)
     
-    return {"groups": groups}
+    counts = await chat_store.unread_counts(user_id, [g["id"] for g in groups])
+    return {
+        "groups": chat_store.with_unread(groups, counts),
+        "total_unread": sum(counts.values())
+    }
 
 @router.get("/groups/class/{class_id}")
 async def get_or_create_class_group(class_id: str, school_id: str):
@@ -132,10 +147,13 @@ async def get_or_create_class_group(class_id: str, school_id: str):
         "created_at": datetime.now(timezone.utc).isoformat(),
         "is_active": True,
         "last_message": None,
-        "last_message_at": None
+        "last_message_at": None,
+        "last_seq": 0
     }
     
     await db.chat_groups.insert_one(group)
+    group.pop("_id", None)
+    publish_group_joined(group, member_ids)
     
     return group
 
@@ -172,10 +190,13 @@ async def get_or_create_staff_group(school_id: str):
         "created_at": datetime.now(timezone.utc).isoformat(),
         "is_active": True,
         "last_message": None,
-        "last_message_at": None
+        "last_message_at": None,
+        "last_seq": 0
     }
     
     await db.chat_groups.insert_one(group)
+    group.pop("_id", None)
+    publish_group_joined(group, member_ids)
     
     return group
 
@@ -183,50 +204,61 @@ async def get_or_create_staff_group(school_id: str):
 
 @router.post("/messages/send")
 async def send_message(msg: ChatMessage):
-    """Send a message to a group"""
-    db = get_database()
-    
-    message = {
-        "id": str(uuid.uuid4()),
-        "group_id": msg.group_id,
-        "content": msg.content,
-        "sender_id": msg.sender_id,
-        "sender_name": msg.sender_name,
-        "sender_role": msg.sender_role,
-        "message_type": msg.message_type,
-        "attachment_url": msg.attachment_url,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "is_deleted": False,
-        "read_by": [msg.sender_id]
-    }
-    
-    await db.chat_messages.insert_one(message)
-    
-    # Update group's last message
-    await db.chat_groups.update_one(
-        {"id": msg.group_id},
-        {"$set": {
-            "last_message": msg.content[:50],
-            "last_message_at": message["created_at"]
-        }}
+    """Send a message to a group (pushed to connected members over /api/live)"""
+    message = await chat_store.append_message(
+        group_id=msg.group_id,
+        content=msg.content,
+        sender_id=msg.sender_id,
+        sender_name=msg.sender_name,
+        sender_role=msg.sender_role,
+        message_type=msg.message_type,
+        attachment_url=msg.attachment_url
     )
+    if message is None:
+        raise HTTPException(status_code=404, detail="Group not found")
     
-    return {"message": "Sent", "message_id": message["id"], "data": message}
+    return {"message": "Sent", "message_id": message["id"], "seq": message["seq"], "data": message}
 
 @router.get("/messages/{group_id}")
-async def get_messages(group_id: str, limit: int = 50, before: Optional[str] = None):
-    """Get messages for a group"""
-    db = get_database()
+async def get_messages(
+    group_id: str,
+    limit: int = 50,
+    before_seq: Optional[int] = None,
+    after_seq: Optional[int] = None,
+    before: Optional[str] = None,
+    user_id: Optional[str] = None
+):
+    """
+    Get messages for a group, oldest first.
+    Scroll back with before_seq=<first_seq>, catch up with after_seq=<last seen seq>.
+    Passing user_id marks the returned page as read.
+    """
+    page = await chat_store.get_messages(
+        group_id, limit=limit, before_seq=before_seq, after_seq=after_seq, before=before
+    )
+    if user_id and page["last_seq"] is not None:
+        await chat_store.mark_read(group_id, user_id, page["last_seq"])
     
-    query = {"group_id": group_id, "is_deleted": False}
-    if before:
-        query["created_at"] = {"$lt": before}
+    return page
+
+@router.post("/messages/read")
+async def mark_messages_read(data: MarkRead):
+    """Move a member's read cursor forward"""
+    seq = await chat_store.mark_read(data.group_id, data.user_id, data.seq)
+    return {"message": "Marked read", "group_id": data.group_id, "last_read_seq": seq}
+
+@router.get("/unread/{school_id}")
+async def get_unread_counts(school_id: str, user_id: str):
+    """Unread count per group for a user (last_seq - read cursor)"""
+    db = get_database()
     
-    messages = await db.chat_messages.find(
-        query, {"_id": 0}
-    ).sort("created_at", -1).limit(limit).to_list(limit)
+    groups = await db.chat_groups.find(
+        {"school_id": school_id, "is_active": True, "members": user_id},
+        {"_id": 0, "id": 1}
+    ).to_list(500)
+    counts = await chat_store.unread_counts(user_id, [g["id"] for g in groups])
     
-    return {"messages": list(reversed(messages)), "group_id": group_id}
+    return {"unread": counts, "total_unread": sum(counts.values())}
 
 @router.delete("/messages/{message_id}")
 async def delete_message(message_id: str, user_id: str):
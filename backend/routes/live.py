@@ -0,0 +1,135 @@
+"""
+Live Updates Channel
+- One authenticated push connection per user (SSE or WebSocket)
+- Delivers notifications, notices, attendance, biometric punches,
+  Tino alerts and chat messages as they are written
+- Dashboards refresh from these events instead of polling
+"""
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from typing import Optional, Dict, List
+import asyncio
+import jwt
+
+from core.auth import JWT_SECRET, JWT_ALGORITHM
+from core.database import db
+from core.event_bus import bus, sse_response
+from core.live_events import topics_for_user, ALERT_ROLES
+
+router = APIRouter(prefix="/live", tags=["Live Updates"])
+
+# Close code sent to WebSocket clients with a missing/invalid token
+WS_POLICY_VIOLATION = 1008
+
+
+async def get_user_from_token(token: Optional[str]) -> Dict:
+    """Resolve a JWT (staff, student or parent login) to the user document."""
+    if not token:
+        raise HTTPException(status_code=401, detail="Token required")
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token has expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user_id = payload.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    if payload.get("type") == "parent":
+        parent = await db.parents.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        if not parent:
+            raise HTTPException(status_code=401, detail="Parent not found")
+        parent["role"] = "parent"
+        student_ids = parent.get("student_ids", [])
+        children = await db.students.find(
+            {"id": {"$in": student_ids}}, {"_id": 0, "class_id": 1}
+        ).to_list(len(student_ids) or 1)
+        parent["class_ids"] = sorted({c["class_id"] for c in children if c.get("class_id")})
+        return parent
+
+    if payload.get("role") == "student":
+        student = await db.students.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        if not student:
+            raise HTTPException(status_code=401, detail="Student not found")
+        student["role"] = "student"
+        return student
+
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+
+def _bearer(request_headers) -> Optional[str]:
+    auth = request_headers.get("authorization") or ""
+    return auth[7:] if auth.lower().startswith("bearer ") else None
+
+
+async def _group_ids(user: Dict) -> List[str]:
+    """Chat groups whose messages this user should receive live."""
+    query = {"school_id": user.get("school_id"), "is_active": True}
+    if user.get("role") not in ALERT_ROLES:
+        query["$or"] = [{"members": user["id"]}]
+        if user.get("role") == "teacher":
+            query["$or"].append({"group_type": "staff"})
+    groups = await db.chat_groups.find(query, {"_id": 0, "id": 1}).to_list(100)
+    return [g["id"] for g in groups]
+
+
+async def _subscribe(user: Dict):
+    topics = topics_for_user(user, await _group_ids(user))
+    return bus.subscribe(*topics), topics
+
+
+def _hello(user: Dict, topics: List[str]) -> Dict:
+    return {"type": "connected", "user_id": user["id"], "role": user.get("role"), "topics": topics}
+
+
+@router.get("/stream")
+async def live_stream(request: Request, token: Optional[str] = None):
+    """
+    Server-Sent Events stream of everything addressed to the caller.
+    EventSource cannot set headers, so the JWT may be passed as ?token=.
+    """
+    user = await get_user_from_token(token or _bearer(request.headers))
+    sub, topics = await _subscribe(user)
+    return sse_response(sub, request, initial=[_hello(user, topics)])
+
+
+@router.websocket("/ws")
+async def live_ws(websocket: WebSocket, token: Optional[str] = None):
+    """WebSocket alternative to /live/stream. Send "ping" to get "pong"."""
+    try:
+        user = await get_user_from_token(token or _bearer(websocket.headers))
+    except HTTPException as e:
+        await websocket.close(code=WS_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    await websocket.accept()
+    sub, topics = await _subscribe(user)
+
+    async def forward():
+        async for event in sub:
+            await websocket.send_json(event)
+
+    sender = asyncio.create_task(forward())
+    try:
+        await websocket.send_json(_hello(user, topics))
+        # Reading is what notices the client going away while nothing is published
+        while True:
+            message = await websocket.receive_text()
+            if message == "ping":
+                await websocket.send_text("pong")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        sub.close()
+
+
+@router.get("/stats")
+async def live_stats():
+    """Connections and topics on this worker (plus cross-worker backend counters)."""
+    return bus.stats()
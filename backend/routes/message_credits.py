@@ -7,11 +7,12 @@ MESSAGE CREDIT SYSTEM FOR SCHOOLS
 - Admin can add/manage credits
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
 from core.database import db
+from core.response_cache import cached_json, CATALOG_MAX_AGE
 import os
 import uuid
 
@@ -220,9 +221,9 @@ async def get_credit_history(school_id: str, limit: int = 50):
     }
 
 @router.get("/costs")
-async def get_message_costs():
+async def get_message_costs(request: Request):
     """Get message costs in credits"""
-    return {
+    return cached_json(request, "message_credits:costs", lambda: {
         "costs": MESSAGE_COSTS,
         "description": {
             "whatsapp_text": "Simple WhatsApp text message",
@@ -237,7 +238,7 @@ async def get_message_costs():
             "event_notification": "School event notification",
             "emergency": "Emergency messages (FREE)"
         }
-    }
+    }, max_age=CATALOG_MAX_AGE)
 
 # ==================== ADMIN FUNCTIONS ====================
 
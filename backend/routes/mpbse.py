@@ -5,11 +5,12 @@ Madhya Pradesh Board of Secondary Education
 Data from https://mpbse.nic.in/syllabus.htm
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
 import sys
 import sys; from pathlib import Path; sys.path.append(str(Path(__file__).parent.parent))
 from services.mpbse_syllabus import MPBSESyllabusService
+from core.response_cache import cached_json
 
 router = APIRouter(prefix="/mpbse", tags=["MPBSE Syllabus"])
 
@@ -44,14 +45,17 @@ async def get_subjects(class_num: str):
 @router.get("/syllabus/{class_num}")
 async def get_syllabus(
     class_num: str,
+    request: Request,
     subject: Optional[str] = Query(None, description="Filter by subject")
 ):
     """Get complete syllabus for a class"""
-    result = MPBSESyllabusService.get_syllabus(class_num, subject)
-    if "error" in result:
-        raise HTTPException(status_code=404, detail=result["error"])
+    def build():
+        result = MPBSESyllabusService.get_syllabus(class_num, subject)
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        return result
     
-    return result
+    return cached_json(request, f"mpbse:syllabus:{class_num}:{subject or ''}", build)
 
 
 @router.get("/search")
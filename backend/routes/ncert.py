@@ -4,43 +4,51 @@ NCERT Syllabus API Routes
 Real NCERT curriculum data from official sources
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import Optional, List
 import sys
 import sys; from pathlib import Path; sys.path.append(str(Path(__file__).parent.parent))
 from services.ncert_syllabus import NCERTSyllabusService
+from core.response_cache import cached_json
 
 router = APIRouter(prefix="/ncert", tags=["NCERT Syllabus"])
 
 
 @router.get("/classes")
-async def get_all_classes():
+async def get_all_classes(request: Request):
     """Get all available NCERT classes (1-12)"""
-    classes = NCERTSyllabusService.get_all_classes()
-    return {
-        "classes": classes,
-        "total": len(classes),
-        "source": "NCERT Official Curriculum"
-    }
+    def build():
+        classes = NCERTSyllabusService.get_all_classes()
+        return {
+            "classes": classes,
+            "total": len(classes),
+            "source": "NCERT Official Curriculum"
+        }
+    
+    return cached_json(request, "ncert:classes", build)
 
 
 @router.get("/subjects/{class_num}")
-async def get_subjects(class_num: str):
+async def get_subjects(class_num: str, request: Request):
     """Get all subjects for a specific class"""
-    subjects = NCERTSyllabusService.get_subjects_for_class(class_num)
-    if not subjects:
-        raise HTTPException(status_code=404, detail=f"Class {class_num} not found")
+    def build():
+        subjects = NCERTSyllabusService.get_subjects_for_class(class_num)
+        if not subjects:
+            raise HTTPException(status_code=404, detail=f"Class {class_num} not found")
+        
+        return {
+            "class": class_num,
+            "subjects": subjects,
+            "total": len(subjects)
+        }
     
-    return {
-        "class": class_num,
-        "subjects": subjects,
-        "total": len(subjects)
-    }
+    return cached_json(request, f"ncert:subjects:{class_num}", build)
 
 
 @router.get("/syllabus/{class_num}")
 async def get_syllabus(
     class_num: str,
+    request: Request,
     subject: Optional[str] = Query(None, description="Filter by subject")
 ):
     """
@@ -48,11 +56,13 @@ async def get_syllabus(
     - Without subject: Returns all subjects with chapters
     - With subject: Returns only that subject's syllabus
     """
-    result = NCERTSyllabusService.get_syllabus(class_num, subject)
-    if "error" in result:
-        raise HTTPException(status_code=404, detail=result["error"])
+    def build():
+        result = NCERTSyllabusService.get_syllabus(class_num, subject)
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        return result
     
-    return result
+    return cached_json(request, f"ncert:syllabus:{class_num}:{subject or ''}", build)
 
 
 @router.get("/chapter/{class_num}/{subject}/{chapter_num}")
@@ -116,48 +126,54 @@ async def get_progress_template(class_num: str, subject: str):
 
 
 @router.get("/books")
-async def get_all_books():
+async def get_all_books(request: Request):
     """Get list of all NCERT books by class"""
-    all_books = []
+    def build():
+        all_books = []
+        
+        for class_num in NCERTSyllabusService.get_all_classes():
+            syllabus = NCERTSyllabusService.get_syllabus(class_num)
+            for subject, data in syllabus.get("subjects", {}).items():
+                all_books.append({
+                    "class": class_num,
+                    "subject": subject,
+                    "book_name": data.get("book", ""),
+                    "chapters_count": len(data.get("chapters", []))
+                })
+        
+        return {
+            "books": all_books,
+            "total": len(all_books),
+            "source": "NCERT Official Textbooks"
+        }
     
-    for class_num in NCERTSyllabusService.get_all_classes():
-        syllabus = NCERTSyllabusService.get_syllabus(class_num)
-        for subject, data in syllabus.get("subjects", {}).items():
-            all_books.append({
-                "class": class_num,
-                "subject": subject,
-                "book_name": data.get("book", ""),
-                "chapters_count": len(data.get("chapters", []))
-            })
-    
-    return {
-        "books": all_books,
-        "total": len(all_books),
-        "source": "NCERT Official Textbooks"
-    }
+    return cached_json(request, "ncert:books", build)
 
 
 @router.get("/summary")
-async def get_syllabus_summary():
+async def get_syllabus_summary(request: Request):
     """Get summary statistics of NCERT syllabus data"""
-    total_chapters = 0
-    total_topics = 0
-    subjects_set = set()
+    def build():
+        total_chapters = 0
+        total_topics = 0
+        subjects_set = set()
+        
+        for class_num in NCERTSyllabusService.get_all_classes():
+            syllabus = NCERTSyllabusService.get_syllabus(class_num)
+            for subject, data in syllabus.get("subjects", {}).items():
+                subjects_set.add(subject)
+                chapters = data.get("chapters", [])
+                total_chapters += len(chapters)
+                for ch in chapters:
+                    total_topics += len(ch.get("topics", []))
+        
+        return {
+            "total_classes": len(NCERTSyllabusService.get_all_classes()),
+            "total_subjects": len(subjects_set),
+            "total_chapters": total_chapters,
+            "total_topics": total_topics,
+            "subjects": sorted(list(subjects_set)),
+            "data_source": "NCERT Official Curriculum (https://ncert.nic.in/syllabus.php)"
+        }
     
-    for class_num in NCERTSyllabusService.get_all_classes():
-        syllabus = NCERTSyllabusService.get_syllabus(class_num)
-        for subject, data in syllabus.get("subjects", {}).items():
-            subjects_set.add(subject)
-            chapters = data.get("chapters", [])
-            total_chapters += len(chapters)
-            for ch in chapters:
-                total_topics += len(ch.get("topics", []))
-    
-    return {
-        "total_classes": len(NCERTSyllabusService.get_all_classes()),
-        "total_subjects": len(subjects_set),
-        "total_chapters": total_chapters,
-        "total_topics": total_topics,
-        "subjects": sorted(list(subjects_set)),
-        "data_source": "NCERT Official Curriculum (https://ncert.nic.in/syllabus.php)"
-    }
+    return cached_json(request, "ncert:summary", build)
@@ -15,11 +15,11 @@ import os
 import sys
 import random
 import string
-import bcrypt
 
 import sys; from pathlib import Path; sys.path.append(str(Path(__file__).parent.parent))
 
 from core.database import db
+from core.auth import hash_password_async, verify_password_async
 
 router = APIRouter(prefix="/password-reset", tags=["Password Reset"])
 
@@ -124,7 +124,7 @@ async def forgot_password(data: ForgotPasswordRequest):
         "identifier": identifier,
         "user_type": user_type,
         "otp": otp,
-        "otp_hash": bcrypt.hashpw(otp.encode(), bcrypt.gensalt()).decode(),
+        "otp_hash": await hash_password_async(otp),
         "expires_at": otp_expiry.isoformat(),
         "verified": False,
         "reset_token": None,
@@ -191,7 +191,7 @@ async def verify_otp(data: VerifyOTPRequest):
         raise HTTPException(status_code=400, detail="OTP expire ho gaya. Naya OTP request karein")
     
     # Verify OTP
-    if not bcrypt.checkpw(data.otp.encode(), otp_record["otp_hash"].encode()):
+    if not await verify_password_async(data.otp, otp_record["otp_hash"]):
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
     # Generate a secure reset token (valid for 15 minutes)
@@ -260,7 +260,7 @@ async def admin_reset_student_password(data: AdminResetStudentPassword):
     
     # Generate new temporary password
     temp_password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-    hashed_password = bcrypt.hashpw(temp_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed_password = await hash_password_async(temp_password)
     
     # Update student password
     await db.students.update_one(
@@ -347,7 +347,7 @@ async def bulk_reset_student_passwords(data: BulkStudentPasswordReset):
             continue
         
         temp_password = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-        hashed = bcrypt.hashpw(temp_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed = await hash_password_async(temp_password)
         
         await db.students.update_one(
             {"id": student["id"]},
@@ -405,7 +405,7 @@ async def reset_password(data: ResetPasswordRequest):
     user_type = otp_record.get("user_type")
     
     # Hash new password
-    hashed_pw = bcrypt.hashpw(data.new_password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(data.new_password)
     
     # Update password based on user type
     if user_type == "student":
@@ -12,6 +12,7 @@ import uuid
 import os
 import razorpay
 from core.database import db
+from core.offload import run_io
 
 router = APIRouter(prefix="/razorpay", tags=["Razorpay Payments"])
 
@@ -57,7 +58,7 @@ async def save_school_razorpay_config(config: SchoolRazorpayConfig):
     try:
         test_client = razorpay.Client(auth=(config.razorpay_key_id, config.razorpay_key_secret))
         # Try to fetch balance to verify credentials
-        test_client.order.all({"count": 1})
+        await run_io(test_client.order.all, {"count": 1})
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid Razorpay credentials: {str(e)}")
     
@@ -175,7 +176,7 @@ async def create_payment_order(data: CreateOrder):
             }
         }
         
-        razor_order = razorpay_client.order.create(data=order_data)
+        razor_order = await run_io(razorpay_client.order.create, data=order_data)
         
         # Save order to database
         payment_record = {
@@ -231,7 +232,7 @@ async def verify_payment(data: VerifyPayment):
         razorpay_client.utility.verify_payment_signature(params)
         
         # Get payment details from Razorpay
-        payment = razorpay_client.payment.fetch(data.razorpay_payment_id)
+        payment = await run_io(razorpay_client.payment.fetch, data.razorpay_payment_id)
         
         # Update payment record
         update_result = await db.razorpay_payments.update_one(
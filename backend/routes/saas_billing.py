@@ -28,7 +28,9 @@ from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 
 from core.database import db
+from core.offload import run_io
 from core.tenant import get_tenant_user, TenantContext, PLAN_FEATURES, PLAN_PRICING
+from core.response_cache import cached_json, CATALOG_MAX_AGE
 
 logger = logging.getLogger(__name__)
 
@@ -62,8 +64,12 @@ class CreditAddRequest(BaseModel):
 # ====================== GET ALL PLANS ======================
 
 @router.get("/plans")
-async def get_plans():
+async def get_plans(request: Request):
     """Public endpoint - list all subscription plans"""
+    return cached_json(request, "billing:plans", _build_plans, max_age=CATALOG_MAX_AGE)
+
+
+def _build_plans():
     plans = []
     for plan_name, pricing in PLAN_PRICING.items():
         if plan_name in ("free", "trial"):
@@ -171,7 +177,7 @@ async def create_subscription_order(data: SubscribeRequest):
         import razorpay
         client = razorpay.Client(auth=(razorpay_key, razorpay_secret))
 
-        order = client.order.create({
+        order = await run_io(client.order.create, {
             "amount": amount_inr * 100,    # Razorpay uses paise
             "currency": "INR",
             "receipt": f"SCH-{data.school_id[:8]}-{uuid.uuid4().hex[:6]}",
@@ -8,6 +8,7 @@ Salary Management System for Teachers & Staff
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 from datetime import datetime, timezone
@@ -17,6 +18,7 @@ import sys
 import sys; from pathlib import Path; sys.path.append(str(Path(__file__).parent.parent))
 
 from core.database import db
+from services.payroll_run import run_payroll, run_summary_csv
 
 router = APIRouter(prefix="/salary", tags=["Salary Management"])
 
@@ -37,6 +39,14 @@ class SalaryStructureCreate(BaseModel):
     other_deductions: float = 0
     effective_from: str
 
+class PayrollRunCreate(BaseModel):
+    school_id: str
+    month: str  # e.g., "2025-01"
+    staff_ids: Optional[List[str]] = None  # None = all staff with an active structure
+    branch_id: Optional[str] = None
+    payment_mode: str = "bank_transfer"
+    created_by: Optional[str] = None
+
 class SalaryPaymentCreate(BaseModel):
     staff_id: str
     school_id: str
@@ -469,61 +479,74 @@ async def bulk_credit_salaries(
     """
     Credit salaries to multiple staff at once
     """
-    credited = 0
-    errors = []
-    
-    for staff_id in staff_ids:
-        try:
-            # Check if already paid
-            existing = await db.salary_payments.find_one({
-                "staff_id": staff_id, "month": month, "status": "credited"
-            })
-            if existing:
-                errors.append(f"{staff_id}: Already credited")
-                continue
-            
-            # Get structure
-            structure = await db.salary_structures.find_one(
-                {"staff_id": staff_id, "is_active": True}
-            )
-            
-            if not structure:
-                errors.append(f"{staff_id}: No salary structure")
-                continue
-            
-            # Get staff
-            staff = await db.staff.find_one({"id": staff_id})
-            if not staff:
-                staff = await db.users.find_one({"id": staff_id})
-            
-            # Create payment
-            slip_no = f"SAL-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:6].upper()}"
-            
-            payment = {
-                "id": str(uuid.uuid4()),
-                "slip_no": slip_no,
-                "staff_id": staff_id,
-                "staff_name": staff.get("name") if staff else "Staff",
-                "school_id": school_id,
-                "month": month,
-                "gross_salary": structure.get("gross_salary", 0),
-                "deductions": structure.get("total_deductions", 0),
-                "net_salary": structure.get("net_salary", 0),
-                "payment_mode": payment_mode,
-                "status": "credited",
-                "payment_date": datetime.now(timezone.utc).isoformat(),
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            await db.salary_payments.insert_one(payment)
-            credited += 1
-            
-        except Exception as e:
-            errors.append(f"{staff_id}: {str(e)}")
+    run = await run_payroll(school_id, month, staff_ids=staff_ids, payment_mode=payment_mode)
+    errors = [
+        f"{i['staff_id']}: {'Already credited' if i['status'] == 'already_credited' else i.get('reason', 'Error')}"
+        for i in run["items"] if i["status"] != "credited"
+    ]
     
     return {
         "success": True,
-        "credited_count": credited,
+        "credited_count": run["summary"]["credited"],
         "errors": errors[:10],
-        "month": month
+        "month": month,
+        "run_id": run["id"]
     }
+
+
+# ==================== PAYROLL RUNS ====================
+
+@router.post("/run")
+async def create_payroll_run(data: PayrollRunCreate):
+    """
+    Month-end payroll run for a school (or one branch) in a single pass.
+    Re-running the same month only credits staff who were not paid yet.
+    """
+    run = await run_payroll(
+        data.school_id,
+        data.month,
+        staff_ids=data.staff_ids,
+        payment_mode=data.payment_mode,
+        branch_id=data.branch_id,
+        created_by=data.created_by
+    )
+    return {
+        "success": True,
+        "run_id": run["id"],
+        "month": run["month"],
+        "summary": run["summary"],
+        "items": run["items"]
+    }
+
+
+@router.get("/runs/{school_id}")
+async def list_payroll_runs(school_id: str, month: Optional[str] = None):
+    """
+    List previous payroll runs (summary only)
+    """
+    query = {"school_id": school_id}
+    if month:
+        query["month"] = month
+    
+    runs = await db.salary_runs.find(
+        query, {"_id": 0, "items": 0}
+    ).sort("created_at", -1).to_list(50)
+    
+    return {"school_id": school_id, "runs": runs}
+
+
+@router.get("/run/{run_id}/download")
+async def download_payroll_run(run_id: str):
+    """
+    Download payroll run summary as CSV
+    """
+    run = await db.salary_runs.find_one({"id": run_id}, {"_id": 0})
+    if not run:
+        raise HTTPException(status_code=404, detail="Payroll run not found")
+    
+    filename = f"payroll_{run['school_id']}_{run['month']}_{run_id[:8]}.csv"
+    return Response(
+        content=run_summary_csv(run),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -442,9 +442,9 @@ async def quick_setup_wizard(
     await db.schools.insert_one(school_data)
     
     # Create director account
-    import bcrypt
+    from core.auth import hash_password_async
     temp_password = ''.join(secrets.choice('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789') for _ in range(10))
-    hashed_pw = bcrypt.hashpw(temp_password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(temp_password)
     
     director_data = {
         "id": str(uuid.uuid4()),
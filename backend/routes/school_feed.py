@@ -1,8 +1,9 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
 from typing import Optional
 from datetime import datetime, timezone
 from core.database import db
 from core.auth import get_current_user
+from core.pagination import fetch_page
 import uuid
 import os
 import aiofiles
@@ -16,15 +17,21 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
 @router.get("/{school_id}")
-async def get_feed_posts(school_id: str):
-    posts = await db.school_feed.find(
-        {"school_id": school_id, "is_deleted": {"$ne": True}}
-    ).sort("created_at", -1).to_list(100)
-
-    for post in posts:
-        post.pop("_id", None)
-
-    return {"posts": posts}
+async def get_feed_posts(
+    school_id: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """Newest posts first; pass `next_cursor` back as `cursor` for older ones."""
+    page = await fetch_page(
+        db.school_feed,
+        {"school_id": school_id, "is_deleted": {"$ne": True}},
+        {"_id": 0},
+        sort=[("created_at", -1)],
+        limit=limit,
+        cursor=cursor
+    )
+    return {"posts": page.items, "next_cursor": page.next_cursor}
 
 
 @router.post("")
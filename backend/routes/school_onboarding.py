@@ -21,13 +21,13 @@ import uuid
 import logging
 import random
 import string
-import bcrypt
 from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
 from core.database import db
+from core.auth import hash_password_async, verify_password_async
 
 logger = logging.getLogger(__name__)
 
@@ -115,7 +115,7 @@ async def register_school(data: SchoolRegisterRequest):
     school_code = generate_school_code(data.school_name)
 
     # Hash password
-    hashed_pw = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(data.password)
 
     now = datetime.now(timezone.utc)
     trial_end = now + timedelta(days=14)
@@ -220,7 +220,7 @@ async def register_school(data: SchoolRegisterRequest):
 
     # Send verification OTP (6-digit)
     otp = ''.join(random.choices(string.digits, k=6))
-    otp_hashed = bcrypt.hashpw(otp.encode(), bcrypt.gensalt()).decode()
+    otp_hashed = await hash_password_async(otp)
     await db.email_verifications.insert_one({
         "email": data.director_email.lower(),
         "otp_hash": otp_hashed,
@@ -272,7 +272,7 @@ async def verify_email(data: VerifyEmailRequest):
     if datetime.now(timezone.utc) > expiry:
         raise HTTPException(status_code=400, detail="OTP expired. Request a new one.")
 
-    if not bcrypt.checkpw(data.otp.encode(), verification["otp_hash"].encode()):
+    if not await verify_password_async(data.otp, verification["otp_hash"]):
         raise HTTPException(status_code=400, detail="Invalid OTP")
 
     # Mark verified
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 from core.database import db
+from core.pagination import fetch_page, stream_documents
 from datetime import datetime, timezone, timedelta
 from bson import ObjectId
 
@@ -54,7 +56,15 @@ async def mark_attendance(data: dict):
     return {"success": True, "id": str(result.inserted_id)}
 
 @router.get("/report")
-async def attendance_report(school_id: str = Query(...), month: int = Query(None), year: int = Query(None)):
+async def attendance_report(
+    school_id: str = Query(...),
+    month: int = Query(None),
+    year: int = Query(None),
+    limit: int = Query(5000, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$")
+):
+    """Month's records in date order; `next_cursor` pages past `limit`, stream=ndjson|json exports all."""
     now = datetime.now(timezone.utc)
     month = month or now.month
     year = year or now.year
@@ -65,12 +75,20 @@ async def attendance_report(school_id: str = Query(...), month: int = Query(None
     else:
         end_date = datetime(year, month + 1, 1, tzinfo=timezone.utc)
     
-    records = await db.staff_attendance.find({
+    query = {
         "school_id": school_id,
         "date": {"$gte": start_date, "$lt": end_date}
-    }).to_list(5000)
-    
-    for r in records:
-        r["id"] = str(r.pop("_id"))
-    
-    return {"report": records, "month": month, "year": year}
+    }
+    sort = [("date", 1)]
+
+    async def with_ids(records):
+        for r in records:
+            r["id"] = str(r.pop("_id"))
+        return records
+
+    if stream:
+        return stream_documents(db.staff_attendance.find(query).sort(sort + [("_id", 1)]), stream, with_ids,
+                                filename=f"staff_attendance_{year}_{month:02d}.{'ndjson' if stream == 'ndjson' else 'json'}")
+
+    page = await fetch_page(db.staff_attendance, query, sort=sort, limit=limit, cursor=cursor)
+    return {"report": await with_ids(page.items), "month": month, "year": year, "next_cursor": page.next_cursor}
@@ -15,9 +15,9 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone, timedelta
 from core.database import db
+from core.auth import hash_password_async, verify_password_async
 import os
 import uuid
-import bcrypt
 import jwt
 from functools import wraps
 
@@ -93,7 +93,7 @@ async def super_admin_login(credentials: SuperAdminLogin):
     if not admin:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not bcrypt.checkpw(credentials.password.encode(), admin["password"].encode()):
+    if not await verify_password_async(credentials.password, admin["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Generate token
@@ -136,7 +136,7 @@ async def create_super_admin(admin_data: SuperAdminCreate, master_key: str):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_password = bcrypt.hashpw(admin_data.password.encode(), bcrypt.gensalt()).decode()
+    hashed_password = await hash_password_async(admin_data.password)
     
     admin_doc = {
         "id": str(uuid.uuid4()),
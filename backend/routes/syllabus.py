@@ -4,12 +4,14 @@ Unified Syllabus API Routes
 Supports multiple boards: NCERT, MPBSE, etc.
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
 import sys
 import sys; from pathlib import Path; sys.path.append(str(Path(__file__).parent.parent))
 from services.ncert_syllabus import NCERTSyllabusService
 from services.mpbse_syllabus import MPBSESyllabusService
+from services.syllabus_index import get_index
+from core.response_cache import cached_json
 
 router = APIRouter(prefix="/syllabus", tags=["Unified Syllabus"])
 
@@ -74,6 +76,7 @@ async def get_subjects_by_board(board: str, class_num: str):
 async def get_syllabus_by_board(
     board: str,
     class_num: str,
+    request: Request,
     subject: Optional[str] = Query(None, description="Filter by subject")
 ):
     """Get complete syllabus for a class from specific board"""
@@ -81,16 +84,18 @@ async def get_syllabus_by_board(
     if board_upper not in SUPPORTED_BOARDS:
         raise HTTPException(status_code=404, detail=f"Board {board} not supported")
     
-    service = SUPPORTED_BOARDS[board_upper]["service"]
-    result = service.get_syllabus(class_num, subject)
-    
-    if "error" in result:
-        raise HTTPException(status_code=404, detail=result["error"])
+    def build():
+        service = SUPPORTED_BOARDS[board_upper]["service"]
+        result = service.get_syllabus(class_num, subject)
+        
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
+        
+        result["board"] = board_upper
+        result["board_name"] = SUPPORTED_BOARDS[board_upper]["name"]
+        return result
     
-    result["board"] = board_upper
-    result["board_name"] = SUPPORTED_BOARDS[board_upper]["name"]
-    
-    return result
+    return cached_json(request, f"syllabus:{board_upper}:{class_num}:{subject or ''}", build)
 
 
 @router.get("/{board}/search")
@@ -121,15 +126,8 @@ async def search_all_boards(
     query: str = Query(..., min_length=2),
     class_num: Optional[str] = Query(None)
 ):
-    """Search syllabus across all boards"""
-    all_results = []
-    
-    for board_code, board_info in SUPPORTED_BOARDS.items():
-        service = board_info["service"]
-        results = service.search_topics(query, class_num)
-        for r in results:
-            r["board"] = board_code
-        all_results.extend(results)
+    """Search syllabus across all boards (one ranked list)"""
+    all_results = get_index().search(query, class_num=class_num)
     
     return {
         "query": query,
@@ -138,3 +136,25 @@ async def search_all_boards(
         "total": len(all_results),
         "boards_searched": list(SUPPORTED_BOARDS.keys())
     }
+
+
+@router.get("/suggest")
+async def suggest_topics(
+    q: str = Query(..., min_length=1),
+    board: Optional[str] = Query(None),
+    class_num: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Typeahead for chapter / topic names (Hindi, English or Roman Hindi)"""
+    board_upper = board.upper() if board else None
+    if board_upper and board_upper not in SUPPORTED_BOARDS:
+        raise HTTPException(status_code=404, detail=f"Board {board} not supported")
+    
+    suggestions = get_index().suggest(q, board=board_upper, class_num=class_num, limit=limit)
+    return {
+        "query": q,
+        "board": board_upper,
+        "class_filter": class_num,
+        "suggestions": suggestions,
+        "total": len(suggestions)
+    }
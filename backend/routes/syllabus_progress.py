@@ -4,12 +4,17 @@ Syllabus Progress Tracking & AI Chapter Summary
 - Teachers update syllabus progress
 - Students see real-time updates
 - AI generates chapter summaries
+- Summaries are pre-generated in the background for every NCERT / MPBSE
+  chapter and language; on-demand requests for a chapter still being
+  written share one generation (single-flight)
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timezone, timedelta
+import asyncio
+import logging
 import uuid
 import os
 import sys
@@ -25,8 +30,15 @@ db = client[db_name]
 
 # Emergent LLM Integration
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from core.llm_stream import sse_stream, token_event, status_event, result_event
+from core.auth import get_current_user
 
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
+SUMMARY_LANGUAGES = ["hinglish", "hindi", "english"]
+PREGEN_CONCURRENCY = int(os.environ.get("SUMMARY_PREGEN_CONCURRENCY", "4"))  # parallel LLM calls per job
+PREGEN_STALE_MINUTES = 5  # a running job with no progress for this long is resumed by the next worker
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/syllabus-progress", tags=["Syllabus Progress"])
 
@@ -55,6 +67,11 @@ class ChapterSummaryRequest(BaseModel):
     include_formulas: bool = True
     include_key_points: bool = True
 
+class SummaryPregenRequest(BaseModel):
+    boards: List[str] = ["NCERT", "MPBSE"]
+    languages: List[str] = SUMMARY_LANGUAGES
+    class_nums: Optional[List[str]] = None  # None = every class
+
 class BulkProgressUpdate(BaseModel):
     school_id: str
     class_id: str
@@ -322,16 +339,8 @@ async def get_syllabus_analytics(
 
 # ==================== AI CHAPTER SUMMARY ====================
 
-@router.post("/ai/summarize-chapter")
-async def generate_chapter_summary(request: ChapterSummaryRequest):
-    """
-    AI generates chapter summary in Hindi/English/Hinglish
-    With key points, formulas, and important concepts
-    """
-    if not EMERGENT_LLM_KEY:
-        raise HTTPException(status_code=500, detail="AI service not configured")
-    
-    # Build prompt based on request
+def chapter_summary_prompt(request: ChapterSummaryRequest) -> str:
+    """Summary prompt for the requested language / formulas / key points"""
     language_instruction = {
         "hindi": "पूरा summary Hindi में लिखो।",
         "english": "Write the entire summary in English.",
@@ -362,85 +371,217 @@ Create a comprehensive summary that includes:
 Make it student-friendly, easy to understand, and exam-focused.
 Use emojis to make it engaging.
 """
+    return prompt
 
-    try:
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=f"chapter-summary-{request.chapter_number}",
-            system_message="You are an expert teacher creating chapter summaries for students."
-        ).with_model("openai", "gpt-4o-mini")
-        
-        user_msg = UserMessage(text=prompt)
-        response = await chat.send_message(user_msg)
-        summary = response
-        
-        # Store the generated summary for future reference
-        summary_record = {
-            "id": str(uuid.uuid4()),
-            "board": request.board,
-            "class_num": request.class_num,
-            "subject": request.subject,
-            "chapter_number": request.chapter_number,
-            "chapter_name": request.chapter_name,
-            "language": request.language,
-            "summary": summary,
-            "generated_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.chapter_summaries.insert_one(summary_record)
-        
-        return {
-            "success": True,
-            "chapter": {
-                "board": request.board,
-                "class": request.class_num,
-                "subject": request.subject,
-                "number": request.chapter_number,
-                "name": request.chapter_name
+
+def chapter_summary_chat(request: ChapterSummaryRequest) -> LlmChat:
+    return LlmChat(
+        api_key=EMERGENT_LLM_KEY,
+        session_id=f"chapter-summary-{request.chapter_number}",
+        system_message="You are an expert teacher creating chapter summaries for students."
+    ).with_model("openai", "gpt-4o-mini")
+
+
+def checked_summary(reply: str) -> str:
+    """The model's reply; raises when it is empty or ends in LlmChat's "AI Error: ..." fallback, so it isn't stored"""
+    text = (reply or "").strip()
+    if not text:
+        raise ValueError("AI returned an empty summary")
+    last = text.rsplit("\n\n", 1)[-1]
+    if last.startswith("AI Error:"):
+        raise ValueError(last)
+    return reply
+
+
+def summary_filter(board: str, class_num: str, subject: str, chapter_number: int, language: str) -> Dict:
+    """chapter_summaries lookup key (one stored summary per chapter and language)"""
+    return {
+        "board": board.upper(),
+        "class_num": str(class_num),
+        "subject": subject,
+        "chapter_number": int(chapter_number),
+        "language": language
+    }
+
+
+def summary_response(board: str, class_num: str, subject: str, chapter_number: int, chapter_name: str,
+                     language: str, summary: str, cached: bool, generated_at: Optional[str] = None) -> Dict:
+    body = {
+        "success": True,
+        "chapter": {
+            "board": board,
+            "class": class_num,
+            "subject": subject,
+            "number": chapter_number,
+            "name": chapter_name
+        },
+        "summary": summary,
+        "language": language,
+        "cached": cached
+    }
+    if generated_at:
+        body["generated_at"] = generated_at
+    return body
+
+
+def _is_standard(request: ChapterSummaryRequest) -> bool:
+    """Only the default variant (formulas + key points) is cached and pre-generated"""
+    return request.include_formulas and request.include_key_points
+
+
+async def find_cached_summary(request: ChapterSummaryRequest) -> Optional[Dict]:
+    if not _is_standard(request):
+        return None
+    cached = await db.chapter_summaries.find_one(summary_filter(
+        request.board, request.class_num, request.subject, request.chapter_number, request.language
+    ), {"_id": 0})
+    if not cached:
+        return None
+    return summary_response(request.board, request.class_num, request.subject, request.chapter_number,
+                            cached.get("chapter_name") or request.chapter_name, request.language,
+                            cached["summary"], True, cached.get("generated_at"))
+
+
+async def save_chapter_summary(request: ChapterSummaryRequest, summary: str) -> Dict:
+    """Store a generated summary in chapter_summaries; returns the API response body"""
+    # Store the generated summary for future reference (default variant only, one per chapter + language)
+    if _is_standard(request):
+        await db.chapter_summaries.update_one(
+            summary_filter(request.board, request.class_num, request.subject, request.chapter_number, request.language),
+            {
+                "$set": {
+                    "chapter_name": request.chapter_name,
+                    "summary": summary,
+                    "generated_at": datetime.now(timezone.utc).isoformat()
+                },
+                "$setOnInsert": {"id": str(uuid.uuid4())}
             },
-            "summary": summary,
-            "language": request.language,
-            "cached": False
-        }
+            upsert=True
+        )
+    
+    return summary_response(request.board, request.class_num, request.subject, request.chapter_number,
+                            request.chapter_name, request.language, summary, False)
+
+
+# In-flight generations by chapter variant: concurrent requests wait for the first one
+_inflight: Dict[Tuple, asyncio.Future] = {}
+
+
+def _flight_key(request: ChapterSummaryRequest) -> Tuple:
+    return (request.board.upper(), str(request.class_num), request.subject, request.chapter_number,
+            request.language, request.include_formulas, request.include_key_points)
+
+
+async def summarize_chapter(request: ChapterSummaryRequest) -> Dict:
+    """Cached summary, else generate it - once, however many callers ask for the chapter at the same time"""
+    cached = await find_cached_summary(request)
+    if cached:
+        return cached
+    
+    key = _flight_key(request)
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+    
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        chat = chapter_summary_chat(request)
+        summary = checked_summary(await chat.send_message(UserMessage(text=chapter_summary_prompt(request))))
+        body = await save_chapter_summary(request, summary)
+        future.set_result(body)
+        return body
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()   # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+@router.post("/ai/summarize-chapter")
+async def generate_chapter_summary(request: ChapterSummaryRequest):
+    """
+    AI generates chapter summary in Hindi/English/Hinglish
+    With key points, formulas, and important concepts
+    (served from chapter_summaries when already generated)
+    """
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+    
+    try:
+        return await summarize_chapter(request)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
 
 
+@router.post("/ai/summarize-chapter/stream")
+async def generate_chapter_summary_stream(request: ChapterSummaryRequest):
+    """
+    /ai/summarize-chapter as Server-Sent Events: the summary as `token`
+    events, then a `result` event with the same body once it is stored.
+    A stored summary comes back as the `result` event alone; while another
+    request is generating the chapter, a `status` event and then its result.
+    """
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+
+    async def events():
+        cached = await find_cached_summary(request)
+        if cached:
+            yield result_event(cached)
+            return
+        pending = _inflight.get(_flight_key(request))
+        if pending is not None:
+            yield status_event("This chapter's summary is already being written")
+            yield result_event(await asyncio.shield(pending))
+            return
+
+        chat = chapter_summary_chat(request)
+        parts = []
+        async for text in chat.stream_message(UserMessage(text=chapter_summary_prompt(request))):
+            parts.append(text)
+            yield token_event(text)
+        yield result_event(await save_chapter_summary(request, checked_summary("".join(parts))))
+
+    return sse_stream("chapter-summary", events())
+
+
 @router.get("/ai/summary/{board}/{class_num}/{subject}/{chapter_num}")
 async def get_cached_summary(
     board: str,
     class_num: str,
     subject: str,
     chapter_num: int,
-    language: str = "hinglish"
+    language: str = "hinglish",
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Get cached chapter summary or generate new one
+    (syllabus chapters only; concurrent requests share one generation)
     """
+    if language not in SUMMARY_LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Unknown language: {language}")
     # Check for cached summary
-    cached = await db.chapter_summaries.find_one({
-        "board": board.upper(),
-        "class_num": class_num,
-        "subject": subject,
-        "chapter_number": chapter_num,
-        "language": language
-    }, {"_id": 0})
+    cached = await db.chapter_summaries.find_one(
+        summary_filter(board, class_num, subject, chapter_num, language), {"_id": 0}
+    )
     
     if cached:
-        return {
-            "success": True,
-            "chapter": {
-                "board": board,
-                "class": class_num,
-                "subject": subject,
-                "number": chapter_num,
-                "name": cached.get("chapter_name", "")
-            },
-            "summary": cached["summary"],
-            "language": language,
-            "cached": True,
-            "generated_at": cached.get("generated_at")
-        }
+        return summary_response(board, class_num, subject, chapter_num, cached.get("chapter_name", ""),
+                                language, cached["summary"], True, cached.get("generated_at"))
+    
+    chapter = next((c for c in syllabus_chapters([board], [class_num])
+                    if c["subject"] == subject and c["chapter_number"] == chapter_num), None)
+    if chapter and EMERGENT_LLM_KEY:
+        try:
+            return await summarize_chapter(ChapterSummaryRequest(**chapter, language=language))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
     
     return {
         "success": False,
@@ -449,6 +590,166 @@ async def get_cached_summary(
     }
 
 
+# ==================== SUMMARY PRE-GENERATION ====================
+
+def syllabus_chapters(boards: List[str], class_nums: Optional[List[str]] = None) -> List[Dict]:
+    """Every chapter of the given boards' syllabus data as ChapterSummaryRequest fields"""
+    from services.ncert_syllabus import NCERT_SYLLABUS_DATA
+    from services.mpbse_syllabus import MPBSE_SYLLABUS_DATA
+    
+    data = {"NCERT": NCERT_SYLLABUS_DATA, "MPBSE": MPBSE_SYLLABUS_DATA}
+    chapters = []
+    for board in boards:
+        classes = data.get(board.upper(), {})
+        for class_num in sorted(classes, key=int):
+            if class_nums and class_num not in class_nums:
+                continue
+            for subject, subject_data in classes[class_num]["subjects"].items():
+                for chapter in subject_data.get("chapters", []):
+                    chapters.append({
+                        "board": board.upper(),
+                        "class_num": class_num,
+                        "subject": subject,
+                        "chapter_number": chapter["number"],
+                        "chapter_name": chapter["name"]
+                    })
+    return chapters
+
+
+async def _claim_summary_job(job_id: str) -> Optional[Dict]:
+    """Take the job unless another worker is actively running it (its heartbeat is fresh)"""
+    now = datetime.now(timezone.utc)
+    stale = (now - timedelta(minutes=PREGEN_STALE_MINUTES)).isoformat()
+    return await db.summary_jobs.find_one_and_update(
+        {
+            "id": job_id,
+            "status": {"$in": ["queued", "running"]},
+            "$or": [{"heartbeat_at": None}, {"heartbeat_at": {"$lt": stale}}]
+        },
+        {"$set": {"status": "running", "heartbeat_at": now.isoformat()}},
+        projection={"_id": 0}
+    )
+
+
+async def run_summary_job(job_id: str):
+    """
+    Generate every missing summary in the job's scope, PREGEN_CONCURRENCY at a time.
+    Chapters already in chapter_summaries are skipped, so a re-run (or a resume
+    after a restart) only does what is left. Status: queued → running → completed.
+    """
+    job = await _claim_summary_job(job_id)
+    if not job:
+        return
+    
+    chapters = syllabus_chapters(job["boards"], job.get("class_nums"))
+    existing = set()
+    async for doc in db.chapter_summaries.find(
+        {"board": {"$in": [b.upper() for b in job["boards"]]}, "language": {"$in": job["languages"]}},
+        {"_id": 0, "board": 1, "class_num": 1, "subject": 1, "chapter_number": 1, "language": 1}
+    ):
+        existing.add((doc["board"], doc["class_num"], doc["subject"], doc["chapter_number"], doc["language"]))
+    
+    todo = [
+        ChapterSummaryRequest(**chapter, language=language)
+        for chapter in chapters for language in job["languages"]
+        if (chapter["board"], chapter["class_num"], chapter["subject"], chapter["chapter_number"], language) not in existing
+    ]
+    await db.summary_jobs.update_one({"id": job_id}, {"$set": {
+        "total": len(chapters) * len(job["languages"]),
+        # summaries a previous run of this job wrote count as generated, not as already there
+        "already_generated": len(chapters) * len(job["languages"]) - len(todo) - job.get("generated", 0),
+        "failed": 0,
+        "errors": [],
+        "started_at": job.get("started_at") or datetime.now(timezone.utc).isoformat()
+    }})
+    logger.info(f"Summary job {job_id}: {len(todo)} summaries to generate")
+    
+    limit = asyncio.Semaphore(PREGEN_CONCURRENCY)
+    
+    async def one(request: ChapterSummaryRequest):
+        async with limit:
+            progress = {"$set": {"heartbeat_at": datetime.now(timezone.utc).isoformat()}}
+            try:
+                await summarize_chapter(request)
+                progress["$inc"] = {"generated": 1}
+            except Exception as e:
+                logger.warning(f"Summary job {job_id}: {request.board} {request.class_num} {request.subject} "
+                               f"ch {request.chapter_number} ({request.language}) failed: {e}")
+                progress["$inc"] = {"failed": 1}
+                progress["$push"] = {"errors": {"$each": [
+                    f"{request.board}/{request.class_num}/{request.subject}/{request.chapter_number}/{request.language}: {e}"
+                ], "$slice": -20}}
+            await db.summary_jobs.update_one({"id": job_id}, progress)
+    
+    try:
+        await asyncio.gather(*[one(request) for request in todo])
+        await db.summary_jobs.update_one({"id": job_id}, {"$set": {
+            "status": "completed",
+            "finished_at": datetime.now(timezone.utc).isoformat()
+        }})
+    except Exception as e:
+        logger.error(f"Summary job {job_id} failed: {e}")
+        await db.summary_jobs.update_one({"id": job_id}, {"$set": {"status": "failed", "error": str(e)}})
+
+
+async def resume_summary_jobs():
+    """Continue jobs a stopped worker left queued or running (called at startup)"""
+    jobs = await db.summary_jobs.find({"status": {"$in": ["queued", "running"]}}, {"_id": 0, "id": 1}).to_list(None)
+    for job in jobs:
+        asyncio.create_task(run_summary_job(job["id"]))
+
+
+@router.post("/ai/pregenerate-summaries")
+async def start_summary_pregeneration(
+    request: SummaryPregenRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Queue a background job that fills chapter_summaries for every chapter of
+    the given boards (and classes) in each language; poll
+    /ai/pregenerate-summaries/{job_id} for progress
+    """
+    if current_user.get("role") not in ["super_admin", "admin", "director"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+    boards = [b.upper() for b in request.boards]
+    unknown = [b for b in boards if b not in ("NCERT", "MPBSE")] + \
+        [lang for lang in request.languages if lang not in SUMMARY_LANGUAGES]
+    if unknown or not boards or not request.languages:
+        raise HTTPException(status_code=400, detail=f"Unknown board/language: {', '.join(unknown) or 'none given'}")
+    
+    job = {
+        "id": str(uuid.uuid4()),
+        "boards": boards,
+        "languages": request.languages,
+        "class_nums": request.class_nums,
+        "status": "queued",
+        "total": len(syllabus_chapters(boards, request.class_nums)) * len(request.languages),
+        "already_generated": 0,
+        "generated": 0,
+        "failed": 0,
+        "errors": [],
+        "heartbeat_at": None,
+        "created_by": current_user["id"],
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.summary_jobs.insert_one(job)
+    job.pop("_id", None)
+    background_tasks.add_task(run_summary_job, job["id"])
+    return job
+
+
+@router.get("/ai/pregenerate-summaries/{job_id}")
+async def get_summary_pregeneration(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Progress of a pre-generation job"""
+    job = await db.summary_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 # ==================== NOTIFICATIONS ====================
 
 @router.get("/notifications/{school_id}/{class_id}")
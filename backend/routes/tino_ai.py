@@ -11,6 +11,8 @@ from pydantic import BaseModel
 from typing import Optional, List
 from motor.motor_asyncio import AsyncIOMotorClient
 from emergentintegrations.llm.chat import LlmChat, UserMessage
+from core.ai_cheap import SARVAM_API_KEY, stream_sarvam_chat
+from core.llm_stream import sse_stream, token_event, result_event
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -239,6 +241,38 @@ async def get_specific_data(school_id: str, query_type: str, params: dict = None
         return None
 
 
+# Sarvam API system prompt (/chat and /chat/stream)
+SARVAM_SYSTEM_PROMPT = """You are AI Tino, a text assistant for SchoolTino. 
+Respond in pure Hindi for Hindi queries, pure English for English queries.
+Keep responses helpful, accurate, and concise.
+You cannot perform actions like opening forms or updating data - only provide information."""
+
+
+def blocked_command_reply(request: TinoMessage) -> Optional[TinoResponse]:
+    """Polite refusal when the message asks Tino to open forms / change data (text-only assistant)"""
+    blocked_keywords = [
+        'form kholo', 'open form', 'admission kholo', 'kholo', 'open',
+        'data update', 'update karo', 'form fill', 'fill karo',
+        'record update', 'delete karo', 'add karo', 'remove karo',
+        'student add', 'staff add', 'create', 'banao'
+    ]
+    
+    message_lower = request.message.lower()
+    if any(keyword in message_lower for keyword in blocked_keywords):
+        # Polite blocking message
+        if request.language == 'hi' or any(c in request.message for c in 'अआइईउऊएऐओऔ'):
+            return TinoResponse(
+                response="🙏 नमस्ते! मैं अब सिर्फ text assistant हूँ। Forms open करने या data update करने के लिए कृपया dashboard में manually जाएं। मैं आपको जानकारी और सुझाव दे सकता हूँ।",
+                action_taken="blocked_system_command"
+            )
+        else:
+            return TinoResponse(
+                response="👋 Hello! I'm a text-only assistant now. For forms or data updates, please use the dashboard manually. I can provide information and suggestions.",
+                action_taken="blocked_system_command"
+            )
+    return None
+
+
 @router.post("/chat", response_model=TinoResponse)
 async def chat_with_tino(request: TinoMessage):
     """
@@ -247,26 +281,9 @@ async def chat_with_tino(request: TinoMessage):
     """
     try:
         # Check for system control commands and BLOCK them
-        blocked_keywords = [
-            'form kholo', 'open form', 'admission kholo', 'kholo', 'open',
-            'data update', 'update karo', 'form fill', 'fill karo',
-            'record update', 'delete karo', 'add karo', 'remove karo',
-            'student add', 'staff add', 'create', 'banao'
-        ]
-        
-        message_lower = request.message.lower()
-        if any(keyword in message_lower for keyword in blocked_keywords):
-            # Polite blocking message
-            if request.language == 'hi' or any(c in request.message for c in 'अआइईउऊएऐओऔ'):
-                return TinoResponse(
-                    response="🙏 नमस्ते! मैं अब सिर्फ text assistant हूँ। Forms open करने या data update करने के लिए कृपया dashboard में manually जाएं। मैं आपको जानकारी और सुझाव दे सकता हूँ।",
-                    action_taken="blocked_system_command"
-                )
-            else:
-                return TinoResponse(
-                    response="👋 Hello! I'm a text-only assistant now. For forms or data updates, please use the dashboard manually. I can provide information and suggestions.",
-                    action_taken="blocked_system_command"
-                )
+        blocked = blocked_command_reply(request)
+        if blocked:
+            return blocked
         
         # ✅ SARVAM API EXCLUSIVELY - No other LLM
         sarvam_api_key = os.environ.get("SARVAM_API_KEY")
@@ -280,12 +297,6 @@ async def chat_with_tino(request: TinoMessage):
         # Call Sarvam API
         import httpx
         
-        # Sarvam API system prompt
-        system_prompt = """You are AI Tino, a text assistant for SchoolTino. 
-Respond in pure Hindi for Hindi queries, pure English for English queries.
-Keep responses helpful, accurate, and concise.
-You cannot perform actions like opening forms or updating data - only provide information."""
-        
         # Detect language from message
         is_hindi = request.language == 'hi' or any(c in request.message for c in 'अआइईउऊएऐओऔ')
         
@@ -299,7 +310,7 @@ You cannot perform actions like opening forms or updating data - only provide in
                 json={
                     "model": "sarvam-m",
                     "messages": [
-                        {"role": "system", "content": system_prompt},
+                        {"role": "system", "content": SARVAM_SYSTEM_PROMPT},
                         {"role": "user", "content": request.message}
                     ],
                     "max_tokens": 3000,
@@ -420,6 +431,46 @@ User Query: {request.message}
         raise HTTPException(status_code=500, detail=f"AI Error: {str(e)}")
 
 
+@router.post("/chat/stream")
+async def chat_with_tino_stream(request: TinoMessage):
+    """
+    /chat as Server-Sent Events: Sarvam's reply as `token` events, then a
+    `result` event with the TinoResponse fields
+    """
+    async def events():
+        blocked = blocked_command_reply(request)
+        if blocked:
+            yield result_event(blocked.model_dump())
+            return
+        if not SARVAM_API_KEY:
+            yield result_event(TinoResponse(
+                response="❌ AI service unavailable – please try again later" if request.language == 'en' else "❌ AI सेवा उपलब्ध नहीं है – कृपया बाद में try करें",
+                action_taken="error"
+            ).model_dump())
+            return
+
+        parts = []
+        async for text in stream_sarvam_chat([
+            {"role": "system", "content": SARVAM_SYSTEM_PROMPT},
+            {"role": "user", "content": request.message}
+        ]):
+            parts.append(text)
+            yield token_event(text)
+
+        if not parts:
+            yield result_event(TinoResponse(
+                response="❌ AI service unavailable" if request.language == 'en' else "❌ AI सेवा उपलब्ध नहीं",
+                action_taken="error"
+            ).model_dump())
+            return
+        yield result_event(TinoResponse(
+            response="".join(parts),
+            action_taken="sarvam_text_response"
+        ).model_dump())
+
+    return sse_stream("tino-ai-chat", events())
+
+
 @router.get("/quick-stats/{school_id}")
 async def get_quick_stats(school_id: str):
     """Get quick stats for dashboard cards"""
@@ -25,6 +25,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/tino-brain", tags=["Tino Brain - Unified AI"])
 
 from core.database import db
+from core.live_events import publish_alert, publish_attendance, publish_notice, publish_notification
+from core.offload import iterate_io
+from core import metrics
+from core.llm_stream import sse_stream, token_event, result_event
+from services.tts_cache import audio_cache
+from services import risk_scoring, prompt_context, intent_router
 
 def get_database():
     return db
@@ -60,8 +66,6 @@ async def get_ai_response(prompt: str, system_message: str, session_id: str = No
     try:
         # Use Emergent LLM Key (preferred)
         if EMERGENT_LLM_KEY:
-            from emergentintegrations.llm.chat import LlmChat, UserMessage
-            
             chat = LlmChat(
                 api_key=EMERGENT_LLM_KEY,
                 session_id=session_id or f"tino-{uuid.uuid4().hex[:8]}",
@@ -92,6 +96,37 @@ async def get_ai_response(prompt: str, system_message: str, session_id: str = No
         logger.error(f"AI response error: {str(e)}")
         raise Exception(f"AI error: {str(e)}")
 
+async def stream_ai_response(prompt: str, system_message: str, session_id: str = None):
+    """get_ai_response(), yielding text as the model produces it"""
+    if EMERGENT_LLM_KEY:
+        chat = LlmChat(
+            api_key=EMERGENT_LLM_KEY,
+            session_id=session_id or f"tino-{uuid.uuid4().hex[:8]}",
+            system_message=system_message
+        ).with_model("openai", "gpt-4o")
+        async for text in chat.stream_message(UserMessage(text=prompt)):
+            yield text
+
+    elif openai_client:
+        # Sync client: the streamed response is consumed on the offload pool
+        stream = lambda: openai_client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1000,
+            temperature=0.7,
+            stream=True
+        )
+        async for chunk in iterate_io(stream):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    else:
+        yield "AI service unavailable. Please try again later."
+
 # ============== ENUMS & MODELS ==============
 
 class AlertPriority(str, Enum):
@@ -343,6 +378,7 @@ async def execute_tino_action(action: str, params: Dict, school_id: str, db) ->
             "created_by": "tino_brain"
         }
         await db.tino_alerts.insert_one(alert)
+        publish_alert(alert)
         return {"alert_created": True, "alert_id": alert["id"]}
     
     elif action == "send_notification":
@@ -357,6 +393,7 @@ async def execute_tino_action(action: str, params: Dict, school_id: str, db) ->
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         await db.notifications.insert_one(notification)
+        publish_notification(notification)
         return {"notification_sent": True}
     
     elif action == "get_school_overview":
@@ -374,13 +411,14 @@ async def execute_attendance_action(query: str, school_id: str, db) -> Dict:
     if "sab" in query or "all" in query or "puri class" in query:
         # Mark all students present for today
         students = await db.students.find({"school_id": school_id, "is_active": True}).to_list(1000)
-        marked = 0
+        marked = []
         for student in students:
             existing = await db.attendance.find_one({
                 "student_id": student.get("id"),
                 "date": today
             })
             if not existing:
+                marked.append({"student_id": student.get("id"), "status": "present"})
                 await db.attendance.insert_one({
                     "id": str(uuid.uuid4()),
                     "school_id": school_id,
@@ -392,8 +430,8 @@ async def execute_attendance_action(query: str, school_id: str, db) -> Dict:
                     "marked_by": "tino_brain",
                     "created_at": datetime.now(timezone.utc).isoformat()
                 })
-                marked += 1
-        return {"message": f"{marked} students ko present mark kar diya", "marked_count": marked, "date": today}
+        publish_attendance(school_id, today, marked, source="tino_brain")
+        return {"message": f"{len(marked)} students ko present mark kar diya", "marked_count": len(marked), "date": today}
     
     return {"message": "Attendance command samajh nahi aaya. Kripya specify karein.", "error": True}
 
@@ -422,6 +460,7 @@ async def execute_notice_action(query: str, school_id: str, user_id: str, db) ->
         "status": "published"
     }
     await db.notices.insert_one(notice)
+    publish_notice(notice)
     
     return {
         "message": f"Notice create kar diya: '{content[:50]}...'",
@@ -449,6 +488,7 @@ async def execute_fee_reminder(school_id: str, db) -> Dict:
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         await db.notifications.insert_one(notification)
+        publish_notification(notification)
         reminders_sent += 1
     
     return {
@@ -483,6 +523,7 @@ async def execute_sms_action(query: str, school_id: str, db) -> Dict:
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         await db.notifications.insert_one(notification)
+        publish_notification(notification)
         sent_count += 1
     
     return {
@@ -530,6 +571,31 @@ async def get_absent_students(school_id: str, db) -> Dict:
         "date": today
     }
 
+async def get_today_attendance(school_id: str, db) -> Dict:
+    """Get today's attendance summary"""
+    today = date.today().isoformat()
+    attendance = await db.attendance.find(
+        {"school_id": school_id, "date": today},
+        {"_id": 0, "status": 1}
+    ).to_list(5000)
+    
+    present = sum(1 for a in attendance if a.get("status") == "present")
+    marked = len(attendance)
+    if not marked:
+        total = await db.students.count_documents({"school_id": school_id, "is_active": True})
+        return {"message": f"Aaj attendance abhi mark nahi hui. Total {total} students hain.",
+                "marked": 0, "total_students": total, "date": today}
+    
+    percentage = round(present / marked * 100, 1)
+    return {
+        "message": f"Aaj ki attendance {percentage}% hai - {present} present, {marked - present} absent.",
+        "present": present,
+        "absent": marked - present,
+        "marked": marked,
+        "percentage": percentage,
+        "date": today
+    }
+
 async def get_pending_fees(school_id: str, db) -> Dict:
     """Get pending fees summary"""
     pending = await db.fees.find({
@@ -599,6 +665,7 @@ async def create_smart_alert(query: str, school_id: str, db) -> Dict:
         "created_by": "tino_brain"
     }
     await db.tino_alerts.insert_one(alert)
+    publish_alert(alert)
     
     return {
         "message": f"Alert create kar diya - Priority: {priority}",
@@ -611,58 +678,59 @@ async def create_smart_alert(query: str, school_id: str, db) -> Dict:
 
 def detect_language_from_text(text: str) -> str:
     """Detect language from user's text"""
-    # Check for Hindi characters (Devanagari)
-    hindi_chars = sum(1 for c in text if '\u0900' <= c <= '\u097F')
-    # Check for English words
-    english_words = ['the', 'is', 'are', 'what', 'how', 'please', 'show', 'tell']
-    english_count = sum(1 for word in english_words if word.lower() in text.lower())
-    
-    # Hinglish indicators
-    hinglish_words = ['kya', 'hai', 'karo', 'batao', 'bhai', 'yaar', 'achha', 'theek', 'haan', 'nahi', 'kaise', 'kyun', 'kaun', 'kahan', 'kitna']
-    hinglish_count = sum(1 for word in hinglish_words if word.lower() in text.lower())
-    
-    if hindi_chars > 5:
-        return "hindi"
-    elif hinglish_count >= 2:
-        return "hinglish"
-    elif english_count >= 2:
-        return "english"
-    else:
-        return "hinglish"  # Default to Hinglish
+    return intent_router.detect_language(text)
 
-async def get_ai_response_with_context(query: str, role: str, context: Dict, conversation_history: List = None, language: str = "hinglish", voice_gender: str = "female") -> str:
+def build_brain_prompt(query: str, role: str, context: Dict, memory: prompt_context.ConversationMemory = None, language: str = "hinglish", voice_gender: str = "female"):
+    """
+    (system prompt, user prompt) for a Tino Brain query, with language, tone,
+    the school status fields this query's intent needs and the conversation
+    memory (summary + recent turns), fitted to PROMPT_TOKEN_BUDGET
+    """
+    # Get language instruction
+    lang_instruction = LANGUAGE_INSTRUCTIONS.get(language, LANGUAGE_INSTRUCTIONS["hinglish"])
+    tone_instruction = GENDER_TONE.get(voice_gender, GENDER_TONE["female"])
+    
+    base_prompt = TINO_SYSTEM_PROMPT.format(
+        role=role,
+        school_name=context.get("school_name", "School"),
+        language_instruction=lang_instruction,
+        tone_instruction=tone_instruction
+    )
+    
+    memory = memory or prompt_context.ConversationMemory(summary="", turns=[])
+    intent = prompt_context.detect_intent(query)
+    fitted = prompt_context.fit([
+        prompt_context.Section("system", base_prompt, required=True),
+        prompt_context.Section("query", query, required=True),
+        prompt_context.Section("school", prompt_context.render_context(context, intent), priority=1),
+        prompt_context.Section("history", memory.render_turns(), priority=2, keep="tail"),
+        prompt_context.Section("summary", memory.summary, priority=3, keep="tail"),
+    ])
+    if fitted.dropped or fitted.truncated:
+        logger.info(f"Tino prompt over budget ({fitted.tokens}/{fitted.budget} tokens): "
+                    f"dropped {fitted.dropped}, truncated {fitted.truncated}")
+    
+    system_prompt = fitted.text("system", "school")
+    
+    # Build prompt with memory
+    full_prompt = query
+    earlier = fitted.text("summary")
+    recent = fitted.text("history")
+    if earlier or recent:
+        parts = []
+        if earlier:
+            parts.append(f"Earlier in this conversation (summary):\n{earlier}")
+        if recent:
+            parts.append(f"Previous conversation:\n{recent}")
+        full_prompt = "\n\n".join(parts) + f"\n\nUser: {query}"
+    
+    return system_prompt, full_prompt
+
+async def get_ai_response_with_context(query: str, role: str, context: Dict, memory: prompt_context.ConversationMemory = None, language: str = "hinglish", voice_gender: str = "female") -> str:
     """Get intelligent response from AI with language and tone support"""
     
     try:
-        # Get language instruction
-        lang_instruction = LANGUAGE_INSTRUCTIONS.get(language, LANGUAGE_INSTRUCTIONS["hinglish"])
-        tone_instruction = GENDER_TONE.get(voice_gender, GENDER_TONE["female"])
-        
-        system_prompt = TINO_SYSTEM_PROMPT.format(
-            role=role,
-            school_name=context.get("school_name", "School"),
-            language_instruction=lang_instruction,
-            tone_instruction=tone_instruction
-        )
-        
-        # Add context
-        system_prompt += "\n\nCurrent School Status:\n"
-        system_prompt += f"- Total Students: {context.get('total_students', 0)}\n"
-        system_prompt += f"- Total Staff: {context.get('total_staff', 0)}\n"
-        system_prompt += f"- Today's Attendance: {context.get('today_attendance', {}).get('percentage', 0)}%\n"
-        system_prompt += f"- Pending Fees: {context.get('pending_fees_count', 0)} students\n"
-        system_prompt += f"- Active Alerts: {context.get('active_alerts', 0)}\n"
-        
-        if context.get("recent_events"):
-            system_prompt += "\nRecent CCTV Events:\n"
-            for event in context.get("recent_events", []):
-                system_prompt += f"- {event.get('type')} at {event.get('location')}\n"
-        
-        # Build prompt with history
-        full_prompt = query
-        if conversation_history:
-            history_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in conversation_history[-5:]])
-            full_prompt = f"Previous conversation:\n{history_text}\n\nUser: {query}"
+        system_prompt, full_prompt = build_brain_prompt(query, role, context, memory, language, voice_gender)
         
         # Use the unified AI response function
         response = await get_ai_response(full_prompt, system_prompt)
@@ -694,28 +762,14 @@ async def get_brain_status():
         "message": "Tino Brain ready to serve! 🧠"
     }
 
-@router.post("/query", response_model=TinoBrainResponse)
-async def query_tino_brain(request: TinoBrainQuery, background_tasks: BackgroundTasks):
-    """
-    Main endpoint - Ask Tino anything
-    Tino will understand, analyze, and take action
-    """
-    db = get_database()
-    
+async def prepare_brain_query(request: TinoBrainQuery, db):
+    """School context, conversation memory and response language for a query"""
     # Get school context
     context = await get_school_context(request.school_id, db)
     context.update(request.context or {})
     
-    # Get conversation history for this user
-    history = await db.tino_conversations.find({
-        "user_id": request.user_id,
-        "school_id": request.school_id
-    }).sort("timestamp", -1).limit(10).to_list(10)
-    
-    conversation_history = [
-        {"role": "user" if h.get("is_user") else "assistant", "content": h.get("message")}
-        for h in reversed(history)
-    ]
+    # Conversation memory: rolling summary + recent turns
+    memory = await prompt_context.load_memory(request.school_id, request.user_id)
     
     # Detect language from user's query if not specified or default
     language = request.language
@@ -724,17 +778,10 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
         detected_lang = detect_language_from_text(request.query)
         language = detected_lang
     
-    # Detect intent and get AI response with language and voice gender
-    ai_response = await get_ai_response_with_context(
-        request.query, 
-        request.user_role, 
-        context,
-        conversation_history,
-        language=language,
-        voice_gender=request.voice_gender
-    )
-    
-    # Save conversation
+    return context, memory, language
+
+async def save_brain_turn(request: TinoBrainQuery, language: str, ai_response: str, db):
+    """Store the user's query and Tino's reply in tino_conversations"""
     await db.tino_conversations.insert_one({
         "id": str(uuid.uuid4()),
         "school_id": request.school_id,
@@ -756,18 +803,65 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
         "language": language,
         "timestamp": datetime.now(timezone.utc).isoformat()
     })
-    
+
+# ============== COMMAND INTENTS ==============
+# Priority order = the order they are checked in; first keyword hit wins
+
+BRAIN_INTENTS = {
+    "attendance_mark": ["attendance laga", "attendance mark", "hazri laga", "present mark"],
+    "notice_create": ["notice bhejo", "announcement karo", "notice create", "sab ko batao", "notice laga"],
+    "fee_reminder": ["fee reminder", "fees yaad dila", "payment remind", "fee notice"],
+    "notification_send": ["sms bhejo", "message bhejo", "notification bhejo", "parents ko batao"],
+    "student_info": ["student info", "student details", "bacche ki jankari", "student ka"],
+    "absent_list": ["kaun absent", "absent list", "absent hai", "nahi aaya", "gayab hai"],
+    "attendance_today": ["aaj ki attendance", "attendance kaisi", "attendance kitni", "attendance batao", "attendance dikha", "kitne present", "hazri batao", "hajri batao"],
+    "fee_status": ["pending fees", "fees pending", "fee status", "kitni fees"],
+    "school_overview": ["school overview", "school ka status", "puri jankari", "sab batao", "school status"],
+    "location_tracking": ["kaun kahan", "location", "track", "kahan hai"],
+    "check_alerts": ["alert", "problem", "issue", "emergency", "koi dikkat"],
+    "class_intelligence": ["class ki condition", "class condition", "class ka status", "is class", "yahan ki condition", "class intelligence", "class report"],
+    "weak_students": ["weak student", "weak bachhe", "kamzor", "kisko help", "peeche hai"],
+    "teacher_performance": ["teacher kaisa", "teacher performance", "kaun achha padha", "teacher ki rating", "syllabus kaisa"],
+    "syllabus_status": ["syllabus kitna", "syllabus complete", "course kahan", "padhai kahan tak"],
+    "class_comparison": ["class compare", "sabse achhi class", "best class", "class ranking"],
+    "class_status": ["class status", "class ka", "class mein", "kitne students"],
+    "alert_create": ["alert banao", "alert create", "warning do", "emergency alert"],
+    "admit_cards": ["admit card", "admitcard", "admit_card", "प्रवेश पत्र", "hall ticket", "hallticket", "एडमिट कार्ड", "admit cards", "generate admit"],
+}
+
+# Intents that change data - reached by exact keyword only
+BRAIN_WRITE_INTENTS = {"attendance_mark", "notice_create", "fee_reminder", "notification_send", "alert_create", "admit_cards"}
+
+# Read-only intents whose action result is a complete answer, so a confident match skips the LLM.
+# Write intents never do: the router has no notion of "don't" or "should I", so "mat bhejo fee
+# reminder" would send the SMS - they keep going through the LLM reply first.
+BRAIN_DIRECT_INTENTS = {
+    "absent_list", "attendance_today", "fee_status", "school_overview", "check_alerts", "class_intelligence", "weak_students",
+    "teacher_performance", "syllabus_status", "class_comparison", "class_status",
+}
+
+brain_router = intent_router.IntentRouter(BRAIN_INTENTS, writes=BRAIN_WRITE_INTENTS)
+
+async def run_brain_actions(request: TinoBrainQuery, ai_response: str, db, intent: Optional[str] = None):
+    """
+    Keyword-matched actions run after the AI reply; some replace the reply
+    with their own summary. `intent` skips matching (the router already
+    chose). Returns (message, action_taken, data).
+    """
     # Check for command patterns and execute REAL ACTIONS
     action_taken = None
     data = None
     execution_results = []
     
     query_lower = request.query.lower()
+    if intent is None:
+        route = brain_router.match(request.query)
+        intent = route.intent if route else None
     
     # ============== ACTION EXECUTION ENGINE ==============
     
     # 1. ATTENDANCE ACTIONS
-    if any(k in query_lower for k in ["attendance laga", "attendance mark", "hazri laga", "present mark"]):
+    if intent == "attendance_mark":
         # Extract class/student info from query
         result = await execute_attendance_action(query_lower, request.school_id, db)
         data = result
@@ -775,57 +869,62 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
         execution_results.append(f"✅ {result.get('message', 'Attendance action completed')}")
     
     # 2. NOTICE/ANNOUNCEMENT ACTIONS
-    elif any(k in query_lower for k in ["notice bhejo", "announcement karo", "notice create", "sab ko batao", "notice laga"]):
+    elif intent == "notice_create":
         result = await execute_notice_action(query_lower, request.school_id, request.user_id, db)
         data = result
         action_taken = "notice_created"
         execution_results.append(f"✅ {result.get('message', 'Notice created')}")
     
     # 3. FEE REMINDER ACTIONS
-    elif any(k in query_lower for k in ["fee reminder", "fees yaad dila", "payment remind", "fee notice"]):
+    elif intent == "fee_reminder":
         result = await execute_fee_reminder(request.school_id, db)
         data = result
         action_taken = "fee_reminder_sent"
         execution_results.append(f"✅ {result.get('message', 'Fee reminders sent')}")
     
     # 4. SMS/NOTIFICATION ACTIONS
-    elif any(k in query_lower for k in ["sms bhejo", "message bhejo", "notification bhejo", "parents ko batao"]):
+    elif intent == "notification_send":
         result = await execute_sms_action(query_lower, request.school_id, db)
         data = result
         action_taken = "notification_sent"
         execution_results.append(f"✅ {result.get('message', 'Notifications sent')}")
     
     # 5. STUDENT INFO QUERIES
-    elif any(k in query_lower for k in ["student info", "student details", "bacche ki jankari", "student ka"]):
+    elif intent == "student_info":
         result = await get_student_details(query_lower, request.school_id, db)
         data = result
         action_taken = "student_info_fetched"
     
     # 6. ABSENT STUDENTS LIST
-    elif any(k in query_lower for k in ["kaun absent", "absent list", "absent hai", "nahi aaya", "gayab hai"]):
+    elif intent == "absent_list":
         result = await get_absent_students(request.school_id, db)
         data = result
         action_taken = "absent_list_fetched"
     
+    # 6b. TODAY'S ATTENDANCE
+    elif intent == "attendance_today":
+        data = await get_today_attendance(request.school_id, db)
+        action_taken = "attendance_fetched"
+    
     # 7. FEE STATUS/PENDING FEES
-    elif any(k in query_lower for k in ["pending fees", "fees pending", "fee status", "kitni fees"]):
+    elif intent == "fee_status":
         result = await get_pending_fees(request.school_id, db)
         data = result
         action_taken = "fee_status_fetched"
     
     # 8. SCHOOL OVERVIEW
-    elif any(k in query_lower for k in ["school overview", "school ka status", "puri jankari", "sab batao", "school status"]):
+    elif intent == "school_overview":
         data = await get_school_context(request.school_id, db)
         action_taken = "get_school_overview"
     
     # 9. LOCATION TRACKING
-    elif any(k in query_lower for k in ["kaun kahan", "location", "track", "kahan hai"]):
+    elif intent == "location_tracking":
         result = await get_location_tracking(request.school_id)
         data = result
         action_taken = "location_tracking"
     
     # 10. ALERTS CHECK
-    elif any(k in query_lower for k in ["alert", "problem", "issue", "emergency", "koi dikkat"]):
+    elif intent == "check_alerts":
         alerts = await db.tino_alerts.find({
             "school_id": request.school_id,
             "status": "active"
@@ -834,7 +933,7 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
         action_taken = "check_alerts"
     
     # 11. CLASS INTELLIGENCE - COMPREHENSIVE CLASS STATUS 🧠
-    elif any(k in query_lower for k in ["class ki condition", "class condition", "class ka status", "is class", "yahan ki condition", "class intelligence", "class report"]):
+    elif intent == "class_intelligence":
         # Extract class from query and get full intelligence
         result = await handle_class_intelligence_query(query_lower, request.school_id, db)
         if result.get("class_intelligence"):
@@ -845,7 +944,7 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
             data = result
     
     # 12. WEAK STUDENTS QUERY
-    elif any(k in query_lower for k in ["weak student", "weak bachhe", "kamzor", "kisko help", "peeche hai"]):
+    elif intent == "weak_students":
         # Get class from query or show all
         result = await handle_class_intelligence_query(query_lower, request.school_id, db)
         if result.get("class_intelligence"):
@@ -861,7 +960,7 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
             data = result
     
     # 13. TEACHER PERFORMANCE QUERY
-    elif any(k in query_lower for k in ["teacher kaisa", "teacher performance", "kaun achha padha", "teacher ki rating", "syllabus kaisa"]):
+    elif intent == "teacher_performance":
         result = await handle_class_intelligence_query(query_lower, request.school_id, db)
         if result.get("class_intelligence"):
             teacher_data = result["class_intelligence"].get("teacher_performance", {})
@@ -875,7 +974,7 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
             data = result
     
     # 14. SYLLABUS PROGRESS QUERY
-    elif any(k in query_lower for k in ["syllabus kitna", "syllabus complete", "course kahan", "padhai kahan tak"]):
+    elif intent == "syllabus_status":
         result = await handle_class_intelligence_query(query_lower, request.school_id, db)
         if result.get("class_intelligence"):
             syllabus_data = result["class_intelligence"].get("syllabus", {})
@@ -890,7 +989,7 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
             data = result
     
     # 15. CLASS COMPARISON
-    elif any(k in query_lower for k in ["class compare", "sabse achhi class", "best class", "class ranking"]):
+    elif intent == "class_comparison":
         result = await get_class_comparison(request.school_id)
         data = result
         ranking_text = []
@@ -900,20 +999,20 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
         action_taken = "class_comparison_fetched"
     
     # 16. BASIC CLASS STATUS
-    elif any(k in query_lower for k in ["class status", "class ka", "class mein", "kitne students"]):
+    elif intent == "class_status":
         result = await get_class_status(query_lower, request.school_id, db)
         data = result
         action_taken = "class_status_fetched"
     
     # 17. CREATE ALERT
-    elif any(k in query_lower for k in ["alert banao", "alert create", "warning do", "emergency alert"]):
+    elif intent == "alert_create":
         result = await create_smart_alert(query_lower, request.school_id, db)
         data = result
         action_taken = "alert_created"
         execution_results.append(f"✅ Alert created: {result.get('title', 'New Alert')}")
     
     # 18. ADMIT CARD GENERATION
-    elif any(k in query_lower for k in ["admit card", "admitcard", "admit_card", "प्रवेश पत्र", "hall ticket", "hallticket", "एडमिट कार्ड", "admit cards", "generate admit"]):
+    elif intent == "admit_cards":
         from routes.admit_card import ai_generate_admit_cards
         result = await ai_generate_admit_cards(query_lower, request.school_id, db)
         data = result
@@ -928,6 +1027,58 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
     if execution_results:
         ai_response = ai_response + "\n\n" + "\n".join(execution_results)
     
+    return ai_response, action_taken, data
+
+def action_reply(action_taken: Optional[str], data: Optional[Dict]) -> str:
+    """Tino's answer from an action's data alone, for queries answered without the LLM"""
+    if not data or data.get("error"):
+        return ""
+    if action_taken == "get_school_overview":
+        attendance = data.get("today_attendance", {})
+        return (f"📊 {data.get('school_name', 'School')}: {data.get('total_students', 0)} students, "
+                f"{data.get('total_staff', 0)} staff, {data.get('total_classes', 0)} classes.\n"
+                f"Aaj attendance {attendance.get('percentage', 0)}% ({attendance.get('present', 0)} present, "
+                f"{attendance.get('absent', 0)} absent). {data.get('pending_fees_count', 0)} students ki fees pending, "
+                f"{data.get('active_alerts', 0)} active alerts.")
+    if action_taken == "check_alerts":
+        if not data.get("count"):
+            return "✅ Abhi koi active alert nahi hai."
+        alerts = "\n".join(f"• {a.get('title', 'Alert')} ({a.get('priority', 'medium')})" for a in data["active_alerts"])
+        return f"⚠️ {data['count']} active alerts:\n{alerts}"
+    if action_taken == "absent_list_fetched" and data.get("absent_students"):
+        names = "\n".join(f"• {s.get('name')} ({s.get('class') or '-'})" for s in data["absent_students"][:10])
+        return f"{data['message']}:\n{names}"
+    return data.get("message", "")
+
+def direct_route(query: str) -> Optional[intent_router.Route]:
+    """The router's route when it is a confident read-only command, else None (ask the LLM)"""
+    route = brain_router.classify(query)
+    if not route or route.intent not in BRAIN_DIRECT_INTENTS or route.confidence < intent_router.DIRECT_CONFIDENCE:
+        return None
+    return route
+
+async def answer_directly(request: TinoBrainQuery, db):
+    """
+    (message, action_taken, data) when the intent router is confident the
+    query is a command whose action answers it on its own - no LLM call.
+    None when uncertain; the query then goes to the LLM as before.
+    """
+    route = direct_route(request.query)
+    if not route:
+        metrics.observe_intent_route("tino-brain", "llm")
+        return None
+    ai_response, action_taken, data = await run_brain_actions(request, "", db, route.intent)
+    ai_response = ai_response.strip() or action_reply(action_taken, data)
+    if not ai_response:
+        metrics.observe_intent_route("tino-brain", "llm")
+        return None
+    metrics.observe_intent_route("tino-brain", "direct")
+    logger.info(f"Tino Brain answered {route.intent!r} without the LLM "
+                f"({route.source}, confidence {route.confidence:.2f})")
+    return ai_response, action_taken, data
+
+async def brain_audio(ai_response: str, voice_gender: str) -> Optional[str]:
+    """Base64 MP3 of the reply in the multilingual voice for voice_gender (None without ElevenLabs)"""
     # Generate audio response with best multilingual voices
     audio_b64 = None
     try:
@@ -937,31 +1088,68 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
             eleven = ElevenLabs(api_key=ELEVENLABS_API_KEY)
             
             # Use best multilingual voices based on gender
-            if request.voice_gender == "male":
+            if voice_gender == "male":
                 voice_id = "TX3LPaxmHKxFdv7VOQHJ"  # Liam - Best multilingual male
             else:
                 voice_id = "EXAVITQu4vr4xnSDxMaL"  # Sarah - Best multilingual female
             
-            audio_gen = eleven.text_to_speech.convert(
-                text=ai_response[:500],  # Limit for TTS
-                voice_id=voice_id,
-                model_id="eleven_multilingual_v2",  # Best for Hindi/English/Hinglish
-                voice_settings={
-                    "stability": 0.5,
-                    "similarity_boost": 0.75,
-                    "style": 0.5,  # Natural conversational style
-                    "use_speaker_boost": True
-                }
-            )
+            tts_text = ai_response[:500]  # Limit for TTS
+            tts_model = "eleven_multilingual_v2"  # Best for Hindi/English/Hinglish
+            tts_settings = {
+                "stability": 0.5,
+                "similarity_boost": 0.75,
+                "style": 0.5,  # Natural conversational style
+                "use_speaker_boost": True
+            }
             import base64
-            audio_data = b""
-            for chunk in audio_gen:
-                audio_data += chunk
+            # Repeated replies ("attendance marked", confirmations) come from the audio cache
+            audio_data = await audio_cache.synthesize(
+                tts_text, voice_id, tts_model, tts_settings,
+                lambda: eleven.text_to_speech.convert(
+                    text=tts_text,
+                    voice_id=voice_id,
+                    model_id=tts_model,
+                    voice_settings=tts_settings
+                )
+            )
             audio_b64 = base64.b64encode(audio_data).decode()
     except Exception as e:
         logger.error(f"TTS error: {e}")
         pass
     
+    return audio_b64
+
+@router.post("/query", response_model=TinoBrainResponse)
+async def query_tino_brain(request: TinoBrainQuery, background_tasks: BackgroundTasks):
+    """
+    Main endpoint - Ask Tino anything
+    Tino will understand, analyze, and take action
+    """
+    db = get_database()
+    context, memory, language = await prepare_brain_query(request, db)
+    
+    # Recognised commands are answered by their action; everything else goes to the AI
+    direct = await answer_directly(request, db)
+    if direct:
+        ai_response, action_taken, data = direct
+    else:
+        # Detect intent and get AI response with language and voice gender
+        ai_response = await get_ai_response_with_context(
+            request.query, 
+            request.user_role, 
+            context,
+            memory,
+            language=language,
+            voice_gender=request.voice_gender
+        )
+    
+    await save_brain_turn(request, language, ai_response, db)
+    if memory.needs_refresh:
+        background_tasks.add_task(prompt_context.refresh_summary, request.school_id, request.user_id)
+    if not direct:
+        ai_response, action_taken, data = await run_brain_actions(request, ai_response, db)
+    audio_b64 = await brain_audio(ai_response, request.voice_gender)
+    
     return TinoBrainResponse(
         message=ai_response,
         data=data,
@@ -969,6 +1157,50 @@ async def query_tino_brain(request: TinoBrainQuery, background_tasks: Background
         audio_base64=audio_b64
     )
 
+@router.post("/query/stream")
+async def query_tino_brain_stream(request: TinoBrainQuery, background_tasks: BackgroundTasks):
+    """
+    /query as Server-Sent Events: `token` events while the AI replies, then
+    one `result` event (TinoBrainResponse fields) once actions have run. An
+    action may replace the streamed text - result.message is final; commands
+    answered without the AI send only the `result`. No audio here; speak
+    result.message via /tino-voice/tts/stream.
+    """
+    db = get_database()
+
+    async def events():
+        context, memory, language = await prepare_brain_query(request, db)
+        direct = await answer_directly(request, db)
+        if direct:
+            ai_response, action_taken, data = direct
+            await save_brain_turn(request, language, ai_response, db)
+            if memory.needs_refresh:
+                background_tasks.add_task(prompt_context.refresh_summary, request.school_id, request.user_id)
+            yield result_event(TinoBrainResponse(message=ai_response, data=data, action_taken=action_taken).model_dump())
+            return
+
+        system_prompt, full_prompt = build_brain_prompt(
+            request.query, request.user_role, context, memory,
+            language=language, voice_gender=request.voice_gender
+        )
+        parts = []
+        async for text in stream_ai_response(full_prompt, system_prompt):
+            parts.append(text)
+            yield token_event(text)
+        ai_response = "".join(parts)
+
+        await save_brain_turn(request, language, ai_response, db)
+        if memory.needs_refresh:
+            background_tasks.add_task(prompt_context.refresh_summary, request.school_id, request.user_id)
+        ai_response, action_taken, data = await run_brain_actions(request, ai_response, db)
+        yield result_event(TinoBrainResponse(
+            message=ai_response,
+            data=data,
+            action_taken=action_taken
+        ).model_dump())
+
+    return sse_stream("tino-brain", events(), background=background_tasks)
+
 @router.post("/cctv-event")
 async def process_cctv_event(event: CCTVEvent, background_tasks: BackgroundTasks):
     """
@@ -1026,6 +1258,7 @@ async def process_cctv_event(event: CCTVEvent, background_tasks: BackgroundTasks
             "created_by": "tino_brain_cctv"
         }
         await db.tino_alerts.insert_one(alert)
+        publish_alert(alert)
         
         # Auto-notify relevant staff
         if auto_notify_roles:
@@ -1047,6 +1280,7 @@ async def process_cctv_event(event: CCTVEvent, background_tasks: BackgroundTasks
                     "created_at": datetime.now(timezone.utc).isoformat()
                 }
                 await db.notifications.insert_one(notification)
+                publish_notification(notification)
         
         # Mark event as processed
         await db.cctv_events.update_one(
@@ -1368,6 +1602,7 @@ async def clear_chat_history(user_id: str, school_id: str):
         "user_id": user_id,
         "school_id": school_id
     })
+    await prompt_context.clear_memory(school_id, user_id)
     
     return {
         "message": "Chat history cleared",
@@ -1490,75 +1725,8 @@ async def get_syllabus_progress(school_id: str, class_id: str, db) -> Dict:
     }
 
 async def get_weak_students(school_id: str, class_id: str, db) -> Dict:
-    """Identify weak students based on attendance, marks, and behavior"""
-    students = await db.students.find({
-        "school_id": school_id,
-        "class_id": class_id,
-        "is_active": True
-    }).to_list(100)
-    
-    weak_students = []
-    at_risk_students = []
-    excellent_students = []
-    
-    for student in students:
-        student_id = student.get("id")
-        
-        # Get attendance
-        attendance = await db.attendance.find({
-            "student_id": student_id
-        }).to_list(100)
-        present = sum(1 for a in attendance if a.get("status") == "present")
-        attendance_rate = (present / len(attendance) * 100) if attendance else 100
-        
-        # Get marks/results
-        results = await db.results.find({
-            "student_id": student_id
-        }).to_list(50)
-        avg_marks = sum(r.get("marks", 0) for r in results) / len(results) if results else 50
-        
-        # Get behavior incidents
-        incidents = await db.tino_alerts.count_documents({
-            "related_ids": student_id,
-            "priority": {"$in": ["critical", "high"]}
-        })
-        
-        # Calculate overall score
-        score = (attendance_rate * 0.3) + (avg_marks * 0.5) + ((100 - incidents * 10) * 0.2)
-        score = max(0, min(100, score))
-        
-        student_info = {
-            "id": student_id,
-            "name": student.get("name", "Unknown"),
-            "roll_no": student.get("roll_no", ""),
-            "attendance_rate": round(attendance_rate, 1),
-            "avg_marks": round(avg_marks, 1),
-            "incidents": incidents,
-            "overall_score": round(score, 1)
-        }
-        
-        if score < 40:
-            student_info["reason"] = []
-            if attendance_rate < 60:
-                student_info["reason"].append("कम attendance")
-            if avg_marks < 40:
-                student_info["reason"].append("कम marks")
-            if incidents > 2:
-                student_info["reason"].append("behavior issues")
-            weak_students.append(student_info)
-        elif score < 60:
-            at_risk_students.append(student_info)
-        elif score > 85:
-            excellent_students.append(student_info)
-    
-    return {
-        "weak_students": weak_students,
-        "weak_count": len(weak_students),
-        "at_risk_students": at_risk_students,
-        "at_risk_count": len(at_risk_students),
-        "excellent_students": excellent_students[:5],  # Top 5
-        "excellent_count": len(excellent_students)
-    }
+    """Identify weak students based on attendance, marks, and behavior (from the risk snapshot)"""
+    return await risk_scoring.get_class_risk(school_id, class_id)
 
 async def get_teacher_performance(school_id: str, class_id: str, db) -> Dict:
     """Get teacher performance for the class"""
@@ -1777,6 +1945,22 @@ async def get_class_intelligence(school_id: str, class_id: str):
         "generated_at": datetime.now(timezone.utc).isoformat()
     }
 
+@router.post("/risk-snapshot/{school_id}/refresh")
+async def refresh_risk_snapshot(school_id: str, class_id: Optional[str] = None):
+    """Recompute weak/at-risk scores for one class or the whole school"""
+    snapshots = await risk_scoring.refresh_snapshots(school_id, class_id)
+    return {
+        "message": "Risk snapshot refreshed",
+        "classes": len(snapshots),
+        "students": sum(s["student_count"] for s in snapshots.values()),
+        "summary": {cid: s["summary"] for cid, s in snapshots.items()}
+    }
+
+@router.get("/risk-snapshot/{school_id}/{class_id}")
+async def get_risk_snapshot(school_id: str, class_id: str):
+    """Stored risk scores for a class (refreshed automatically when stale)"""
+    return await risk_scoring.get_class_risk(school_id, class_id)
+
 @router.post("/class-intelligence/from-camera")
 async def get_class_intelligence_from_camera(request: ClassIntelligenceRequest):
     """
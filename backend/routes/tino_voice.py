@@ -9,12 +9,14 @@ Features:
 """
 
 from fastapi import APIRouter, HTTPException, File, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
 import os
 import base64
 import io
 from elevenlabs import ElevenLabs, VoiceSettings
+from services.tts_cache import audio_cache, MEDIA_TYPE as TTS_MEDIA_TYPE
 
 router = APIRouter(prefix="/tino-voice", tags=["tino-voice"])
 
@@ -83,6 +85,52 @@ def get_eleven_client():
     return ElevenLabs(api_key=ELEVENLABS_API_KEY)
 
 
+TTS_MODEL = "eleven_multilingual_v2"  # Supports Hindi and English
+
+
+def _tts_job(client, request: TTSRequest):
+    """(text, voice_id, model, settings, convert) for services.tts_cache"""
+    voice_config = VOICE_OPTIONS.get(request.voice_type, VOICE_OPTIONS["male_hindi"])
+    voice_id = voice_config["voice_id"]
+    settings = {
+        "stability": request.stability,
+        "similarity_boost": request.similarity_boost,
+        "style": request.style,
+        "use_speaker_boost": request.use_speaker_boost
+    }
+    convert = lambda: client.text_to_speech.convert(
+        text=request.text,
+        voice_id=voice_id,
+        model_id=TTS_MODEL,
+        voice_settings=VoiceSettings(**settings)
+    )
+    return request.text, voice_id, TTS_MODEL, settings, convert
+
+
+PREWARM_VOICES = ("male_hindi", "female_hindi")
+
+
+def prewarm_phrases() -> list:
+    """
+    Fixed gate / director greetings in the voices the greeting screens use,
+    for services.tts_cache.prewarm() at startup. Empty without an API key.
+    """
+    client = get_eleven_client()
+    if not client:
+        return []
+    from routes.ai_greeting import GreetingSettings, VISITOR_GREETINGS
+    from routes.director_greeting import TIME_GREETINGS
+
+    defaults = GreetingSettings(school_id="")
+    texts = [defaults.entry_greeting_hindi, defaults.entry_greeting_english,
+             defaults.exit_greeting_hindi, defaults.exit_greeting_english]
+    texts += list(VISITOR_GREETINGS.values())
+    texts += [g for by_period in TIME_GREETINGS.values() for g in by_period.values()]
+    texts = list(dict.fromkeys(texts))
+    return [_tts_job(client, TTSRequest(text=text, voice_type=voice))
+            for voice in PREWARM_VOICES for text in texts]
+
+
 @router.get("/voices", response_model=VoiceOptionsResponse)
 async def get_available_voices():
     """Get list of available voice options for Tino AI"""
@@ -135,30 +183,8 @@ async def text_to_speech(request: TTSRequest):
                 success=False
             )
         
-        # Get voice ID based on selected type
-        voice_config = VOICE_OPTIONS.get(request.voice_type, VOICE_OPTIONS["male_hindi"])
-        voice_id = voice_config["voice_id"]
-        
-        # Configure voice settings
-        voice_settings = VoiceSettings(
-            stability=request.stability,
-            similarity_boost=request.similarity_boost,
-            style=request.style,
-            use_speaker_boost=request.use_speaker_boost
-        )
-        
-        # Generate audio
-        audio_generator = client.text_to_speech.convert(
-            text=request.text,
-            voice_id=voice_id,
-            model_id="eleven_multilingual_v2",  # Supports Hindi and English
-            voice_settings=voice_settings
-        )
-        
-        # Collect audio chunks
-        audio_data = b""
-        for chunk in audio_generator:
-            audio_data += chunk
+        # Identical (text, voice, settings) requests are served from the audio cache
+        audio_data = await audio_cache.synthesize(*_tts_job(client, request))
         
         # Convert to base64
         audio_b64 = base64.b64encode(audio_data).decode('utf-8')
@@ -180,6 +206,15 @@ async def text_to_speech(request: TTSRequest):
         )
 
 
+@router.post("/tts/stream")
+async def text_to_speech_stream(request: TTSRequest):
+    """Binary MP3 streamed chunk by chunk as ElevenLabs produces it (cached clips from disk)"""
+    client = get_eleven_client()
+    if not client:
+        raise HTTPException(status_code=503, detail="ELEVENLABS_API_KEY not configured")
+    return StreamingResponse(audio_cache.stream(*_tts_job(client, request)), media_type=TTS_MEDIA_TYPE)
+
+
 @router.post("/stt", response_model=STTResponse)
 async def speech_to_text(audio_file: UploadFile = File(...)):
     """Convert speech to text using ElevenLabs"""
@@ -250,5 +285,6 @@ async def voice_status():
         "elevenlabs_configured": has_key,
         "available_voices": len(VOICE_OPTIONS),
         "tts_enabled": has_key,
-        "stt_enabled": has_key
+        "stt_enabled": has_key,
+        "tts_cache": audio_cache.stats()
     }
@@ -1,21 +1,26 @@
 """
 Vehicle/Transport Management Module
 - Bus routes and stops
-- Vehicle tracking (GPS simulation for now)
+- Vehicle tracking (GPS device ingestion + live SSE/WebSocket updates)
 - Driver management
 - Student transport assignment
 - Route optimization
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime, timezone
+from typing import Optional, List, Union
+from datetime import datetime, timezone, timedelta
 from core.database import db
+from core.event_bus import bus, sse_response
+from services.gps_tracking import (
+    store as gps_store, ingest_pings, get_vehicle_location, get_track,
+    vehicle_topic, school_transport_topic, location_event
+)
+from services import bus_eta
 import os
 from dotenv import load_dotenv
 import uuid
-import random
 
 load_dotenv()
 
@@ -55,6 +60,18 @@ class StudentTransport(BaseModel):
     drop_stop: str
     transport_type: str = "both"  # pickup, drop, both
 
+class GPSPing(BaseModel):
+    vehicle_id: Optional[str] = None
+    device_imei: Optional[str] = None  # either vehicle_id or device_imei is required
+    lat: float
+    lng: float
+    speed: Optional[float] = None  # km/h; derived from previous point if missing
+    heading: Optional[float] = None
+    ts: Optional[Union[float, str]] = None  # ISO time or epoch (s / ms); server time if missing
+
+class GPSPingBatch(BaseModel):
+    pings: List[GPSPing]
+
 # API Endpoints
 
 @router.post("/vehicles")
@@ -134,6 +151,7 @@ async def create_route(route: BusRoute, school_id: str):
     
     await db.bus_routes.insert_one(route_doc)
     route_doc.pop('_id', None)
+    bus_eta.invalidate_route(route_doc)
     
     return {
         "success": True,
@@ -229,6 +247,10 @@ async def assign_student_transport(assignment: StudentTransport, school_id: str)
     }
     
     # Remove existing assignment if any
+    previous = await db.student_transport.find(
+        {"student_id": assignment.student_id, "school_id": school_id},
+        {"_id": 0, "route_id": 1}
+    ).to_list(None)
     await db.student_transport.delete_many({
         "student_id": assignment.student_id,
         "school_id": school_id
@@ -236,12 +258,20 @@ async def assign_student_transport(assignment: StudentTransport, school_id: str)
     
     await db.student_transport.insert_one(assignment_doc)
     
-    # Update route student count
-    count = await db.student_transport.count_documents({"route_id": assignment.route_id})
-    await db.bus_routes.update_one(
-        {"id": assignment.route_id},
-        {"$set": {"total_students": count}}
-    )
+    # Update student counts of the new route and any route the student left
+    old_route_ids = {p["route_id"] for p in previous if p.get("route_id")} - {assignment.route_id}
+    old_routes = await db.bus_routes.find(
+        {"id": {"$in": list(old_route_ids)}},
+        {"_id": 0, "id": 1, "vehicle_id": 1}
+    ).to_list(None) if old_route_ids else []
+    for changed in [route, *old_routes]:
+        count = await db.student_transport.count_documents({"route_id": changed["id"]})
+        await db.bus_routes.update_one(
+            {"id": changed["id"]},
+            {"$set": {"total_students": count}}
+        )
+        # Stop → students mapping for arrival alerts is rebuilt on next ping
+        bus_eta.invalidate_route(changed)
     
     assignment_doc.pop('_id', None)
     
@@ -253,7 +283,7 @@ async def assign_student_transport(assignment: StudentTransport, school_id: str)
 
 @router.get("/track/{vehicle_id}")
 async def track_vehicle(vehicle_id: str, school_id: str):
-    """Get vehicle current location (simulated GPS)"""
+    """Get vehicle current location from GPS device pings"""
     db = get_database()
     
     vehicle = await db.vehicles.find_one(
@@ -263,20 +293,15 @@ async def track_vehicle(vehicle_id: str, school_id: str):
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
-    # Simulated GPS data (in production, this would come from real GPS device)
-    simulated_location = {
-        "lat": 26.8467 + random.uniform(-0.01, 0.01),
-        "lng": 80.9462 + random.uniform(-0.01, 0.01),
-        "speed": random.randint(20, 45),
-        "heading": random.randint(0, 360),
-        "last_updated": datetime.now(timezone.utc).isoformat()
-    }
+    location = await get_vehicle_location(vehicle_id)
     
     return {
         "vehicle_number": vehicle.get("vehicle_number"),
         "driver": vehicle.get("driver"),
-        "location": simulated_location,
-        "note": "GPS tracking is SIMULATED. Real GPS integration pending."
+        "location": location,
+        "recent_points": [location_event(p)["location"] for p in gps_store.history(vehicle_id, 20)],
+        "live_stream": f"/api/transport/live/{vehicle_id}?school_id={school_id}",
+        "note": None if location else "No GPS data received yet for this vehicle."
     }
 
 @router.get("/track-all")
@@ -289,27 +314,108 @@ async def track_all_vehicles(school_id: str):
         {"_id": 0}
     ).to_list(length=50)
     
+    live = gps_store.school_positions(school_id)
+    
     vehicle_locations = []
     for v in vehicles:
+        point = live.get(v.get("id"))
+        location = location_event(point)["location"] if point else v.get("current_location")
+        if not location:
+            status = "offline"
+        else:
+            status = "on_route" if (location.get("speed") or 0) > 3 else "stopped"
         vehicle_locations.append({
             "id": v.get("id"),
             "vehicle_number": v.get("vehicle_number"),
             "driver_name": v.get("driver", {}).get("name"),
             "driver_phone": v.get("driver", {}).get("phone"),
-            "location": {
-                "lat": 26.8467 + random.uniform(-0.02, 0.02),
-                "lng": 80.9462 + random.uniform(-0.02, 0.02),
-                "speed": random.randint(0, 50)
-            },
-            "status": "on_route" if random.random() > 0.3 else "stopped"
+            "location": location,
+            "status": status
         })
     
     return {
         "total_vehicles": len(vehicle_locations),
         "vehicles": vehicle_locations,
-        "note": "GPS tracking is SIMULATED. Real GPS integration pending."
+        "live_stream": f"/api/transport/live-all?school_id={school_id}"
     }
 
+@router.get("/track/{vehicle_id}/history")
+async def get_vehicle_track_history(vehicle_id: str, school_id: str, hours: int = 12):
+    """Stored (downsampled) GPS track for a vehicle"""
+    db = get_database()
+    
+    vehicle = await db.vehicles.find_one({"id": vehicle_id, "school_id": school_id}, {"_id": 0, "id": 1})
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    since = datetime.now(timezone.utc) - timedelta(hours=min(hours, 72))
+    points = await get_track(vehicle_id, since=since)
+    
+    return {
+        "vehicle_id": vehicle_id,
+        "since": since.isoformat(),
+        "count": len(points),
+        "points": points
+    }
+
+# ============== GPS INGESTION & LIVE STREAMS ==============
+
+@router.post("/gps/ingest")
+async def ingest_gps_batch(batch: GPSPingBatch):
+    """
+    Batched GPS pings from devices / gateway.
+    Each ping needs vehicle_id or device_imei (registered via /gps-setup/add-device).
+    """
+    if len(batch.pings) > 5000:
+        raise HTTPException(status_code=413, detail="Max 5000 pings per batch")
+    
+    result = await ingest_pings([p.model_dump() for p in batch.pings])
+    return {"success": True, **result}
+
+@router.get("/live/{vehicle_id}")
+async def live_vehicle_stream(vehicle_id: str, school_id: str, request: Request):
+    """Server-Sent Events stream of one vehicle's location"""
+    db = get_database()
+    
+    vehicle = await db.vehicles.find_one({"id": vehicle_id, "school_id": school_id}, {"_id": 0, "id": 1})
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    sub = bus.subscribe(vehicle_topic(vehicle_id))
+    location = await get_vehicle_location(vehicle_id)
+    initial = [{"type": "vehicle_location", "vehicle_id": vehicle_id, "school_id": school_id, "location": location}] if location else []
+    return sse_response(sub, request, initial=initial)
+
+@router.get("/live-all")
+async def live_school_stream(school_id: str, request: Request):
+    """Server-Sent Events stream of every vehicle in a school (admin map)"""
+    sub = bus.subscribe(school_transport_topic(school_id))
+    initial = [location_event(p) for p in gps_store.school_positions(school_id).values()]
+    return sse_response(sub, request, initial=initial)
+
+@router.websocket("/ws/{vehicle_id}")
+async def live_vehicle_ws(websocket: WebSocket, vehicle_id: str, school_id: str):
+    """WebSocket alternative to /live/{vehicle_id}"""
+    db = get_database()
+    
+    vehicle = await db.vehicles.find_one({"id": vehicle_id, "school_id": school_id}, {"_id": 0, "id": 1})
+    if not vehicle:
+        await websocket.close(code=1008)   # policy violation - not this school's vehicle
+        return
+    
+    await websocket.accept()
+    sub = bus.subscribe(vehicle_topic(vehicle_id))
+    try:
+        location = await get_vehicle_location(vehicle_id)
+        if location:
+            await websocket.send_json({"type": "vehicle_location", "vehicle_id": vehicle_id, "school_id": school_id, "location": location})
+        async for event in sub:
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sub.close()
+
 @router.get("/student/{student_id}")
 async def get_student_transport(student_id: str, school_id: str):
     """Get student's transport details"""
@@ -641,12 +747,23 @@ async def send_bus_notification(notification: BusNotification):
     }
 
 @router.post("/notifications/bus-late")
-async def notify_bus_late(school_id: str, vehicle_id: str, route_id: str, delay_minutes: int, reason: str = "Traffic"):
-    """Quick notification for bus delay"""
+async def notify_bus_late(school_id: str, vehicle_id: str, route_id: str, delay_minutes: Optional[int] = None, reason: str = "Traffic"):
+    """Quick notification for bus delay (delay estimated from live GPS if not given)"""
     db = get_database()
     
     # Get vehicle info
     vehicle = await db.vehicles.find_one({"id": vehicle_id})
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    if delay_minutes is None:
+        await bus_eta.load_vehicles([vehicle_id])
+        delay_minutes = bus_eta.engine.predicted_delay(vehicle_id, route_id)
+        if delay_minutes is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Delay could not be estimated (no live GPS or stop timings). Please enter delay_minutes."
+            )
     
     message = f"🚌 Bus Update: {vehicle.get('vehicle_number', 'Bus')} aaj {delay_minutes} minute late hai. Reason: {reason}. Inconvenience ke liye sorry!"
     
@@ -661,6 +778,7 @@ async def notify_bus_late(school_id: str, vehicle_id: str, route_id: str, delay_
         "school_id": school_id,
         "vehicle_id": vehicle_id,
         "route_id": route_id,
+        "affected_routes": [route_id],
         "notification_type": "bus_late",
         "message": message,
         "delay_minutes": delay_minutes,
@@ -731,17 +849,19 @@ async def parent_track_bus(student_id: str, school_id: str):
     
     vehicle = await db.vehicles.find_one({"id": route.get("vehicle_id")})
     
-    # Get GPS location (simulated for now)
-    current_location = {
-        "lat": 26.8467 + random.uniform(-0.02, 0.02),
-        "lng": 80.9462 + random.uniform(-0.02, 0.02),
-        "speed": random.randint(0, 45),
-        "last_updated": datetime.now(timezone.utc).isoformat()
-    }
-    
-    # Calculate ETA to student's stop
+    current_location = await get_vehicle_location(route.get("vehicle_id"))
     pickup_stop = assignment.get("pickup_stop")
-    eta_minutes = random.randint(5, 25)  # Simulated ETA
+    
+    await bus_eta.load_vehicles([route["vehicle_id"]])
+    now_ist = datetime.now(bus_eta.IST)
+    stop_name = pickup_stop if bus_eta.trip_session(now_ist) == "morning" else assignment.get("drop_stop")
+    eta = bus_eta.engine.eta_for_stop(route["vehicle_id"], route["id"], stop_name, now_ist) if current_location else None
+    if eta is None:
+        eta_text = "ETA not available yet"
+    elif eta["passed"]:
+        eta_text = "Bus has passed this stop"
+    else:
+        eta_text = f"Approx {eta['eta_minutes']} minutes"
     
     return {
         "tracking_available": True,
@@ -754,8 +874,30 @@ async def parent_track_bus(student_id: str, school_id: str):
             "driver_phone": vehicle.get("driver", {}).get("phone")
         },
         "current_location": current_location,
-        "eta_minutes": eta_minutes,
-        "eta_text": f"Approx {eta_minutes} minutes",
-        "status": "on_route",
-        "note": "🔴 GPS tracking is SIMULATED. Real GPS will be connected soon."
+        "eta_minutes": eta["eta_minutes"] if eta else None,
+        "eta_text": eta_text,
+        "status": "on_route" if current_location else "offline",
+        "live_stream": f"/api/transport/parent-live/{student_id}?school_id={school_id}"
     }
+
+@router.get("/parent-live/{student_id}")
+async def parent_live_stream(student_id: str, school_id: str, request: Request):
+    """Server-Sent Events stream of the bus assigned to a student"""
+    db = get_database()
+    
+    assignment = await db.student_transport.find_one(
+        {"student_id": student_id, "school_id": school_id},
+        {"_id": 0, "route_id": 1}
+    )
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Transport not assigned to this student")
+    
+    route = await db.bus_routes.find_one({"id": assignment.get("route_id")}, {"_id": 0, "vehicle_id": 1})
+    if not route or not route.get("vehicle_id"):
+        raise HTTPException(status_code=404, detail="No vehicle assigned to this route")
+    
+    vehicle_id = route["vehicle_id"]
+    sub = bus.subscribe(vehicle_topic(vehicle_id))
+    location = await get_vehicle_location(vehicle_id)
+    initial = [{"type": "vehicle_location", "vehicle_id": vehicle_id, "school_id": school_id, "location": location}] if location else []
+    return sse_response(sub, request, initial=initial)
@@ -11,9 +11,10 @@ import io
 import base64
 import logging
 import uuid
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timezone, date
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -24,6 +25,10 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/voice-assistant", tags=["Voice Assistant"])
 
 from core.database import db
+from services.tts_cache import audio_cache, MEDIA_TYPE as TTS_MEDIA_TYPE
+from core.llm_stream import sse_stream, token_event, result_event
+from core import metrics
+from services import intent_router
 
 def get_database():
     return db
@@ -338,105 +343,117 @@ def get_voice_id(gender: str) -> str:
     return VOICE_IDS.get(gender, VOICE_IDS["female"])
 
 
-def generate_audio(text: str, gender: str = "female") -> Optional[str]:
-    """Generate TTS audio using ElevenLabs"""
+VOICE_SETTINGS = {
+    "stability": 0.6,
+    "similarity_boost": 0.85,
+    "style": 0.3,
+    "use_speaker_boost": True
+}
+
+
+def _tts_call(text: str, voice_id: str, settings: Optional[Dict] = None):
+    """Blocking ElevenLabs request for tts_cache; returns the chunk iterator"""
+    kwargs = {"voice_settings": settings} if settings else {}
+    return lambda: eleven_client.text_to_speech.convert(
+        text=text, voice_id=voice_id, model_id=ELEVENLABS_MODEL, **kwargs
+    )
+
+
+async def synthesize_audio(text: str, gender: str = "female") -> Optional[bytes]:
+    """TTS audio bytes via the shared audio cache (ElevenLabs only on a miss)"""
     if not eleven_client:
         return None
     
+    voice_id = get_voice_id(gender)
     try:
-        voice_id = get_voice_id(gender)
-        
-        # Use multilingual model for better Hindi
-        audio_generator = eleven_client.text_to_speech.convert(
-            text=text,
-            voice_id=voice_id,
-            model_id="eleven_multilingual_v2",
-            voice_settings={
-                "stability": 0.6,
-                "similarity_boost": 0.85,
-                "style": 0.3,
-                "use_speaker_boost": True
-            }
-        )
-        
-        audio_data = b""
-        for chunk in audio_generator:
-            audio_data += chunk
-        
-        return base64.b64encode(audio_data).decode()
-        
+        return await audio_cache.synthesize(text, voice_id, ELEVENLABS_MODEL, VOICE_SETTINGS,
+                                            _tts_call(text, voice_id, VOICE_SETTINGS))
     except Exception as e:
         logger.error(f"TTS failed: {e}")
         # Try fallback voice
         try:
             fallback_id = FALLBACK_VOICES.get(gender, FALLBACK_VOICES["female"])
-            audio_generator = eleven_client.text_to_speech.convert(
-                text=text,
-                voice_id=fallback_id,
-                model_id="eleven_multilingual_v2"
-            )
-            audio_data = b""
-            for chunk in audio_generator:
-                audio_data += chunk
-            return base64.b64encode(audio_data).decode()
-        except:
+            return await audio_cache.synthesize(text, fallback_id, ELEVENLABS_MODEL, None,
+                                                _tts_call(text, fallback_id))
+        except Exception:
             return None
 
 
+async def generate_audio(text: str, gender: str = "female") -> Optional[str]:
+    """Generate TTS audio using ElevenLabs, base64 for the JSON responses"""
+    audio = await synthesize_audio(text, gender)
+    return base64.b64encode(audio).decode() if audio else None
+
+
+def prewarm_phrases() -> List[Tuple]:
+    """Fixed navigation / confirmation prompts, both voices - cached at startup"""
+    if not eleven_client:
+        return []
+    phrases = []
+    for gender in ("male", "female"):
+        texts = {cmd[f"response_{gender}"] for cmd in NAVIGATION_COMMANDS.values() if cmd.get(f"response_{gender}")}
+        texts |= {cmd[f"confirm_msg_{gender}"] for cmd in ACTION_COMMANDS.values() if cmd.get(f"confirm_msg_{gender}")}
+        voice_id = get_voice_id(gender)
+        phrases += [(text, voice_id, ELEVENLABS_MODEL, VOICE_SETTINGS, _tts_call(text, voice_id, VOICE_SETTINGS))
+                    for text in sorted(texts)]
+    return phrases
+
+
+navigation_router = intent_router.IntentRouter({key: cmd["keywords"] for key, cmd in NAVIGATION_COMMANDS.items()})
+action_router = intent_router.IntentRouter({key: cmd["keywords"] for key, cmd in ACTION_COMMANDS.items()},
+                                           writes={"create_classes"})
+
+
 def detect_navigation(text: str) -> Optional[Dict]:
     """Detect navigation command"""
-    text_lower = text.lower()
-    
-    for cmd_key, cmd_data in NAVIGATION_COMMANDS.items():
-        for keyword in cmd_data["keywords"]:
-            if keyword in text_lower:
-                return {"key": cmd_key, **cmd_data}
-    
-    # Also check for "open X" or "X kholo" patterns
-    open_patterns = ["open", "kholo", "khol do", "dikhao", "dikha do", "le jao", "jao"]
-    for pattern in open_patterns:
-        if pattern in text_lower:
-            # Check which page to open
-            for cmd_key, cmd_data in NAVIGATION_COMMANDS.items():
-                for keyword in cmd_data["keywords"]:
-                    if keyword in text_lower:
-                        return {"key": cmd_key, **cmd_data}
-    
-    return None
+    route = navigation_router.match(text)
+    return {"key": route.intent, **NAVIGATION_COMMANDS[route.intent]} if route else None
 
 
 def detect_action(text: str, role: str) -> Optional[Dict]:
     """Detect action command"""
-    text_lower = text.lower()
-    
-    for cmd_key, cmd_data in ACTION_COMMANDS.items():
-        # Check role
-        if role not in cmd_data.get("roles", []):
-            continue
-        
-        for keyword in cmd_data["keywords"]:
-            if keyword in text_lower:
-                return {"key": cmd_key, **cmd_data}
-    
-    return None
+    allowed = [key for key, cmd in ACTION_COMMANDS.items() if role in cmd.get("roles", [])]
+    route = action_router.match(text, allowed)
+    return {"key": route.intent, **ACTION_COMMANDS[route.intent]} if route else None
 
 
-async def get_ai_response(message: str, role: str, gender: str, context: dict = None, is_jarvis_mode: bool = False) -> str:
-    """Get AI response with gender-specific language using Emergent LLM"""
-    if not emergent_chat_available:
-        if gender == "male":
-            return "AI service available nahi hai. Baad mein try karo."
-        else:
-            return "AI service available nahi hai. Baad mein try karo."
-    
-    try:
-        # Get school-specific context for AI Learning
-        school_context = ""
-        if context and context.get("school_id"):
-            try:
-                school = await db.schools.find_one({"id": context["school_id"]}, {"_id": 0, "name": 1, "board": 1, "timing": 1, "address": 1})
-                if school:
-                    school_context = f"""
+def detect_command(text: str, role: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    (navigation, action) for a user message - at most one is set. Keywords
+    first (navigation before action); without a keyword, a confident fuzzy
+    match (typos, word order) of either kind. Creating classes needs its keyword.
+    """
+    nav_cmd = detect_navigation(text)
+    if nav_cmd:
+        return nav_cmd, None
+    action_cmd = detect_action(text, role)
+    if action_cmd:
+        return None, action_cmd
+
+    allowed = [key for key, cmd in ACTION_COMMANDS.items() if role in cmd.get("roles", [])]
+    candidates = [
+        (route.confidence, kind, route.intent)
+        for kind, route in (("navigate", navigation_router.classify(text)),
+                            ("action", action_router.classify(text, allowed)))
+        if route
+    ]
+    if not candidates:
+        return None, None
+    _, kind, key = max(candidates)
+    if kind == "navigate":
+        return {"key": key, **NAVIGATION_COMMANDS[key]}, None
+    return None, {"key": key, **ACTION_COMMANDS[key]}
+
+
+async def build_chat_system_prompt(role: str, gender: str, context: dict = None, is_jarvis_mode: bool = False) -> str:
+    """Tino's system prompt: gender-specific grammar, school data, Jarvis mode"""
+    # Get school-specific context for AI Learning
+    school_context = ""
+    if context and context.get("school_id"):
+        try:
+            school = await db.schools.find_one({"id": context["school_id"]}, {"_id": 0, "name": 1, "board": 1, "timing": 1, "address": 1})
+            if school:
+                school_context = f"""
 SCHOOL CONTEXT (AI Learning - इस school के बारे में):
 - School Name: {school.get('name', 'Unknown')}
 - Board: {school.get('board', 'CBSE')}
@@ -445,12 +462,12 @@ SCHOOL CONTEXT (AI Learning - इस school के बारे में):
 
 Use this school's name and context when answering questions about the school.
 """
-                # Get some recent data for context
-                student_count = await db.students.count_documents({"school_id": context["school_id"], "is_active": True})
-                staff_count = await db.staff.count_documents({"school_id": context["school_id"], "is_active": True})
-                class_count = await db.classes.count_documents({"school_id": context["school_id"]})
-                
-                school_context += f"""
+            # Get some recent data for context
+            student_count = await db.students.count_documents({"school_id": context["school_id"], "is_active": True})
+            staff_count = await db.staff.count_documents({"school_id": context["school_id"], "is_active": True})
+            class_count = await db.classes.count_documents({"school_id": context["school_id"]})
+            
+            school_context += f"""
 LIVE DATA (AI Learning - Real-time stats):
 - Total Students: {student_count}
 - Total Staff: {staff_count}
@@ -458,13 +475,13 @@ LIVE DATA (AI Learning - Real-time stats):
 
 When user asks about school statistics, use this REAL data.
 """
-            except Exception as e:
-                logging.error(f"Error getting school context: {e}")
-        
-        # Jarvis mode specific instructions
-        jarvis_instruction = ""
-        if is_jarvis_mode:
-            jarvis_instruction = """
+        except Exception as e:
+            logging.error(f"Error getting school context: {e}")
+    
+    # Jarvis mode specific instructions
+    jarvis_instruction = ""
+    if is_jarvis_mode:
+        jarvis_instruction = """
 JARVIS MODE ACTIVE - Meeting Assistant:
 - You are actively listening in a meeting
 - Be polite and respectful: Start with "Sir, " or address the user respectfully
@@ -474,10 +491,10 @@ JARVIS MODE ACTIVE - Meeting Assistant:
 - You can access school data and provide real-time information
 - Act like a professional assistant, similar to JARVIS from Iron Man
 """
-        
-        # Gender-specific system prompt
-        if gender == "male":
-            gender_instruction = """
+    
+    # Gender-specific system prompt
+    if gender == "male":
+        gender_instruction = """
             IMPORTANT: Tum MALE ho. Apni response mein:
             - "karunga" use karo, "karungi" NAHI
             - "hoon" use karo 
@@ -485,8 +502,8 @@ JARVIS MODE ACTIVE - Meeting Assistant:
             - Male perspective se bolo
             Example: "Main ye kar raha hoon", "Main dikha raha hoon", "Main khol raha hoon"
             """
-        else:
-            gender_instruction = """
+    else:
+        gender_instruction = """
             IMPORTANT: Tum FEMALE ho. Apni response mein:
             - "karungi" use karo, "karunga" NAHI
             - "hoon" use karo
@@ -494,8 +511,8 @@ JARVIS MODE ACTIVE - Meeting Assistant:
             - Female perspective se bolo
             Example: "Main ye kar rahi hoon", "Main dikha rahi hoon", "Main khol rahi hoon"
             """
-        
-        system_prompt = f"""Tum Tino ho, ek school AI assistant. 
+    
+    system_prompt = f"""Tum Tino ho, ek school AI assistant. 
         
 {gender_instruction}
 
@@ -519,6 +536,19 @@ RULES:
 - Hinglish mein bolo
 - Jarvis Mode mein polite raho: "Sir, ..." style
 """
+    return system_prompt
+
+
+async def get_ai_response(message: str, role: str, gender: str, context: dict = None, is_jarvis_mode: bool = False) -> str:
+    """Get AI response with gender-specific language using Emergent LLM"""
+    if not emergent_chat_available:
+        if gender == "male":
+            return "AI service available nahi hai. Baad mein try karo."
+        else:
+            return "AI service available nahi hai. Baad mein try karo."
+    
+    try:
+        system_prompt = await build_chat_system_prompt(role, gender, context, is_jarvis_mode)
         
         # Use emergentintegrations LlmChat
         chat = LlmChat(
@@ -540,6 +570,28 @@ RULES:
             return "Kuch technical problem hai. Dobara try karo."
 
 
+async def stream_ai_response(message: str, role: str, gender: str, context: dict = None, is_jarvis_mode: bool = False):
+    """get_ai_response(), yielding text as the model produces it"""
+    if not emergent_chat_available:
+        yield "AI service available nahi hai. Baad mein try karo."
+        return
+    
+    try:
+        system_prompt = await build_chat_system_prompt(role, gender, context, is_jarvis_mode)
+    except Exception as e:
+        logger.error(f"AI error: {e}")
+        yield "Kuch technical problem hai. Dobara try karo."
+        return
+    
+    chat = LlmChat(
+        api_key=EMERGENT_LLM_KEY,
+        session_id=f"tino-{uuid.uuid4().hex[:8]}",
+        system_message=system_prompt
+    ).with_model("openai", "gpt-4o")
+    async for text in chat.stream_message(UserMessage(text=message)):
+        yield text
+
+
 # ============= API ENDPOINTS =============
 
 @router.get("/status")
@@ -591,7 +643,7 @@ async def transcribe_audio(
 @router.post("/tts")
 async def text_to_speech(request: TTSRequest):
     """Convert text to speech"""
-    audio_b64 = generate_audio(request.text, request.voice_gender)
+    audio_b64 = await generate_audio(request.text, request.voice_gender)
     
     if not audio_b64:
         raise HTTPException(status_code=500, detail="Audio generation failed")
@@ -599,20 +651,30 @@ async def text_to_speech(request: TTSRequest):
     return {"audio_base64": audio_b64, "text": request.text, "voice": request.voice_gender}
 
 
-@router.post("/chat", response_model=CommandResponse)
-async def chat_with_tino(request: ChatMessage):
-    """
-    Main chat endpoint - ACTUALLY executes commands
-    """
-    db = get_database()
+@router.post("/tts/stream")
+async def text_to_speech_stream(request: TTSRequest):
+    """Binary MP3 streamed as ElevenLabs produces it (or straight from the audio cache)"""
+    if not eleven_client:
+        raise HTTPException(status_code=503, detail="TTS not configured")
+    voice_id = get_voice_id(request.voice_gender)
+    return StreamingResponse(
+        audio_cache.stream(request.text, voice_id, ELEVENLABS_MODEL, VOICE_SETTINGS,
+                           _tts_call(request.text, voice_id, VOICE_SETTINGS)),
+        media_type=TTS_MEDIA_TYPE
+    )
+
+
+async def handle_command(request: ChatMessage, db) -> Optional[CommandResponse]:
+    """Navigation / action commands answered without the AI (None when the message is neither)"""
     gender = request.voice_gender
+    nav_cmd, action_cmd = detect_command(request.message, request.user_role)
+    metrics.observe_intent_route("voice-assistant", "command" if nav_cmd or action_cmd else "llm")
     
-    # 1. Check for NAVIGATION command first
-    nav_cmd = detect_navigation(request.message)
+    # 1. NAVIGATION command
     if nav_cmd:
         response_key = f"response_{gender}"
         response_text = nav_cmd.get(response_key, nav_cmd.get("response_female"))
-        audio_b64 = generate_audio(response_text, gender)
+        audio_b64 = await generate_audio(response_text, gender)
         
         return CommandResponse(
             message=response_text,
@@ -622,14 +684,13 @@ async def chat_with_tino(request: ChatMessage):
             audio_base64=audio_b64
         )
     
-    # 2. Check for ACTION command
-    action_cmd = detect_action(request.message, request.user_role)
+    # 2. ACTION command
     if action_cmd:
         # If needs confirmation
         if action_cmd.get("confirm"):
             confirm_key = f"confirm_msg_{gender}"
             confirm_msg = action_cmd.get(confirm_key, action_cmd.get("confirm_msg_female", "Confirm karein?"))
-            audio_b64 = generate_audio(confirm_msg, gender)
+            audio_b64 = await generate_audio(confirm_msg, gender)
             
             return CommandResponse(
                 message=confirm_msg,
@@ -647,7 +708,7 @@ async def chat_with_tino(request: ChatMessage):
             else:
                 response_text = f"{action_cmd['key'].replace('_', ' ').title()} page khol rahi hoon."
             
-            audio_b64 = generate_audio(response_text, gender)
+            audio_b64 = await generate_audio(response_text, gender)
             
             return CommandResponse(
                 message=response_text,
@@ -659,7 +720,7 @@ async def chat_with_tino(request: ChatMessage):
         
         # Execute action
         result = await execute_action(action_cmd["key"], request.school_id, gender, db)
-        audio_b64 = generate_audio(result["message"], gender)
+        audio_b64 = await generate_audio(result["message"], gender)
         
         return CommandResponse(
             message=result["message"],
@@ -669,10 +730,26 @@ async def chat_with_tino(request: ChatMessage):
             audio_base64=audio_b64
         )
     
+    return None
+
+
+@router.post("/chat", response_model=CommandResponse)
+async def chat_with_tino(request: ChatMessage):
+    """
+    Main chat endpoint - ACTUALLY executes commands
+    """
+    db = get_database()
+    gender = request.voice_gender
+    
+    # 1-2. Navigation and action commands
+    command = await handle_command(request, db)
+    if command:
+        return command
+    
     # 3. No specific command - use AI for response
     context = {"school_id": request.school_id, "user_id": request.user_id, "user_role": request.user_role}
     ai_response = await get_ai_response(request.message, request.user_role, gender, context, request.is_jarvis_mode)
-    audio_b64 = generate_audio(ai_response, gender)
+    audio_b64 = await generate_audio(ai_response, gender)
     
     # Check if AI suggests navigation
     nav_check = detect_navigation(ai_response)
@@ -685,6 +762,40 @@ async def chat_with_tino(request: ChatMessage):
     )
 
 
+@router.post("/chat/stream")
+async def chat_with_tino_stream(request: ChatMessage):
+    """
+    /chat as Server-Sent Events. Commands come back as a single `result`
+    event (CommandResponse fields, with audio); anything else streams the AI
+    reply as `token` events, then a `result` without audio - speak it via
+    /voice-assistant/tts/stream.
+    """
+    db = get_database()
+
+    async def events():
+        command = await handle_command(request, db)
+        if command:
+            yield result_event(command.model_dump())
+            return
+
+        context = {"school_id": request.school_id, "user_id": request.user_id, "user_role": request.user_role}
+        parts = []
+        async for text in stream_ai_response(request.message, request.user_role, request.voice_gender,
+                                             context, request.is_jarvis_mode):
+            parts.append(text)
+            yield token_event(text)
+        ai_response = "".join(parts)
+
+        nav_check = detect_navigation(ai_response)
+        yield result_event(CommandResponse(
+            message=ai_response,
+            action_type="chat",
+            navigate_to=nav_check["url"] if nav_check else None
+        ).model_dump())
+
+    return sse_stream("voice-assistant-chat", events())
+
+
 @router.post("/execute-command", response_model=CommandResponse)
 async def execute_confirmed_command(request: CommandRequest):
     """Execute a confirmed command"""
@@ -699,12 +810,12 @@ async def execute_confirmed_command(request: CommandRequest):
             msg = "Command samajh nahi aaya. Dobara bolo."
         else:
             msg = "Command samajh nahi aayi. Dobara bolo."
-        audio_b64 = generate_audio(msg, gender)
+        audio_b64 = await generate_audio(msg, gender)
         return CommandResponse(message=msg, audio_base64=audio_b64)
     
     # Execute
     result = await execute_action(action_cmd["key"], request.school_id, gender, db)
-    audio_b64 = generate_audio(result["message"], gender)
+    audio_b64 = await generate_audio(result["message"], gender)
     
     return CommandResponse(
         message=result["message"],
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Body, Header
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Form, Body, Header, BackgroundTasks, Query, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -9,14 +9,11 @@ import os
 import logging
 import re
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr, validator
+from pydantic import BaseModel, Field, EmailStr, validator, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
-import bcrypt
-import qrcode
-from io import BytesIO
 import base64
 import aiofiles
 # Removed: from syllabus_data_2025_26 import ... (data now inlined below)
@@ -30,6 +27,9 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 
 load_dotenv(ROOT_DIR / '.env')
 
+# Must run before the first Motor client is created (Mongo command listener)
+from core import metrics
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
@@ -485,6 +485,17 @@ from routes.tino_voice import router as tino_voice_router
 from routes.did_avatar import router as did_avatar_router
 from routes.documents import router as documents_router
 from routes.bulk_import import router as bulk_import_router
+from routes.live import router as live_router
+from routes.exports import router as exports_router
+from core.event_bus import bus
+from core.audit_buffer import audit_buffer, make_entry
+from core.live_events import publish_notification, publish_notice, publish_attendance
+from core.pagination import fetch_page, stream_documents, set_next_cursor, lookup, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from core.auth import hash_password_async, verify_password_async
+from core import offload
+from core.offload import run_io, run_cpu
+from core.llm_stream import sse_stream, token_event, status_event, result_event
+from services import risk_scoring, report_cards, exam_sessions, cpu_tasks, staff_provisioning, question_bank
 
 # ==================== MODELS ====================
 
@@ -1137,6 +1148,7 @@ class PaperGenerateRequest(BaseModel):
     time_duration: int  # in minutes
     language: str = "english"
     include_all_chapters: bool = False  # If true, include all chapters of subject
+    board: Optional[str] = None  # CBSE, MP Board, RBSE ... (NCERT-based when not given)
 
 class PaperGenerateResponse(BaseModel):
     id: str
@@ -1149,6 +1161,7 @@ class PaperGenerateResponse(BaseModel):
     total_marks: int
     time_duration: int
     created_at: str
+    bank_questions: int = 0  # questions reused from the question bank
 
 # Dashboard Stats
 class DashboardStats(BaseModel):
@@ -1347,16 +1360,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     return user
 
 async def log_audit(user_id: str, action: str, module: str, details: dict, ip_address: str = None):
-    audit_log = {
-        "id": str(uuid.uuid4()),
-        "user_id": user_id,
-        "action": action,
-        "module": module,
-        "details": details,
-        "ip_address": ip_address,
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
-    await db.audit_logs.insert_one(audit_log)
+    # Buffered: core.audit_buffer writes entries in batches off the request path
+    audit_buffer.add(make_entry(user_id, action, module, details, ip_address))
 
 async def create_notification(
     school_id: str,
@@ -1382,6 +1387,7 @@ async def create_notification(
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.notifications.insert_one(notification)
+    publish_notification(notification)
     return notification
 
 def extract_class_number(class_name: Optional[str]) -> Optional[str]:
@@ -1450,7 +1456,7 @@ async def setup_director(user: UserRegister):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_pw = bcrypt.hashpw(user.password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(user.password)
     
     # Create Director user
     user_data = {
@@ -1542,7 +1548,7 @@ async def quick_school_setup(data: QuickSchoolSetup):
     await db.schools.insert_one(school_data)
     
     # Hash password
-    hashed_pw = bcrypt.hashpw(data.director_password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(data.director_password)
     
     # Create Director
     director_id = str(uuid.uuid4())
@@ -1609,7 +1615,7 @@ async def login(credentials: UserLogin):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not bcrypt.checkpw(credentials.password.encode(), user["password"].encode()):
+    if not await verify_password_async(credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if not user.get("is_active", True):
@@ -1710,7 +1716,7 @@ async def create_user_account(user_data: UserCreate, current_user: dict = Depend
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_pw = bcrypt.hashpw(user_data.password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(user_data.password)
     
     # If Principal creates, status is pending (needs Director approval)
     # If Director creates, status is active
@@ -1971,7 +1977,7 @@ async def transfer_user_account(user_id: str, data: TransferUserRequest, current
         raise HTTPException(status_code=404, detail="User not found")
     
     # Hash new password
-    hashed_pw = bcrypt.hashpw(data.new_password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(data.new_password)
     
     # Update user with new person details
     await db.users.update_one(
@@ -3473,7 +3479,7 @@ async def admit_student(student: StudentCreate, current_user: dict = Depends(get
     
     # Generate temporary password
     temp_password = generate_temp_password()
-    hashed_pw = bcrypt.hashpw(temp_password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(temp_password)
     
     # Determine status - if Director/Principal adds, directly active
     # If staff adds, pending approval (optional - can be configured)
@@ -3588,7 +3594,7 @@ async def student_login(
         if not student:
             raise HTTPException(status_code=401, detail="Invalid Student ID")
         
-        if not bcrypt.checkpw(password.encode(), student["password"].encode()):
+        if not await verify_password_async(password, student["password"]):
             raise HTTPException(status_code=401, detail="Invalid password")
     
     elif mobile and dob:
@@ -3645,10 +3651,10 @@ async def student_change_password(student_id: str, old_password: str, new_passwo
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    if not bcrypt.checkpw(old_password.encode(), student["password"].encode()):
+    if not await verify_password_async(old_password, student["password"]):
         raise HTTPException(status_code=401, detail="Current password is incorrect")
 
-    new_hashed = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+    new_hashed = await hash_password_async(new_password)
 
     await db.students.update_one(
         {"student_id": student_id},
@@ -3746,7 +3752,7 @@ async def create_student(student: StudentCreate, current_user: dict = Depends(ge
         student_id = generate_student_id(student.school_id)
     
     temp_password = generate_temp_password()
-    hashed_pw = bcrypt.hashpw(temp_password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(temp_password)
     
     student_data = {
         "id": str(uuid.uuid4()),
@@ -3770,12 +3776,20 @@ async def create_student(student: StudentCreate, current_user: dict = Depends(ge
 
 @api_router.get("/students", response_model=List[StudentResponse])
 async def get_students(
+    response: Response,
     school_id: Optional[str] = None,
     class_id: Optional[str] = None,
     search: Optional[str] = None,
     status: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
     current_user: dict = Depends(get_current_user)
 ):
+    """
+    Students by name, `limit` per page; X-Next-Cursor is set when there are
+    more (pass it back as `cursor`). stream=ndjson|json returns all of them.
+    """
     # Multi-tenant isolation: always scope to authenticated user's school
     if current_user.get("role") == "owner":
         effective_school_id = school_id or current_user.get("school_id")
@@ -3795,21 +3809,32 @@ async def get_students(
             {"admission_no": {"$regex": search, "$options": "i"}}
         ]
     
-    students = await db.students.find(query, {"_id": 0, "password": 0}).to_list(500)
-    
-    # Enrich with class info
-    for student in students:
-        class_doc = await db.classes.find_one({"id": student["class_id"]}, {"_id": 0})
-        if class_doc:
-            student["class_name"] = class_doc["name"]
-            student["section"] = class_doc["section"]
-        # Ensure required fields exist
-        if "student_id" not in student:
-            student["student_id"] = student.get("admission_no", "N/A")
-        if "status" not in student:
-            student["status"] = "active" if student.get("is_active", True) else "inactive"
-    
-    return [StudentResponse(**s) for s in students]
+    projection = {"_id": 0, "password": 0}
+    sort = [("name", 1)]
+
+    async def enrich(students):
+        # One class lookup per page instead of one per student
+        classes = await lookup(db.classes, (s.get("class_id") for s in students), {"_id": 0, "name": 1, "section": 1})
+        for student in students:
+            class_doc = classes.get(student.get("class_id"))
+            if class_doc:
+                student["class_name"] = class_doc["name"]
+                student["section"] = class_doc["section"]
+            # Ensure required fields exist
+            if "student_id" not in student:
+                student["student_id"] = student.get("admission_no", "N/A")
+            if "status" not in student:
+                student["status"] = "active" if student.get("is_active", True) else "inactive"
+        return [StudentResponse(**s) for s in students]
+
+    if stream:
+        async def rows(batch):
+            return [s.model_dump() for s in await enrich(batch)]
+        return stream_documents(db.students.find(query, projection).sort(sort), stream, rows)
+
+    page = await fetch_page(db.students, query, projection, sort=sort, limit=limit, cursor=cursor)
+    set_next_cursor(response, page)
+    return await enrich(page.items)
 
 
 # Search endpoints for accountant dashboard — JWT required, school_id from token
@@ -4017,29 +4042,8 @@ DESIGNATION_ROLE_MAP = {
     "sweeper": "peon"
 }
 
-@api_router.post("/employees", response_model=UnifiedEmployeeResponse)
-async def create_unified_employee(
-    employee: UnifiedEmployeeCreate, 
-    current_user: dict = Depends(get_current_user)
-):
-    """Create employee with optional login account and permissions"""
-    if current_user["role"] not in ["director", "principal", "admin"]:
-        raise HTTPException(status_code=403, detail="Not authorized to create employees")
-    
-    # Check if email already exists in staff or users
-    existing_staff = await db.staff.find_one({"email": employee.email})
-    if existing_staff:
-        raise HTTPException(status_code=400, detail="Email already registered as staff")
-    
-    existing_user = await db.users.find_one({"email": employee.email})
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered as user")
-    
-    # Generate employee ID
-    year = datetime.now().year
-    count = await db.staff.count_documents({"school_id": employee.school_id}) + 1
-    employee_id = f"EMP-{year}-{str(count).zfill(5)}"
-    
+def build_employee_documents(employee: UnifiedEmployeeCreate, employee_id: Optional[str] = None):
+    """staff doc, user doc (None without login; password not yet hashed) and the plain password"""
     # Determine role based on designation
     role = DESIGNATION_ROLE_MAP.get(employee.designation.lower().replace(" ", "_"), "teacher")
     if employee.role:
@@ -4052,7 +4056,7 @@ async def create_unified_employee(
     if employee.custom_permissions:
         permissions.update(employee.custom_permissions)
     
-    # Create staff record
+    now = datetime.now(timezone.utc).isoformat()
     staff_data = {
         "id": str(uuid.uuid4()),
         "employee_id": employee_id,
@@ -4068,37 +4072,62 @@ async def create_unified_employee(
         "joining_date": employee.joining_date or datetime.now(timezone.utc).date().isoformat(),
         "salary": employee.salary,
         "is_active": True,
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": now,
         "has_login": employee.create_login,
         "user_id": None,
         "role": role,
         "permissions": permissions
     }
+    if not employee.create_login:
+        return staff_data, None, None
+    
+    password = employee.password or employee.mobile  # Default password is mobile number
+    user_data = {
+        "id": str(uuid.uuid4()),
+        "name": employee.name,
+        "email": employee.email,
+        "mobile": employee.mobile,
+        "password": None,
+        "role": role,
+        "school_id": employee.school_id,
+        "permissions": permissions,
+        "is_active": True,
+        "employee_id": employee_id,
+        "staff_id": staff_data["id"],
+        "created_at": now
+    }
+    staff_data["user_id"] = user_data["id"]
+    return staff_data, user_data, password
+
+@api_router.post("/employees", response_model=UnifiedEmployeeResponse)
+async def create_unified_employee(
+    employee: UnifiedEmployeeCreate, 
+    current_user: dict = Depends(get_current_user)
+):
+    """Create employee with optional login account and permissions"""
+    if current_user["role"] not in ["director", "principal", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized to create employees")
+    
+    # Check if email already exists in staff or users
+    existing_staff = await db.staff.find_one({"email": employee.email})
+    if existing_staff:
+        raise HTTPException(status_code=400, detail="Email already registered as staff")
+    
+    existing_user = await db.users.find_one({"email": employee.email})
+    if existing_user:
+        raise HTTPException(status_code=400, detail="Email already registered as user")
+    
+    # Generate employee ID
+    year = datetime.now().year
+    count = await db.staff.count_documents({"school_id": employee.school_id}) + 1
+    employee_id = f"EMP-{year}-{str(count).zfill(5)}"
     
-    user_id = None
+    staff_data, user_data, password = build_employee_documents(employee, employee_id)
     
     # Create login account if requested
-    if employee.create_login:
-        password = employee.password or employee.mobile  # Default password is mobile number
-        hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-        
-        user_data = {
-            "id": str(uuid.uuid4()),
-            "name": employee.name,
-            "email": employee.email,
-            "mobile": employee.mobile,
-            "password": hashed_password,
-            "role": role,
-            "school_id": employee.school_id,
-            "permissions": permissions,
-            "is_active": True,
-            "employee_id": employee_id,
-            "staff_id": staff_data["id"],
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
+    if user_data:
+        user_data["password"] = await hash_password_async(password)
         await db.users.insert_one(user_data)
-        user_id = user_data["id"]
-        staff_data["user_id"] = user_id
     
     await db.staff.insert_one(staff_data)
     await log_audit(current_user["id"], "create", "employee", {
@@ -4109,15 +4138,56 @@ async def create_unified_employee(
     
     return UnifiedEmployeeResponse(**staff_data)
 
+class BulkEmployeeCreate(BaseModel):
+    school_id: str
+    employees: List[Dict[str, Any]]  # UnifiedEmployeeCreate fields; validated row by row
+    create_login: Optional[bool] = None  # overrides every row's create_login when set
+
+@api_router.post("/employees/bulk")
+async def create_employees_bulk(
+    request: BulkEmployeeCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """Create many employees (with logins) in one call; passwords hashed in parallel, per-row results"""
+    if current_user["role"] not in ["director", "principal", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized to create employees")
+    if len(request.employees) > staff_provisioning.MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {staff_provisioning.MAX_BATCH} employees per request")
+    
+    entries = []
+    for row in request.employees:
+        fields = {**row, "school_id": request.school_id}
+        if request.create_login is not None:
+            fields["create_login"] = request.create_login
+        try:
+            employee = UnifiedEmployeeCreate(**fields)
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+            entries.append({"staff": {"name": row.get("name")}, "error": problems})
+            continue
+        staff_data, user_data, password = build_employee_documents(employee)
+        entries.append({"staff": staff_data, "user": user_data, "password": password})
+    
+    result = await staff_provisioning.provision(entries)
+    await log_audit(current_user["id"], "bulk_create", "employee", {
+        "school_id": request.school_id,
+        "created": result["created"], "skipped": result["skipped"], "errors": result["error"]
+    })
+    return result
+
 @api_router.get("/employees", response_model=List[UnifiedEmployeeResponse])
 async def get_employees(
+    response: Response,
     school_id: Optional[str] = None,
     designation: Optional[str] = None,
     has_login: Optional[bool] = None,
     search: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all employees with their login status and permissions"""
+    """Get all employees with their login status and permissions (paged by `cursor`, or streamed)"""
     query = {"is_active": True}
     
     if school_id:
@@ -4139,9 +4209,15 @@ async def get_employees(
             {"mobile": {"$regex": search, "$options": "i"}}
         ]
     
-    employees = await db.staff.find(query, {"_id": 0}).sort("created_at", -1).to_list(500)
-    
-    return [UnifiedEmployeeResponse(**emp) for emp in employees]
+    sort = [("created_at", -1)]
+    if stream:
+        async def rows(batch):
+            return [UnifiedEmployeeResponse(**emp).model_dump() for emp in batch]
+        return stream_documents(db.staff.find(query, {"_id": 0}).sort(sort), stream, rows)
+
+    page = await fetch_page(db.staff, query, {"_id": 0}, sort=sort, limit=limit, cursor=cursor)
+    set_next_cursor(response, page)
+    return [UnifiedEmployeeResponse(**emp) for emp in page.items]
 
 @api_router.get("/employees/{employee_id}", response_model=UnifiedEmployeeResponse)
 async def get_employee(employee_id: str, current_user: dict = Depends(get_current_user)):
@@ -4216,7 +4292,7 @@ async def update_employee(
                 "permissions": permissions
             }
             if employee.password:
-                user_update["password"] = bcrypt.hashpw(employee.password.encode(), bcrypt.gensalt()).decode()
+                user_update["password"] = await hash_password_async(employee.password)
             
             await db.users.update_one(
                 {"id": existing["user_id"]},
@@ -4225,7 +4301,7 @@ async def update_employee(
         else:
             # Create new user account
             password = employee.password or employee.mobile
-            hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+            hashed_password = await hash_password_async(password)
             
             user_data = {
                 "id": str(uuid.uuid4()),
@@ -4318,7 +4394,7 @@ async def toggle_employee_login(
         else:
             # Create new user account
             pwd = password or employee.get("mobile", "123456")
-            hashed_password = bcrypt.hashpw(pwd.encode(), bcrypt.gensalt()).decode()
+            hashed_password = await hash_password_async(pwd)
             
             role = employee.get("role", "teacher")
             permissions = employee.get("permissions", DEFAULT_PERMISSIONS.get(role, {}))
@@ -4531,6 +4607,7 @@ async def mark_attendance(attendance: AttendanceCreate, current_user: dict = Dep
             {"$set": {"status": attendance.status, "remarks": attendance.remarks, "marked_by": current_user["id"]}}
         )
         updated = await db.attendance.find_one({"id": existing["id"]}, {"_id": 0})
+        publish_attendance(attendance.school_id, attendance.date, [updated], class_id=attendance.class_id)
         return AttendanceResponse(**updated)
     
     attendance_data = {
@@ -4540,6 +4617,8 @@ async def mark_attendance(attendance: AttendanceCreate, current_user: dict = Dep
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.attendance.insert_one(attendance_data)
+    attendance_data.pop("_id", None)
+    publish_attendance(attendance.school_id, attendance.date, [attendance_data], class_id=attendance.class_id)
     
     return AttendanceResponse(**attendance_data)
 
@@ -4576,6 +4655,7 @@ async def mark_bulk_attendance(data: BulkAttendanceCreate, current_user: dict =
         )
         results.append(AttendanceResponse(**attendance_data))
     
+    publish_attendance(data.school_id, data.date, [r.model_dump() for r in results], class_id=data.class_id)
     await log_audit(current_user["id"], "bulk_mark", "attendance", {
         "class_id": data.class_id,
         "date": data.date,
@@ -4586,13 +4666,18 @@ async def mark_bulk_attendance(data: BulkAttendanceCreate, current_user: dict =
 
 @api_router.get("/attendance", response_model=List[AttendanceResponse])
 async def get_attendance(
+    response: Response,
     class_id: Optional[str] = None,
     student_id: Optional[str] = None,
     date: Optional[str] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
     current_user: dict = Depends(get_current_user)
 ):
+    """Newest first, paged by `cursor` (X-Next-Cursor); stream=ndjson|json returns every record."""
     query = {}
     if class_id:
         query["class_id"] = class_id
@@ -4603,15 +4688,25 @@ async def get_attendance(
     if from_date and to_date:
         query["date"] = {"$gte": from_date, "$lte": to_date}
     
-    attendance_list = await db.attendance.find(query, {"_id": 0}).sort("date", -1).to_list(1000)
-    
-    # Enrich with student names
-    for att in attendance_list:
-        student = await db.students.find_one({"id": att["student_id"]}, {"_id": 0, "name": 1})
-        if student:
-            att["student_name"] = student["name"]
-    
-    return [AttendanceResponse(**a) for a in attendance_list]
+    sort = [("date", -1)]
+
+    async def enrich(attendance_list):
+        # Enrich with student names
+        students = await lookup(db.students, (a.get("student_id") for a in attendance_list), {"_id": 0, "name": 1})
+        for att in attendance_list:
+            student = students.get(att["student_id"])
+            if student:
+                att["student_name"] = student["name"]
+        return [AttendanceResponse(**a) for a in attendance_list]
+
+    if stream:
+        async def rows(batch):
+            return [a.model_dump() for a in await enrich(batch)]
+        return stream_documents(db.attendance.find(query, {"_id": 0}).sort(sort), stream, rows)
+
+    page = await fetch_page(db.attendance, query, {"_id": 0}, sort=sort, limit=limit, cursor=cursor)
+    set_next_cursor(response, page)
+    return await enrich(page.items)
 
 @api_router.get("/attendance/stats")
 async def get_attendance_stats(
@@ -5029,10 +5124,15 @@ async def create_fee_invoice(invoice: FeeInvoiceCreate, current_user: dict = Dep
 
 @api_router.get("/fees/invoices", response_model=List[FeeInvoiceResponse])
 async def get_fee_invoices(
+    response: Response,
     student_id: Optional[str] = None,
     status: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
     current_user: dict = Depends(get_current_user)
 ):
+    """Newest first, paged by `cursor` (X-Next-Cursor); stream=ndjson|json returns every invoice."""
     # Always scope to authenticated user's school — never trust client-supplied school_id
     query = {"school_id": current_user["school_id"]}
     if student_id:
@@ -5040,15 +5140,25 @@ async def get_fee_invoices(
     if status:
         query["status"] = status
     
-    invoices = await db.fee_invoices.find(query, {"_id": 0}).sort("created_at", -1).to_list(500)
-    
-    # Enrich with student names
-    for inv in invoices:
-        student = await db.students.find_one({"id": inv["student_id"]}, {"_id": 0, "name": 1})
-        if student:
-            inv["student_name"] = student["name"]
-    
-    return [FeeInvoiceResponse(**i) for i in invoices]
+    sort = [("created_at", -1)]
+
+    async def enrich(invoices):
+        # Enrich with student names
+        students = await lookup(db.students, (i.get("student_id") for i in invoices), {"_id": 0, "name": 1})
+        for inv in invoices:
+            student = students.get(inv["student_id"])
+            if student:
+                inv["student_name"] = student["name"]
+        return [FeeInvoiceResponse(**i) for i in invoices]
+
+    if stream:
+        async def rows(batch):
+            return [i.model_dump() for i in await enrich(batch)]
+        return stream_documents(db.fee_invoices.find(query, {"_id": 0}).sort(sort), stream, rows)
+
+    page = await fetch_page(db.fee_invoices, query, {"_id": 0}, sort=sort, limit=limit, cursor=cursor)
+    set_next_cursor(response, page)
+    return await enrich(page.items)
 
 @api_router.post("/fees/payments", response_model=FeePaymentResponse)
 async def create_fee_payment(payment: FeePaymentCreate, current_user: dict = Depends(get_current_user)):
@@ -5087,19 +5197,31 @@ async def create_fee_payment(payment: FeePaymentCreate, current_user: dict = Dep
 
 @api_router.get("/fees/payments", response_model=List[FeePaymentResponse])
 async def get_fee_payments(
+    response: Response,
     invoice_id: Optional[str] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
     current_user: dict = Depends(get_current_user)
 ):
+    """Newest first, paged by `cursor` (X-Next-Cursor); stream=ndjson|json returns every payment."""
     query = {}
     if invoice_id:
         query["invoice_id"] = invoice_id
     if from_date and to_date:
         query["created_at"] = {"$gte": from_date, "$lte": to_date}
     
-    payments = await db.fee_payments.find(query, {"_id": 0}).sort("created_at", -1).to_list(500)
-    return [FeePaymentResponse(**p) for p in payments]
+    sort = [("created_at", -1)]
+    if stream:
+        async def rows(batch):
+            return [FeePaymentResponse(**p).model_dump() for p in batch]
+        return stream_documents(db.fee_payments.find(query, {"_id": 0}).sort(sort), stream, rows)
+
+    page = await fetch_page(db.fee_payments, query, {"_id": 0}, sort=sort, limit=limit, cursor=cursor)
+    set_next_cursor(response, page)
+    return [FeePaymentResponse(**p) for p in page.items]
 
 @api_router.get("/fees/stats")
 async def get_fee_stats(school_id: str, month: Optional[str] = None, current_user: dict = Depends(get_current_user)):
@@ -5135,6 +5257,8 @@ async def create_notice(notice: NoticeCreate, current_user: dict = Depends(get_c
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.notices.insert_one(notice_data)
+    notice_data.pop("_id", None)
+    publish_notice(notice_data)
     await log_audit(current_user["id"], "create", "notices", {"notice_id": notice_data["id"], "title": notice.title})
 
     target_audience = notice.target_audience or []
@@ -5371,27 +5495,44 @@ async def get_audit_logs(
     user_id: Optional[str] = None,
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
+    before: Optional[str] = None,
     limit: int = 100,
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["role"] not in ["director", "principal", "admin"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    # Include this worker's not-yet-flushed entries
+    await audit_buffer.flush()
+    
+    # Every filter combination is served by a (field, created_at) index
     query = {}
     if module:
         query["module"] = module
     if user_id:
         query["user_id"] = user_id
-    if from_date and to_date:
-        query["created_at"] = {"$gte": from_date, "$lte": to_date}
-    
-    logs = await db.audit_logs.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
-    
-    # Enrich with user names
+    created = {}
+    if from_date:
+        created["$gte"] = from_date
+    if to_date:
+        created["$lte"] = to_date
+    if before:
+        created["$lt"] = before
+    if created:
+        query["created_at"] = created
+    limit = max(1, min(limit, 500))
+    
+    logs = await db.audit_logs.find(query, {"_id": 0, "ts": 0}).sort("created_at", -1).to_list(limit)
+    
+    # Enrich with user names (one lookup for the page)
+    user_ids = list({log["user_id"] for log in logs if log.get("user_id")})
+    names = {
+        u["id"]: u.get("name")
+        for u in await db.users.find({"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    } if user_ids else {}
     for log in logs:
-        user = await db.users.find_one({"id": log["user_id"]}, {"_id": 0, "name": 1})
-        if user:
-            log["user_name"] = user["name"]
+        if names.get(log.get("user_id")):
+            log["user_name"] = names[log["user_id"]]
     
     return [AuditLogResponse(**log_item) for log_item in logs]
 
@@ -5447,60 +5588,24 @@ async def get_dashboard_stats(school_id: str, current_user: dict = Depends(get_c
 
 # ==================== AI PAPER GENERATOR ====================
 
-@api_router.post("/ai/generate-paper", response_model=PaperGenerateResponse)
-async def generate_paper(request: PaperGenerateRequest, current_user: dict = Depends(get_current_user)):
-    if current_user["role"] not in ["director", "principal", "teacher", "exam_controller", "admin"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    openai_key = os.environ.get("OPENAI_API_KEY")
-    emergent_key = os.environ.get("EMERGENT_LLM_KEY")
-    api_key = emergent_key or openai_key
+DRAWING_SUBJECTS = ['drawing', 'चित्रकला', 'art', 'art & craft']
+
+def build_paper_prompts(request: PaperGenerateRequest):
+    """(system prompt, user message) for the AI paper generator"""
+    # Marks per question type (shared with the question bank's paper assembly)
+    marks_distribution = question_bank.marks_plan(request.question_types, request.total_marks)
     
-    if not api_key:
-        raise HTTPException(status_code=500, detail="API key not configured")
+    # Build distribution string
+    dist_str = "\n".join([
+        f"- {name}: {marks} marks total ({marks//per_q if marks >= per_q else 1} questions × {per_q} marks each)" 
+        for name, per_q, marks, _ in marks_distribution
+    ])
     
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        # Calculate marks distribution based on question types with proper percentages
-        type_config = {
-            'mcq': ("MCQ (Multiple Choice)", 1, 0.15),
-            'fill_blank': ("Fill in the Blanks", 1, 0.10),
-            'short': ("Short Answer (2-3 lines)", 2, 0.25),
-            'long': ("Long Answer (detailed)", 5, 0.25),
-            'diagram': ("Diagram Based Questions", 3, 0.15),
-            'hots': ("HOTS (Higher Order Thinking)", 4, 0.10)
-        }
-        
-        marks_distribution = []
-        total_percentage = sum(type_config[t][2] for t in request.question_types if t in type_config)
-        
-        for qtype in request.question_types:
-            if qtype in type_config:
-                name, per_q, pct = type_config[qtype]
-                adjusted_pct = pct / total_percentage if total_percentage > 0 else pct
-                marks_for_type = max(per_q, int(request.total_marks * adjusted_pct))
-                marks_distribution.append((name, per_q, marks_for_type, qtype))
-        
-        # Adjust to ensure total matches exactly
-        current_total = sum(m[2] for m in marks_distribution)
-        if marks_distribution and current_total != request.total_marks:
-            diff = request.total_marks - current_total
-            # Add/subtract from the last item
-            last = marks_distribution[-1]
-            marks_distribution[-1] = (last[0], last[1], max(last[1], last[2] + diff), last[3])
-        
-        # Build distribution string
-        dist_str = "\n".join([
-            f"- {name}: {marks} marks total ({marks//per_q if marks >= per_q else 1} questions × {per_q} marks each)" 
-            for name, per_q, marks, _ in marks_distribution
-        ])
-        
-        # Build question type examples for the prompt
-        question_examples = []
-        for name, per_q, marks, qtype in marks_distribution:
-            if qtype == 'diagram':
-                question_examples.append(f'''{{
+    # Build question type examples for the prompt
+    question_examples = []
+    for name, per_q, marks, qtype in marks_distribution:
+        if qtype == 'diagram':
+            question_examples.append(f'''{{
             "type": "diagram",
             "question": "Draw a well-labelled diagram of [topic]. Label at least 5 parts.",
             "answer": "Diagram should show: [list of required labels and parts]",
@@ -5508,21 +5613,21 @@ async def generate_paper(request: PaperGenerateRequest, current_user: dict = Dep
             "difficulty": "medium",
             "diagram_required": true
         }}''')
-            elif qtype == 'hots':
-                question_examples.append(f'''{{
+        elif qtype == 'hots':
+            question_examples.append(f'''{{
             "type": "hots",
             "question": "Analyze/Compare/Evaluate... [higher order thinking question]",
             "answer": "Expected analysis with reasoning...",
             "marks": 4,
             "difficulty": "hard"
         }}''')
-        
-        # Get custom marks if provided
-        marks_config = getattr(request, 'marks_config', None) or {}
-        
-        # Language instruction
-        if request.language == "hindi":
-            lang_instruction = """
+    
+    # Get custom marks if provided
+    marks_config = getattr(request, 'marks_config', None) or {}
+    
+    # Language instruction
+    if request.language == "hindi":
+        lang_instruction = """
 LANGUAGE REQUIREMENT - STRICTLY HINDI:
 - Write ALL questions in PURE HINDI (Devanagari script)
 - Write ALL answers in PURE HINDI (Devanagari script)
@@ -5532,8 +5637,8 @@ LANGUAGE REQUIREMENT - STRICTLY HINDI:
 - Example Hindi question: "प्रकाश संश्लेषण की प्रक्रिया को समझाइए।"
 - Example Hindi answer: "प्रकाश संश्लेषण वह प्रक्रिया है जिसमें पौधे सूर्य के प्रकाश का उपयोग करके..."
 """
-        else:
-            lang_instruction = """
+    else:
+        lang_instruction = """
 LANGUAGE REQUIREMENT - STRICTLY ENGLISH:
 - Write ALL questions in PURE ENGLISH only
 - Write ALL answers in PURE ENGLISH only
@@ -5541,14 +5646,14 @@ LANGUAGE REQUIREMENT - STRICTLY ENGLISH:
 - DO NOT use any Hindi words or Devanagari script
 - Use proper scientific terminology in English
 """
-        
-        # Special handling for Drawing/Art subject (Pre-Primary and Primary)
-        is_drawing_subject = request.subject.lower() in ['drawing', 'चित्रकला', 'art', 'art & craft']
-        is_pre_primary = request.class_name.lower() in ['nursery', 'lkg', 'ukg']
-        
-        if is_drawing_subject:
-            # Override question types for drawing
-            drawing_system_prompt = f"""You are an expert Drawing/Art question paper generator for Indian schools.
+    
+    # Special handling for Drawing/Art subject (Pre-Primary and Primary)
+    is_drawing_subject = request.subject.lower() in DRAWING_SUBJECTS
+    is_pre_primary = request.class_name.lower() in ['nursery', 'lkg', 'ukg']
+    
+    if is_drawing_subject:
+        # Override question types for drawing
+        drawing_system_prompt = f"""You are an expert Drawing/Art question paper generator for Indian schools.
 Generate drawing activities and questions for {request.class_name} students.
 Chapter/Topic: {request.chapter}
 Exam Name: {request.exam_name or 'Drawing Exam'}
@@ -5624,12 +5729,12 @@ IMPORTANT:
 4. Total marks MUST be exactly {request.total_marks}
 5. Include variety of drawing activities
 """
-            system_prompt = drawing_system_prompt
-        else:
-            # ═══════════════════════════════════════════════════════════
-            # SCHOOLTINO ULTRA EXAM AI - NEXT-GENERATION SYSTEM
-            # ═══════════════════════════════════════════════════════════
-            system_prompt = f"""You are SCHOOLTINO ULTRA EXAM AI,
+        system_prompt = drawing_system_prompt
+    else:
+        # ═══════════════════════════════════════════════════════════
+        # SCHOOLTINO ULTRA EXAM AI - NEXT-GENERATION SYSTEM
+        # ═══════════════════════════════════════════════════════════
+        system_prompt = f"""You are SCHOOLTINO ULTRA EXAM AI,
 a next-generation Question Paper + Answer Generator
 built by combining the best logic of modern exam paper generators.
 
@@ -5647,7 +5752,7 @@ built by combining the best logic of modern exam paper generators.
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 📌 EXAM PARAMETERS (PROVIDED)
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-• Board: MP Board / CBSE / RBSE (NCERT-based)
+• Board: {request.board or 'MP Board / CBSE / RBSE'} (NCERT-based)
 • Class: {request.class_name}
 • Subject: {request.subject}
 • Chapters: {request.chapter}
@@ -5834,15 +5939,9 @@ Return in this EXACT JSON format:
 
 GENERATE THE PAPER NOW! Return ONLY the JSON object above.
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"paper-{str(uuid.uuid4())[:8]}",
-            system_message=system_prompt
-        ).with_model("openai", "gpt-4o-mini")
-        
-        # ✅ IMPROVED USER MESSAGE - More explicit about marks
-        user_msg = UserMessage(text=f"""Generate a complete question paper with these EXACT requirements:
+    
+    # ✅ IMPROVED USER MESSAGE - More explicit about marks
+    user_text = f"""Generate a complete question paper with these EXACT requirements:
 
 Subject: {request.subject}
 Class: {request.class_name}  
@@ -5852,6 +5951,7 @@ Language: {request.language}
 Difficulty: {request.difficulty}
 
 CRITICAL: Every question MUST have a "marks" field with a number (1, 2, 3, 4, or 5).
+Every question MUST also have a "chapter" field with the exact chapter name it is from.
 The sum of ALL question marks MUST equal EXACTLY {request.total_marks}.
 
 Example: If total marks = 20, and you have:
@@ -5860,95 +5960,219 @@ Example: If total marks = 20, and you have:
 - 1 Long × 4 marks = 4 marks
 Total = 10+6+4 = 20 marks ✓
 
-Generate the paper now in pure {request.language} language.""")
-        response = await chat.send_message(user_msg)
-        
-        # Parse response
-        import json
-        import re
-        
-        # Extract JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', response)
-        if json_match:
-            questions_data = json.loads(json_match.group())
-        else:
-            questions_data = {"questions": []}
-        
-        # Validate and fix marks if needed
-        questions = questions_data.get("questions", [])
-        actual_total = sum(q.get("marks", 0) for q in questions)
-        
-        # If marks don't match, try to adjust
-        max_retries = 2
-        retry_count = 0
+Generate the paper now in pure {request.language} language."""
+    return system_prompt, user_text
+
+def parse_paper_json(response: str) -> dict:
+    """The JSON object in a model reply ({"questions": []} when there is none)"""
+    import json
+    
+    json_match = re.search(r'\{[\s\S]*\}', response)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except ValueError:
+            logging.warning("Paper generator returned invalid JSON")
+    return {"questions": []}
+
+async def finish_paper(request: PaperGenerateRequest, chat, response: str, current_user: dict) -> dict:
+    """Parse the model's JSON, re-ask (max 2) until marks add up, add the questions to the bank, then save the paper"""
+    from emergentintegrations.llm.chat import UserMessage
+    
+    # Validate and fix marks if needed
+    questions = question_bank.extract_questions(parse_paper_json(response))
+    actual_total = sum(q.get("marks", 0) for q in questions)
+    
+    # If marks don't match, try to adjust
+    max_retries = 2
+    retry_count = 0
+    
+    while actual_total != request.total_marks and retry_count < max_retries:
+        retry_count += 1
+        logging.info(f"Paper marks mismatch: {actual_total} vs {request.total_marks}. Retry {retry_count}")
         
-        while actual_total != request.total_marks and retry_count < max_retries:
-            retry_count += 1
-            logging.info(f"Paper marks mismatch: {actual_total} vs {request.total_marks}. Retry {retry_count}")
-            
-            # Retry with more specific prompt
-            retry_prompt = f"""The paper you generated has {actual_total} marks but I need EXACTLY {request.total_marks} marks.
+        # Retry with more specific prompt
+        retry_prompt = f"""The paper you generated has {actual_total} marks but I need EXACTLY {request.total_marks} marks.
 Please regenerate with the correct number of questions. Current distribution needs adjustment.
 Generate questions that sum to EXACTLY {request.total_marks} marks. No more, no less."""
-            
-            retry_msg = UserMessage(text=retry_prompt)
-            response = await chat.send_message(retry_msg)
-            
-            json_match = re.search(r'\{[\s\S]*\}', response)
-            if json_match:
-                questions_data = json.loads(json_match.group())
-                questions = questions_data.get("questions", [])
-                actual_total = sum(q.get("marks", 0) for q in questions)
-        
-        # Only as last resort, adjust marks (but with better questions)
-        if actual_total != request.total_marks and questions:
-            diff = request.total_marks - actual_total
-            
-            if diff > 0 and diff <= 5:
-                # Need more marks - adjust last question's marks instead of adding fake questions
-                if questions and questions[-1].get("type") in ["short", "long"]:
-                    questions[-1]["marks"] = questions[-1].get("marks", 2) + diff
-                else:
-                    # Add a single meaningful question
-                    questions.append({
-                        "type": "short" if diff <= 3 else "long",
-                        "question": f"Explain the key concepts from this chapter that you found most important. ({diff} marks)",
-                        "answer": "Student should explain main concepts covered in the chapter with examples.",
-                        "marks": diff,
-                        "difficulty": "medium"
-                    })
-            elif diff < 0:
-                # Too many marks - remove from end until balanced
-                while sum(q.get("marks", 0) for q in questions) > request.total_marks and questions:
-                    questions.pop()
         
-        # Final verification
-        final_total = sum(q.get("marks", 0) for q in questions)
+        retry_msg = UserMessage(text=retry_prompt)
+        response = await chat.send_message(retry_msg)
         
-        paper_data = {
-            "id": str(uuid.uuid4()),
-            "subject": request.subject,
-            "class_name": request.class_name,
-            "chapter": request.chapter,
-            "exam_name": request.exam_name,
-            "questions": questions,
-            "total_marks": request.total_marks,
-            "actual_marks": final_total,
-            "time_duration": request.time_duration,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "marks_verified": final_total == request.total_marks
-        }
+        retried = question_bank.extract_questions(parse_paper_json(response))
+        if retried:
+            questions = retried
+            actual_total = sum(q.get("marks", 0) for q in questions)
+    
+    if request.subject.lower() not in DRAWING_SUBJECTS:
+        await question_bank.ingest(questions, question_bank.tags_for(request), current_user.get("school_id"))
+    return await save_paper(request, questions, current_user)
+
+async def save_paper(request: PaperGenerateRequest, questions: List[dict], current_user: dict, bank_questions: int = 0) -> dict:
+    """Last-resort marks adjustment, then store the paper and audit it"""
+    actual_total = sum(q.get("marks", 0) for q in questions)
+    
+    # Only as last resort, adjust marks (but with better questions)
+    if actual_total != request.total_marks and questions:
+        diff = request.total_marks - actual_total
+        
+        if diff > 0 and diff <= 5:
+            # Need more marks - adjust last question's marks instead of adding fake questions
+            if questions and questions[-1].get("type") in ["short", "long"]:
+                questions[-1]["marks"] = questions[-1].get("marks", 2) + diff
+            else:
+                # Add a single meaningful question
+                questions.append({
+                    "type": "short" if diff <= 3 else "long",
+                    "question": f"Explain the key concepts from this chapter that you found most important. ({diff} marks)",
+                    "answer": "Student should explain main concepts covered in the chapter with examples.",
+                    "marks": diff,
+                    "difficulty": "medium"
+                })
+        elif diff < 0:
+            # Too many marks - remove from end until balanced
+            while sum(q.get("marks", 0) for q in questions) > request.total_marks and questions:
+                questions.pop()
+    
+    # Final verification
+    final_total = sum(q.get("marks", 0) for q in questions)
+    
+    paper_data = {
+        "id": str(uuid.uuid4()),
+        "subject": request.subject,
+        "class_name": request.class_name,
+        "chapter": request.chapter,
+        "exam_name": request.exam_name,
+        "questions": questions,
+        "total_marks": request.total_marks,
+        "actual_marks": final_total,
+        "time_duration": request.time_duration,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "marks_verified": final_total == request.total_marks,
+        "bank_questions": bank_questions
+    }
+    
+    # Save to DB
+    await db.generated_papers.insert_one(paper_data)
+    await log_audit(current_user["id"], "generate", "ai_papers", {"paper_id": paper_data["id"], "subject": request.subject})
+    return paper_data
+
+async def paper_from_bank(request: PaperGenerateRequest):
+    """Question bank assembly for the request, or None when the bank has nothing for it (or it's a drawing paper)"""
+    if request.subject.lower() in DRAWING_SUBJECTS:
+        return None
+    plan = question_bank.marks_plan(request.question_types, request.total_marks)
+    assembly = await question_bank.fill(question_bank.tags_for(request), plan)
+    return assembly if assembly.bank_count else None
+
+async def finish_bank_paper(request: PaperGenerateRequest, assembly, response: Optional[str], current_user: dict) -> dict:
+    """Merge the top-up reply (if any) into the bank assembly, bank the new questions and save the paper"""
+    if response is not None:
+        generated = question_bank.extract_questions(parse_paper_json(response))
+        await question_bank.ingest(generated, question_bank.tags_for(request), current_user.get("school_id"))
+        assembly.add(generated)
+    await question_bank.mark_used(assembly)
+    return await save_paper(request, assembly.questions, current_user, bank_questions=assembly.bank_count)
+
+def topup_chat(api_key: str):
+    from emergentintegrations.llm.chat import LlmChat
+    return LlmChat(
+        api_key=api_key,
+        session_id=f"paper-topup-{str(uuid.uuid4())[:8]}",
+        system_message=question_bank.TOPUP_SYSTEM
+    ).with_model("openai", "gpt-4o-mini")
+
+@api_router.post("/ai/generate-paper", response_model=PaperGenerateResponse)
+async def generate_paper(request: PaperGenerateRequest, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["director", "principal", "teacher", "exam_controller", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    openai_key = os.environ.get("OPENAI_API_KEY")
+    emergent_key = os.environ.get("EMERGENT_LLM_KEY")
+    api_key = emergent_key or openai_key
+    
+    if not api_key:
+        raise HTTPException(status_code=500, detail="API key not configured")
+    
+    try:
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
         
-        # Save to DB
-        await db.generated_papers.insert_one(paper_data)
-        await log_audit(current_user["id"], "generate", "ai_papers", {"paper_id": paper_data["id"], "subject": request.subject})
+        # Reuse banked questions; the LLM only writes what the bank can't cover
+        assembly = await paper_from_bank(request)
+        if assembly:
+            response = None
+            if assembly.missing:
+                prompt = question_bank.topup_prompt(question_bank.tags_for(request), assembly)
+                response = await topup_chat(api_key).send_message(UserMessage(text=prompt))
+            paper_data = await finish_bank_paper(request, assembly, response, current_user)
+            return PaperGenerateResponse(**paper_data)
+        
+        system_prompt, user_text = build_paper_prompts(request)
+        chat = LlmChat(
+            api_key=api_key,
+            session_id=f"paper-{str(uuid.uuid4())[:8]}",
+            system_message=system_prompt
+        ).with_model("openai", "gpt-4o-mini")
+        response = await chat.send_message(UserMessage(text=user_text))
         
+        paper_data = await finish_paper(request, chat, response, current_user)
         return PaperGenerateResponse(**paper_data)
         
     except Exception as e:
         logging.error(f"AI Paper generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate paper: {str(e)}")
 
+@api_router.post("/ai/generate-paper/stream")
+async def generate_paper_stream(request: PaperGenerateRequest, current_user: dict = Depends(get_current_user)):
+    """
+    /ai/generate-paper as Server-Sent Events: the model's JSON as `token`
+    events while it writes, then a `result` event with the parsed, marks-checked
+    and saved paper (PaperGenerateResponse fields). Re-asks for a marks
+    mismatch are not streamed; a `status` event announces them. Papers built
+    from the question bank announce the reused count in a `status` event and
+    stream only the top-up questions.
+    """
+    if current_user["role"] not in ["director", "principal", "teacher", "exam_controller", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    api_key = os.environ.get("EMERGENT_LLM_KEY") or os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="API key not configured")
+    
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+    async def events():
+        assembly = await paper_from_bank(request)
+        if assembly:
+            yield status_event(f"{assembly.bank_count} questions from the question bank")
+            response = None
+            if assembly.missing:
+                prompt = question_bank.topup_prompt(question_bank.tags_for(request), assembly)
+                parts = []
+                async for text in topup_chat(api_key).stream_message(UserMessage(text=prompt)):
+                    parts.append(text)
+                    yield token_event(text)
+                response = "".join(parts)
+            paper_data = await finish_bank_paper(request, assembly, response, current_user)
+            yield result_event(PaperGenerateResponse(**paper_data).model_dump())
+            return
+
+        system_prompt, user_text = build_paper_prompts(request)
+        chat = LlmChat(
+            api_key=api_key,
+            session_id=f"paper-{str(uuid.uuid4())[:8]}",
+            system_message=system_prompt
+        ).with_model("openai", "gpt-4o-mini")
+        parts = []
+        async for text in chat.stream_message(UserMessage(text=user_text)):
+            parts.append(text)
+            yield token_event(text)
+        yield status_event("Checking marks and saving the paper")
+        paper_data = await finish_paper(request, chat, "".join(parts), current_user)
+        yield result_event(PaperGenerateResponse(**paper_data).model_dump())
+
+    return sse_stream("generate-paper", events())
+
 @api_router.post("/ai/generate-answer-image")
 async def generate_answer_image(
     question: str = Body(...),
@@ -6687,14 +6911,38 @@ async def get_weak_students(current_user: dict = Depends(get_current_user)):
     ).to_list(10)
     
     class_ids = [c["id"] for c in my_classes]
+    if not class_ids:
+        return []
+    class_names = {c["id"]: f"{c.get('name', 'Class')} {c.get('section', '')}".strip() for c in my_classes}
     
-    # Get students with weak performance (demo data)
-    weak_students = await db.weak_students.find(
-        {"class_id": {"$in": class_ids}},
-        {"_id": 0}
-    ).to_list(20)
+    # Scored from attendance, marks and incidents (class_risk_snapshots)
+    snapshots = await risk_scoring.get_class_snapshots(current_user.get("school_id"), class_ids)
+    flagged = [
+        row for snap in snapshots.values() for row in snap["students"]
+        if row["band"] in ("weak", "at_risk")
+    ]
+    flagged.sort(key=lambda r: r["overall_score"])
+    flagged = flagged[:20]
+    
+    # Saved strategies (POST /teacher/weak-students/{student_id}/strategy)
+    strategies = await db.weak_students.find(
+        {"student_id": {"$in": [r["id"] for r in flagged]}},
+        {"_id": 0, "student_id": 1, "ai_strategy": 1, "improvement_plan": 1}
+    ).to_list(len(flagged) or 1)
+    strategies = {s["student_id"]: s for s in strategies}
     
-    return weak_students
+    return [
+        {
+            **row,
+            "student_id": row["id"],
+            "class": class_names.get(row["class_id"], ""),
+            "avg_score": row["avg_marks"],
+            "attendance": row["attendance_rate"],
+            "ai_strategy": strategies.get(row["id"], {}).get("ai_strategy"),
+            "improvement_plan": strategies.get(row["id"], {}).get("improvement_plan", [])
+        }
+        for row in flagged
+    ]
 
 @api_router.post("/teacher/weak-students/{student_id}/strategy")
 async def save_weak_student_strategy(student_id: str, strategy: dict, current_user: dict = Depends(get_current_user)):
@@ -7509,15 +7757,8 @@ async def generate_student_qr(student_id: str, current_user: dict = Depends(get_
     # QR data contains student info
     qr_data = f"SCHOOLTINO|STUDENT|{student['student_id']}|{student['name']}|{student.get('class_id', '')}"
     
-    # Generate QR code
-    qr = qrcode.QRCode(version=1, box_size=10, border=2)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    # Generate QR code (rendered on the CPU pool)
+    qr_base64 = base64.b64encode(await run_cpu(cpu_tasks.qr_png, qr_data)).decode()
     
     return {
         "student_id": student["student_id"],
@@ -7535,14 +7776,7 @@ async def generate_staff_qr(staff_id: str, current_user: dict = Depends(get_curr
     
     qr_data = f"SCHOOLTINO|STAFF|{staff['id']}|{staff['name']}|{staff.get('role', '')}"
     
-    qr = qrcode.QRCode(version=1, box_size=10, border=2)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    qr_base64 = base64.b64encode(await run_cpu(cpu_tasks.qr_png, qr_data)).decode()
     
     return {
         "staff_id": staff["id"],
@@ -7682,22 +7916,7 @@ async def generate_report_card(request: ReportCardRequest, current_user: dict =
     total_marks = sum(s.get("total_marks", 100) for s in request.subjects)
     obtained_marks = sum(s.get("marks_obtained", 0) for s in request.subjects)
     percentage = round((obtained_marks / total_marks) * 100, 2) if total_marks > 0 else 0
-    
-    # Calculate grade
-    if percentage >= 90:
-        grade = "A+"
-    elif percentage >= 80:
-        grade = "A"
-    elif percentage >= 70:
-        grade = "B+"
-    elif percentage >= 60:
-        grade = "B"
-    elif percentage >= 50:
-        grade = "C"
-    elif percentage >= 40:
-        grade = "D"
-    else:
-        grade = "F"
+    grade = report_cards.grade_for(percentage)
     
     report_card = {
         "id": str(uuid.uuid4()),
@@ -7736,6 +7955,67 @@ async def generate_report_card(request: ReportCardRequest, current_user: dict =
         created_at=report_card["created_at"]
     )
 
+class BatchReportCardRequest(BaseModel):
+    exam_id: Optional[str] = None     # one exam schedule (one section)
+    exam_name: Optional[str] = None   # every section's schedule with this name
+    class_ids: Optional[List[str]] = None
+    remarks: Optional[str] = None
+    render_pdf: bool = True
+
+@api_router.post("/reports/batch")
+async def generate_batch_report_cards(
+    request: BatchReportCardRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """Generate report cards (ranks + percentiles) for a whole section, class or school from saved marks"""
+    if current_user["role"] not in ["director", "principal", "teacher", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not request.exam_id and not request.exam_name:
+        raise HTTPException(status_code=400, detail="exam_id or exam_name required")
+    
+    job = await report_cards.run_batch(
+        school_id=current_user.get("school_id"),
+        exam_id=request.exam_id,
+        exam_name=request.exam_name,
+        class_ids=request.class_ids,
+        created_by=current_user["id"],
+        remarks=request.remarks
+    )
+    if job["status"] == "completed" and job["cards"] and request.render_pdf:
+        job["pdf_status"] = "queued"
+        await db.report_card_jobs.update_one({"id": job["id"]}, {"$set": {"pdf_status": "queued"}})
+        background_tasks.add_task(report_cards.render_job_pdf, job["id"])
+    
+    await log_audit(current_user["id"], "batch_generate", "report_cards", {
+        "job_id": job["id"], "exam": job["exam_name"], "cards": job["cards"]
+    })
+    return job
+
+@api_router.get("/reports/batch/{job_id}")
+async def get_batch_report_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Status of a batch report card job"""
+    job = await db.report_card_jobs.find_one(
+        {"id": job_id, "school_id": current_user.get("school_id")}, {"_id": 0, "pdf_path": 0}
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/reports/batch/{job_id}/pdf")
+async def download_batch_report_pdf(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Merged printable PDF of every report card in the job"""
+    job = await db.report_card_jobs.find_one({"id": job_id, "school_id": current_user.get("school_id")}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("pdf_status") != "ready":
+        raise HTTPException(status_code=409, detail=f"PDF not ready (status: {job.get('pdf_status')})")
+    return FileResponse(
+        job["pdf_path"],
+        media_type="application/pdf",
+        filename=f"report_cards_{(job.get('exam_name') or 'exam').replace(' ', '_')}.pdf"
+    )
+
 @api_router.get("/reports/student/{student_id}")
 async def get_student_reports(student_id: str, current_user: dict = Depends(get_current_user)):
     """Get all report cards for a student"""
@@ -9633,7 +9913,7 @@ async def create_director_for_school(
     
     # Generate temporary password (8 chars)
     temp_password = generate_temp_password()
-    hashed_pw = bcrypt.hashpw(temp_password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(temp_password)
     
     # Create school first if name provided
     school_id = None
@@ -9717,11 +9997,11 @@ async def change_password(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Verify old password
-    if not bcrypt.checkpw(old_password.encode(), user["password"].encode()):
+    if not await verify_password_async(old_password, user["password"]):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Hash new password
-    hashed_pw = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password_async(new_password)
     
     await db.users.update_one(
         {"id": current_user["id"]},
@@ -10054,42 +10334,35 @@ async def get_my_exam_results(current_user: dict = Depends(get_current_user)):
     
     # Add rank for each result
     for result in results:
-        all_results = await db.exam_results.find(
-            {"exam_id": result["exam_id"]},
-            {"_id": 0, "score": 1}
-        ).sort("score", -1).to_list(1000)
-        
-        rank = 1
-        for r in all_results:
-            if r["score"] > result["score"]:
-                rank += 1
-        
-        result["rank"] = rank
-        result["total_students"] = len(all_results)
+        result["rank"], result["total_students"] = await exam_sessions.rank_in_exam(
+            result["exam_id"], result["score"]
+        )
     
     return results
 
 @api_router.get("/exams/{exam_id}")
 async def get_exam(exam_id: str, current_user: dict = Depends(get_current_user)):
     """Get exam details (with questions for taking exam)"""
-    exam = await db.exams.find_one({"id": exam_id}, {"_id": 0})
-    if not exam:
+    if current_user.get("role") != "student":
+        exam = await db.exams.find_one({"id": exam_id}, {"_id": 0})
+        if not exam:
+            raise HTTPException(status_code=404, detail="Exam not found")
+        return exam
+    
+    # Students get the cached paper without correct answers
+    key = await exam_sessions.get_answer_key(exam_id)
+    if not key:
         raise HTTPException(status_code=404, detail="Exam not found")
     
-    # For students, check if already attempted
-    if current_user.get("role") == "student":
-        result = await db.exam_results.find_one({
-            "exam_id": exam_id,
-            "student_id": current_user.get("id")
-        })
-        if result:
-            raise HTTPException(status_code=400, detail="You have already attempted this exam")
-        
-        # Remove correct answers from questions for students
-        for q in exam.get("questions", []):
-            q.pop("correct_answer", None)
+    # Check if already attempted (covered by the unique exam/student index)
+    result = await db.exam_results.find_one(
+        {"exam_id": exam_id, "student_id": current_user.get("id")},
+        {"_id": 0, "id": 1}
+    )
+    if result:
+        raise HTTPException(status_code=400, detail="You have already attempted this exam")
     
-    return exam
+    return key.student_view()
 
 @api_router.post("/exams/{exam_id}/submit", response_model=ExamResultResponse)
 async def submit_exam(exam_id: str, submission: ExamSubmission, current_user: dict = Depends(get_current_user)):
@@ -10097,105 +10370,22 @@ async def submit_exam(exam_id: str, submission: ExamSubmission, current_user: di
     if current_user.get("role") != "student":
         raise HTTPException(status_code=403, detail="Only students can submit exams")
     
-    exam = await db.exams.find_one({"id": exam_id}, {"_id": 0})
-    if not exam:
-        raise HTTPException(status_code=404, detail="Exam not found")
-    
-    # Check if already attempted
-    existing = await db.exam_results.find_one({
-        "exam_id": exam_id,
-        "student_id": current_user.get("id")
-    })
-    if existing:
+    # Answer key comes from the per-exam cache; the unique (exam_id, student_id)
+    # index rejects a second submission, so there is no read-then-insert race
+    try:
+        result_data = await exam_sessions.submit(exam_id, current_user, submission.answers)
+    except exam_sessions.AlreadySubmitted:
         raise HTTPException(status_code=400, detail="You have already submitted this exam")
-    
-    # Calculate score
-    questions = exam.get("questions", [])
-    correct_answers = 0
-    wrong_answers = 0
-    unanswered = 0
-    score = 0
-    
-    for idx, q in enumerate(questions):
-        answer_key = str(idx)
-        if answer_key in submission.answers:
-            if submission.answers[answer_key] == q["correct_answer"]:
-                correct_answers += 1
-                score += q["marks"]
-            else:
-                wrong_answers += 1
-                if exam.get("negative_marking"):
-                    score -= exam.get("negative_marks", 0.25)
-        else:
-            unanswered += 1
-    
-    # Ensure score doesn't go negative
-    score = max(0, score)
-    
-    total_marks = exam["total_marks"]
-    percentage = round((score / total_marks) * 100, 2) if total_marks > 0 else 0
-    
-    # Get student info
-    student = current_user
-    student_name = student.get("name", "Unknown")
-    
-    result_data = {
-        "id": str(uuid.uuid4()),
-        "exam_id": exam_id,
-        "exam_title": exam["title"],
-        "subject": exam["subject"],
-        "class_id": exam["class_id"],
-        "school_id": exam["school_id"],
-        "student_id": current_user.get("id"),
-        "student_name": student_name,
-        "answers": submission.answers,
-        "score": score,
-        "total_marks": total_marks,
-        "percentage": percentage,
-        "correct_answers": correct_answers,
-        "wrong_answers": wrong_answers,
-        "unanswered": unanswered,
-        "time_taken": 0,  # Can be tracked from frontend
-        "submitted_at": datetime.now(timezone.utc).isoformat()
-    }
-    
-    await db.exam_results.insert_one(result_data)
-    
-    # Calculate rank
-    all_results = await db.exam_results.find(
-        {"exam_id": exam_id},
-        {"_id": 0, "score": 1}
-    ).sort("score", -1).to_list(1000)
-    
-    rank = 1
-    for r in all_results:
-        if r["score"] > score:
-            rank += 1
+    if result_data is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
     
     await log_audit(current_user.get("id"), "submit_exam", "exams", {
         "exam_id": exam_id,
-        "score": score,
-        "percentage": percentage
+        "score": result_data["score"],
+        "percentage": result_data["percentage"]
     })
     
-    return ExamResultResponse(
-        id=result_data["id"],
-        exam_id=exam_id,
-        exam_title=exam["title"],
-        subject=exam["subject"],
-        student_id=result_data["student_id"],
-        student_name=student_name,
-        score=score,
-        total_marks=total_marks,
-        percentage=percentage,
-        correct_answers=correct_answers,
-        wrong_answers=wrong_answers,
-        unanswered=unanswered,
-        time_taken=0,
-        submitted_at=result_data["submitted_at"],
-        rank=rank,
-        total_students=len(all_results)
-    )
+    return ExamResultResponse(**result_data)
 
 @api_router.get("/exams/{exam_id}/results")
 async def get_exam_results(exam_id: str, current_user: dict = Depends(get_current_user)):
@@ -10266,6 +10456,7 @@ async def update_exam_status(exam_id: str, status: str, current_user: dict = Dep
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Exam not found")
+    exam_sessions.invalidate_exam(exam_id)
     
     return {"message": f"Exam status updated to {status}"}
 
@@ -10285,6 +10476,7 @@ async def delete_exam(exam_id: str, current_user: dict = Depends(get_current_use
         raise HTTPException(status_code=400, detail=f"Cannot delete exam with {submissions} submissions. Mark as completed instead.")
     
     await db.exams.delete_one({"id": exam_id})
+    exam_sessions.invalidate_exam(exam_id)
     
     await log_audit(current_user["id"], "delete_exam", "exams", {"exam_id": exam_id})
     
@@ -10293,15 +10485,7 @@ async def delete_exam(exam_id: str, current_user: dict = Depends(get_current_use
 @api_router.get("/exams/{exam_id}/leaderboard")
 async def get_exam_leaderboard(exam_id: str, limit: int = 10, current_user: dict = Depends(get_current_user)):
     """Get top performers for an exam"""
-    results = await db.exam_results.find(
-        {"exam_id": exam_id},
-        {"_id": 0, "student_name": 1, "score": 1, "percentage": 1, "submitted_at": 1}
-    ).sort("score", -1).limit(limit).to_list(limit)
-    
-    for idx, r in enumerate(results):
-        r["rank"] = idx + 1
-    
-    return results
+    return await exam_sessions.top_results(exam_id, limit)
 
 # ==================== RAZORPAY PAYMENT GATEWAY ====================
 
@@ -10355,7 +10539,7 @@ async def create_payment_order(request: CreateOrderRequest, current_user: dict =
             }
         }
         
-        order = razorpay_client.order.create(data=order_data)
+        order = await run_io(razorpay_client.order.create, data=order_data)
         
         # Store order in database
         order_record = {
@@ -12537,7 +12721,7 @@ async def create_staff_with_auto_id(
         "mobile": mobile,
         "role": role,
         "school_id": school_id,
-        "password": password or "school123",  # Default password
+        "password": await hash_password_async(password or "school123"),  # Default password
         "permissions": {},
         "created_at": datetime.now(timezone.utc).isoformat(),
         "created_by": current_user["id"]
@@ -13770,6 +13954,8 @@ api_router.include_router(documents_router)
 api_router.include_router(bulk_import_router)
 api_router.include_router(dual_credits_router)
 api_router.include_router(team_unified_router)
+api_router.include_router(live_router)
+api_router.include_router(exports_router)
 
 app.include_router(api_router)
 
@@ -13815,6 +14001,11 @@ async def readiness_check():
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Database not ready: {str(e)}")
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint (per-route latency, Mongo commands, AI timings)"""
+    return metrics.prometheus_response(authorization)
+
 # Mount static files for uploads and marketing materials
 app.mount("/api/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 app.mount("/api/static", StaticFiles(directory=str(ROOT_DIR / "static")), name="static")
@@ -13827,7 +14018,10 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+# Outermost, so latency includes CORS handling and unhandled errors are counted
+app.add_middleware(metrics.MetricsMiddleware)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13990,6 +14184,83 @@ async def startup_auto_migrate():
     except Exception as e:
         print(f"[STARTUP-MIGRATE] Error (non-fatal): {e}")
 
+@app.on_event("startup")
+async def startup_event_bus():
+    """Attach the cross-worker live event backend (Redis when REDIS_URL is set)."""
+    await bus.start()
+
+@app.on_event("startup")
+async def startup_syllabus_index():
+    """Compile the static syllabus search index before the first request."""
+    import asyncio
+    from services.syllabus_index import get_index
+    await asyncio.to_thread(get_index)
+
+@app.on_event("startup")
+async def startup_summary_jobs():
+    """Resume chapter summary pre-generation jobs a previous worker didn't finish."""
+    from routes.syllabus_progress import resume_summary_jobs
+    try:
+        await resume_summary_jobs()
+    except Exception as e:
+        logger.warning(f"Summary job resume failed: {e}")
+
+@app.on_event("startup")
+async def startup_audit_buffer():
+    """Start the write-behind audit flusher and replay any spilled entries."""
+    await audit_buffer.start()
+
+@app.on_event("startup")
+async def startup_offload():
+    """Start the event-loop stall monitor and spawn the CPU pool workers up front."""
+    offload.loop_monitor.start()
+    await offload.warm_cpu_pool()
+
+@app.on_event("startup")
+async def startup_tts_cache():
+    """Index the TTS audio cache, then synthesize the fixed greetings/confirmations in the background."""
+    import asyncio
+    from services import tts_cache
+    from routes import voice_assistant, tino_voice
+    await run_io(tts_cache.audio_cache.load)
+    if os.environ.get("TTS_PREWARM", "1") != "0":
+        phrases = voice_assistant.prewarm_phrases() + tino_voice.prewarm_phrases()
+        if phrases:
+            asyncio.create_task(tts_cache.prewarm(phrases))
+
+@app.on_event("startup")
+async def startup_list_indexes():
+    """Indexes backing the keyset-paginated lists, exports, Tino memory and chapter summaries (equality keys, then sort keys + _id)."""
+    list_indexes = {
+        "students": [[("school_id", 1), ("name", 1), ("_id", 1)],
+                     [("school_id", 1), ("class_id", 1), ("name", 1), ("_id", 1)]],
+        "attendance": [[("class_id", 1), ("date", -1), ("_id", -1)],
+                       [("student_id", 1), ("date", -1), ("_id", -1)],
+                       [("school_id", 1), ("date", 1), ("class_id", 1), ("_id", 1)]],
+        "fee_invoices": [[("school_id", 1), ("created_at", -1), ("_id", -1)]],
+        "fee_payments": [[("created_at", -1), ("_id", -1)],
+                         [("invoice_id", 1), ("created_at", -1), ("_id", -1)],
+                         [("school_id", 1), ("status", 1), ("created_at", 1), ("_id", 1)]],
+        "staff": [[("school_id", 1), ("is_active", 1), ("created_at", -1), ("_id", -1)]],
+        "staff_attendance": [[("school_id", 1), ("date", 1), ("_id", 1)]],
+        "school_feed": [[("school_id", 1), ("created_at", -1), ("_id", -1)]],
+        "export_jobs": [[("id", 1)]],
+        "tino_conversations": [[("school_id", 1), ("user_id", 1), ("timestamp", -1)]],
+        "tino_memory": [[("school_id", 1), ("user_id", 1)]],
+        "chapter_summaries": [[("board", 1), ("class_num", 1), ("subject", 1), ("chapter_number", 1), ("language", 1)]],
+        "summary_jobs": [[("id", 1)], [("status", 1)]],
+    }
+    try:
+        for collection, indexes in list_indexes.items():
+            for keys in indexes:
+                await db[collection].create_index(keys)
+    except Exception as e:
+        logger.warning(f"List index creation failed: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await bus.stop()
+    await audit_buffer.stop()
+    await offload.loop_monitor.stop()
+    offload.shutdown()
     client.close()
\ No newline at end of file
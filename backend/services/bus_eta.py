@@ -0,0 +1,447 @@
+"""
+Bus ETA & Geofence Engine
+- Precomputes stop geometry (cumulative distance) per route and direction
+- Grid spatial index over all stops for geofence hits
+- ETA to upcoming stops from recent vehicle speed
+- Deduplicated "arriving in N minutes" / "delayed" notifications to students
+  assigned to that stop (pickup in the morning, drop in the evening)
+
+Stops come from BusRoute.stops; a stop is usable when it has lat/lng:
+    {"name": "Civil Lines", "lat": 26.85, "lng": 80.94, "pickup_time": "07:20", "drop_time": "14:10"}
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from math import floor
+from typing import Dict, List, Optional, Tuple
+import logging
+import time
+import uuid
+
+from pymongo.errors import BulkWriteError
+
+from core.database import db
+from core.event_bus import bus
+from services.gps_tracking import haversine_m, register_point_listener, store as gps_store, vehicle_topic
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+GEOFENCE_RADIUS_M = 120
+GRID_CELL_DEG = 0.005            # ~550 m cells
+ETA_ALERT_MINUTES = (10, 5)      # "arriving in N minutes" thresholds
+DELAY_ALERT_MINUTES = 10         # delayed when predicted arrival is this late vs schedule
+DELAY_STEP_MINUTES = 10          # re-alert every further 10 minutes of delay
+MIN_SPEED_KMH = 12               # floor so a bus at a red light does not show ETA = ∞
+DEFAULT_SPEED_KMH = 20
+ROUTE_CACHE_SECONDS = 600
+DUPLICATE_KEY_ERROR = 11000
+
+
+def trip_session(now_ist: datetime) -> str:
+    return "morning" if now_ist.hour < 12 else "evening"
+
+
+def _parse_hhmm(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    if not value:
+        return None
+    try:
+        hh, mm = str(value).strip()[:5].split(":")
+        return int(hh), int(mm)
+    except ValueError:
+        return None
+
+
+class RouteGeometry:
+    """Ordered stops of one route in one direction with cumulative distance."""
+
+    def __init__(self, route: Dict, session: str):
+        stops = [s for s in route.get("stops", []) if s.get("lat") is not None and s.get("lng") is not None]
+        if session == "evening":
+            stops = list(reversed(stops))
+        self.route_id = route["id"]
+        self.school_id = route.get("school_id")
+        self.route_name = route.get("route_name", "")
+        self.session = session
+        self.names = [s.get("name") or s.get("stop_name") or f"Stop {i + 1}" for i, s in enumerate(stops)]
+        self.lat = [float(s["lat"]) for s in stops]
+        self.lng = [float(s["lng"]) for s in stops]
+        time_key = "pickup_time" if session == "morning" else "drop_time"
+        self.scheduled = [_parse_hhmm(s.get(time_key) or s.get("time")) for s in stops]
+        self.cumulative = [0.0]
+        for i in range(1, len(stops)):
+            self.cumulative.append(self.cumulative[-1] + haversine_m(self.lat[i - 1], self.lng[i - 1], self.lat[i], self.lng[i]))
+
+    def __len__(self):
+        return len(self.names)
+
+
+class StopGridIndex:
+    """Uniform lat/lng grid: cell → [(route_id, session, stop_idx)]."""
+
+    def __init__(self, cell_deg: float = GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Tuple[int, int], List[Tuple[str, str, int]]] = defaultdict(list)
+        self._route_cells: Dict[str, set] = defaultdict(set)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return floor(lat / self.cell_deg), floor(lng / self.cell_deg)
+
+    def add(self, geom: RouteGeometry):
+        for i in range(len(geom)):
+            cell = self._cell(geom.lat[i], geom.lng[i])
+            self._cells[cell].append((geom.route_id, geom.session, i))
+            self._route_cells[geom.route_id].add(cell)
+
+    def remove_route(self, route_id: str):
+        for cell in self._route_cells.pop(route_id, ()):
+            kept = [e for e in self._cells.get(cell, ()) if e[0] != route_id]
+            if kept:
+                self._cells[cell] = kept
+            else:
+                self._cells.pop(cell, None)
+
+    def nearby(self, lat: float, lng: float) -> List[Tuple[str, str, int]]:
+        """Entries in the point's cell and its 8 neighbours (covers radius < cell size)."""
+        cy, cx = self._cell(lat, lng)
+        found = []
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                found.extend(self._cells.get((cy + dy, cx + dx), ()))
+        return found
+
+
+class EtaEngine:
+    """Pure in-memory evaluation; the async layer below feeds routes and writes alerts."""
+
+    def __init__(self, geofence_radius: float = GEOFENCE_RADIUS_M):
+        self.geofence_radius = geofence_radius
+        self.index = StopGridIndex()
+        self.geometry: Dict[Tuple[str, str], RouteGeometry] = {}
+        self.vehicle_routes: Dict[str, List[str]] = defaultdict(list)
+        self.route_vehicle: Dict[str, str] = {}
+        # (route_id, session, stop_idx) → student ids
+        self.stop_students: Dict[Tuple[str, str, int], List[str]] = {}
+        # (vehicle_id, route_id) → {"trip": key, "last_stop": idx}
+        self.progress: Dict[Tuple[str, str], Dict] = {}
+        # trip key ("YYYY-MM-DD:session") → dedup keys already sent
+        self.sent: Dict[str, set] = defaultdict(set)
+        self._day: Optional[str] = None
+
+    # ---------- loading ----------
+
+    def load_route(self, route: Dict, assignments: List[Dict]):
+        self.drop_route(route["id"])
+        for session in ("morning", "evening"):
+            geom = RouteGeometry(route, session)
+            if len(geom) == 0:
+                continue
+            self.geometry[(route["id"], session)] = geom
+            self.index.add(geom)
+            stop_key = "pickup_stop" if session == "morning" else "drop_stop"
+            by_name = defaultdict(list)
+            for a in assignments:
+                if a.get("route_id") != route["id"]:
+                    continue
+                if a.get("transport_type", "both") not in ("both", "pickup" if session == "morning" else "drop"):
+                    continue
+                by_name[a.get(stop_key)].append(a["student_id"])
+            for i, name in enumerate(geom.names):
+                self.stop_students[(route["id"], session, i)] = by_name.get(name, [])
+        if route.get("vehicle_id") and route["id"] not in self.vehicle_routes[route["vehicle_id"]]:
+            self.vehicle_routes[route["vehicle_id"]].append(route["id"])
+            self.route_vehicle[route["id"]] = route["vehicle_id"]
+
+    def drop_route(self, route_id: str):
+        self.index.remove_route(route_id)
+        for session in ("morning", "evening"):
+            geom = self.geometry.pop((route_id, session), None)
+            for i in range(len(geom) if geom else 0):
+                self.stop_students.pop((route_id, session, i), None)
+        vid = self.route_vehicle.pop(route_id, None)
+        if vid and route_id in self.vehicle_routes.get(vid, ()):
+            self.vehicle_routes[vid].remove(route_id)
+
+    # ---------- evaluation ----------
+
+    @staticmethod
+    def recent_speed_kmh(vehicle_id: str, fallback: Optional[float] = None) -> float:
+        """Exponentially weighted speed over the ring buffer, ignoring stops."""
+        ewma = None
+        for p in gps_store.history(vehicle_id, 20):
+            if p["speed"] and p["speed"] > 3:
+                ewma = p["speed"] if ewma is None else 0.3 * p["speed"] + 0.7 * ewma
+        speed = ewma if ewma is not None else (fallback or DEFAULT_SPEED_KMH)
+        return max(MIN_SPEED_KMH, speed)
+
+    def _trip_state(self, vehicle_id: str, route_id: str, trip: str) -> Dict:
+        key = (vehicle_id, route_id)
+        state = self.progress.get(key)
+        if state is None or state["trip"] != trip:
+            state = self.progress[key] = {"trip": trip, "last_stop": -1}
+        return state
+
+    def evaluate(self, point: Dict, now_ist: Optional[datetime] = None) -> List[Dict]:
+        """Process one position; returns new (deduplicated) notifications."""
+        vehicle_id = point["vehicle_id"]
+        route_ids = self.vehicle_routes.get(vehicle_id)
+        if not route_ids:
+            return []
+
+        now_ist = now_ist or datetime.fromtimestamp(point["epoch"], IST)
+        session = trip_session(now_ist)
+        trip = f"{now_ist.date().isoformat()}:{session}"
+        if self._day != now_ist.date().isoformat():
+            self._day = now_ist.date().isoformat()
+            self._prune(self._day)
+        lat, lng = point["lat"], point["lng"]
+
+        # Geofence: which of this vehicle's stops are we inside?
+        inside: Dict[str, int] = {}
+        for route_id, sess, idx in self.index.nearby(lat, lng):
+            if sess != session or route_id not in route_ids:
+                continue
+            geom = self.geometry[(route_id, sess)]
+            if haversine_m(lat, lng, geom.lat[idx], geom.lng[idx]) <= self.geofence_radius:
+                inside[route_id] = max(idx, inside.get(route_id, -1))
+
+        speed_kmh = None
+        alerts = []
+        for route_id in route_ids:
+            geom = self.geometry.get((route_id, session))
+            if not geom:
+                continue
+            state = self._trip_state(vehicle_id, route_id, trip)
+            if route_id in inside and inside[route_id] > state["last_stop"]:
+                state["last_stop"] = inside[route_id]
+                alerts.extend(self._arrived(point, geom, trip, inside[route_id]))
+
+            nxt = state["last_stop"] + 1
+            if nxt >= len(geom):
+                continue
+            if speed_kmh is None:
+                speed_kmh = self.recent_speed_kmh(vehicle_id, point.get("speed"))
+            to_next = haversine_m(lat, lng, geom.lat[nxt], geom.lng[nxt])
+            for idx in range(nxt, len(geom)):
+                remaining_m = to_next + geom.cumulative[idx] - geom.cumulative[nxt]
+                eta_min = remaining_m / (speed_kmh / 3.6) / 60
+                alerts.extend(self._eta_alerts(point, geom, trip, idx, eta_min, now_ist))
+        return alerts
+
+    def eta_for_stop(self, vehicle_id: str, route_id: str, stop_name: str,
+                     now_ist: Optional[datetime] = None) -> Optional[Dict]:
+        """ETA from the vehicle's latest position to a named stop (for parent tracking)."""
+        point = gps_store.latest(vehicle_id)
+        if not point:
+            return None
+        now_ist = now_ist or datetime.now(IST)
+        session = trip_session(now_ist)
+        geom = self.geometry.get((route_id, session))
+        if not geom or stop_name not in geom.names:
+            return None
+        target = geom.names.index(stop_name)
+        state = self._trip_state(vehicle_id, route_id, f"{now_ist.date().isoformat()}:{session}")
+        if target <= state["last_stop"]:
+            return {"eta_minutes": 0, "passed": True}
+        nxt = state["last_stop"] + 1
+        remaining_m = (haversine_m(point["lat"], point["lng"], geom.lat[nxt], geom.lng[nxt])
+                       + geom.cumulative[target] - geom.cumulative[nxt])
+        speed = self.recent_speed_kmh(vehicle_id, point.get("speed"))
+        return {"eta_minutes": round(remaining_m / (speed / 3.6) / 60), "passed": False,
+                "distance_m": round(remaining_m)}
+
+    # ---------- alert builders ----------
+
+    def predicted_delay(self, vehicle_id: str, route_id: str,
+                        now_ist: Optional[datetime] = None) -> Optional[int]:
+        """Worst predicted lateness (minutes) over upcoming scheduled stops."""
+        point = gps_store.latest(vehicle_id)
+        if not point:
+            return None
+        now_ist = now_ist or datetime.now(IST)
+        session = trip_session(now_ist)
+        geom = self.geometry.get((route_id, session))
+        if not geom:
+            return None
+        state = self._trip_state(vehicle_id, route_id, f"{now_ist.date().isoformat()}:{session}")
+        nxt = state["last_stop"] + 1
+        if nxt >= len(geom):
+            return None
+        speed = self.recent_speed_kmh(vehicle_id, point.get("speed"))
+        to_next = haversine_m(point["lat"], point["lng"], geom.lat[nxt], geom.lng[nxt])
+        worst = None
+        for idx in range(nxt, len(geom)):
+            if not geom.scheduled[idx]:
+                continue
+            eta_min = (to_next + geom.cumulative[idx] - geom.cumulative[nxt]) / (speed / 3.6) / 60
+            due = now_ist.replace(hour=geom.scheduled[idx][0], minute=geom.scheduled[idx][1], second=0, microsecond=0)
+            delay = (now_ist + timedelta(minutes=eta_min) - due).total_seconds() / 60
+            worst = delay if worst is None else max(worst, delay)
+        return max(0, round(worst)) if worst is not None else None
+
+    def _prune(self, today: str):
+        for trip in [t for t in self.sent if not t.startswith(today)]:
+            del self.sent[trip]
+        for key in [k for k, v in self.progress.items() if not v["trip"].startswith(today)]:
+            del self.progress[key]
+
+    def _once(self, trip: str, key: str) -> bool:
+        if key in self.sent[trip]:
+            return False
+        self.sent[trip].add(key)
+        return True
+
+    def _base(self, point: Dict, geom: RouteGeometry, idx: int) -> Dict:
+        return {
+            "school_id": geom.school_id,
+            "vehicle_id": point["vehicle_id"],
+            "route_id": geom.route_id,
+            "route_name": geom.route_name,
+            "stop_index": idx,
+            "stop_name": geom.names[idx],
+            "student_ids": self.stop_students.get((geom.route_id, geom.session, idx), []),
+        }
+
+    def _arrived(self, point: Dict, geom: RouteGeometry, trip: str, idx: int) -> List[Dict]:
+        if not self.stop_students.get((geom.route_id, geom.session, idx)):
+            return []
+        key = f"{geom.route_id}:{trip}:{idx}:arrived"
+        if not self._once(trip, key):
+            return []
+        return [{**self._base(point, geom, idx), "notification_type": "bus_arrived", "dedup_key": key,
+                 "message": f"🚌 Bus {geom.route_name} aapke stop {geom.names[idx]} par pahunch gayi hai."}]
+
+    def _eta_alerts(self, point: Dict, geom: RouteGeometry, trip: str, idx: int,
+                    eta_min: float, now_ist: datetime) -> List[Dict]:
+        if not self.stop_students.get((geom.route_id, geom.session, idx)):
+            return []
+        alerts = []
+        # Smallest threshold the ETA is under, so a bus first seen 3 min away sends one alert, not two
+        crossed = [t for t in ETA_ALERT_MINUTES if eta_min <= t]
+        if crossed:
+            threshold = min(crossed)
+            key = f"{geom.route_id}:{trip}:{idx}:eta{threshold}"
+            if self._once(trip, key):
+                for t in crossed:
+                    self.sent[trip].add(f"{geom.route_id}:{trip}:{idx}:eta{t}")
+                minutes = max(1, round(eta_min))
+                alerts.append({**self._base(point, geom, idx), "notification_type": "bus_arriving",
+                               "eta_minutes": minutes, "dedup_key": key,
+                               "message": f"🚌 Bus {geom.route_name} {geom.names[idx]} stop par lagbhag {minutes} minute mein pahunchegi."})
+
+        scheduled = geom.scheduled[idx]
+        if scheduled:
+            due = now_ist.replace(hour=scheduled[0], minute=scheduled[1], second=0, microsecond=0)
+            delay = (now_ist + timedelta(minutes=eta_min) - due).total_seconds() / 60
+            if delay >= DELAY_ALERT_MINUTES:
+                step = int(delay // DELAY_STEP_MINUTES) * DELAY_STEP_MINUTES
+                key = f"{geom.route_id}:{trip}:{idx}:late{step}"
+                if self._once(trip, key):
+                    alerts.append({**self._base(point, geom, idx), "notification_type": "bus_late",
+                                   "delay_minutes": round(delay), "dedup_key": key,
+                                   "message": f"🚌 Bus Update: {geom.route_name} aaj {geom.names[idx]} stop par lagbhag {round(delay)} minute late hai."})
+        return alerts
+
+
+engine = EtaEngine()
+_loaded_at: Dict[str, float] = {}
+_indexes_ready = False
+
+
+async def _ensure_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        # Dedup across workers: each worker has its own engine.sent set
+        await db.bus_notifications.create_index("dedup_key", unique=True, sparse=True)
+        await db.bus_notifications.create_index([("school_id", 1), ("affected_routes", 1), ("created_at", -1)])
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning(f"bus_notifications index creation failed: {e}")
+
+
+async def load_vehicles(vehicle_ids: List[str]):
+    """Load routes (and their student assignments) for vehicles not cached recently."""
+    now = time.monotonic()
+    stale = [v for v in vehicle_ids if now - _loaded_at.get(v, -ROUTE_CACHE_SECONDS) >= ROUTE_CACHE_SECONDS]
+    if not stale:
+        return
+    routes = await db.bus_routes.find(
+        {"vehicle_id": {"$in": stale}, "status": {"$ne": "inactive"}},
+        {"_id": 0, "id": 1, "school_id": 1, "route_name": 1, "vehicle_id": 1, "stops": 1}
+    ).to_list(None)
+    assignments = await db.student_transport.find(
+        {"route_id": {"$in": [r["id"] for r in routes]}},
+        {"_id": 0, "student_id": 1, "route_id": 1, "pickup_stop": 1, "drop_stop": 1, "transport_type": 1}
+    ).to_list(None) if routes else []
+    for vid in stale:
+        for route_id in engine.vehicle_routes.pop(vid, []):
+            engine.drop_route(route_id)
+        _loaded_at[vid] = now
+    by_route = defaultdict(list)
+    for a in assignments:
+        by_route[a["route_id"]].append(a)
+    for route in routes:
+        engine.load_route(route, by_route[route["id"]])
+
+
+def invalidate_route(route: Dict):
+    """Call after a route's stops/vehicle or its student assignments change."""
+    engine.drop_route(route["id"])
+    if route.get("vehicle_id"):
+        _loaded_at.pop(route["vehicle_id"], None)
+
+
+async def _deliver(alerts: List[Dict]):
+    if not alerts:
+        return
+    await _ensure_indexes()
+    now = datetime.now(timezone.utc).isoformat()
+    docs = [{
+        "id": str(uuid.uuid4()),
+        "school_id": a["school_id"],
+        "vehicle_id": a["vehicle_id"],
+        "route_id": a["route_id"],
+        "notification_type": a["notification_type"],
+        "message": a["message"],
+        "affected_routes": [a["route_id"]],
+        "stop_name": a["stop_name"],
+        "student_ids": a["student_ids"],
+        "eta_minutes": a.get("eta_minutes"),
+        "delay_minutes": a.get("delay_minutes"),
+        "recipients_count": len(a["student_ids"]),
+        "dedup_key": a["dedup_key"],
+        "source": "auto_eta",
+        "created_at": now
+    } for a in alerts]
+    rejected = set()
+    try:
+        await db.bus_notifications.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for err in e.details.get("writeErrors", []):
+            if err.get("code") != DUPLICATE_KEY_ERROR:
+                raise
+            rejected.add(err["index"])
+    for i, doc in enumerate(docs):
+        if i in rejected:
+            continue
+        doc.pop("_id", None)
+        bus.publish(vehicle_topic(doc["vehicle_id"]), {"type": doc["notification_type"], **doc})
+        for student_id in doc["student_ids"]:
+            bus.publish(f"student:{student_id}", {"type": doc["notification_type"], **doc})
+
+
+async def handle_points(points: List[Dict]):
+    """GPS ingestion listener: evaluate every accepted point."""
+    if not points:
+        return
+    await load_vehicles(list({p["vehicle_id"] for p in points}))
+    alerts = []
+    for p in points:
+        alerts.extend(engine.evaluate(p))
+    await _deliver(alerts)
+
+
+register_point_listener(handle_points)
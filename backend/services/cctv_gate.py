@@ -0,0 +1,299 @@
+"""
+CCTV Frame Gate (local pre-processing before any vision API call)
+- Near-duplicate drop: 256-bit dHash of each frame against the last frame
+  that went through; a camera re-posting the same scene costs one decode
+  (a 64-bit hash barely moves when one person walks into a wide shot)
+- Motion gate: share of pixels that changed between consecutive 64×48
+  grayscale thumbnails; a still corridor never reaches face detection
+- Face detection on CPU with OpenCV (opencv-python-headless in
+  requirements.txt): YuNet (ONNX model at CCTV_FACE_MODEL) when
+  configured, else the Haar cascade bundled with opencv. Faces are
+  cropped with a margin and only identifiable crops (big enough, sharp,
+  reasonably lit) are returned for matching
+- A crop already seen on the camera within FACE_REPEAT_SECONDS is dropped
+  (a student standing at the gate is matched once, not every frame)
+- Analysis runs on the CPU process pool (analyze_frame is a plain
+  module-level function); each camera has its own queue and worker, so a
+  camera's frames are gated in order against its own previous frame
+- Backpressure: a camera's queue holds QUEUE_SIZE frames; beyond that
+  submit() raises CameraBusy and the route answers 429 + Retry-After
+
+Without a detector (OpenCV not installed, or OpenCV 5+ without a YuNet
+model), frames that pass the duplicate / motion gates are returned as
+"forward" and go to the vision API as before.
+
+    result = await frame_gate.submit(device_id, jpeg_bytes)
+    if result["outcome"] == "faces":
+        ... match result["faces"][i]["crop"] (JPEG bytes) against enrolled photos
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+    logger.warning("opencv-python-headless not installed - no local face detection, CCTV frames go to the vision API")
+
+HASH_SIZE = 16                   # frame dHash is HASH_SIZE² bits
+DUPLICATE_DISTANCE = int(os.environ.get("CCTV_DUPLICATE_DISTANCE", "4"))   # differing frame-hash bits
+FACE_REPEAT_DISTANCE = 10        # differing bits (of 64) for a crop to be the same face again
+MOTION_MIN_SHARE = float(os.environ.get("CCTV_MOTION_MIN_SHARE", "0.01"))  # changed thumbnail pixels
+MOTION_PIXEL_DELTA = 25          # grey levels for a thumbnail pixel to count as changed
+THUMB_SIZE = (64, 48)
+DETECT_WIDTH = 640               # frames are decoded at (about) this width for detection
+MIN_FACE_PX = 40                 # at DETECT_WIDTH
+MIN_SHARPNESS = 30.0             # variance of the Laplacian of the face crop
+BRIGHTNESS_RANGE = (40, 220)
+CROP_MARGIN = 0.25
+CROP_SIZE = 192
+FACE_MODEL = os.environ.get("CCTV_FACE_MODEL")   # YuNet .onnx
+FACE_REPEAT_SECONDS = 30
+QUEUE_SIZE = int(os.environ.get("CCTV_QUEUE_SIZE", "4"))
+IDLE_SECONDS = 60                # a camera's worker exits after this long without frames
+
+
+# ====================== FRAME ANALYSIS (process pool) ======================
+
+def dhash(gray, size: int = 8) -> int:
+    """size²-bit difference hash of a PIL grayscale image."""
+    from PIL import Image
+    small = np.asarray(gray.resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def motion_share(thumb: np.ndarray, previous: np.ndarray) -> float:
+    diff = np.abs(thumb.astype(np.int16) - previous.astype(np.int16))
+    return float((diff > MOTION_PIXEL_DELTA).mean())
+
+
+def sharpness(gray: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian - low for blurred or out-of-focus faces."""
+    g = gray.astype(np.float32)
+    lap = g[1:-1, :-2] + g[1:-1, 2:] + g[:-2, 1:-1] + g[2:, 1:-1] - 4 * g[1:-1, 1:-1]
+    return float(lap.var()) if lap.size else 0.0
+
+
+_detector = None
+
+
+def detector_kind() -> Optional[str]:
+    """yunet | haar | None (no OpenCV, or OpenCV 5+ without a YuNet model - it no longer ships Haar cascades)"""
+    if not OPENCV_AVAILABLE:
+        return None
+    if FACE_MODEL and os.path.exists(FACE_MODEL) and hasattr(cv2, "FaceDetectorYN"):
+        return "yunet"
+    return "haar" if hasattr(cv2, "CascadeClassifier") else None
+
+
+def get_detector():
+    global _detector
+    if _detector is None:
+        kind = detector_kind()
+        if kind == "yunet":
+            _detector = (kind, cv2.FaceDetectorYN.create(FACE_MODEL, "", (320, 320), 0.8))
+        elif kind == "haar":
+            _detector = (kind, cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml"))
+    return _detector
+
+
+def detect_faces(rgb: np.ndarray, gray: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """(x, y, w, h) boxes at the decoded resolution."""
+    kind, detector = get_detector()
+    if kind == "yunet":
+        height, width = gray.shape
+        detector.setInputSize((width, height))
+        _, faces = detector.detect(np.ascontiguousarray(rgb[:, :, ::-1]))
+        return [tuple(int(v) for v in f[:4]) for f in (faces if faces is not None else [])]
+    boxes = detector.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(MIN_FACE_PX, MIN_FACE_PX))
+    return [tuple(int(v) for v in b) for b in boxes]
+
+
+def _crop(image, gray: np.ndarray, box: Tuple[int, int, int, int]) -> Optional[Dict[str, Any]]:
+    """JPEG crop of an identifiable face, or None."""
+    from PIL import Image
+    x, y, w, h = box
+    if min(w, h) < MIN_FACE_PX:
+        return None
+    face = gray[max(y, 0):y + h, max(x, 0):x + w]
+    brightness = float(face.mean()) if face.size else 0.0
+    sharp = sharpness(face)
+    if sharp < MIN_SHARPNESS or not BRIGHTNESS_RANGE[0] <= brightness <= BRIGHTNESS_RANGE[1]:
+        return None
+    mx, my = int(w * CROP_MARGIN), int(h * CROP_MARGIN)
+    region = image.crop((max(x - mx, 0), max(y - my, 0), min(x + w + mx, image.width), min(y + h + my, image.height)))
+    region.thumbnail((CROP_SIZE, CROP_SIZE), Image.BILINEAR)
+    buffer = BytesIO()
+    region.save(buffer, format="JPEG", quality=90)
+    return {
+        "box": [x, y, w, h],
+        "crop": buffer.getvalue(),
+        "hash": dhash(region.convert("L")),
+        "sharpness": round(sharp, 1),
+        "brightness": round(brightness, 1),
+    }
+
+
+def analyze_frame(jpeg: bytes, previous_thumb: Optional[bytes] = None, last_hash: Optional[int] = None,
+                  find_faces: bool = True) -> Dict[str, Any]:
+    """
+    Gate one frame against the camera's state. Returns the frame's hash and
+    thumbnail (the caller keeps them for the next frame) and an outcome:
+    duplicate | no_motion | no_faces | unidentifiable | faces | forward.
+    Raises ValueError for data that isn't an image.
+    """
+    from PIL import Image, UnidentifiedImageError
+    try:
+        image = Image.open(BytesIO(jpeg))
+        image.draft("RGB", (DETECT_WIDTH, DETECT_WIDTH))   # JPEG: decode at 1/2 .. 1/8 scale directly
+        image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"not an image ({e})")
+    if image.width > DETECT_WIDTH:
+        image = image.resize((DETECT_WIDTH, round(image.height * DETECT_WIDTH / image.width)), Image.BILINEAR)
+
+    gray_image = image.convert("L")
+    thumb = np.asarray(gray_image.resize(THUMB_SIZE, Image.BILINEAR), dtype=np.uint8)
+    result: Dict[str, Any] = {"hash": dhash(gray_image, HASH_SIZE), "thumb": thumb.tobytes(), "faces": [], "faces_detected": 0}
+
+    if last_hash is not None and hamming(result["hash"], last_hash) <= DUPLICATE_DISTANCE:
+        result["outcome"] = "duplicate"
+        return result
+    if previous_thumb is not None:
+        previous = np.frombuffer(previous_thumb, dtype=np.uint8).reshape(thumb.shape)
+        result["motion"] = round(motion_share(thumb, previous), 4)
+        if result["motion"] < MOTION_MIN_SHARE:
+            result["outcome"] = "no_motion"
+            return result
+    if not find_faces or detector_kind() is None:
+        result["outcome"] = "forward"
+        return result
+
+    gray = np.asarray(gray_image)
+    boxes = detect_faces(np.asarray(image), gray)
+    result["faces_detected"] = len(boxes)
+    result["faces"] = [c for c in (_crop(image, gray, box) for box in boxes) if c]
+    result["outcome"] = "faces" if result["faces"] else ("unidentifiable" if boxes else "no_faces")
+    return result
+
+
+# ====================== PER-CAMERA QUEUES ======================
+
+class CameraBusy(Exception):
+    """The camera's queue is full - the caller should back off."""
+
+
+@dataclass
+class _Camera:
+    queue: asyncio.Queue
+    worker: Optional[asyncio.Task] = None
+    previous_thumb: Optional[bytes] = None
+    last_hash: Optional[int] = None
+    recent_faces: Deque[Tuple[float, int]] = field(default_factory=deque)   # (seen at, crop hash)
+    outcomes: Dict[str, int] = field(default_factory=dict)
+
+
+class FrameGate:
+    def __init__(self, queue_size: int = QUEUE_SIZE, analyze: Optional[Callable[..., Any]] = None):
+        """analyze(jpeg, previous_thumb, last_hash) → result; defaults to analyze_frame on the CPU pool."""
+        self.queue_size = queue_size
+        self._analyze = analyze
+        self._cameras: Dict[str, _Camera] = {}
+        self.rejected = 0
+
+    async def submit(self, camera_id: str, jpeg: bytes) -> Dict[str, Any]:
+        """Gate a frame in the camera's order; raises CameraBusy when its queue is full."""
+        camera = self._cameras.get(camera_id)
+        if camera is None:
+            camera = self._cameras[camera_id] = _Camera(queue=asyncio.Queue(self.queue_size))
+        future = asyncio.get_running_loop().create_future()
+        try:
+            camera.queue.put_nowait((jpeg, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            _observe("rejected")
+            raise CameraBusy(camera_id)
+        if camera.worker is None or camera.worker.done():
+            camera.worker = asyncio.create_task(self._run(camera_id, camera))
+        return await future
+
+    async def _analyze_frame(self, jpeg: bytes, camera: _Camera) -> Dict[str, Any]:
+        if self._analyze is not None:
+            return await self._analyze(jpeg, camera.previous_thumb, camera.last_hash)
+        from core.offload import run_cpu   # not at import: pool workers load this module without the app
+        return await run_cpu(analyze_frame, jpeg, camera.previous_thumb, camera.last_hash)
+
+    async def _run(self, camera_id: str, camera: _Camera):
+        while True:
+            try:
+                jpeg, future = await asyncio.wait_for(camera.queue.get(), IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                if camera.queue.empty():
+                    return
+                continue
+            if future.cancelled():
+                continue
+            try:
+                result = await self._analyze_frame(jpeg, camera)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+
+            camera.previous_thumb = result.pop("thumb")
+            if result["outcome"] not in ("duplicate", "no_motion"):
+                camera.last_hash = result["hash"]   # duplicates are judged against the last frame that went through
+            if result["faces"]:
+                result["faces"] = self._new_faces(camera, result["faces"])
+                if not result["faces"]:
+                    result["outcome"] = "repeat_faces"
+            camera.outcomes[result["outcome"]] = camera.outcomes.get(result["outcome"], 0) + 1
+            _observe(result["outcome"])
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _new_faces(camera: _Camera, faces: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop crops that look like a face this camera sent on within FACE_REPEAT_SECONDS."""
+        now = time.monotonic()
+        while camera.recent_faces and now - camera.recent_faces[0][0] > FACE_REPEAT_SECONDS:
+            camera.recent_faces.popleft()
+        fresh = []
+        for face in faces:
+            if any(hamming(face["hash"], seen) <= FACE_REPEAT_DISTANCE for _, seen in camera.recent_faces):
+                continue
+            camera.recent_faces.append((now, face["hash"]))
+            fresh.append(face)
+        return fresh
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "detector": detector_kind(),
+            "rejected": self.rejected,
+            "cameras": {cid: {"queued": c.queue.qsize(), "outcomes": dict(c.outcomes)} for cid, c in self._cameras.items()},
+        }
+
+
+def _observe(outcome: str):
+    from core import metrics
+    metrics.observe_cctv_frame(outcome)
+
+
+frame_gate = FrameGate()
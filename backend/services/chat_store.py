@@ -0,0 +1,228 @@
+"""
+Group Chat Message Store
+- Per-group sequence numbers from an atomic $inc on chat_groups.last_seq
+- Unique (group_id, seq) index: paging and catch-up are index range scans
+- Per-member read cursor (chat_read_cursors.last_read_seq):
+  unread = group.last_seq - cursor, no per-message read_by arrays
+- New messages are pushed on the group topic of the live channel
+- Legacy messages (written before seq existed) are numbered lazily, per group
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+import logging
+import uuid
+
+from pymongo import ReturnDocument, UpdateOne
+
+from core.database import db
+from core.live_events import publish_chat_message
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 200
+
+_indexes_ready = False
+# Groups whose legacy messages are known to be numbered (per process)
+_seq_ready: set = set()
+
+
+async def ensure_chat_indexes():
+    """Create chat indexes once per process (safe to call on every request)."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        # Partial: legacy rows without seq must not collide on (group_id, null)
+        await db.chat_messages.create_index(
+            [("group_id", 1), ("seq", 1)],
+            name="uniq_group_seq",
+            unique=True,
+            partialFilterExpression={"seq": {"$exists": True}}
+        )
+        await db.chat_read_cursors.create_index(
+            [("group_id", 1), ("user_id", 1)], name="uniq_group_user", unique=True
+        )
+        await db.chat_read_cursors.create_index([("user_id", 1)])
+        await db.chat_groups.create_index([("id", 1)])
+        await db.chat_groups.create_index([("school_id", 1), ("members", 1)])
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning(f"Chat index creation failed: {e}")
+
+
+async def _ensure_groups_seq(group_ids: List[str]) -> Dict[str, int]:
+    """
+    {group_id: last_seq} for the groups that exist. Groups without last_seq
+    get their legacy messages numbered by created_at - one query and two bulk
+    writes for all of them. Deterministic (created_at, id) order means two
+    workers racing here assign identical numbers.
+    """
+    await ensure_chat_indexes()
+    groups = await db.chat_groups.find(
+        {"id": {"$in": group_ids}}, {"_id": 0, "id": 1, "last_seq": 1}
+    ).to_list(len(group_ids))
+    last_seq = {g["id"]: g["last_seq"] for g in groups if "last_seq" in g}
+    unnumbered = [g["id"] for g in groups if "last_seq" not in g]
+    if unnumbered:
+        legacy = await db.chat_messages.find(
+            {"group_id": {"$in": unnumbered}, "seq": {"$exists": False}},
+            {"_id": 0, "id": 1, "group_id": 1}
+        ).sort([("group_id", 1), ("created_at", 1), ("id", 1)]).to_list(None)
+        counts = dict.fromkeys(unnumbered, 0)
+        updates = []
+        for m in legacy:
+            counts[m["group_id"]] += 1
+            updates.append(UpdateOne({"id": m["id"]}, {"$set": {"seq": counts[m["group_id"]]}}))
+        if updates:
+            await db.chat_messages.bulk_write(updates, ordered=False)
+        await db.chat_groups.bulk_write([
+            UpdateOne({"id": gid}, {"$max": {"last_seq": n}}) for gid, n in counts.items()
+        ], ordered=False)
+        last_seq.update(counts)
+    _seq_ready.update(g["id"] for g in groups)
+    return last_seq
+
+
+async def _ensure_group_seq(group_id: str) -> bool:
+    """
+    Number a group's legacy messages the first time this process touches the
+    group. Returns False if the group is missing.
+    """
+    if group_id in _seq_ready:
+        return True
+    return group_id in await _ensure_groups_seq([group_id])
+
+
+async def _advance_cursor(group_id: str, user_id: str, seq: int):
+    await db.chat_read_cursors.update_one(
+        {"group_id": group_id, "user_id": user_id},
+        {
+            "$max": {"last_read_seq": seq},
+            "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
+        },
+        upsert=True
+    )
+
+
+async def append_message(
+    group_id: str,
+    content: str,
+    sender_id: str,
+    sender_name: str,
+    sender_role: str,
+    message_type: str = "text",
+    attachment_url: Optional[str] = None
+) -> Optional[Dict]:
+    """Allocate the next seq, store the message and push it. None if the group does not exist."""
+    if not await _ensure_group_seq(group_id):
+        return None
+
+    now = datetime.now(timezone.utc).isoformat()
+    # One round trip: take the next seq and update the group preview together
+    group = await db.chat_groups.find_one_and_update(
+        {"id": group_id},
+        {
+            "$inc": {"last_seq": 1},
+            "$set": {"last_message": content[:50], "last_message_at": now, "last_sender_id": sender_id}
+        },
+        projection={"_id": 0, "last_seq": 1, "school_id": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if group is None:
+        return None
+
+    message = {
+        "id": str(uuid.uuid4()),
+        "group_id": group_id,
+        "school_id": group.get("school_id"),
+        "seq": group["last_seq"],
+        "content": content,
+        "sender_id": sender_id,
+        "sender_name": sender_name,
+        "sender_role": sender_role,
+        "message_type": message_type,
+        "attachment_url": attachment_url,
+        "created_at": now,
+        "is_deleted": False
+    }
+    await db.chat_messages.insert_one(message)
+    message.pop("_id", None)
+
+    # The sender has obviously read up to their own message
+    await _advance_cursor(group_id, sender_id, message["seq"])
+    publish_chat_message(message)
+    return message
+
+
+async def get_messages(
+    group_id: str,
+    limit: int = 50,
+    before_seq: Optional[int] = None,
+    after_seq: Optional[int] = None,
+    before: Optional[str] = None
+) -> Dict:
+    """
+    One page of messages, oldest first.
+    - default / before_seq: the `limit` newest messages below before_seq (scroll back)
+    - after_seq: the `limit` oldest messages above after_seq (catch up after reconnect)
+    - before: legacy created_at cursor, still honoured
+    """
+    await _ensure_group_seq(group_id)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = {"group_id": group_id, "is_deleted": False}
+
+    if after_seq is not None:
+        query["seq"] = {"$gt": after_seq}
+        messages = await db.chat_messages.find(query, {"_id": 0}).sort("seq", 1).limit(limit + 1).to_list(limit + 1)
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+    else:
+        if before_seq is not None:
+            query["seq"] = {"$lt": before_seq}
+        elif before:
+            query["created_at"] = {"$lt": before}
+        messages = await db.chat_messages.find(query, {"_id": 0}).sort("seq", -1).limit(limit + 1).to_list(limit + 1)
+        has_more = len(messages) > limit
+        messages = list(reversed(messages[:limit]))
+
+    return {
+        "messages": messages,
+        "group_id": group_id,
+        "has_more": has_more,
+        "first_seq": messages[0].get("seq") if messages else None,
+        "last_seq": messages[-1].get("seq") if messages else None
+    }
+
+
+async def mark_read(group_id: str, user_id: str, seq: Optional[int] = None) -> int:
+    """Move the member's cursor forward (never back). seq=None means 'everything so far'."""
+    if seq is None:
+        await _ensure_group_seq(group_id)
+        group = await db.chat_groups.find_one({"id": group_id}, {"_id": 0, "last_seq": 1})
+        seq = (group or {}).get("last_seq", 0)
+    await _advance_cursor(group_id, user_id, seq)
+    return seq
+
+
+async def unread_counts(user_id: str, group_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    {group_id: unread} from two indexed queries, whatever the number of groups
+    (plus one query and two bulk writes the first time legacy groups are seen).
+    """
+    group_ids = list(group_ids)
+    if not group_ids:
+        return {}
+    last_seq = await _ensure_groups_seq(group_ids)
+    cursors = await db.chat_read_cursors.find(
+        {"user_id": user_id, "group_id": {"$in": group_ids}},
+        {"_id": 0, "group_id": 1, "last_read_seq": 1}
+    ).to_list(len(group_ids))
+    read = {c["group_id"]: c.get("last_read_seq", 0) for c in cursors}
+    return {gid: max(0, seq - read.get(gid, 0)) for gid, seq in last_seq.items()}
+
+
+def with_unread(groups: List[Dict], counts: Dict[str, int]) -> List[Dict]:
+    for g in groups:
+        g["unread_count"] = counts.get(g["id"], 0)
+    return groups
@@ -0,0 +1,60 @@
+"""
+CPU Tasks
+- Process-pool targets for core.offload.run_cpu()
+- Module-level functions with plain arguments / results, so they pickle; only
+  bcrypt / qrcode / openpyxl are imported (lazily), never Motor or the app
+
+    hashed = await run_cpu(cpu_tasks.bcrypt_hash, password)
+"""
+
+from io import BytesIO
+from typing import Any, Dict, List
+
+
+def bcrypt_hash(secret: str) -> str:
+    import bcrypt
+    return bcrypt.hashpw(secret.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def bcrypt_hash_many(secrets: List[str], rounds: int = 12) -> List[str]:
+    """One pool round-trip for a whole chunk of passwords (bulk provisioning)."""
+    import bcrypt
+    return [bcrypt.hashpw(s.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8") for s in secrets]
+
+
+def bcrypt_check(secret: str, hashed: str) -> bool:
+    import bcrypt
+    return bcrypt.checkpw(secret.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def qr_png(data: str, box_size: int = 10, border: int = 2) -> bytes:
+    import qrcode
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def xlsx_records(content: bytes) -> List[Dict[str, Any]]:
+    """Rows of the first sheet as {header: value}; header row is row 1, blank rows skipped."""
+    import openpyxl
+    wb = openpyxl.load_workbook(BytesIO(content), data_only=True, read_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = [value for value in next(rows, ()) if value]
+        data = []
+        for row in rows:
+            record = {headers[idx]: value for idx, value in enumerate(row) if idx < len(headers)}
+            if any(record.values()):
+                data.append(record)
+        return data
+    finally:
+        wb.close()
+
+
+def warm() -> bool:
+    """Submitted once per worker at startup so the first login doesn't pay for the spawn."""
+    import bcrypt  # noqa: F401
+    return True
@@ -0,0 +1,352 @@
+"""
+Online Exam Session Layer
+- Answer key per published exam cached in memory as NumPy arrays
+  (one DB read per exam per worker, single-flight when 2,000 students submit at the bell)
+- Grading = vector compare against the key
+- One submission per student enforced by a unique (exam_id, student_id) index
+- Incremental top-K leaderboard per exam, kept in sync across workers
+  through the event bus (topic exam:{exam_id})
+"""
+
+from bisect import bisect_right, insort
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+import uuid
+
+import numpy as np
+from pymongo.errors import DuplicateKeyError
+
+from core.database import db
+from core.event_bus import bus
+
+logger = logging.getLogger(__name__)
+
+KEY_TTL_SECONDS = 300          # exams can be edited/closed on another worker
+LEADERBOARD_SIZE = 100         # top-K kept per exam
+LEADERBOARD_IDLE_SECONDS = 3600
+UNANSWERED = -1
+
+_indexes_ready = False
+_keys: Dict[str, "AnswerKey"] = {}
+_key_loads: Dict[str, asyncio.Future] = {}
+_boards: Dict[str, "Leaderboard"] = {}
+_board_loads: Dict[str, asyncio.Future] = {}
+
+
+async def ensure_exam_indexes():
+    """Unique submission index + leaderboard/result indexes (once per process)."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        await db.exams.create_index([("id", 1)])
+        await db.exam_results.create_index([("exam_id", 1), ("score", -1)])
+        await db.exam_results.create_index([("student_id", 1), ("submitted_at", -1)])
+        await db.exam_results.create_index(
+            [("exam_id", 1), ("student_id", 1)], name="uniq_exam_student", unique=True
+        )
+        _indexes_ready = True
+    except Exception as e:
+        # Old duplicate submissions block the unique index; submit still
+        # works, it just cannot reject a racing double-submit.
+        logger.warning(f"Exam index creation failed: {e}")
+
+
+def exam_topic(exam_id: str) -> str:
+    return f"exam:{exam_id}"
+
+
+# ====================== ANSWER KEY ======================
+
+class AnswerKey:
+    """Grading data for one exam plus the student-facing copy of the paper."""
+
+    def __init__(self, exam: Dict):
+        questions = exam.get("questions", [])
+        self.exam_id = exam["id"]
+        self.correct = np.array([q.get("correct_answer", UNANSWERED) for q in questions], dtype=np.int64)
+        self.marks = np.array([q.get("marks", 1) for q in questions], dtype=np.float64)
+        self.negative = float(exam.get("negative_marks", 0.25)) if exam.get("negative_marking") else 0.0
+        self.meta = {k: v for k, v in exam.items() if k != "questions"}
+        self.public_questions = [{k: v for k, v in q.items() if k != "correct_answer"} for q in questions]
+        self.loaded_at = time.monotonic()
+
+    @property
+    def total_marks(self):
+        return self.meta.get("total_marks", float(self.marks.sum()))
+
+    def student_view(self) -> Dict:
+        return {**self.meta, "questions": [dict(q) for q in self.public_questions]}
+
+    def answers_array(self, answers: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """{"0": 2, "3": 1} → given [2, -1, -1, 1, ...] + answered mask; keys outside the paper are ignored."""
+        n = len(self.correct)
+        given = np.full(n, UNANSWERED, dtype=np.int64)
+        answered = np.zeros(n, dtype=bool)
+        for key, value in answers.items():
+            try:
+                idx = int(key)
+            except (TypeError, ValueError):
+                continue
+            if 0 <= idx < n:
+                given[idx] = value
+                answered[idx] = True
+        return given, answered
+
+    def grade(self, answers: Dict[str, int]) -> Dict:
+        given, answered = self.answers_array(answers)
+        right = answered & (given == self.correct)
+        wrong = answered & ~right
+        n_wrong = int(wrong.sum())
+        score = max(0.0, float(self.marks[right].sum()) - self.negative * n_wrong)
+        if score.is_integer():
+            score = int(score)
+        total = self.total_marks
+        return {
+            "score": score,
+            "total_marks": total,
+            "percentage": round((score / total) * 100, 2) if total > 0 else 0,
+            "correct_answers": int(right.sum()),
+            "wrong_answers": n_wrong,
+            "unanswered": int((~answered).sum())
+        }
+
+    def grade_batch(self, answer_matrix: np.ndarray) -> np.ndarray:
+        """Scores for many submissions at once (rows = students, -1 = unanswered)."""
+        answered = answer_matrix != UNANSWERED
+        right = answered & (answer_matrix == self.correct)
+        wrong = answered & ~right
+        return np.maximum(0.0, right @ self.marks - self.negative * wrong.sum(axis=1))
+
+
+async def _single_flight(loads: Dict[str, asyncio.Future], key: str, loader):
+    """Run loader once for concurrent callers asking for the same key."""
+    pending = loads.get(key)
+    if pending is not None:
+        return await pending
+    future = asyncio.get_running_loop().create_future()
+    loads[key] = future
+    try:
+        value = await loader()
+        future.set_result(value)
+        return value
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        loads.pop(key, None)
+        if not future.done():
+            future.cancel()
+        elif future.exception() is not None:
+            # Mark retrieved so asyncio does not log "exception never retrieved"
+            future.exception()
+
+
+async def get_answer_key(exam_id: str) -> Optional[AnswerKey]:
+    key = _keys.get(exam_id)
+    if key is not None and time.monotonic() - key.loaded_at < KEY_TTL_SECONDS:
+        return key
+
+    async def load():
+        await ensure_exam_indexes()
+        exam = await db.exams.find_one({"id": exam_id}, {"_id": 0})
+        if not exam:
+            _keys.pop(exam_id, None)
+            return None
+        loaded = AnswerKey(exam)
+        _keys[exam_id] = loaded
+        return loaded
+
+    return await _single_flight(_key_loads, exam_id, load)
+
+
+def invalidate_exam(exam_id: str):
+    """Drop cached key + leaderboard (status change, delete)."""
+    _keys.pop(exam_id, None)
+    board = _boards.pop(exam_id, None)
+    if board:
+        board.close()
+
+
+# ====================== LEADERBOARD ======================
+
+def _rank_key(entry: Dict) -> Tuple:
+    # Higher score first, earlier submission breaks ties
+    return (-entry["score"], entry.get("submitted_at") or "")
+
+
+class Leaderboard:
+    """
+    All scores (sorted, for rank / count) + the top-K entries for one exam.
+    Applying the same result twice is a no-op, so local submits and the
+    bus echo of them can both feed it.
+    """
+
+    def __init__(self, exam_id: str, size: int = LEADERBOARD_SIZE):
+        self.exam_id = exam_id
+        self.size = size
+        self.scores: List[float] = []
+        self.top: List[Dict] = []
+        self.ids: set = set()
+        self.touched = time.monotonic()
+        self._sub = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, entry: Dict) -> bool:
+        if entry["id"] in self.ids:
+            return False
+        self.ids.add(entry["id"])
+        insort(self.scores, entry["score"])
+        if len(self.top) < self.size or _rank_key(entry) < _rank_key(self.top[-1]):
+            self.top.append(entry)
+            self.top.sort(key=_rank_key)
+            del self.top[self.size:]
+        return True
+
+    def rank_of(self, score: float) -> int:
+        """1 + number of strictly higher scores (same rule as before)."""
+        return len(self.scores) - bisect_right(self.scores, score) + 1
+
+    def __len__(self):
+        return len(self.scores)
+
+    def leaders(self, limit: int) -> List[Dict]:
+        self.touched = time.monotonic()
+        return [
+            {"student_name": e["student_name"], "score": e["score"], "percentage": e["percentage"],
+             "submitted_at": e["submitted_at"], "rank": i + 1}
+            for i, e in enumerate(self.top[:limit])
+        ]
+
+    def follow(self):
+        """Apply results submitted on other workers."""
+        self._sub = bus.subscribe(exam_topic(self.exam_id), queue_size=5000)
+
+        async def consume():
+            async for event in self._sub:
+                if event.get("type") == "exam_submitted":
+                    self.add(event["entry"])
+
+        self._task = asyncio.create_task(consume())
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+        if self._sub:
+            self._sub.close()
+
+
+def _entry(result: Dict) -> Dict:
+    return {
+        "id": result["id"],
+        "student_id": result.get("student_id"),
+        "student_name": result.get("student_name"),
+        "score": result["score"],
+        "percentage": result.get("percentage"),
+        "submitted_at": result.get("submitted_at")
+    }
+
+
+def _evict_idle():
+    now = time.monotonic()
+    for exam_id in [e for e, b in _boards.items() if now - b.touched > LEADERBOARD_IDLE_SECONDS]:
+        _boards.pop(exam_id).close()
+
+
+async def get_leaderboard(exam_id: str) -> Leaderboard:
+    board = _boards.get(exam_id)
+    if board is not None:
+        board.touched = time.monotonic()
+        return board
+
+    async def load():
+        await ensure_exam_indexes()
+        _evict_idle()
+        fresh = Leaderboard(exam_id)
+        # Subscribe before reading so nothing submitted meanwhile is missed
+        fresh.follow()
+        rows = await db.exam_results.find(
+            {"exam_id": exam_id},
+            {"_id": 0, "id": 1, "student_id": 1, "student_name": 1, "score": 1,
+             "percentage": 1, "submitted_at": 1}
+        ).to_list(None)
+        for row in rows:
+            if row.get("id") is not None and row.get("score") is not None:
+                fresh.add(_entry(row))
+        _boards[exam_id] = fresh
+        return fresh
+
+    return await _single_flight(_board_loads, exam_id, load)
+
+
+# ====================== SUBMIT ======================
+
+class AlreadySubmitted(Exception):
+    pass
+
+
+async def submit(exam_id: str, student: Dict, answers: Dict[str, int], time_taken: int = 0) -> Optional[Dict]:
+    """
+    Grade and store one submission. Returns the result (with rank and
+    total_students), None if the exam does not exist; raises AlreadySubmitted.
+    """
+    key = await get_answer_key(exam_id)
+    if key is None:
+        return None
+    graded = key.grade(answers)
+    exam = key.meta
+    result = {
+        "id": str(uuid.uuid4()),
+        "exam_id": exam_id,
+        "exam_title": exam["title"],
+        "subject": exam["subject"],
+        "class_id": exam["class_id"],
+        "school_id": exam["school_id"],
+        "student_id": student.get("id"),
+        "student_name": student.get("name", "Unknown"),
+        "answers": answers,
+        **graded,
+        "time_taken": time_taken,
+        "submitted_at": datetime.now(timezone.utc).isoformat()
+    }
+    try:
+        await db.exam_results.insert_one(result)
+    except DuplicateKeyError:
+        raise AlreadySubmitted()
+    result.pop("_id", None)
+
+    board = await get_leaderboard(exam_id)
+    entry = _entry(result)
+    board.add(entry)
+    bus.publish(exam_topic(exam_id), {"type": "exam_submitted", "exam_id": exam_id, "entry": entry})
+    result["rank"] = board.rank_of(result["score"])
+    result["total_students"] = len(board)
+    return result
+
+
+async def top_results(exam_id: str, limit: int = 10) -> List[Dict]:
+    """Leaderboard rows; served from memory up to LEADERBOARD_SIZE, else from the (exam_id, score) index."""
+    if limit <= LEADERBOARD_SIZE:
+        return (await get_leaderboard(exam_id)).leaders(limit)
+    await ensure_exam_indexes()
+    results = await db.exam_results.find(
+        {"exam_id": exam_id},
+        {"_id": 0, "student_name": 1, "score": 1, "percentage": 1, "submitted_at": 1}
+    ).sort([("score", -1), ("submitted_at", 1)]).limit(limit).to_list(limit)
+    for idx, r in enumerate(results):
+        r["rank"] = idx + 1
+    return results
+
+
+async def rank_in_exam(exam_id: str, score: float) -> Tuple[int, int]:
+    """(rank, total_students) from two index-only counts, for exams not held in memory."""
+    board = _boards.get(exam_id)
+    if board is not None:
+        return board.rank_of(score), len(board)
+    await ensure_exam_indexes()
+    higher = await db.exam_results.count_documents({"exam_id": exam_id, "score": {"$gt": score}})
+    total = await db.exam_results.count_documents({"exam_id": exam_id})
+    return higher + 1, total
@@ -0,0 +1,380 @@
+"""
+Export Engine
+- Rows are read from a Motor cursor / aggregation one batch at a time and
+  written as they arrive, so memory stays flat whatever the row count
+- CSV is streamed straight to the client (UTF-8 BOM so Excel shows Hindi names)
+- XLSX uses an openpyxl write-only workbook (rows spill to temp XML as they
+  are appended); the finished file is streamed back in chunks and deleted
+- Year-end sized exports run as a background job that writes to EXPORT_DIR;
+  the export_jobs document tracks progress and the file is downloaded when ready
+
+Reports: staff-attendance, student-attendance, fee-collection, fee-defaulters
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import csv
+import io
+import logging
+import os
+import tempfile
+import uuid
+
+from core.database import db
+from core.pagination import iter_batches, lookup
+
+logger = logging.getLogger(__name__)
+
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    Workbook = None
+    OPENPYXL_AVAILABLE = False
+    logger.warning("openpyxl not installed - XLSX exports unavailable, CSV only")
+
+EXPORT_DIR = Path(os.environ.get("EXPORT_DIR", str(Path(__file__).resolve().parent.parent / "exports")))
+EXPORT_TTL_HOURS = int(os.environ.get("EXPORT_TTL_HOURS", "48"))
+BATCH_SIZE = 1000
+CSV_CHUNK_BYTES = 64 * 1024
+PROGRESS_EVERY = 10000
+FORMATS = ("csv", "xlsx")
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+Columns = List[Tuple[str, str]]   # (row key, header)
+
+
+class ExportError(Exception):
+    """Unknown report / format, or a missing optional dependency."""
+
+
+# ====================== SOURCES ======================
+# Each source yields flat row dicts for one school; enrichment lookups run
+# once per batch ($in), never per row.
+
+def _month_bounds(month: Optional[int], year: Optional[int]) -> Tuple[datetime, datetime, int, int]:
+    now = datetime.now(timezone.utc)
+    month = month or now.month
+    year = year or now.year
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end, month, year
+
+
+async def staff_attendance_rows(school_id: str, month: int = None, year: int = None, **_) -> AsyncIterator[Dict]:
+    start, end, _, _ = _month_bounds(month, year)
+    cursor = db.staff_attendance.find(
+        {"school_id": school_id, "date": {"$gte": start, "$lt": end}}, {"_id": 0}
+    ).sort([("date", 1), ("_id", 1)])
+    async for batch in iter_batches(cursor, BATCH_SIZE):
+        staff = await lookup(db.staff, (r.get("staff_id") for r in batch), {"_id": 0, "name": 1, "designation": 1})
+        for r in batch:
+            member = staff.get(r.get("staff_id"), {})
+            yield {
+                "date": r.get("date"),
+                "staff_id": r.get("staff_id"),
+                "staff_name": member.get("name"),
+                "designation": member.get("designation"),
+                "status": r.get("status"),
+                "check_in_time": r.get("check_in_time"),
+                "method": r.get("method"),
+            }
+
+
+async def student_attendance_rows(school_id: str, from_date: str = None, to_date: str = None,
+                                  class_id: str = None, **_) -> AsyncIterator[Dict]:
+    query: Dict[str, Any] = {"school_id": school_id}
+    if class_id:
+        query["class_id"] = class_id
+    if from_date or to_date:
+        query["date"] = {k: v for k, v in (("$gte", from_date), ("$lte", to_date)) if v}
+    cursor = db.attendance.find(query, {"_id": 0}).sort([("date", 1), ("class_id", 1), ("_id", 1)])
+    async for batch in iter_batches(cursor, BATCH_SIZE):
+        students = await lookup(db.students, (r.get("student_id") for r in batch),
+                                {"_id": 0, "name": 1, "admission_no": 1, "roll_number": 1})
+        classes = await lookup(db.classes, (r.get("class_id") for r in batch), {"_id": 0, "name": 1, "section": 1})
+        for r in batch:
+            student = students.get(r.get("student_id"), {})
+            cls = classes.get(r.get("class_id"), {})
+            yield {
+                "date": r.get("date"),
+                "class": f"{cls.get('name', '')}-{cls.get('section', '')}".strip("-"),
+                "admission_no": student.get("admission_no"),
+                "roll_number": student.get("roll_number"),
+                "student_name": student.get("name") or r.get("student_name"),
+                "status": r.get("status"),
+                "remarks": r.get("remarks"),
+            }
+
+
+async def fee_collection_rows(school_id: str, month: str = None, **_) -> AsyncIterator[Dict]:
+    month = month or datetime.now().strftime('%Y-%m')
+    year, mon = (int(part) for part in month.split("-"))
+    next_month = f"{year + (mon == 12):04d}-{mon % 12 + 1:02d}"
+    # ISO created_at strings of the month sort between "YYYY-MM" and the next month's prefix
+    cursor = db.fee_payments.find(
+        {"school_id": school_id, "status": "success", "created_at": {"$gte": month, "$lt": next_month}}, {"_id": 0}
+    ).sort([("created_at", 1), ("_id", 1)])
+    async for batch in iter_batches(cursor, BATCH_SIZE):
+        for p in batch:
+            yield {
+                "date": (p.get("created_at") or "")[:10],
+                "receipt_number": p.get("receipt_number"),
+                "student_sid": p.get("student_sid"),
+                "student_name": p.get("student_name"),
+                "fee_type": p.get("fee_type"),
+                "fee_month": p.get("month"),
+                "payment_method": p.get("payment_method"),
+                "amount": p.get("amount"),
+                "collected_by": p.get("collected_by"),
+            }
+
+
+async def fee_defaulters_rows(school_id: str, min_amount: float = 0, **_) -> AsyncIterator[Dict]:
+    # Same grouping as multi_year_fees.get_all_fee_defaulters, without its top-100 cap
+    pipeline = [
+        {"$match": {"school_id": school_id, "status": {"$in": ["pending", "partial"]}}},
+        {"$group": {
+            "_id": "$student_id",
+            "student_name": {"$first": "$student_name"},
+            "total_dues": {"$sum": "$remaining_amount"},
+            "years": {"$addToSet": "$academic_year"},
+            "oldest_due_year": {"$min": "$academic_year"},
+            "due_count": {"$sum": 1}
+        }},
+        {"$match": {"total_dues": {"$gt": min_amount or 0}}},
+        {"$sort": {"total_dues": -1, "_id": 1}}
+    ]
+    cursor = db.multi_year_dues.aggregate(pipeline, allowDiskUse=True)
+    async for batch in iter_batches(cursor, BATCH_SIZE):
+        for d in batch:
+            yield {
+                "student_id": d["_id"],
+                "student_name": d.get("student_name"),
+                "total_dues": d.get("total_dues", 0),
+                "years_pending": sorted(y for y in d.get("years", []) if y),
+                "oldest_due": d.get("oldest_due_year"),
+                "due_count": d.get("due_count", 0),
+            }
+
+
+REPORTS: Dict[str, Dict[str, Any]] = {
+    "staff-attendance": {
+        "title": "Staff Attendance",
+        "params": ["month", "year"],
+        "source": staff_attendance_rows,
+        "columns": [("date", "Date"), ("staff_id", "Staff ID"), ("staff_name", "Name"),
+                    ("designation", "Designation"), ("status", "Status"), ("check_in_time", "Check-in"),
+                    ("method", "Method")],
+    },
+    "student-attendance": {
+        "title": "Student Attendance",
+        "params": ["from_date", "to_date", "class_id"],
+        "source": student_attendance_rows,
+        "columns": [("date", "Date"), ("class", "Class"), ("admission_no", "Admission No"),
+                    ("roll_number", "Roll No"), ("student_name", "Student"), ("status", "Status"),
+                    ("remarks", "Remarks")],
+    },
+    "fee-collection": {
+        "title": "Fee Collection",
+        "params": ["month"],
+        "source": fee_collection_rows,
+        "columns": [("date", "Date"), ("receipt_number", "Receipt No"), ("student_sid", "Student ID"),
+                    ("student_name", "Student"), ("fee_type", "Fee Type"), ("fee_month", "Fee Month"),
+                    ("payment_method", "Method"), ("amount", "Amount"), ("collected_by", "Collected By")],
+    },
+    "fee-defaulters": {
+        "title": "Fee Defaulters",
+        "params": ["min_amount"],
+        "source": fee_defaulters_rows,
+        "columns": [("student_id", "Student ID"), ("student_name", "Student"), ("total_dues", "Total Dues"),
+                    ("years_pending", "Years Pending"), ("oldest_due", "Oldest Due"), ("due_count", "Dues")],
+    },
+}
+
+
+def get_report(name: str, fmt: str) -> Dict[str, Any]:
+    report = REPORTS.get(name)
+    if report is None:
+        raise ExportError(f"Unknown report '{name}' (available: {', '.join(REPORTS)})")
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format '{fmt}' (csv or xlsx)")
+    if fmt == "xlsx" and not OPENPYXL_AVAILABLE:
+        raise ExportError("XLSX export needs openpyxl on the server - use format=csv")
+    return report
+
+
+def filename_for(name: str, fmt: str, params: Dict[str, Any]) -> str:
+    suffix = "_".join(str(params[k]) for k in REPORTS[name]["params"] if params.get(k) not in (None, ""))
+    return f"{name}{'_' + suffix if suffix else ''}.{fmt}"
+
+
+# ====================== WRITERS ======================
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v) for v in value)
+    return str(value)
+
+
+def _cell_xlsx(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Excel has no timezones: store UTC wall time
+        return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+    if isinstance(value, (list, tuple, dict)):
+        return _cell_text(value)
+    return value
+
+
+async def csv_chunks(rows: AsyncIterator[Dict], columns: Columns) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in columns])
+    yield b"\xef\xbb\xbf" + buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    async for row in rows:
+        writer.writerow([_cell_text(row.get(key)) for key, _ in columns])
+        if buffer.tell() >= CSV_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _append_rows(sheet, rows: List[List[Any]]):
+    for row in rows:
+        sheet.append(row)
+
+
+async def write_xlsx(rows: AsyncIterator[Dict], columns: Columns, path: Path, title: str) -> None:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title[:31])
+    sheet.append([header for _, header in columns])
+    pending: List[List[Any]] = []
+    async for row in rows:
+        pending.append([_cell_xlsx(row.get(key)) for key, _ in columns])
+        if len(pending) >= BATCH_SIZE:
+            await asyncio.to_thread(_append_rows, sheet, pending)
+            pending = []
+    if pending:
+        await asyncio.to_thread(_append_rows, sheet, pending)
+    await asyncio.to_thread(workbook.save, str(path))
+
+
+async def write_file(name: str, fmt: str, school_id: str, params: Dict[str, Any], path: Path,
+                     on_progress: Optional[Callable[[int], Any]] = None) -> int:
+    """Write the whole export to `path`; returns the row count."""
+    report = get_report(name, fmt)
+    count = 0
+
+    async def counted():
+        nonlocal count
+        async for row in report["source"](school_id, **params):
+            count += 1
+            if on_progress is not None and count % PROGRESS_EVERY == 0:
+                await on_progress(count)
+            yield row
+
+    if fmt == "xlsx":
+        await write_xlsx(counted(), report["columns"], path, report["title"])
+    else:
+        with open(path, "wb") as f:
+            async for chunk in csv_chunks(counted(), report["columns"]):
+                f.write(chunk)
+    return count
+
+
+async def xlsx_tempfile(name: str, school_id: str, params: Dict[str, Any]) -> Path:
+    """Build an XLSX for a direct download; the caller deletes it after sending."""
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f"{name}-", suffix=".xlsx", dir=EXPORT_DIR)
+    os.close(fd)
+    try:
+        await write_file(name, "xlsx", school_id, params, Path(tmp))
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return Path(tmp)
+
+
+def csv_stream(name: str, school_id: str, params: Dict[str, Any]) -> AsyncIterator[bytes]:
+    report = get_report(name, "csv")
+    return csv_chunks(report["source"](school_id, **params), report["columns"])
+
+
+# ====================== BACKGROUND JOBS ======================
+
+async def create_job(name: str, fmt: str, school_id: str, params: Dict[str, Any], created_by: str) -> Dict:
+    get_report(name, fmt)
+    job = {
+        "id": str(uuid.uuid4()),
+        "report": name,
+        "format": fmt,
+        "school_id": school_id,
+        "params": params,
+        "filename": filename_for(name, fmt, params),
+        "status": "queued",
+        "rows": 0,
+        "created_by": created_by,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "expires_at": (datetime.now(timezone.utc) + timedelta(hours=EXPORT_TTL_HOURS)).isoformat(),
+    }
+    await db.export_jobs.insert_one(job)
+    job.pop("_id", None)
+    return job
+
+
+async def run_job(job_id: str) -> Optional[str]:
+    """Produce the job's file; status goes queued → running → ready | failed."""
+    job = await db.export_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        return None
+    await purge_expired()
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = EXPORT_DIR / f"{job_id}.{job['format']}"
+    started = datetime.now(timezone.utc)
+    await db.export_jobs.update_one({"id": job_id}, {"$set": {"status": "running", "started_at": started.isoformat()}})
+
+    async def progress(rows: int):
+        await db.export_jobs.update_one({"id": job_id}, {"$set": {"rows": rows}})
+
+    try:
+        rows = await write_file(job["report"], job["format"], job["school_id"], job["params"], path, progress)
+        await db.export_jobs.update_one({"id": job_id}, {"$set": {
+            "status": "ready",
+            "rows": rows,
+            "bytes": path.stat().st_size,
+            "path": str(path),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "seconds": round((datetime.now(timezone.utc) - started).total_seconds(), 2)
+        }})
+        return str(path)
+    except Exception as e:
+        logger.error(f"Export job {job_id} ({job['report']}) failed: {e}")
+        path.unlink(missing_ok=True)
+        await db.export_jobs.update_one({"id": job_id}, {"$set": {"status": "failed", "error": str(e)}})
+        return None
+
+
+async def purge_expired() -> int:
+    """Delete job files and documents past their expiry."""
+    now = datetime.now(timezone.utc).isoformat()
+    expired = await db.export_jobs.find({"expires_at": {"$lt": now}}, {"_id": 0, "id": 1, "path": 1}).to_list(None)
+    for job in expired:
+        if job.get("path"):
+            Path(job["path"]).unlink(missing_ok=True)
+    if expired:
+        await db.export_jobs.delete_many({"id": {"$in": [j["id"] for j in expired]}})
+    return len(expired)
@@ -0,0 +1,332 @@
+"""
+GPS Tracking Service
+- Accepts batched device pings (by vehicle_id or device IMEI)
+- Keeps latest position per vehicle in memory + ring buffer of recent points
+- Persists downsampled tracks to the vehicle_tracks time-series collection
+- Publishes every accepted ping on the event bus for SSE/WebSocket fan-out
+"""
+
+from collections import deque
+from datetime import datetime, timezone
+from math import asin, cos, radians, sin, sqrt
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+
+from pymongo import UpdateOne
+
+from core.database import db
+from core.event_bus import bus
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SIZE = 120            # recent points kept per vehicle
+PERSIST_INTERVAL_SECONDS = 30  # at most one stored point per vehicle per interval...
+PERSIST_DISTANCE_METERS = 100  # ...unless it moved this far
+TRACK_RETENTION_DAYS = 90
+EARTH_RADIUS_M = 6371000.0
+MAX_CLOCK_AHEAD_SECONDS = 300  # a ping further in the future would make every real ping after it "stale"
+MIN_PING_EPOCH = 1577836800    # 2020-01-01: older is a tracker with an unset clock
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in metres."""
+    dlat = radians(lat2 - lat1)
+    dlng = radians(lng2 - lng1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * asin(sqrt(a))
+
+
+def vehicle_topic(vehicle_id: str) -> str:
+    return f"vehicle:{vehicle_id}"
+
+
+def school_transport_topic(school_id: str) -> str:
+    return f"transport:{school_id}"
+
+
+def _to_epoch(ts) -> float:
+    """
+    Ping timestamp (epoch seconds / milliseconds as a number or digit string,
+    ISO string or None) → epoch seconds. Raises ValueError for anything else.
+    """
+    if ts is None:
+        return datetime.now(timezone.utc).timestamp()
+    if isinstance(ts, str) and ts.strip().replace(".", "", 1).isdigit():
+        ts = float(ts)
+    if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+        # Some trackers send milliseconds
+        return ts / 1000.0 if ts > 1e12 else float(ts)
+    dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _parse_ts(ts) -> float:
+    """_to_epoch() for a device's ping; also a ValueError before MIN_PING_EPOCH or more than MAX_CLOCK_AHEAD_SECONDS ahead."""
+    epoch = _to_epoch(ts)
+    if not MIN_PING_EPOCH <= epoch <= datetime.now(timezone.utc).timestamp() + MAX_CLOCK_AHEAD_SECONDS:   # NaN too
+        raise ValueError(f"ping time {ts!r} out of range")
+    return epoch
+
+
+def _parse_position(ping: Dict) -> Tuple[float, float]:
+    """(lat, lng) as floats; raises ValueError when missing or off the globe."""
+    try:
+        lat, lng = float(ping["lat"]), float(ping["lng"])
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"bad position ({e})")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):   # also false for NaN
+        raise ValueError(f"position {lat}, {lng} out of range")
+    return lat, lng
+
+
+class VehiclePositionStore:
+    """In-memory latest position + ring buffer per vehicle (one per worker)."""
+
+    def __init__(
+        self,
+        history_size: int = HISTORY_SIZE,
+        persist_interval: float = PERSIST_INTERVAL_SECONDS,
+        persist_distance: float = PERSIST_DISTANCE_METERS
+    ):
+        self.history_size = history_size
+        self.persist_interval = persist_interval
+        self.persist_distance = persist_distance
+        self._latest: Dict[str, Dict] = {}
+        self._history: Dict[str, deque] = {}
+        self._last_persisted: Dict[str, Dict] = {}
+        self._school_vehicles: Dict[str, set] = {}
+
+    def update(self, vehicle_id: str, school_id: str, ping: Dict) -> Tuple[Optional[Dict], bool]:
+        """
+        Apply one ping. Returns (point, should_persist); point is None when the
+        ping is older than what we already have.
+        """
+        epoch = _to_epoch(ping.get("ts"))   # devices' pings are range-checked in ingest_pings
+        prev = self._latest.get(vehicle_id)
+        if prev and epoch <= prev["epoch"]:
+            return None, False
+
+        lat, lng = float(ping["lat"]), float(ping["lng"])
+        speed = ping.get("speed")
+        if speed is None and prev:
+            elapsed = epoch - prev["epoch"]
+            speed = haversine_m(prev["lat"], prev["lng"], lat, lng) / elapsed * 3.6 if elapsed > 0 else 0
+        point = {
+            "vehicle_id": vehicle_id,
+            "school_id": school_id,
+            "lat": lat,
+            "lng": lng,
+            "speed": round(float(speed or 0), 1),
+            "heading": ping.get("heading"),
+            "epoch": epoch,
+            "last_updated": datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+        }
+
+        self._latest[vehicle_id] = point
+        history = self._history.get(vehicle_id)
+        if history is None:
+            history = self._history[vehicle_id] = deque(maxlen=self.history_size)
+        history.append(point)
+        self._school_vehicles.setdefault(school_id, set()).add(vehicle_id)
+
+        last = self._last_persisted.get(vehicle_id)
+        should_persist = (
+            last is None
+            or epoch - last["epoch"] >= self.persist_interval
+            or haversine_m(last["lat"], last["lng"], lat, lng) >= self.persist_distance
+        )
+        if should_persist:
+            self._last_persisted[vehicle_id] = point
+        return point, should_persist
+
+    def latest(self, vehicle_id: str) -> Optional[Dict]:
+        return self._latest.get(vehicle_id)
+
+    def history(self, vehicle_id: str, limit: Optional[int] = None) -> List[Dict]:
+        points = list(self._history.get(vehicle_id, ()))
+        return points[-limit:] if limit else points
+
+    def school_positions(self, school_id: str) -> Dict[str, Dict]:
+        return {vid: self._latest[vid] for vid in self._school_vehicles.get(school_id, ()) if vid in self._latest}
+
+    def __len__(self):
+        return len(self._latest)
+
+
+store = VehiclePositionStore()
+
+# device IMEI / vehicle id → {"vehicle_id", "school_id"}; vehicles rarely move between schools
+_device_map: Dict[str, Dict] = {}
+_vehicle_map: Dict[str, Dict] = {}
+_tracks_ready = False
+
+# Async callbacks run with the accepted points of every ingested batch (e.g. ETA engine)
+_point_listeners: List[Callable[[List[Dict]], Awaitable[None]]] = []
+
+
+def register_point_listener(fn: Callable[[List[Dict]], Awaitable[None]]):
+    if fn not in _point_listeners:
+        _point_listeners.append(fn)
+
+
+async def ensure_track_collection():
+    """Create the vehicle_tracks time-series collection once per process."""
+    global _tracks_ready
+    if _tracks_ready:
+        return
+    try:
+        existing = await db.list_collection_names(filter={"name": "vehicle_tracks"})
+        if not existing:
+            await db.create_collection(
+                "vehicle_tracks",
+                timeseries={"timeField": "ts", "metaField": "meta", "granularity": "seconds"},
+                expireAfterSeconds=TRACK_RETENTION_DAYS * 86400
+            )
+        _tracks_ready = True
+    except Exception as e:
+        # Pre-5.0 servers: fall back to a plain collection
+        logger.warning(f"vehicle_tracks time-series setup failed: {e}")
+        _tracks_ready = True
+
+
+async def _resolve(pings: List[Dict]) -> None:
+    """Fill _device_map/_vehicle_map for ids we have not seen yet (one $in query each)."""
+    imeis = {p["device_imei"] for p in pings if p.get("device_imei") and p["device_imei"] not in _device_map}
+    if imeis:
+        devices = await db.gps_devices.find(
+            {"device_imei": {"$in": list(imeis)}},
+            {"_id": 0, "device_imei": 1, "vehicle_id": 1, "school_id": 1}
+        ).to_list(None)
+        for d in devices:
+            _device_map[d["device_imei"]] = {"vehicle_id": d["vehicle_id"], "school_id": d["school_id"]}
+
+    vehicle_ids = {p["vehicle_id"] for p in pings if p.get("vehicle_id") and p["vehicle_id"] not in _vehicle_map}
+    if vehicle_ids:
+        vehicles = await db.vehicles.find(
+            {"id": {"$in": list(vehicle_ids)}},
+            {"_id": 0, "id": 1, "school_id": 1}
+        ).to_list(None)
+        for v in vehicles:
+            _vehicle_map[v["id"]] = {"vehicle_id": v["id"], "school_id": v["school_id"]}
+
+
+def _lookup(ping: Dict) -> Optional[Dict]:
+    if ping.get("vehicle_id"):
+        return _vehicle_map.get(ping["vehicle_id"])
+    if ping.get("device_imei"):
+        return _device_map.get(ping["device_imei"])
+    return None
+
+
+def location_event(point: Dict) -> Dict:
+    return {
+        "type": "vehicle_location",
+        "vehicle_id": point["vehicle_id"],
+        "school_id": point["school_id"],
+        "location": {k: point[k] for k in ("lat", "lng", "speed", "heading", "last_updated")}
+    }
+
+
+def apply_pings(resolved: List[Tuple[Dict, Dict]]) -> Tuple[List[Dict], List[Dict]]:
+    """Update the store and fan out. Returns (accepted points, points to persist)."""
+    accepted, to_persist = [], []
+    for meta, ping in resolved:
+        point, persist = store.update(meta["vehicle_id"], meta["school_id"], ping)
+        if point is None:
+            continue
+        accepted.append(point)
+        if persist:
+            to_persist.append(point)
+        event = location_event(point)
+        bus.publish(vehicle_topic(point["vehicle_id"]), event)
+        bus.publish(school_transport_topic(point["school_id"]), event)
+    return accepted, to_persist
+
+
+async def persist_points(points: List[Dict]) -> None:
+    """Write downsampled points to vehicle_tracks and refresh vehicles.current_location."""
+    if not points:
+        return
+    await ensure_track_collection()
+    await db.vehicle_tracks.insert_many([
+        {
+            "ts": datetime.fromtimestamp(p["epoch"], timezone.utc),
+            "meta": {"vehicle_id": p["vehicle_id"], "school_id": p["school_id"]},
+            "lat": p["lat"],
+            "lng": p["lng"],
+            "speed": p["speed"],
+            "heading": p["heading"]
+        }
+        for p in points
+    ], ordered=False)
+
+    # Latest persisted point per vehicle (other workers read this as a fallback)
+    newest: Dict[str, Dict] = {}
+    for p in points:
+        newest[p["vehicle_id"]] = p
+    await db.vehicles.bulk_write([
+        UpdateOne(
+            {"id": vid},
+            {"$set": {"current_location": location_event(p)["location"]}}
+        )
+        for vid, p in newest.items()
+    ], ordered=False)
+
+
+async def ingest_pings(pings: List[Dict]) -> Dict:
+    """Full ingestion path for one device batch."""
+    await _resolve(pings)
+
+    resolved, unknown, rejected = [], 0, 0
+    for ping in pings:
+        meta = _lookup(ping)
+        if meta is None:
+            unknown += 1
+            continue
+        try:
+            ping["ts"] = _parse_ts(ping.get("ts"))
+            ping["lat"], ping["lng"] = _parse_position(ping)
+        except ValueError:
+            rejected += 1   # one bad clock or fix doesn't sink the batch
+            continue
+        resolved.append((meta, ping))
+
+    accepted, to_persist = apply_pings(resolved)
+    await persist_points(to_persist)
+    for listener in _point_listeners:
+        try:
+            await listener(accepted)
+        except Exception as e:
+            logger.error(f"GPS point listener {listener.__name__} failed: {e}")
+
+    return {
+        "received": len(pings),
+        "accepted": len(accepted),
+        "stale": len(resolved) - len(accepted),
+        "unknown_device": unknown,
+        "rejected": rejected,
+        "persisted": len(to_persist)
+    }
+
+
+async def get_vehicle_location(vehicle_id: str) -> Optional[Dict]:
+    """Latest location from memory, else the last persisted one (pinged on another worker)."""
+    point = store.latest(vehicle_id)
+    if point:
+        return location_event(point)["location"]
+    vehicle = await db.vehicles.find_one({"id": vehicle_id}, {"_id": 0, "current_location": 1})
+    return vehicle.get("current_location") if vehicle else None
+
+
+async def get_track(vehicle_id: str, since: Optional[datetime] = None, limit: int = 500) -> List[Dict]:
+    """Stored (downsampled) track for a vehicle, oldest first."""
+    query = {"meta.vehicle_id": vehicle_id}
+    if since:
+        query["ts"] = {"$gte": since}
+    points = await db.vehicle_tracks.find(
+        query, {"_id": 0, "meta": 0}
+    ).sort("ts", -1).to_list(limit)
+    points.reverse()
+    return points
@@ -0,0 +1,196 @@
+"""
+Local Intent Router (Tino commands without an LLM round-trip)
+- Keyword stage: each intent's phrases compiled into one regex; the first
+  intent in table order that matches wins, the same priority the old
+  `if any(k in text ...)` chains had
+- Fuzzy stage: character 2/3-gram TF-IDF vectors of every phrase, looked up
+  through an inverted index; catches typos and re-orderings ("attendence
+  aaj ki", "fee pending kitne") that no keyword contains
+- Confidence: for a keyword hit, the share of the utterance explained by
+  the keyword plus filler words ("aaj", "kitne", "batao", ...); a
+  multi-word keyword may take the fuzzy score instead when it is higher.
+  A one-word keyword never does - the n-grams of "emergency" alone make
+  "emergency leave chahiye" look similar - so any utterance that merely
+  contains "problem" or "issue" alongside other words scores low and goes
+  to the LLM. For a fuzzy hit, the cosine similarity
+- Write intents (send SMS, mark attendance, ...) are only ever reached by
+  keyword, never by a fuzzy guess
+- detect_language(): Hindi / Hinglish / English from script and marker words
+
+Everything is compiled once at import; classify() on a one-line utterance
+takes tens of microseconds.
+
+    router = IntentRouter({"fee_status": ["pending fees", "fee status"], ...},
+                          writes={"fee_reminder"})
+    route = router.classify("fee pending kitne hai")
+    if route and route.confidence >= DIRECT_CONFIDENCE:
+        ...   # run the intent's handler, skip the LLM
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+import math
+import os
+import re
+
+DIRECT_CONFIDENCE = float(os.environ.get("INTENT_DIRECT_CONFIDENCE", "0.75"))
+FUZZY_MIN_SCORE = float(os.environ.get("INTENT_FUZZY_MIN_SCORE", "0.7"))
+FUZZY_MIN_MARGIN = 0.08    # over the runner-up intent, else it's a coin toss
+NGRAM_SIZES = (2, 3)
+
+# Words that carry no intent of their own - they don't count against a keyword hit
+FILLER_WORDS = frozenset("""
+    aaj abhi ab ek ki ka ke ko hai hain ho tha kya kitne kitni kitna kaun kaunse kon mein me main se
+    par pe batao bata btao dikhao dikha do karo kar kardo kijiye please plz pls mujhe hume humein
+    hamare hamara hamari mera meri school wala wali wale page open kholo khol le jao chalo yaar bhai
+    ji sir madam sab sabhi zara jara tino hey hi hello ok okay toh to bhi list
+    the a an is are what how many show tell me today todays of in for my our all please can you
+    और क्या है हैं की का के को में आज बताओ दिखाओ कितने कितनी कौन से
+""".split())
+
+_WORD = re.compile(r"[\wऀ-ॿ]+")
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+_ENGLISH_MARKERS = frozenset(["the", "is", "are", "what", "how", "please", "show", "tell"])
+_HINGLISH_MARKERS = frozenset(["kya", "hai", "karo", "batao", "bhai", "yaar", "achha", "theek", "haan",
+                               "nahi", "kaise", "kyun", "kaun", "kahan", "kitna"])
+
+
+@dataclass
+class Route:
+    intent: str
+    confidence: float
+    source: str              # "keyword" | "fuzzy"
+    matched: str = ""        # the keyword, or the nearest training phrase
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def _content(words: Iterable[str]) -> List[str]:
+    return [w for w in words if w not in FILLER_WORDS]
+
+
+def _ngrams(text: str) -> Dict[str, int]:
+    counts: Dict[str, int] = defaultdict(int)
+    for word in text.split():
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(max(len(padded) - n + 1, 1)):
+                counts[padded[i:i + n]] += 1
+    return counts
+
+
+class IntentRouter:
+    def __init__(self, intents: Dict[str, List[str]], writes: Collection[str] = ()):
+        """intents: name → trigger phrases, in priority order (dicts keep insertion order)."""
+        self.order = list(intents)
+        self.writes = frozenset(writes)
+        self._keyword = [
+            (name, re.compile("|".join(re.escape(p.lower()) for p in sorted(phrases, key=len, reverse=True))))
+            for name, phrases in intents.items() if phrases
+        ]
+        # fuzzy model: one TF-IDF vector per training phrase (filler words removed)
+        samples: List[Tuple[str, str, Dict[str, int]]] = []
+        for name, phrases in intents.items():
+            for phrase in phrases:
+                text = " ".join(_content(normalize(phrase).split())) or normalize(phrase)
+                if text:
+                    samples.append((name, phrase, _ngrams(text)))
+        df: Dict[str, int] = defaultdict(int)
+        for _, _, grams in samples:
+            for g in grams:
+                df[g] += 1
+        self._idf = {g: math.log((1 + len(samples)) / (1 + n)) + 1 for g, n in df.items()}
+        self._samples: List[Tuple[str, str]] = []
+        self._index: Dict[str, List[Tuple[int, float]]] = defaultdict(list)   # n-gram → (sample, weight)
+        for i, (name, phrase, grams) in enumerate(samples):
+            vec = self._weigh(grams)
+            self._samples.append((name, phrase))
+            for g, w in vec.items():
+                self._index[g].append((i, w))
+
+    def _weigh(self, grams: Dict[str, int]) -> Dict[str, float]:
+        vec = {g: (1 + math.log(n)) * self._idf.get(g, 0.0) for g, n in grams.items()}
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {g: w / norm for g, w in vec.items() if w}
+
+    # ---------- stages ----------
+
+    def match(self, text: str, allowed: Optional[Collection[str]] = None) -> Optional[Route]:
+        """Keyword stage only: first intent (table order) with a phrase in the text."""
+        lowered = text.lower()
+        for name, pattern in self._keyword:
+            if allowed is not None and name not in allowed:
+                continue
+            hit = pattern.search(lowered)
+            if hit:
+                return Route(name, self._coverage(lowered, hit.group(0)), "keyword", hit.group(0))
+        return None
+
+    def similar(self, text: str) -> Dict[str, Tuple[float, str]]:
+        """Fuzzy stage: best cosine similarity per intent, with the phrase that gave it."""
+        words = normalize(text).split()
+        query = " ".join(_content(words)) or " ".join(words)
+        scores: Dict[int, float] = defaultdict(float)
+        for g, w in self._weigh(_ngrams(query)).items():
+            for i, sw in self._index.get(g, ()):
+                scores[i] += w * sw
+        best: Dict[str, Tuple[float, str]] = {}
+        for i, score in scores.items():
+            name, phrase = self._samples[i]
+            if score > best.get(name, (0.0, ""))[0]:
+                best[name] = (score, phrase)
+        return best
+
+    def classify(self, text: str, allowed: Optional[Collection[str]] = None) -> Optional[Route]:
+        """
+        Keyword hit if there is one (confidence = coverage, or the fuzzy
+        score when higher and the keyword is a phrase), else the nearest
+        read-only intent when it is clearly ahead.
+        `allowed` limits the candidate intents (e.g. by role).
+        """
+        if not text or not text.strip():
+            return None
+        route = self.match(text, allowed)
+        similar = self.similar(text)
+        if route:
+            if len(route.matched.split()) > 1:
+                route.confidence = max(route.confidence, similar.get(route.intent, (0.0, ""))[0])
+            return route
+
+        ranked = sorted(
+            ((score, name, phrase) for name, (score, phrase) in similar.items()
+             if name not in self.writes and (allowed is None or name in allowed)),
+            reverse=True
+        )
+        if not ranked or ranked[0][0] < FUZZY_MIN_SCORE:
+            return None
+        runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+        if ranked[0][0] - runner_up < FUZZY_MIN_MARGIN:
+            return None
+        score, name, phrase = ranked[0]
+        return Route(name, min(score, 1.0), "fuzzy", phrase)
+
+    @staticmethod
+    def _coverage(lowered: str, keyword: str) -> float:
+        """Share of the utterance's words that are the keyword or filler."""
+        words = normalize(lowered).split()
+        if not words:
+            return 0.0
+        rest = normalize(lowered.replace(keyword, " ", 1)).split()
+        explained = (len(words) - len(rest)) + sum(1 for w in rest if w in FILLER_WORDS)
+        return explained / len(words)
+
+
+def detect_language(text: str) -> str:
+    """hindi when written in Devanagari, else hinglish / english by marker words (default hinglish)."""
+    if len(_DEVANAGARI.findall(text)) > 5:
+        return "hindi"
+    words = set(normalize(text).split())
+    if len(words & _HINGLISH_MARKERS) >= 2:
+        return "hinglish"
+    if len(words & _ENGLISH_MARKERS) >= 2:
+        return "english"
+    return "hinglish"
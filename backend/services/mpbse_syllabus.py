@@ -425,37 +425,5 @@ class MPBSESyllabusService:
     
     @staticmethod
     def search_topics(query: str, class_num: str = None):
-        results = []
-        query_lower = query.lower()
-        
-        classes_to_search = [class_num] if class_num else MPBSE_SYLLABUS_DATA.keys()
-        
-        for cls in classes_to_search:
-            if cls not in MPBSE_SYLLABUS_DATA:
-                continue
-            
-            for subject, subject_data in MPBSE_SYLLABUS_DATA[cls]["subjects"].items():
-                for chapter in subject_data.get("chapters", []):
-                    if query_lower in chapter["name"].lower():
-                        results.append({
-                            "class": cls,
-                            "subject": subject,
-                            "board": "MPBSE",
-                            "chapter": chapter["name"],
-                            "chapter_number": chapter["number"],
-                            "match_type": "chapter_name"
-                        })
-                    
-                    for topic in chapter.get("topics", []):
-                        if query_lower in topic.lower():
-                            results.append({
-                                "class": cls,
-                                "subject": subject,
-                                "board": "MPBSE",
-                                "chapter": chapter["name"],
-                                "chapter_number": chapter["number"],
-                                "topic": topic,
-                                "match_type": "topic"
-                            })
-        
-        return results
+        from services.syllabus_index import get_index
+        return get_index().search(query, board="MPBSE", class_num=class_num)
@@ -1330,40 +1330,11 @@ class NCERTSyllabusService:
     
     @staticmethod
     def search_topics(query: str, class_num: str = None) -> List[Dict]:
-        """Search for topics across syllabus"""
-        results = []
-        query_lower = query.lower()
-        
-        classes_to_search = [class_num] if class_num else NCERT_SYLLABUS_DATA.keys()
-        
-        for cls in classes_to_search:
-            if cls not in NCERT_SYLLABUS_DATA:
-                continue
-            
-            for subject, subject_data in NCERT_SYLLABUS_DATA[cls]["subjects"].items():
-                for chapter in subject_data.get("chapters", []):
-                    # Search in chapter name
-                    if query_lower in chapter["name"].lower():
-                        results.append({
-                            "class": cls,
-                            "subject": subject,
-                            "chapter": chapter["name"],
-                            "chapter_number": chapter["number"],
-                            "match_type": "chapter_name"
-                        })
-                    
-                    # Search in topics
-                    for topic in chapter.get("topics", []):
-                        if query_lower in topic.lower():
-                            results.append({
-                                "class": cls,
-                                "subject": subject,
-                                "chapter": chapter["name"],
-                                "chapter_number": chapter["number"],
-                                "topic": topic,
-                                "match_type": "topic"
-                            })
-        
+        """Ranked search of chapter names and topics (Hindi / English / transliterated)"""
+        from services.syllabus_index import get_index
+        results = get_index().search(query, board="NCERT", class_num=class_num)
+        for r in results:
+            r.pop("board", None)
         return results
     
     @staticmethod
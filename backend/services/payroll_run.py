@@ -0,0 +1,298 @@
+"""
+Payroll Run Engine
+- Prefetches structures, staff and existing payments for a month in bulk ($in queries)
+- Computes salary slips in memory
+- Writes slips with a single insert_many
+- Unique (staff_id, month) index on credited payments makes re-runs idempotent
+- Stores a run summary in salary_runs for CSV download
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import csv
+import io
+import logging
+import uuid
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from core.database import db
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+_indexes_ready = False
+
+
+async def ensure_payroll_indexes():
+    """Create payroll indexes once per process (safe to call on every run)."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        # Partial filter: legacy ai-accountant rows use employee_id and status=pending/paid,
+        # so only credited rows keyed by staff_id take part in the uniqueness check.
+        await db.salary_payments.create_index(
+            [("staff_id", 1), ("month", 1)],
+            name="uniq_staff_month_credited",
+            unique=True,
+            partialFilterExpression={"status": "credited", "staff_id": {"$exists": True}}
+        )
+        await db.salary_payments.create_index([("school_id", 1), ("month", 1), ("status", 1)])
+        await db.salary_structures.create_index([("staff_id", 1), ("is_active", 1)])
+        await db.salary_runs.create_index([("school_id", 1), ("month", 1), ("created_at", -1)])
+        _indexes_ready = True
+    except Exception as e:
+        # Existing duplicate rows block the unique index; the run still works,
+        # it just falls back to the prefetch check for idempotency.
+        logger.warning(f"Payroll index creation failed: {e}")
+
+
+def _new_slip_no() -> str:
+    return f"SAL-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:6].upper()}"
+
+
+async def _resolve_staff_ids(school_id: str, branch_id: Optional[str]) -> List[str]:
+    """All staff with an active salary structure in the school (optionally one branch)."""
+    structures = await db.salary_structures.find(
+        {"school_id": school_id, "is_active": True},
+        {"_id": 0, "staff_id": 1}
+    ).to_list(None)
+    staff_ids = [s["staff_id"] for s in structures if s.get("staff_id")]
+    if not branch_id or not staff_ids:
+        return staff_ids
+
+    in_branch = await db.staff.find(
+        {"id": {"$in": staff_ids}, "branch_id": branch_id},
+        {"_id": 0, "id": 1}
+    ).to_list(None)
+    users_in_branch = await db.users.find(
+        {"id": {"$in": staff_ids}, "branch_id": branch_id},
+        {"_id": 0, "id": 1}
+    ).to_list(None)
+    allowed = {s["id"] for s in in_branch} | {u["id"] for u in users_in_branch}
+    return [sid for sid in staff_ids if sid in allowed]
+
+
+async def _prefetch(staff_ids: List[str], month: str) -> Dict[str, Dict]:
+    """Load everything the run needs with one $in query per collection."""
+    paid_rows = await db.salary_payments.find(
+        {"staff_id": {"$in": staff_ids}, "month": month, "status": "credited"},
+        {"_id": 0, "staff_id": 1, "slip_no": 1}
+    ).to_list(None)
+
+    structures = await db.salary_structures.find(
+        {"staff_id": {"$in": staff_ids}, "is_active": True},
+        {"_id": 0}
+    ).to_list(None)
+
+    staff_rows = await db.staff.find(
+        {"id": {"$in": staff_ids}},
+        {"_id": 0, "id": 1, "name": 1, "designation": 1, "branch_id": 1}
+    ).to_list(None)
+    people = {s["id"]: s for s in staff_rows}
+
+    missing = [sid for sid in staff_ids if sid not in people]
+    if missing:
+        user_rows = await db.users.find(
+            {"id": {"$in": missing}},
+            {"_id": 0, "id": 1, "name": 1, "role": 1, "branch_id": 1}
+        ).to_list(None)
+        for u in user_rows:
+            people[u["id"]] = u
+
+    return {
+        "paid": {p["staff_id"]: p for p in paid_rows},
+        "structures": {s["staff_id"]: s for s in structures},
+        "people": people
+    }
+
+
+def build_slips(
+    staff_ids: List[str],
+    school_id: str,
+    month: str,
+    payment_mode: str,
+    prefetched: Dict[str, Dict]
+) -> Dict[str, List[Dict]]:
+    """Compute payment documents and per-staff outcomes in memory."""
+    now = datetime.now(timezone.utc).isoformat()
+    payments = []
+    items = []
+    seen = set()
+
+    for staff_id in staff_ids:
+        if staff_id in seen:
+            continue
+        seen.add(staff_id)
+
+        person = prefetched["people"].get(staff_id)
+        name = person.get("name") if person else "Staff"
+
+        if staff_id in prefetched["paid"]:
+            items.append({
+                "staff_id": staff_id,
+                "staff_name": name,
+                "status": "already_credited",
+                "slip_no": prefetched["paid"][staff_id].get("slip_no"),
+                "net_salary": 0
+            })
+            continue
+
+        structure = prefetched["structures"].get(staff_id)
+        if not structure:
+            items.append({
+                "staff_id": staff_id,
+                "staff_name": name,
+                "status": "error",
+                "reason": "No salary structure",
+                "net_salary": 0
+            })
+            continue
+
+        slip_no = _new_slip_no()
+        payments.append({
+            "id": str(uuid.uuid4()),
+            "slip_no": slip_no,
+            "staff_id": staff_id,
+            "staff_name": name,
+            "school_id": school_id,
+            "branch_id": person.get("branch_id") if person else None,
+            "month": month,
+            "gross_salary": structure.get("gross_salary", 0),
+            "deductions": structure.get("total_deductions", 0),
+            "net_salary": structure.get("net_salary", 0),
+            "payment_mode": payment_mode,
+            "status": "credited",
+            "payment_date": now,
+            "created_at": now
+        })
+        items.append({
+            "staff_id": staff_id,
+            "staff_name": name,
+            "designation": (person.get("designation") or person.get("role", "Staff")) if person else "Staff",
+            "status": "credited",
+            "slip_no": slip_no,
+            "gross_salary": structure.get("gross_salary", 0),
+            "deductions": structure.get("total_deductions", 0),
+            "net_salary": structure.get("net_salary", 0)
+        })
+
+    return {"payments": payments, "items": items}
+
+
+async def _write_payments(payments: List[Dict]) -> set:
+    """insert_many (unordered); returns staff_ids rejected by the unique index."""
+    if not payments:
+        return set()
+    try:
+        await db.salary_payments.insert_many(payments, ordered=False)
+        return set()
+    except BulkWriteError as e:
+        duplicates = set()
+        for err in e.details.get("writeErrors", []):
+            if err.get("code") != DUPLICATE_KEY_ERROR:
+                raise
+            duplicates.add(payments[err["index"]]["staff_id"])
+        return duplicates
+
+
+async def run_payroll(
+    school_id: str,
+    month: str,
+    staff_ids: Optional[List[str]] = None,
+    payment_mode: str = "bank_transfer",
+    branch_id: Optional[str] = None,
+    created_by: Optional[str] = None
+) -> Dict:
+    """
+    Credit salaries for many staff in one pass.
+    staff_ids=None pays every staff member with an active structure.
+    """
+    await ensure_payroll_indexes()
+
+    if staff_ids is None:
+        staff_ids = await _resolve_staff_ids(school_id, branch_id)
+
+    prefetched = await _prefetch(staff_ids, month) if staff_ids else {
+        "paid": {}, "structures": {}, "people": {}
+    }
+    slips = build_slips(staff_ids, school_id, month, payment_mode, prefetched)
+
+    # A concurrent run may have credited someone between prefetch and insert
+    duplicates = await _write_payments(slips["payments"])
+    credited_ids = set()
+    for item in slips["items"]:
+        if item["status"] != "credited":
+            continue
+        if item["staff_id"] in duplicates:
+            item["status"] = "already_credited"
+            item["net_salary"] = 0
+        else:
+            credited_ids.add(item["staff_id"])
+
+    if credited_ids:
+        now = datetime.now(timezone.utc).isoformat()
+        await db.staff.bulk_write([
+            UpdateOne(
+                {"id": p["staff_id"]},
+                {"$set": {
+                    "last_salary_month": month,
+                    "last_salary_amount": p["net_salary"],
+                    "last_salary_date": now
+                }}
+            )
+            for p in slips["payments"] if p["staff_id"] in credited_ids
+        ], ordered=False)
+
+    credited_items = [i for i in slips["items"] if i["status"] == "credited"]
+    run = {
+        "id": str(uuid.uuid4()),
+        "school_id": school_id,
+        "branch_id": branch_id,
+        "month": month,
+        "payment_mode": payment_mode,
+        "created_by": created_by,
+        "summary": {
+            "requested": len(slips["items"]),
+            "credited": len(credited_items),
+            "already_credited": sum(1 for i in slips["items"] if i["status"] == "already_credited"),
+            "errors": sum(1 for i in slips["items"] if i["status"] == "error"),
+            "total_gross": sum(i.get("gross_salary", 0) for i in credited_items),
+            "total_deductions": sum(i.get("deductions", 0) for i in credited_items),
+            "total_net": sum(i.get("net_salary", 0) for i in credited_items)
+        },
+        "items": slips["items"],
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.salary_runs.insert_one(run)
+    run.pop("_id", None)
+    return run
+
+
+def run_summary_csv(run: Dict) -> str:
+    """Render a payroll run as CSV for download."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["Staff ID", "Name", "Designation", "Status", "Slip No",
+                     "Gross", "Deductions", "Net", "Remarks"])
+    for item in run.get("items", []):
+        writer.writerow([
+            item.get("staff_id"),
+            item.get("staff_name"),
+            item.get("designation", ""),
+            item.get("status"),
+            item.get("slip_no") or "",
+            item.get("gross_salary", 0),
+            item.get("deductions", 0),
+            item.get("net_salary", 0),
+            item.get("reason", "")
+        ])
+    summary = run.get("summary", {})
+    writer.writerow([])
+    writer.writerow(["Total", "", "", f"{summary.get('credited', 0)} credited", "",
+                     summary.get("total_gross", 0), summary.get("total_deductions", 0),
+                     summary.get("total_net", 0), ""])
+    return buf.getvalue()
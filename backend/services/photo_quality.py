@@ -0,0 +1,318 @@
+"""
+Local Photo Quality Analyzer (enrollment photos, before any vision API call)
+- Sharpness: variance of the Laplacian of the face, resized to a fixed
+  width and contrast first so the score doesn't depend on how big or how
+  brightly lit the face is
+- Exposure: 256-bin histogram of the face region - mean brightness,
+  share of clipped shadows / highlights, 5th-95th percentile contrast
+- Framing: face box width against the image width (per photo type) and
+  the distance of the face centre from the image centre
+- Pose: yaw and roll from YuNet landmarks (eyes, nose tip) when the
+  CCTV_FACE_MODEL is configured; with the bundled Haar cascades the pose
+  is only frontal / profile (frontal vs profile cascade, mirrored for the
+  other side)
+- Without a face detector (OpenCV missing) the same sharpness and
+  exposure measures are taken over the centre of the image, where the
+  face should be; a blank, blurred, dark or overexposed photo is still
+  rejected locally and a clearly good one accepted (face not verified:
+  the route sends it to the vision API when a key is set, and otherwise
+  stores it with ai_verified False)
+- Same result keys as the vision analysis (face_detected, quality_score,
+  face_clear, angle_correct, issues, recommendations) plus the raw metrics,
+  source="local" and an ambiguous flag: no face / more than one face
+  found, or a score within AMBIGUOUS_BAND of the acceptance threshold.
+  Only ambiguous photos go to the vision API.
+
+analyze_photo is a plain module-level function, run on the CPU process pool:
+
+    result = await run_cpu(analyze_photo, jpeg_bytes, "front")
+"""
+
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+import math
+
+import numpy as np
+
+from services.cctv_gate import OPENCV_AVAILABLE, detect_faces, detector_kind, get_detector, sharpness
+
+if OPENCV_AVAILABLE:
+    import cv2
+
+ANALYZE_WIDTH = 800              # photos are decoded at (about) this width
+SHARPNESS_WIDTH = 160            # face resized to this width before the Laplacian
+SHARPNESS_STD = 50.0             # face grey levels scaled to this standard deviation first
+SHARPNESS_RANGE = (15.0, 80.0)   # Laplacian variance: blurred .. crisp
+BRIGHTNESS_TARGET = 130
+BRIGHTNESS_TOLERANCE = 50        # face mean within target ± this is well exposed
+CLIPPED_MAX_SHARE = 0.05         # pixels at the ends of the histogram
+MIN_CONTRAST = 60                # 95th - 5th percentile grey level
+ACCEPT_SCORE = 60                # upload routes reject below this
+AMBIGUOUS_BAND = 10              # scores within ± this of ACCEPT_SCORE are ambiguous
+FRONTAL_MAX_YAW = 15.0           # degrees
+PROFILE_YAW_RANGE = (20.0, 65.0)
+MAX_ROLL = 15.0
+NOSE_DEPTH = 0.6                 # nose tip in front of the eye line, in inter-eye distances
+WEIGHTS = {"sharpness": 0.35, "exposure": 0.25, "size": 0.2, "centering": 0.2}
+CENTRE_REGION = (0.6, 0.7)       # share of width / height judged when there is no face box
+BLANK_MAX_CONTRAST = 12          # 95th - 5th percentile grey level of an image with nothing in it
+
+# face width / image width for a full score, per photo type
+FACE_SIZE_TARGET = {"passport": 0.3, "front": 0.25, "left": 0.2, "right": 0.2, "full_body": 0.05}
+FRONTAL_TYPES = ("passport", "front")
+PROFILE_TYPES = ("left", "right")
+
+_profile_cascade = None
+
+
+# ====================== MEASUREMENTS ======================
+
+def exposure(gray: np.ndarray) -> Dict[str, float]:
+    """Histogram statistics of a grayscale region."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum() or 1.0
+    cumulative = np.cumsum(hist) / total
+    levels = np.arange(256)
+    return {
+        "brightness": round(float((hist * levels).sum() / total), 1),
+        "shadows": round(float(hist[:16].sum() / total), 4),
+        "highlights": round(float(hist[240:].sum() / total), 4),
+        "contrast": int(np.searchsorted(cumulative, 0.95) - np.searchsorted(cumulative, 0.05)),
+    }
+
+
+def exposure_score(stats: Dict[str, float]) -> float:
+    off = max(abs(stats["brightness"] - BRIGHTNESS_TARGET) - BRIGHTNESS_TOLERANCE, 0) / BRIGHTNESS_TOLERANCE
+    clipped = max(stats["shadows"], stats["highlights"]) - CLIPPED_MAX_SHARE
+    flat = max(MIN_CONTRAST - stats["contrast"], 0) / MIN_CONTRAST
+    return float(np.clip(100 - 60 * off - 200 * max(clipped, 0) - 50 * flat, 0, 100))
+
+
+def face_sharpness(gray: np.ndarray, box: Tuple[int, int, int, int]) -> float:
+    from PIL import Image
+    x, y, w, h = box
+    face = gray[max(y, 0):y + h, max(x, 0):x + w]
+    if face.size == 0:
+        return 0.0
+    height = max(round(face.shape[0] * SHARPNESS_WIDTH / face.shape[1]), 3)
+    face = np.asarray(Image.fromarray(face).resize((SHARPNESS_WIDTH, height), Image.BILINEAR), dtype=np.float32)
+    # contrast-normalised, so a dark (low-contrast) face isn't also called blurry
+    return sharpness(face * (SHARPNESS_STD / max(float(face.std()), 5.0)))
+
+
+def pose_from_landmarks(landmarks: np.ndarray) -> Dict[str, float]:
+    """
+    Yaw and roll in degrees from YuNet's 5 landmarks (right eye, left eye,
+    nose tip, mouth corners). The nose tip sits NOSE_DEPTH inter-eye
+    distances in front of the eyes, so its sideways offset from the eye
+    midpoint over the (foreshortened) eye distance is NOSE_DEPTH·tan(yaw).
+    """
+    points = landmarks.reshape(5, 2)
+    right_eye, left_eye, nose = points[0], points[1], points[2]
+    eye_vector = left_eye - right_eye
+    eye_distance = float(np.hypot(*eye_vector)) or 1.0
+    roll = math.degrees(math.atan2(eye_vector[1], eye_vector[0]))
+    offset = float(np.dot(nose - (right_eye + left_eye) / 2, eye_vector / eye_distance)) / eye_distance
+    return {"yaw": round(math.degrees(math.atan(offset / NOSE_DEPTH)), 1), "roll": round(roll, 1)}
+
+
+def _profiles(gray: np.ndarray) -> List[Tuple[Tuple[int, int, int, int], str]]:
+    """Profile faces from the Haar profile cascade, which only finds one side; the mirror finds the other."""
+    global _profile_cascade
+    if _profile_cascade is None:
+        _profile_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_profileface.xml")
+    width = gray.shape[1]
+    found = []
+    for flipped in (False, True):
+        image = np.ascontiguousarray(gray[:, ::-1]) if flipped else gray
+        for x, y, w, h in _profile_cascade.detectMultiScale(image, scaleFactor=1.1, minNeighbors=5, minSize=(40, 40)):
+            box = (width - x - w, y, w, h) if flipped else (x, y, w, h)
+            found.append((tuple(int(v) for v in box), "mirrored" if flipped else "direct"))
+    return found
+
+
+def find_faces(rgb: np.ndarray, gray: np.ndarray) -> List[Dict[str, Any]]:
+    """Faces as {box, pose, yaw?, roll?}; pose is frontal | profile | unknown (yunet: past PROFILE_YAW_RANGE)."""
+    kind, detector = get_detector()
+    if kind == "yunet":
+        height, width = gray.shape
+        detector.setInputSize((width, height))
+        _, faces = detector.detect(np.ascontiguousarray(rgb[:, :, ::-1]))
+        found = []
+        for f in (faces if faces is not None else []):
+            angles = pose_from_landmarks(f[4:14])
+            yaw = abs(angles["yaw"])
+            pose = "frontal" if yaw <= FRONTAL_MAX_YAW else ("profile" if yaw <= PROFILE_YAW_RANGE[1] else "unknown")
+            found.append({"box": tuple(int(v) for v in f[:4]), "pose": pose, **angles})
+        return found
+    faces = [{"box": box, "pose": "frontal"} for box in detect_faces(rgb, gray)]
+    if faces:
+        return faces
+    return [{"box": box, "pose": "profile", "profile_cascade": side} for box, side in _profiles(gray)]
+
+
+# ====================== SCORING ======================
+
+def exposure_issues(stats: Dict[str, float], subject: str) -> Tuple[List[str], List[str]]:
+    if stats["brightness"] < BRIGHTNESS_TARGET - BRIGHTNESS_TOLERANCE:
+        return [f"{subject} is too dark"], ["Move to better light or face a window"]
+    if stats["brightness"] > BRIGHTNESS_TARGET + BRIGHTNESS_TOLERANCE:
+        return [f"{subject} is overexposed"], ["Avoid direct sunlight or flash on the face"]
+    return [], []
+
+
+def whole_image_quality(gray: np.ndarray) -> Dict[str, Any]:
+    """
+    Sharpness and exposure of the centre of the photo, for when there is no
+    face detector. Framing and pose can't be judged, so the score is the
+    lower of the sharpness and exposure scores, and a photo that isn't
+    blank is assumed to hold a face (metrics["face_verified"] is False).
+    """
+    height, width = gray.shape
+    w, h = round(width * CENTRE_REGION[0]), round(height * CENTRE_REGION[1])
+    box = ((width - w) // 2, (height - h) // 2, w, h)
+    x, y = box[:2]
+    stats = exposure(gray[y:y + h, x:x + w])
+    metrics: Dict[str, Any] = {
+        "region": list(box),
+        "sharpness": round(face_sharpness(gray, box), 1),
+        "exposure": stats,
+        "face_verified": False,
+    }
+    if stats["contrast"] <= BLANK_MAX_CONTRAST:
+        return {
+            "ambiguous": False, "face_detected": False, "quality_score": 0, "face_clear": False,
+            "issues": ["No face detected - the photo is blank"],
+            "recommendations": ["Face the camera in good light, with the whole face inside the frame"],
+            "metrics": metrics,
+        }
+
+    low, high = SHARPNESS_RANGE
+    scores = {
+        "sharpness": float(np.clip((metrics["sharpness"] - low) / (high - low), 0, 1) * 100),
+        "exposure": exposure_score(stats),
+    }
+    metrics["scores"] = {k: round(v) for k, v in scores.items()}
+    quality_score = round(min(scores.values()))   # blurred or badly lit is unusable, whatever the other measure
+    issues, recommendations = exposure_issues(stats, "Photo")
+    if scores["sharpness"] < 50:
+        issues.insert(0, "Photo is blurry")
+        recommendations.insert(0, "Hold the camera steady and tap to focus on the face")
+    return {
+        "ambiguous": abs(quality_score - ACCEPT_SCORE) < AMBIGUOUS_BAND,
+        "face_detected": True,
+        "quality_score": quality_score,
+        "face_clear": scores["sharpness"] >= 50,
+        "issues": issues,
+        "recommendations": recommendations,
+        "metrics": metrics,
+    }
+
+
+def angle_check(photo_type: str, face: Dict[str, Any]) -> Optional[bool]:
+    """True / False, or None when the pose can't be told apart well enough."""
+    if photo_type in FRONTAL_TYPES:
+        if abs(face.get("roll", 0)) > MAX_ROLL:
+            return False
+        return face["pose"] == "frontal"
+    if photo_type in PROFILE_TYPES:
+        if "yaw" in face:
+            return PROFILE_YAW_RANGE[0] <= abs(face["yaw"]) <= PROFILE_YAW_RANGE[1]
+        # Haar: a frontal hit may still be a slight turn, so that's not a clear "wrong angle"
+        return True if face["pose"] == "profile" else None
+    return True
+
+
+def analyze_photo(jpeg: bytes, photo_type: str) -> Dict[str, Any]:
+    """
+    Judge one enrollment photo. Raises ValueError for data that isn't an image.
+    Left / right photos are checked for a turned head, not for which way it's
+    turned - landmarks can't tell the subject's left from a mirrored selfie.
+    """
+    from PIL import Image, UnidentifiedImageError
+    try:
+        image = Image.open(BytesIO(jpeg))
+        image.draft("RGB", (ANALYZE_WIDTH, ANALYZE_WIDTH))
+        image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"not an image ({e})")
+    if image.width > ANALYZE_WIDTH:
+        image = image.resize((ANALYZE_WIDTH, round(image.height * ANALYZE_WIDTH / image.width)), Image.BILINEAR)
+    rgb = np.asarray(image)
+    gray = np.asarray(image.convert("L"))
+    height, width = gray.shape
+
+    result: Dict[str, Any] = {"success": True, "source": "local", "detector": detector_kind(), "photo_type": photo_type}
+    if result["detector"] is None:
+        result.update(whole_image_quality(gray))
+        return result
+
+    faces = find_faces(rgb, gray)
+    result["faces_found"] = len(faces)
+    if not faces:
+        result.update({
+            "ambiguous": True, "face_detected": False, "quality_score": 0, "face_clear": False, "angle_correct": False,
+            "issues": ["No face detected"],
+            "recommendations": ["Face the camera in good light, with the whole face inside the frame"],
+            "metrics": {"exposure": exposure(gray)},
+        })
+        return result
+
+    face = max(faces, key=lambda f: f["box"][2] * f["box"][3])
+    x, y, w, h = face["box"]
+    region = gray[max(y, 0):y + h, max(x, 0):x + w]
+    metrics: Dict[str, Any] = {
+        "box": [x, y, w, h],
+        "pose": face["pose"],
+        "sharpness": round(face_sharpness(gray, face["box"]), 1),
+        "exposure": exposure(region),
+        "face_width_share": round(w / width, 3),
+        "center_offset": round(float(np.hypot((x + w / 2) / width - 0.5, (y + h / 2) / height - 0.5)), 3),
+    }
+    metrics.update({k: face[k] for k in ("yaw", "roll") if k in face})
+
+    low, high = SHARPNESS_RANGE
+    target = FACE_SIZE_TARGET.get(photo_type, FACE_SIZE_TARGET["front"])
+    scores = {
+        "sharpness": float(np.clip((metrics["sharpness"] - low) / (high - low), 0, 1) * 100),
+        "exposure": exposure_score(metrics["exposure"]),
+        "size": float(np.clip(metrics["face_width_share"] / target, 0, 1) * 100),
+        # full-body shots put the face near the top by design
+        "centering": 100.0 if photo_type == "full_body" else float(np.clip(1 - metrics["center_offset"] / 0.5, 0, 1) * 100),
+    }
+    metrics["scores"] = {k: round(v) for k, v in scores.items()}
+    quality_score = round(sum(WEIGHTS[k] * v for k, v in scores.items()))
+    angle = angle_check(photo_type, face)
+
+    issues, recommendations = [], []
+    if scores["sharpness"] < 50:
+        issues.append("Face is blurry")
+        recommendations.append("Hold the camera steady and tap to focus on the face")
+    exposure_problems = exposure_issues(metrics["exposure"], "Face")
+    issues += exposure_problems[0]
+    recommendations += exposure_problems[1]
+    if scores["size"] < 60:
+        issues.append("Face is too small in the photo")
+        recommendations.append("Move closer to the camera")
+    if scores["centering"] < 60:
+        issues.append("Face is not centred")
+        recommendations.append("Keep the face in the middle of the frame")
+    if len(faces) > 1:
+        issues.append(f"{len(faces)} faces in the photo")
+        recommendations.append("Only the person being enrolled should be in the photo")
+    if angle is False:
+        issues.append(f"Wrong head angle for a {photo_type} photo")
+        recommendations.append("Look straight at the camera" if photo_type in FRONTAL_TYPES
+                               else "Turn the head about 30-45 degrees to the side")
+
+    result.update({
+        "face_detected": True,
+        "quality_score": quality_score,
+        "face_clear": scores["sharpness"] >= 50,
+        "angle_correct": angle is not False,
+        "issues": issues,
+        "recommendations": recommendations,
+        "metrics": metrics,
+        "ambiguous": (abs(quality_score - ACCEPT_SCORE) < AMBIGUOUS_BAND or angle is None or len(faces) > 1),
+    })
+    return result
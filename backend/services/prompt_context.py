@@ -0,0 +1,336 @@
+"""
+Prompt Context Budgeter (Tino memory)
+- Token counts per provider: tiktoken for OpenAI models when installed,
+  otherwise a chars-per-token estimate that charges Devanagari (more tokens
+  per character on every provider except Sarvam) separately from Latin text
+- Conversation memory per (school_id, user_id): a rolling summary of older
+  turns in tino_memory plus the most recent turns verbatim. Once
+  SUMMARIZE_AFTER turns sit outside the verbatim window they are folded into
+  the summary (cheap model via core.ai_cheap, extractive fallback) after
+  the response has been sent
+- Intent → school-context fields: an attendance question gets the
+  attendance figures, not the fee and CCTV lines
+- fit(): required sections always go in; the rest are added by priority,
+  truncated or dropped to stay within the request's token budget
+
+    memory = await load_memory(school_id, user_id)
+    sections = [Section("system", base, required=True),
+                Section("query", query, required=True),
+                Section("school", render_context(context, detect_intent(query)), priority=1),
+                Section("history", memory.render_turns(), priority=2, keep="tail"),
+                Section("summary", memory.summary, priority=3, keep="tail")]
+    prompt = fit(sections, budget=PROMPT_TOKEN_BUDGET, provider="openai")
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import re
+
+from core.database import db
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", "1800"))
+RECENT_TURNS = int(os.environ.get("TINO_RECENT_TURNS", "4"))
+SUMMARIZE_AFTER = int(os.environ.get("TINO_SUMMARIZE_AFTER", "6"))
+SUMMARY_MAX_TOKENS = 250
+TURN_MAX_TOKENS = int(os.environ.get("TINO_TURN_MAX_TOKENS", "200"))   # long data replies are clipped
+MAX_FOLD_TURNS = 40        # a long unsummarized backlog is folded from its newest turns only
+MIN_SECTION_TOKENS = 40    # a section squeezed below this is dropped instead
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Estimated characters per token: (Latin / digits / punctuation, Devanagari)
+CHARS_PER_TOKEN = {
+    "openai": (4.0, 1.7),
+    "groq": (3.8, 1.4),      # Llama 3 tokenizer
+    "gemini": (4.0, 2.4),
+    "sarvam": (4.0, 3.2),    # Indic-aware tokenizer
+    "ollama": (3.8, 1.4),
+}
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+_encoders: Dict[str, Any] = {}
+
+
+# ====================== TOKEN COUNTING ======================
+
+def _openai_encoder():
+    if "openai" not in _encoders:
+        try:
+            _encoders["openai"] = tiktoken.get_encoding("o200k_base")   # gpt-4o / gpt-4o-mini
+        except Exception as e:   # encoding file not cached and no network
+            logger.warning(f"tiktoken unavailable, estimating OpenAI tokens: {e}")
+            _encoders["openai"] = None
+    return _encoders["openai"]
+
+
+def count_tokens(text: str, provider: str = "openai") -> int:
+    if not text:
+        return 0
+    if provider == "openai" and TIKTOKEN_AVAILABLE:
+        encoder = _openai_encoder()
+        if encoder is not None:
+            return len(encoder.encode(text))
+    latin, devanagari = CHARS_PER_TOKEN.get(provider, CHARS_PER_TOKEN["openai"])
+    indic = len(_DEVANAGARI.findall(text))
+    return int((len(text) - indic) / latin + indic / devanagari) + 1
+
+
+def truncate_tokens(text: str, max_tokens: int, provider: str = "openai", keep: str = "head") -> str:
+    """Cut text to about max_tokens at a line (or word) boundary; keep="tail" keeps the end."""
+    if count_tokens(text, provider) <= max_tokens:
+        return text
+    lines = text.splitlines() if "\n" in text else text.split(" ")
+    joiner = "\n" if "\n" in text else " "
+    if keep == "tail":
+        lines = lines[::-1]
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line, provider)
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    if keep == "tail":
+        kept = kept[::-1]
+    if not kept:
+        # a single line longer than the budget: cut by characters instead
+        chars = int(len(text) * max_tokens / count_tokens(text, provider))
+        return text[-chars:] if keep == "tail" else text[:chars]
+    return joiner.join(kept)
+
+
+# ====================== BUDGET ======================
+
+@dataclass
+class Section:
+    name: str
+    text: str
+    priority: int = 0        # lower goes in first
+    required: bool = False   # never dropped or cut (system prompt, the question)
+    keep: str = "head"       # which end survives truncation
+
+
+@dataclass
+class FittedPrompt:
+    sections: Dict[str, str]
+    tokens: int
+    budget: int
+    dropped: List[str] = field(default_factory=list)
+    truncated: List[str] = field(default_factory=list)
+
+    def text(self, *names: str, sep: str = "\n\n") -> str:
+        return sep.join(self.sections[n] for n in names if self.sections.get(n))
+
+
+def fit(sections: List[Section], budget: Optional[int] = None, provider: str = "openai") -> FittedPrompt:
+    """Keep required sections, then add the others by priority while they fit (default PROMPT_TOKEN_BUDGET)."""
+    budget = budget or PROMPT_TOKEN_BUDGET
+    out: Dict[str, str] = {}
+    used = 0
+    for s in sections:
+        if s.required:
+            out[s.name] = s.text
+            used += count_tokens(s.text, provider)
+
+    result = FittedPrompt(sections=out, tokens=0, budget=budget)
+    for s in sorted((s for s in sections if not s.required and s.text), key=lambda s: s.priority):
+        cost = count_tokens(s.text, provider)
+        room = budget - used
+        if cost <= room:
+            out[s.name] = s.text
+            used += cost
+        elif room >= MIN_SECTION_TOKENS:
+            out[s.name] = truncate_tokens(s.text, room, provider, s.keep)
+            used += count_tokens(out[s.name], provider)
+            result.truncated.append(s.name)
+        else:
+            result.dropped.append(s.name)
+    result.tokens = used
+    return result
+
+
+# ====================== INTENT → CONTEXT FIELDS ======================
+
+INTENT_KEYWORDS = {
+    "attendance": ["attendance", "hazri", "absent", "present", "gayab", "nahi aaya", "chutti"],
+    "fees": ["fee", "fees", "payment", "pending", "dues", "baki", "collection"],
+    "alerts": ["alert", "emergency", "cctv", "camera", "problem", "issue", "dikkat", "warning"],
+    "overview": ["overview", "status", "sab batao", "puri jankari", "summary", "report"],
+}
+
+INTENT_FIELDS = {
+    "attendance": ["total_students", "today_attendance"],
+    "fees": ["total_students", "pending_fees_count"],
+    "alerts": ["active_alerts", "recent_events"],
+    "overview": ["total_students", "total_staff", "total_classes", "today_attendance",
+                 "pending_fees_count", "active_alerts", "recent_events"],
+    "general": ["total_students", "total_staff"],
+}
+
+
+def detect_intent(query: str) -> str:
+    q = query.lower()
+    for intent, words in INTENT_KEYWORDS.items():
+        if any(w in q for w in words):
+            return intent
+    return "general"
+
+
+def _render_field(name: str, value: Any) -> Optional[str]:
+    if name == "total_students":
+        return f"- Total Students: {value or 0}"
+    if name == "total_staff":
+        return f"- Total Staff: {value or 0}"
+    if name == "total_classes":
+        return f"- Total Classes: {value or 0}"
+    if name == "today_attendance":
+        value = value or {}
+        return (f"- Today's Attendance: {value.get('percentage', 0)}% "
+                f"({value.get('present', 0)} present, {value.get('absent', 0)} absent)")
+    if name == "pending_fees_count":
+        return f"- Pending Fees: {value or 0} students"
+    if name == "active_alerts":
+        return f"- Active Alerts: {value or 0}"
+    if name == "recent_events":
+        if not value:
+            return None
+        return "Recent CCTV Events:\n" + "\n".join(f"- {e.get('type')} at {e.get('location')}" for e in value)
+    return None
+
+
+def render_context(context: Dict[str, Any], intent: str) -> str:
+    """The 'Current School Status' block with only the fields this intent needs."""
+    lines = [_render_field(name, context.get(name)) for name in INTENT_FIELDS.get(intent, INTENT_FIELDS["general"])]
+    lines = [line for line in lines if line]
+    return "Current School Status:\n" + "\n".join(lines) if lines else ""
+
+
+# ====================== CONVERSATION MEMORY ======================
+
+@dataclass
+class ConversationMemory:
+    summary: str
+    turns: List[Dict[str, str]]          # recent, oldest first: {"role", "content"}
+    pending: int = 0                     # unsummarized turns older than the verbatim window
+
+    @property
+    def needs_refresh(self) -> bool:
+        """True when the turn being answered (query + reply) will push the backlog to SUMMARIZE_AFTER."""
+        return self.pending + 2 >= SUMMARIZE_AFTER
+
+    def render_turns(self, max_turn_tokens: int = TURN_MAX_TOKENS) -> str:
+        """One line per turn (so the budget drops whole turns, oldest first), each clipped."""
+        lines = []
+        for t in self.turns:
+            content = " ".join(t["content"].split())
+            lines.append(f"{t['role']}: {truncate_tokens(content, max_turn_tokens)}")
+        return "\n".join(lines)
+
+
+def _turn(doc: Dict) -> Dict[str, str]:
+    return {"role": "user" if doc.get("is_user") else "assistant", "content": doc.get("message") or ""}
+
+
+async def load_memory(school_id: str, user_id: str) -> ConversationMemory:
+    """Rolling summary plus the last RECENT_TURNS turns after it."""
+    memory = await db.tino_memory.find_one({"school_id": school_id, "user_id": user_id}, {"_id": 0})
+    query = {"school_id": school_id, "user_id": user_id}
+    if memory and memory.get("summarized_until"):
+        query["timestamp"] = {"$gt": memory["summarized_until"]}
+    window = RECENT_TURNS + SUMMARIZE_AFTER
+    docs = await db.tino_conversations.find(query, {"_id": 0, "message": 1, "is_user": 1}) \
+        .sort("timestamp", -1).limit(window).to_list(window)
+    docs.reverse()
+    return ConversationMemory(
+        summary=(memory or {}).get("summary", ""),
+        turns=[_turn(d) for d in docs[-RECENT_TURNS:]],
+        pending=max(len(docs) - RECENT_TURNS, 0),
+    )
+
+
+def _extractive_summary(previous: str, turns: List[Dict[str, str]]) -> str:
+    """No model available: keep the first sentence of each turn."""
+    lines = [previous] if previous else []
+    for t in turns:
+        first = re.split(r"(?<=[.!?।])\s", t["content"].strip(), maxsplit=1)[0]
+        lines.append(f"{t['role']}: {first[:160]}")
+    return truncate_tokens("\n".join(lines), SUMMARY_MAX_TOKENS, keep="tail")
+
+
+async def _model_summary(previous: str, turns: List[Dict[str, str]]) -> Optional[str]:
+    from core.ai_cheap import ask_groq, ask_gemini
+    transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+    prompt = (
+        "Update the running summary of a conversation between a school administrator and the "
+        "assistant Tino. Keep names, classes, numbers, dates and any pending requests; drop "
+        "greetings and repetition. Reply with the summary only, at most 120 words, in the "
+        "language of the conversation.\n\n"
+        f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+    )
+    system = "You summarize conversations for an assistant's memory."
+    for ask, model in ((ask_groq, "fast"), (ask_gemini, "flash_8b")):
+        text = await ask(prompt, system=system, model=model, max_tokens=SUMMARY_MAX_TOKENS, temperature=0.2)
+        if text:
+            return text.strip()
+    return None
+
+
+_refreshing: set = set()
+
+
+async def refresh_summary(school_id: str, user_id: str):
+    """
+    Fold the turns that have left the verbatim window into the summary once
+    SUMMARIZE_AFTER of them have piled up. Runs after the response is sent;
+    one refresh per session at a time.
+    """
+    key = (school_id, user_id)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    try:
+        memory = await db.tino_memory.find_one({"school_id": school_id, "user_id": user_id}, {"_id": 0}) or {}
+        query = {"school_id": school_id, "user_id": user_id}
+        if memory.get("summarized_until"):
+            query["timestamp"] = {"$gt": memory["summarized_until"]}
+        limit = RECENT_TURNS + MAX_FOLD_TURNS
+        docs = await db.tino_conversations.find(query, {"_id": 0, "message": 1, "is_user": 1, "timestamp": 1}) \
+            .sort("timestamp", -1).limit(limit).to_list(limit)
+        docs.reverse()
+        old = docs[:-RECENT_TURNS] if len(docs) > RECENT_TURNS else []
+        if len(old) < SUMMARIZE_AFTER:
+            return
+
+        turns = [_turn(d) for d in old]
+        previous = memory.get("summary", "")
+        summary = await _model_summary(previous, turns)
+        method = "model"
+        if not summary:
+            summary, method = _extractive_summary(previous, turns), "extractive"
+        await db.tino_memory.update_one(
+            {"school_id": school_id, "user_id": user_id},
+            {"$set": {
+                "summary": truncate_tokens(summary, SUMMARY_MAX_TOKENS, keep="tail"),
+                "summarized_until": old[-1]["timestamp"],
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "method": method,
+            }, "$inc": {"turns_summarized": len(old)}},
+            upsert=True
+        )
+        logger.info(f"Tino memory: folded {len(old)} turns into the summary ({method}) for {user_id}")
+    except Exception as e:
+        logger.warning(f"Tino memory refresh failed for {user_id}: {e}")
+    finally:
+        _refreshing.discard(key)
+
+
+async def clear_memory(school_id: str, user_id: str):
+    await db.tino_memory.delete_many({"school_id": school_id, "user_id": user_id})
@@ -0,0 +1,397 @@
+"""
+Question Bank (AI paper generator)
+- Every question the paper generator produces is stored in question_bank,
+  tagged with board, class, subject, chapter, type, difficulty, marks and
+  language, and shared across schools
+- Deduplicated by a hash of the normalized question text (case, numbering,
+  "(2 marks)" suffixes and punctuation ignored) within class + subject +
+  language; the unique index makes concurrent ingests safe
+- fill(): assembles a paper from the bank for the marks plan of a request
+  (marks per question type, as in the generator prompt). Per type, a
+  subset-sum over the candidates' marks hits the type's marks exactly,
+  preferring standard-mark questions, the least-used ones and a spread
+  over the requested chapters. Whatever can't be reached becomes missing
+  slots, and only those go to the LLM (topup_prompt())
+
+    assembly = await fill(tags_for(request), marks_plan(request.question_types, request.total_marks))
+    if assembly.missing:
+        ... ask the LLM for topup_prompt(...), then assembly.add(extract_questions(data))
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+import random
+import re
+import unicodedata
+import uuid
+
+from pymongo import UpdateOne
+
+from core.database import db
+
+logger = logging.getLogger(__name__)
+
+# type → (label, marks per question, share of the paper)
+QUESTION_TYPES = {
+    "mcq": ("MCQ (Multiple Choice)", 1, 0.15),
+    "fill_blank": ("Fill in the Blanks", 1, 0.10),
+    "short": ("Short Answer (2-3 lines)", 2, 0.25),
+    "long": ("Long Answer (detailed)", 5, 0.25),
+    "diagram": ("Diagram Based Questions", 3, 0.15),
+    "hots": ("HOTS (Higher Order Thinking)", 4, 0.10),
+}
+DEFAULT_BOARD = "NCERT"
+TOPUP_SYSTEM = ("You are an expert exam question writer for Indian schools (NCERT-based, 2025-26 syllabus). "
+                "Write board-standard questions with correct answers and reply with JSON only.")
+CANDIDATE_LIMIT = 400      # bank questions considered per paper
+MAX_QUESTION_MARKS = 10
+
+# fields copied from a generated question into the bank (and back into papers)
+QUESTION_FIELDS = ("type", "question", "options", "answer", "explanation", "marking_points",
+                   "diagram_steps", "drawing_guide", "diagram_required", "internal_choice",
+                   "choice_question", "marks", "difficulty", "chapter")
+
+_indexes_ready = False
+
+
+async def ensure_bank_indexes():
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        await db.question_bank.create_index([("text_hash", 1)], name="uniq_text_hash", unique=True)
+        await db.question_bank.create_index([("class_name", 1), ("subject", 1), ("language", 1),
+                                             ("type", 1), ("chapter", 1)])
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning(f"Question bank index creation failed: {e}")
+
+
+# ====================== MARKS PLAN ======================
+
+def marks_plan(question_types: List[str], total_marks: int) -> List[Tuple[str, int, int, str]]:
+    """(label, marks per question, marks for the type, type) per requested type, summing to total_marks."""
+    plan = []
+    total_share = sum(QUESTION_TYPES[t][2] for t in question_types if t in QUESTION_TYPES)
+    for qtype in question_types:
+        if qtype in QUESTION_TYPES:
+            label, per_q, share = QUESTION_TYPES[qtype]
+            adjusted = share / total_share if total_share > 0 else share
+            plan.append((label, per_q, max(per_q, int(total_marks * adjusted)), qtype))
+
+    # Adjust to ensure total matches exactly - add/subtract from the last item
+    current = sum(p[2] for p in plan)
+    if plan and current != total_marks:
+        label, per_q, marks, qtype = plan[-1]
+        plan[-1] = (label, per_q, max(per_q, marks + total_marks - current), qtype)
+    return plan
+
+
+# ====================== NORMALIZE / INGEST ======================
+
+_NUMBERING = re.compile(r"^\s*(?:q(?:uestion)?\.?\s*)?\d+\s*[\.\):-]\s*", re.IGNORECASE)
+_MARKS_NOTE = re.compile(r"[\(\[]\s*\d+\s*(?:marks?|अंक)\s*[\)\]]", re.IGNORECASE)
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _MARKS_NOTE.sub(" ", _NUMBERING.sub("", text))
+    # drop punctuation and symbols; keeps Devanagari vowel signs (which \W would strip)
+    text = "".join(" " if unicodedata.category(c)[0] in "PS" else c for c in text)
+    return " ".join(text.split())
+
+
+def text_hash(question: str, class_name: str, subject: str, language: str) -> str:
+    key = "|".join([class_name.strip().lower(), subject.strip().lower(), language.lower(), normalize_text(question)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def requested_chapters(chapter: str, chapters: Optional[List[str]] = None) -> List[str]:
+    names = chapters or [c for c in (chapter or "").split(",")]
+    return [c.strip() for c in names if c and c.strip()]
+
+
+def _match_chapter(name: Optional[str], chapters: List[str]) -> Optional[str]:
+    """The requested chapter a question says it belongs to (exact, then containment)."""
+    if len(chapters) == 1 and not name:
+        return chapters[0]
+    if not name:
+        return None
+    wanted = normalize_text(name)
+    for c in chapters:
+        if normalize_text(c) == wanted:
+            return c
+    for c in chapters:
+        n = normalize_text(c)
+        if n and (n in wanted or wanted in n):
+            return c
+    return None
+
+
+def extract_questions(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Questions from a generator reply: either {"questions": [...]} or the
+    question_paper.sections / answer_paper.answers layout, merged by q_no.
+    """
+    if isinstance(data.get("questions"), list) and data["questions"]:
+        return [q for q in data["questions"] if isinstance(q, dict)]
+    sections = (data.get("question_paper") or {}).get("sections") or []
+    answers = {a.get("q_no"): a for a in (data.get("answer_paper") or {}).get("answers") or [] if isinstance(a, dict)}
+    questions = []
+    for section in sections:
+        for q in section.get("questions") or []:
+            if not isinstance(q, dict):
+                continue
+            q = dict(q)
+            key = answers.get(q.get("q_no")) or {}
+            q.setdefault("answer", key.get("correct_answer") or key.get("model_answer"))
+            for extra in ("explanation", "marking_points", "diagram_steps"):
+                if key.get(extra):
+                    q.setdefault(extra, key[extra])
+            questions.append(q)
+    return questions
+
+
+@dataclass
+class Tags:
+    board: str
+    class_name: str
+    subject: str
+    language: str
+    difficulty: str            # easy | medium | hard | mixed
+    chapters: List[str]        # empty = any chapter of the subject
+
+
+def tags_for(request) -> Tags:
+    """Tags of a PaperGenerateRequest."""
+    return Tags(
+        board=(getattr(request, "board", None) or DEFAULT_BOARD).strip(),
+        class_name=request.class_name.strip(),
+        subject=request.subject.strip(),
+        language=(request.language or "english").lower(),
+        difficulty=(request.difficulty or "mixed").lower(),
+        chapters=[] if request.include_all_chapters else requested_chapters(request.chapter, request.chapters),
+    )
+
+
+def _clean(q: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: q[k] for k in QUESTION_FIELDS if q.get(k) not in (None, "", [])}
+
+
+async def ingest(questions: Iterable[Dict[str, Any]], tags: Tags, school_id: Optional[str] = None) -> int:
+    """Add generated questions to the bank; returns how many were new. Never raises."""
+    now = datetime.now(timezone.utc).isoformat()
+    ops, seen = [], set()
+    for q in questions:
+        text = (q.get("question") or "").strip()
+        marks = q.get("marks")
+        if not text or not isinstance(marks, (int, float)) or not 0 < marks <= MAX_QUESTION_MARKS:
+            continue
+        chapter = _match_chapter(q.get("chapter"), tags.chapters) if tags.chapters else q.get("chapter")
+        if not chapter:
+            continue   # can't tell which chapter it covers - not reusable
+        digest = text_hash(text, tags.class_name, tags.subject, tags.language)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        difficulty = (q.get("difficulty") or tags.difficulty).lower()
+        doc = {
+            **_clean(q),
+            "id": str(uuid.uuid4()),
+            "text_hash": digest,
+            "board": tags.board,
+            "class_name": tags.class_name,
+            "subject": tags.subject,
+            "language": tags.language,
+            "chapter": chapter,
+            "type": (q.get("type") or "short").lower(),
+            "difficulty": difficulty if difficulty != "mixed" else "medium",
+            "marks": int(marks),
+            "source_school_id": school_id,
+            "used_count": 0,
+            "created_at": now,
+        }
+        ops.append(UpdateOne({"text_hash": digest}, {"$setOnInsert": doc}, upsert=True))
+    if not ops:
+        return 0
+    try:
+        await ensure_bank_indexes()
+        result = await db.question_bank.bulk_write(ops, ordered=False)
+        return result.upserted_count
+    except Exception as e:
+        logger.warning(f"Question bank ingest failed: {e}")
+        return 0
+
+
+# ====================== ASSEMBLY ======================
+
+@dataclass
+class Slot:
+    type: str
+    marks: int
+    count: int
+
+
+@dataclass
+class Assembly:
+    plan: List[Tuple[str, int, int, str]]
+    picked: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)   # type → questions
+    missing: List[Slot] = field(default_factory=list)
+
+    @property
+    def bank_count(self) -> int:
+        return sum(1 for qs in self.picked.values() for q in qs if q.get("bank_id"))
+
+    @property
+    def questions(self) -> List[Dict[str, Any]]:
+        """In plan order (objective types first, as in the prompt's sections)."""
+        return [q for _, _, _, qtype in self.plan for q in self.picked.get(qtype, [])]
+
+    @property
+    def total(self) -> int:
+        return sum(q.get("marks", 0) for q in self.questions)
+
+    def add(self, generated: List[Dict[str, Any]]):
+        """Fill missing slots from freshly generated questions (same constraint-fill per type)."""
+        by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for q in generated:
+            if (q.get("question") or "").strip() and isinstance(q.get("marks"), (int, float)) and q["marks"] > 0:
+                by_type[(q.get("type") or "").lower()].append(_clean(q))
+        still_missing = []
+        for qtype, slots in _group_slots(self.missing).items():
+            need = sum(s.marks * s.count for s in slots)
+            per_q = slots[0].marks
+            chosen, reached = _choose(by_type.get(qtype, []), need, per_q)
+            self.picked.setdefault(qtype, []).extend(chosen)
+            if reached < need:
+                still_missing.extend(_slots(qtype, need - reached, per_q))
+        self.missing = still_missing
+
+
+def _group_slots(slots: List[Slot]) -> Dict[str, List[Slot]]:
+    grouped: Dict[str, List[Slot]] = defaultdict(list)
+    for s in slots:
+        grouped[s.type].append(s)
+    return grouped
+
+
+def _slots(qtype: str, marks: int, per_q: int) -> List[Slot]:
+    slots = []
+    if marks >= per_q:
+        slots.append(Slot(qtype, per_q, marks // per_q))
+    if marks % per_q:
+        slots.append(Slot(qtype, marks % per_q, 1))
+    return slots
+
+
+def _choose(candidates: List[Dict[str, Any]], target: int, per_q: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Subset of candidates (already in preference order) whose marks sum to
+    target, or to the closest total below it. Standard-mark questions are
+    tried first, so the paper keeps the usual 1/2/3/5-mark shape.
+    """
+    usable = [c for c in candidates if 0 < int(c.get("marks", 0)) <= target]
+    usable.sort(key=lambda c: int(c["marks"]) != per_q)   # stable: keeps preference order within each group
+    reach: List[Optional[List[int]]] = [None] * (target + 1)
+    reach[0] = []
+    for i, c in enumerate(usable):
+        m = int(c["marks"])
+        for total in range(target, m - 1, -1):
+            if reach[total] is None and reach[total - m] is not None:
+                reach[total] = reach[total - m] + [i]
+        if reach[target] is not None:
+            break
+    best = max(t for t in range(target + 1) if reach[t] is not None)
+    return [usable[i] for i in reach[best]], best
+
+
+def _preference_order(docs: List[Dict[str, Any]], chapters: List[str]) -> List[Dict[str, Any]]:
+    """Least-used first, shuffled within equal use, interleaved across chapters."""
+    random.shuffle(docs)
+    docs.sort(key=lambda d: d.get("used_count", 0))
+    if len(chapters) < 2:
+        return docs
+    queues: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for d in docs:
+        queues[d.get("chapter")].append(d)
+    ordered = []
+    while any(queues.values()):
+        for q in queues.values():
+            if q:
+                ordered.append(q.pop(0))
+    return ordered
+
+
+def _as_paper_question(doc: Dict[str, Any]) -> Dict[str, Any]:
+    q = _clean(doc)
+    q["bank_id"] = doc["id"]
+    return q
+
+
+async def fill(tags: Tags, plan: List[Tuple[str, int, int, str]]) -> Assembly:
+    """Pick bank questions for each type's marks; the rest is returned as missing slots."""
+    assembly = Assembly(plan=plan)
+    types = [qtype for _, _, _, qtype in plan]
+    query: Dict[str, Any] = {"class_name": tags.class_name, "subject": tags.subject,
+                             "language": tags.language, "type": {"$in": types}}
+    if tags.chapters:
+        query["chapter"] = {"$in": tags.chapters}
+    if tags.difficulty != "mixed":
+        query["difficulty"] = tags.difficulty
+    if tags.board != DEFAULT_BOARD:
+        query["board"] = {"$in": [tags.board, DEFAULT_BOARD]}   # NCERT-based questions fit every board
+
+    try:
+        docs = await db.question_bank.find(query, {"_id": 0}) \
+            .sort("used_count", 1).limit(CANDIDATE_LIMIT).to_list(CANDIDATE_LIMIT)
+    except Exception as e:
+        logger.warning(f"Question bank lookup failed: {e}")
+        docs = []
+
+    by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for d in docs:
+        by_type[d["type"]].append(d)
+    for _, per_q, marks, qtype in plan:
+        chosen, reached = _choose(_preference_order(by_type.get(qtype, []), tags.chapters), marks, per_q)
+        assembly.picked[qtype] = [_as_paper_question(d) for d in chosen]
+        if reached < marks:
+            assembly.missing.extend(_slots(qtype, marks - reached, per_q))
+    return assembly
+
+
+async def mark_used(assembly: Assembly):
+    ids = [q["bank_id"] for q in assembly.questions if q.get("bank_id")]
+    if not ids:
+        return
+    try:
+        await db.question_bank.update_many(
+            {"id": {"$in": ids}},
+            {"$inc": {"used_count": 1}, "$set": {"last_used_at": datetime.now(timezone.utc).isoformat()}}
+        )
+    except Exception as e:
+        logger.warning(f"Question bank usage update failed: {e}")
+
+
+def topup_prompt(tags: Tags, assembly: Assembly) -> str:
+    """User message asking the LLM for just the missing questions, not a whole paper."""
+    slots = "\n".join(
+        f"- {s.count} × {QUESTION_TYPES.get(s.type, (s.type,))[0]} ({s.type}), {s.marks} mark{'s' if s.marks != 1 else ''} each"
+        for s in assembly.missing
+    )
+    have = [q["question"][:80] for q in assembly.questions][:20]
+    avoid = ("\n\nDo NOT repeat these questions already in the paper:\n" + "\n".join(f"- {h}" for h in have)) if have else ""
+    language = "pure Hindi (Devanagari script)" if tags.language == "hindi" else "pure English"
+    return f"""Write ONLY these questions for a {tags.class_name} {tags.subject} exam paper ({tags.board} syllabus 2025-26):
+{slots}
+
+Chapters: {", ".join(tags.chapters) or "any chapter of the subject"}
+Difficulty: {tags.difficulty}
+Language: {language}, no mixing.{avoid}
+
+Return ONLY this JSON:
+{{"questions": [{{"type": "mcq", "question": "...", "options": ["(a) ...", "(b) ...", "(c) ...", "(d) ..."], "answer": "...", "marks": 1, "difficulty": "easy", "chapter": "exact chapter name from the list"}}]}}
+Every question needs type, question, answer, marks (exactly as listed above), difficulty and chapter; options only for mcq."""
@@ -0,0 +1,166 @@
+"""
+Report Card PDF Renderer
+- Dependency-free PDF 1.4 writer (standard Helvetica fonts, Flate-compressed pages)
+- render_pages() is the process-pool target: it only imports the stdlib, so
+  spawned workers start fast and never touch the event loop or Mongo
+- assemble() stitches the page streams from all workers into one printable PDF
+
+Text is WinAnsi (Latin-1 + a few symbols); characters outside it print as "?".
+"""
+
+from typing import Dict, List, Optional
+import zlib
+
+PAGE_WIDTH = 595   # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+_FONTS = {False: "F1", True: "F2"}  # regular / bold
+
+
+def _pdf_text(text) -> str:
+    raw = str(text if text is not None else "")
+    raw = raw.encode("cp1252", errors="replace").decode("latin-1")
+    return raw.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _Canvas:
+    def __init__(self):
+        self.ops: List[str] = []
+
+    def text(self, x: float, y: float, value, size: float = 10, bold: bool = False):
+        self.ops.append(f"BT /{_FONTS[bold]} {size} Tf {x:.1f} {y:.1f} Td ({_pdf_text(value)}) Tj ET")
+
+    def text_right(self, x: float, y: float, value, size: float = 10, bold: bool = False):
+        # Helvetica digits are 0.556 em wide; good enough for right-aligning numbers
+        self.text(x - len(str(value)) * size * 0.556, y, value, size, bold)
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, width: float = 0.8):
+        self.ops.append(f"{width} w {x1:.1f} {y1:.1f} m {x2:.1f} {y2:.1f} l S")
+
+    def rect(self, x: float, y: float, w: float, h: float, width: float = 1):
+        self.ops.append(f"{width} w {x:.1f} {y:.1f} {w:.1f} {h:.1f} re S")
+
+    def stream(self) -> bytes:
+        return zlib.compress("\n".join(self.ops).encode("latin-1"))
+
+
+def _num(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return "" if value is None else str(value)
+
+
+def _rank_text(rank: Optional[int], size: Optional[int]) -> str:
+    return f"{rank} / {size}" if rank else "-"
+
+
+def render_card(card: Dict, school: Dict) -> bytes:
+    """One report card → compressed page content stream."""
+    c = _Canvas()
+    top = PAGE_HEIGHT - MARGIN
+    right = PAGE_WIDTH - MARGIN
+
+    c.rect(MARGIN - 15, MARGIN - 15, PAGE_WIDTH - 2 * MARGIN + 30, PAGE_HEIGHT - 2 * MARGIN + 30, 1.5)
+    c.text(MARGIN, top, school.get("name") or "School", 18, bold=True)
+    if school.get("address"):
+        c.text(MARGIN, top - 18, school["address"], 9)
+    c.text(MARGIN, top - 45, "REPORT CARD", 14, bold=True)
+    c.text_right(right, top - 45, card.get("exam_name", ""), 12, bold=True)
+    c.line(MARGIN, top - 55, right, top - 55, 1.2)
+
+    y = top - 80
+    details = [
+        ("Student", card.get("student_name")),
+        ("Roll / Adm. No.", card.get("student_roll")),
+        ("Class", card.get("class_name")),
+    ]
+    for label, value in details:
+        c.text(MARGIN, y, label, 10, bold=True)
+        c.text(MARGIN + 110, y, value or "-", 10)
+        y -= 16
+
+    # Subject table
+    y -= 14
+    cols = [MARGIN, MARGIN + 210, MARGIN + 275, MARGIN + 355, MARGIN + 415]
+    headers = ["Subject", "Max", "Obtained", "Grade", "Percentile"]
+    for x, h in zip(cols, headers):
+        c.text(x, y, h, 10, bold=True)
+    c.line(MARGIN, y - 5, right, y - 5)
+    y -= 20
+    for s in card.get("subjects", []):
+        c.text(cols[0], y, s.get("subject", ""), 10)
+        c.text(cols[1], y, s.get("total_marks", ""), 10)
+        c.text(cols[2], y, "AB" if s.get("absent") else _num(s.get("marks_obtained")), 10)
+        c.text(cols[3], y, s.get("grade", ""), 10)
+        pct = s.get("percentile")
+        c.text(cols[4], y, f"{pct:.0f}" if pct is not None else "-", 10)
+        y -= 16
+    c.line(MARGIN, y + 10, right, y + 10)
+    c.text(cols[0], y - 4, "Total", 10, bold=True)
+    c.text(cols[1], y - 4, card.get("total_marks", ""), 10, bold=True)
+    c.text(cols[2], y - 4, _num(card.get("obtained_marks")), 10, bold=True)
+    c.text(cols[3], y - 4, card.get("grade", ""), 10, bold=True)
+
+    # Result summary
+    y -= 40
+    summary = [
+        ("Percentage", f"{card.get('percentage', 0):.2f}%"),
+        ("Overall Grade", card.get("grade", "")),
+        ("Class Rank", _rank_text(card.get("class_rank"), card.get("class_size"))),
+        ("Section Rank", _rank_text(card.get("section_rank"), card.get("section_size"))),
+    ]
+    for label, value in summary:
+        c.text(MARGIN, y, label, 11, bold=True)
+        c.text(MARGIN + 130, y, value, 11)
+        y -= 18
+
+    if card.get("remarks"):
+        y -= 10
+        c.text(MARGIN, y, "Remarks:", 10, bold=True)
+        c.text(MARGIN + 60, y, card["remarks"][:90], 10)
+
+    # Signatures
+    sig_y = MARGIN + 30
+    c.line(MARGIN, sig_y, MARGIN + 140, sig_y)
+    c.text(MARGIN, sig_y - 14, card.get("class_teacher_name") or "Class Teacher", 9)
+    c.line(right - 140, sig_y, right, sig_y)
+    c.text(right - 140, sig_y - 14, "Principal", 9)
+    return c.stream()
+
+
+def render_pages(cards: List[Dict], school: Dict) -> List[bytes]:
+    """Process-pool entry point: render a chunk of cards."""
+    return [render_card(card, school) for card in cards]
+
+
+def assemble(pages: List[bytes]) -> bytes:
+    """Merge compressed page streams into a single PDF document."""
+    n = len(pages)
+    # Object numbers: 1 catalog, 2 page tree, 3-4 fonts, then (page, content) pairs
+    page_ids = [5 + 2 * i for i in range(n)]
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Count {n} /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    for i, stream in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {page_ids[i] + 1} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{off:010d} 00000 n \n".encode() for off in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
@@ -0,0 +1,325 @@
+"""
+Batch Report Card Engine
+- One job covers an exam for a section, a class, or the whole school
+- Bulk reads: exam schedules, marks, students, subjects, classes ($in queries)
+- Totals, grades, class/section ranks and subject percentiles computed with NumPy
+- All report_cards written with one insert_many (re-running an exam replaces its cards)
+- Merged printable PDF rendered on the shared CPU pool (core.offload.run_cpu + services.report_card_pdf)
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import uuid
+
+import numpy as np
+
+from core.database import db
+from core.offload import run_cpu, run_io
+from services import report_card_pdf
+
+logger = logging.getLogger(__name__)
+
+GRADE_BANDS = [(90, "A+"), (80, "A"), (70, "B+"), (60, "B"), (50, "C"), (40, "D")]
+FAIL_GRADE = "F"
+
+PDF_DIR = Path(__file__).resolve().parent.parent / "uploads" / "report_cards"
+PDF_CHUNK_SIZE = 200          # cards per run_cpu task
+
+
+def grade_for(percentage: float) -> str:
+    """Single-value grade (same ladder as the vectorised path)."""
+    for cutoff, grade in GRADE_BANDS:
+        if percentage >= cutoff:
+            return grade
+    return FAIL_GRADE
+
+
+def grades_for(percentages: np.ndarray) -> np.ndarray:
+    return np.select(
+        [percentages >= cutoff for cutoff, _ in GRADE_BANDS],
+        [grade for _, grade in GRADE_BANDS],
+        default=FAIL_GRADE
+    )
+
+
+def competition_ranks(values: np.ndarray) -> np.ndarray:
+    """1-based ranks, highest first, ties share a rank (1, 2, 2, 4)."""
+    desc = np.sort(-values)
+    return np.searchsorted(desc, -values, side="left") + 1
+
+
+def percentiles(column: np.ndarray) -> np.ndarray:
+    """Percent of students scoring at or below each value; NaN (absent) stays NaN."""
+    present = ~np.isnan(column)
+    out = np.full(column.shape, np.nan)
+    if present.any():
+        ordered = np.sort(column[present])
+        out[present] = np.searchsorted(ordered, column[present], side="right") / len(ordered) * 100
+    return out
+
+
+# ====================== COMPUTE ======================
+
+def _marks_value(raw) -> Optional[float]:
+    """Entered marks as a number; blank counts as 0, text like "AB" as absent (None)."""
+    if raw is None or raw == "":
+        return 0.0
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def compute_cards(
+    exams: List[Dict],
+    marks: List[Dict],
+    students: Dict[str, Dict],
+    subjects: Dict[str, str],
+    classes: Dict[str, Dict]
+) -> List[Dict]:
+    """
+    Pure computation (no I/O) so it can be benchmarked directly.
+    Class rank / subject percentiles are across every section of the same class
+    name; section rank is within the class_id. A student's maximum counts only
+    the subjects their own section has marks for - sections of one class may
+    take different subjects, or not have every subject entered yet.
+    """
+    exam_by_class = {e["class_id"]: e for e in exams}
+    # (student_id, subject_id) → marks; last write wins like /marks/bulk
+    by_student: Dict[str, Dict[str, float]] = {}
+    # Section comes from the marks row, not the student (who may have moved since)
+    section_of: Dict[str, str] = {}
+    section_subjects: Dict[str, set] = {}
+    for m in marks:
+        if m.get("student_id") in students and m.get("class_id") in exam_by_class:
+            scores = by_student.setdefault(m["student_id"], {})
+            value = _marks_value(m.get("marks"))
+            if value is not None:
+                scores[m.get("subject_id")] = value
+            else:
+                scores.pop(m.get("subject_id"), None)
+            section_of[m["student_id"]] = m["class_id"]
+            section_subjects.setdefault(m["class_id"], set()).add(m.get("subject_id"))
+
+    # Group students by class name (grade level), columns = subjects seen in that level
+    levels: Dict[str, List[str]] = {}
+    for sid in by_student:
+        cls = classes.get(section_of[sid], {})
+        levels.setdefault(cls.get("name") or section_of[sid], []).append(sid)
+
+    cards = []
+    now = datetime.now(timezone.utc).isoformat()
+    for level, sids in levels.items():
+        subject_ids = sorted({sub for sid in sids for sub in section_subjects[section_of[sid]]},
+                             key=lambda x: subjects.get(x, x or ""))
+        n, k = len(sids), len(subject_ids)
+        matrix = np.full((n, k), np.nan)
+        col = {sub: j for j, sub in enumerate(subject_ids)}
+        for i, sid in enumerate(sids):
+            for sub, value in by_student[sid].items():
+                matrix[i, col[sub]] = value
+
+        section_ids = np.array([section_of[sid] for sid in sids])
+        max_per_subject = np.array([float(exam_by_class[c].get("max_marks") or 100) for c in section_ids])
+        appeared = ~np.isnan(matrix)
+        obtained = np.nansum(matrix, axis=1)
+        # Absent subjects still count towards the maximum - but only the section's own subjects
+        taken = np.array([[sub in section_subjects[section_of[sid]] for sub in subject_ids] for sid in sids],
+                         dtype=bool).reshape(n, k)
+        total_max = max_per_subject * taken.sum(axis=1)
+        pct = np.where(total_max > 0, np.round(obtained / total_max * 100, 2), 0.0)
+        grades = grades_for(pct)
+        class_rank = competition_ranks(pct)
+
+        section_rank = np.zeros(n, dtype=int)
+        section_size = np.zeros(n, dtype=int)
+        for section in np.unique(section_ids):
+            mask = section_ids == section
+            section_rank[mask] = competition_ranks(pct[mask])
+            section_size[mask] = mask.sum()
+
+        subject_pct = np.where(appeared, matrix / max_per_subject[:, None] * 100, np.nan)
+        subject_grades = grades_for(np.nan_to_num(subject_pct, nan=-1))
+        # On percent scale so sections with different max marks compare fairly
+        subject_percentile = np.column_stack([percentiles(subject_pct[:, j]) for j in range(k)])
+
+        for i, sid in enumerate(sids):
+            student = students[sid]
+            cls = classes.get(section_of[sid], {})
+            exam = exam_by_class[section_of[sid]]
+            subject_rows = []
+            for j, sub in enumerate(subject_ids):
+                if not taken[i, j]:
+                    continue
+                absent = not appeared[i, j]
+                subject_rows.append({
+                    "subject_id": sub,
+                    "subject": subjects.get(sub, sub),
+                    "marks_obtained": None if absent else round(float(matrix[i, j]), 2),
+                    "total_marks": int(max_per_subject[i]),
+                    "grade": "AB" if absent else str(subject_grades[i, j]),
+                    "percentile": None if absent else round(float(subject_percentile[i, j]), 1),
+                    "absent": absent
+                })
+            cards.append({
+                "id": str(uuid.uuid4()),
+                "student_id": sid,
+                "student_name": student.get("name", ""),
+                "student_roll": student.get("admission_no", ""),
+                "class_id": section_of[sid],
+                "class_name": f"{cls.get('name', '')} - {cls.get('section', '')}" if cls else "",
+                "exam_id": exam["id"],
+                "exam_name": exam.get("name", ""),
+                "subjects": subject_rows,
+                "total_marks": int(total_max[i]),
+                "obtained_marks": round(float(obtained[i]), 2),
+                "percentage": float(pct[i]),
+                "grade": str(grades[i]),
+                "class_rank": int(class_rank[i]),
+                "class_size": n,
+                "section_rank": int(section_rank[i]),
+                "section_size": int(section_size[i]),
+                "school_id": exam.get("school_id"),
+                "source": "batch",
+                "created_at": now
+            })
+    return cards
+
+
+# ====================== PDF ======================
+
+async def render_pdf(cards: List[Dict], school: Dict) -> bytes:
+    """Render cards in parallel chunks and merge into one PDF (page order = card order)."""
+    chunks = [cards[i:i + PDF_CHUNK_SIZE] for i in range(0, len(cards), PDF_CHUNK_SIZE)]
+    results = await asyncio.gather(*[run_cpu(report_card_pdf.render_pages, chunk, school) for chunk in chunks])
+    pages = [page for chunk in results for page in chunk]
+    return await run_io(report_card_pdf.assemble, pages)
+
+
+def _print_order(cards: List[Dict]) -> List[Dict]:
+    """Section by section, roll order inside a section."""
+    return sorted(cards, key=lambda c: (c.get("class_name") or "", str(c.get("student_roll") or ""), c["student_name"]))
+
+
+# ====================== JOB ======================
+
+async def _load_exams(school_id: str, exam_id: Optional[str], exam_name: Optional[str],
+                      class_ids: Optional[List[str]]) -> List[Dict]:
+    query = {"school_id": school_id}
+    if exam_id:
+        query["id"] = exam_id
+    elif exam_name:
+        query["name"] = exam_name
+    else:
+        return []
+    if class_ids:
+        query["class_id"] = {"$in": class_ids}
+    return await db.exam_schedules.find(query, {"_id": 0}).to_list(None)
+
+
+async def run_batch(
+    school_id: str,
+    exam_id: Optional[str] = None,
+    exam_name: Optional[str] = None,
+    class_ids: Optional[List[str]] = None,
+    created_by: Optional[str] = None,
+    remarks: Optional[str] = None
+) -> Dict:
+    """Compute and store every report card for the exam; returns the job document."""
+    exams = await _load_exams(school_id, exam_id, exam_name, class_ids)
+    job = {
+        "id": str(uuid.uuid4()),
+        "school_id": school_id,
+        "exam_id": exam_id,
+        "exam_name": exam_name or (exams[0].get("name") if exams else None),
+        "exam_ids": [e["id"] for e in exams],
+        "class_ids": [e["class_id"] for e in exams],
+        "created_by": created_by,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "status": "no_marks",
+        "cards": 0,
+        "pdf_status": None
+    }
+    if exams:
+        exam_ids = job["exam_ids"]
+        marks = await db.marks.find(
+            {"exam_id": {"$in": exam_ids}},
+            {"_id": 0, "student_id": 1, "subject_id": 1, "marks": 1, "class_id": 1}
+        ).to_list(None)
+        student_ids = list({m["student_id"] for m in marks if m.get("student_id")})
+        subject_ids = list({m["subject_id"] for m in marks if m.get("subject_id")})
+
+        students = await db.students.find(
+            {"id": {"$in": student_ids}},
+            {"_id": 0, "id": 1, "name": 1, "admission_no": 1, "class_id": 1}
+        ).to_list(None)
+        subject_docs = await db.subjects.find(
+            {"id": {"$in": subject_ids}}, {"_id": 0, "id": 1, "name": 1}
+        ).to_list(None)
+        class_docs = await db.classes.find(
+            {"id": {"$in": job["class_ids"]}}, {"_id": 0, "id": 1, "name": 1, "section": 1}
+        ).to_list(None)
+
+        cards = compute_cards(
+            exams,
+            marks,
+            {s["id"]: s for s in students},
+            {s["id"]: s.get("name", s["id"]) for s in subject_docs},
+            {c["id"]: c for c in class_docs}
+        )
+        for card in cards:
+            card["batch_id"] = job["id"]
+            card["created_by"] = created_by
+            card["remarks"] = remarks
+
+        # Replace earlier batch cards for these exams, then one bulk write
+        await db.report_cards.delete_many({"exam_id": {"$in": exam_ids}, "source": "batch"})
+        if cards:
+            await db.report_cards.insert_many(cards, ordered=False)
+        job.update({
+            "status": "completed",
+            "cards": len(cards),
+            "students_without_marks": await db.students.count_documents({
+                "class_id": {"$in": job["class_ids"]},
+                "is_active": True,
+                "id": {"$nin": student_ids}
+            })
+        })
+
+    await db.report_card_jobs.insert_one(job)
+    job.pop("_id", None)
+    return job
+
+
+def _write_pdf(path: Path, pdf: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pdf)
+
+
+async def render_job_pdf(job_id: str) -> Optional[str]:
+    """Render the merged PDF for a finished job and record its path."""
+    job = await db.report_card_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job or not job.get("cards"):
+        return None
+    await db.report_card_jobs.update_one({"id": job_id}, {"$set": {"pdf_status": "rendering"}})
+    try:
+        cards = await db.report_cards.find({"batch_id": job_id}, {"_id": 0}).to_list(None)
+        school = await db.schools.find_one({"id": job["school_id"]}, {"_id": 0, "name": 1, "address": 1}) or {}
+        pdf = await render_pdf(_print_order(cards), school)
+
+        path = PDF_DIR / f"{job_id}.pdf"
+        await run_io(_write_pdf, path, pdf)
+        await db.report_card_jobs.update_one({"id": job_id}, {"$set": {
+            "pdf_status": "ready",
+            "pdf_path": str(path),
+            "pdf_pages": len(cards),
+            "pdf_bytes": len(pdf)
+        }})
+        return str(path)
+    except Exception as e:
+        logger.error(f"Report card PDF for job {job_id} failed: {e}")
+        await db.report_card_jobs.update_one({"id": job_id}, {"$set": {"pdf_status": "failed", "pdf_error": str(e)}})
+        return None
@@ -0,0 +1,267 @@
+"""
+Class Risk Scoring Engine
+- Three grouped aggregations per run (attendance, marks, incidents), for a
+  whole class or a whole school at once - no per-student queries
+- Weighted scores computed on NumPy arrays
+- Results persisted per class in class_risk_snapshots; readers use the
+  snapshot and refresh it when it is missing or stale
+
+Score (unchanged from the original per-student loop):
+    0.3 × attendance% + 0.5 × average marks% + 0.2 × (100 − 10 × incidents), clipped to 0..100
+    < 40 weak, < 60 at risk, > 85 excellent
+"""
+
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+import logging
+import uuid
+
+import numpy as np
+from pymongo import UpdateOne
+
+from core.database import db
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS = {"attendance": 0.3, "marks": 0.5, "behaviour": 0.2}
+INCIDENT_PENALTY = 10
+INCIDENT_PRIORITIES = ["critical", "high"]
+DEFAULT_ATTENDANCE = 100.0  # no attendance rows yet
+DEFAULT_MARKS = 50.0        # no results yet
+
+WEAK_BELOW = 40
+AT_RISK_BELOW = 60
+EXCELLENT_ABOVE = 85
+
+SNAPSHOT_MAX_AGE = timedelta(hours=6)
+
+_indexes_ready = False
+
+
+async def ensure_risk_indexes():
+    """Indexes the three aggregations and the snapshot reads rely on."""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        await db.attendance.create_index([("student_id", 1), ("date", 1)])
+        await db.results.create_index([("student_id", 1)])
+        await db.exam_results.create_index([("student_id", 1)])
+        await db.tino_alerts.create_index([("related_ids", 1), ("priority", 1)])
+        await db.class_risk_snapshots.create_index(
+            [("school_id", 1), ("class_id", 1)], name="uniq_school_class", unique=True
+        )
+        _indexes_ready = True
+    except Exception as e:
+        logger.warning(f"Risk scoring index creation failed: {e}")
+
+
+# ====================== AGGREGATIONS ======================
+
+async def _attendance_by_student(student_ids: List[str]) -> Dict[str, Dict]:
+    rows = await db.attendance.aggregate([
+        {"$match": {"student_id": {"$in": student_ids}}},
+        {"$group": {
+            "_id": "$student_id",
+            "total": {"$sum": 1},
+            "present": {"$sum": {"$cond": [{"$eq": ["$status", "present"]}, 1, 0]}}
+        }}
+    ]).to_list(None)
+    return {r["_id"]: r for r in rows}
+
+
+async def _marks_by_student(student_ids: List[str]) -> Dict[str, Dict]:
+    # Legacy `results.marks` and online `exam_results.percentage` are both on a 0-100 scale
+    rows = await db.results.aggregate([
+        {"$match": {"student_id": {"$in": student_ids}}},
+        {"$project": {"student_id": 1, "pct": "$marks"}},
+        {"$unionWith": {"coll": "exam_results", "pipeline": [
+            {"$match": {"student_id": {"$in": student_ids}}},
+            {"$project": {"student_id": 1, "pct": "$percentage"}}
+        ]}},
+        {"$match": {"pct": {"$type": "number"}}},
+        {"$group": {"_id": "$student_id", "avg": {"$avg": "$pct"}, "count": {"$sum": 1}}}
+    ]).to_list(None)
+    return {r["_id"]: r for r in rows}
+
+
+async def _incidents_by_student(student_ids: List[str]) -> Dict[str, int]:
+    rows = await db.tino_alerts.aggregate([
+        {"$match": {"related_ids": {"$in": student_ids}, "priority": {"$in": INCIDENT_PRIORITIES}}},
+        {"$unwind": "$related_ids"},
+        {"$match": {"related_ids": {"$in": student_ids}}},
+        {"$group": {"_id": "$related_ids", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    return {r["_id"]: r["count"] for r in rows}
+
+
+# ====================== SCORING ======================
+
+def score_arrays(present: np.ndarray, total: np.ndarray, marks: np.ndarray,
+                 has_marks: np.ndarray, incidents: np.ndarray) -> Dict[str, np.ndarray]:
+    """Vectorised scores for N students. All inputs are length-N arrays."""
+    attendance_rate = np.where(total > 0, present / np.maximum(total, 1) * 100, DEFAULT_ATTENDANCE)
+    avg_marks = np.where(has_marks, marks, DEFAULT_MARKS)
+    score = (
+        attendance_rate * WEIGHTS["attendance"]
+        + avg_marks * WEIGHTS["marks"]
+        + (100 - incidents * INCIDENT_PENALTY) * WEIGHTS["behaviour"]
+    )
+    score = np.clip(score, 0, 100)
+    band = np.select(
+        [score < WEAK_BELOW, score < AT_RISK_BELOW, score > EXCELLENT_ABOVE],
+        ["weak", "at_risk", "excellent"],
+        default="ok"
+    )
+    return {"attendance_rate": attendance_rate, "avg_marks": avg_marks, "score": score, "band": band}
+
+
+def _reasons(attendance_rate: float, avg_marks: float, incidents: int) -> List[str]:
+    reasons = []
+    if attendance_rate < 60:
+        reasons.append("कम attendance")
+    if avg_marks < 40:
+        reasons.append("कम marks")
+    if incidents > 2:
+        reasons.append("behavior issues")
+    return reasons
+
+
+async def compute_scores(students: List[Dict]) -> List[Dict]:
+    """Score a batch of student documents (any number of classes)."""
+    if not students:
+        return []
+    await ensure_risk_indexes()
+    ids = [s["id"] for s in students]
+    attendance = await _attendance_by_student(ids)
+    marks = await _marks_by_student(ids)
+    incidents = await _incidents_by_student(ids)
+
+    n = len(ids)
+    present = np.fromiter((attendance.get(i, {}).get("present", 0) for i in ids), dtype=float, count=n)
+    total = np.fromiter((attendance.get(i, {}).get("total", 0) for i in ids), dtype=float, count=n)
+    has_marks = np.fromiter((i in marks for i in ids), dtype=bool, count=n)
+    avg = np.fromiter((marks.get(i, {}).get("avg") or 0 for i in ids), dtype=float, count=n)
+    inc = np.fromiter((incidents.get(i, 0) for i in ids), dtype=float, count=n)
+
+    scored = score_arrays(present, total, avg, has_marks, inc)
+    att_rate = np.round(scored["attendance_rate"], 1).tolist()
+    avg_marks = np.round(scored["avg_marks"], 1).tolist()
+    score = np.round(scored["score"], 1).tolist()
+    band = scored["band"].tolist()
+
+    rows = []
+    for k, s in enumerate(students):
+        row = {
+            "id": s["id"],
+            "name": s.get("name", "Unknown"),
+            "roll_no": s.get("roll_no", ""),
+            "class_id": s.get("class_id"),
+            "attendance_rate": att_rate[k],
+            "avg_marks": avg_marks[k],
+            "incidents": int(inc[k]),
+            "overall_score": score[k],
+            "band": band[k]
+        }
+        if band[k] == "weak":
+            row["reason"] = _reasons(att_rate[k], avg_marks[k], int(inc[k]))
+        rows.append(row)
+    return rows
+
+
+def summarize(rows: List[Dict]) -> Dict:
+    """The get_weak_students() response shape, from scored rows."""
+    weak = [r for r in rows if r["band"] == "weak"]
+    at_risk = [r for r in rows if r["band"] == "at_risk"]
+    excellent = sorted((r for r in rows if r["band"] == "excellent"),
+                       key=lambda r: r["overall_score"], reverse=True)
+    return {
+        "weak_students": weak,
+        "weak_count": len(weak),
+        "at_risk_students": at_risk,
+        "at_risk_count": len(at_risk),
+        "excellent_students": excellent[:5],  # Top 5
+        "excellent_count": len(excellent)
+    }
+
+
+# ====================== SNAPSHOTS ======================
+
+async def refresh_snapshots(school_id: str, class_id: Optional[str] = None) -> Dict[str, Dict]:
+    """Recompute and store snapshots for one class or every class of a school."""
+    query = {"school_id": school_id, "is_active": True}
+    if class_id:
+        query["class_id"] = class_id
+    students = await db.students.find(
+        query, {"_id": 0, "id": 1, "name": 1, "roll_no": 1, "class_id": 1}
+    ).to_list(None)
+    rows = await compute_scores(students)
+
+    by_class: Dict[str, List[Dict]] = {}
+    for r in rows:
+        by_class.setdefault(r["class_id"], []).append(r)
+    if class_id:
+        by_class.setdefault(class_id, [])
+
+    now = datetime.now(timezone.utc).isoformat()
+    snapshots = {}
+    for cid, class_rows in by_class.items():
+        if cid is None:
+            continue
+        snapshots[cid] = {
+            "school_id": school_id,
+            "class_id": cid,
+            "students": class_rows,
+            "summary": {k: v for k, v in summarize(class_rows).items() if k.endswith("_count")},
+            "student_count": len(class_rows),
+            "generated_at": now
+        }
+    if snapshots:
+        await db.class_risk_snapshots.bulk_write([
+            UpdateOne(
+                {"school_id": school_id, "class_id": cid},
+                {"$set": snap, "$setOnInsert": {"id": str(uuid.uuid4())}},
+                upsert=True
+            )
+            for cid, snap in snapshots.items()
+        ], ordered=False)
+    return snapshots
+
+
+def _is_fresh(snapshot: Optional[Dict], max_age: timedelta) -> bool:
+    if not snapshot or not snapshot.get("generated_at"):
+        return False
+    generated = datetime.fromisoformat(snapshot["generated_at"])
+    return datetime.now(timezone.utc) - generated < max_age
+
+
+async def get_class_snapshots(
+    school_id: str,
+    class_ids: List[str],
+    max_age: timedelta = SNAPSHOT_MAX_AGE
+) -> Dict[str, Dict]:
+    """Snapshots for the given classes, refreshing missing/stale ones in one batch."""
+    await ensure_risk_indexes()
+    existing = await db.class_risk_snapshots.find(
+        {"school_id": school_id, "class_id": {"$in": class_ids}}, {"_id": 0}
+    ).to_list(len(class_ids) or 1)
+    snapshots = {s["class_id"]: s for s in existing if _is_fresh(s, max_age)}
+
+    stale = [cid for cid in class_ids if cid not in snapshots]
+    if len(stale) == 1:
+        snapshots.update(await refresh_snapshots(school_id, stale[0]))
+    elif stale:
+        # Several classes: one school-wide pass is cheaper than one pass per class
+        refreshed = await refresh_snapshots(school_id)
+        snapshots.update({cid: refreshed[cid] for cid in stale if cid in refreshed})
+    return snapshots
+
+
+async def get_class_risk(school_id: str, class_id: str, max_age: timedelta = SNAPSHOT_MAX_AGE) -> Dict:
+    """get_weak_students()-shaped result for one class, served from the snapshot."""
+    snapshot = (await get_class_snapshots(school_id, [class_id], max_age)).get(class_id)
+    rows = snapshot["students"] if snapshot else []
+    return {
+        **summarize(rows),
+        "generated_at": snapshot.get("generated_at") if snapshot else None
+    }
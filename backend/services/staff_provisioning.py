@@ -0,0 +1,153 @@
+"""
+Staff Provisioning
+- Creates many staff records (and their login accounts) in one pass:
+  one $in lookup for duplicate emails, one block of employee IDs, every
+  password hashed in parallel across the CPU pool, then insert_many for
+  users and for staff
+- Callers build the documents (role / permission mapping stays with them);
+  this module only dedups, numbers, hashes and writes
+- Every entry gets an outcome: created | skipped (duplicate) | error
+
+    results = await provision([
+        {"staff": {...}, "user": {...} or None, "password": "..."},
+        ...
+    ])
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+
+from pymongo.errors import BulkWriteError
+
+from core.database import db
+from core.auth import hash_passwords_async
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 2000
+
+
+def _email(doc: Optional[Dict]) -> Optional[str]:
+    email = (doc or {}).get("email")
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+async def reserve_employee_ids(count: int) -> List[str]:
+    """
+    `count` consecutive EMP-<YEAR>-<SEQ> IDs, continuing generate_employee_id()'s
+    sequence (count of this year's IDs + 1); one count for the whole block.
+    """
+    year = datetime.now().year
+    existing = await db.staff.count_documents({"employee_id": {"$regex": f"^EMP-{year}-"}})
+    return [f"EMP-{year}-{str(existing + i + 1).zfill(5)}" for i in range(count)]
+
+
+async def _existing_emails(emails: List[str]) -> set:
+    if not emails:
+        return set()
+    found = set()
+    for collection in (db.users, db.staff):
+        async for doc in collection.find({"email": {"$in": emails}}, {"_id": 0, "email": 1}):
+            found.add(doc["email"].lower())
+    return found
+
+
+def _failed_indexes(error: BulkWriteError) -> Dict[int, str]:
+    return {e["index"]: e.get("errmsg", "write failed") for e in error.details.get("writeErrors", [])}
+
+
+async def _insert_many(collection, docs: List[Dict]) -> Dict[int, str]:
+    """insert_many(ordered=False); returns {position in docs: error} for the rows that failed."""
+    if not docs:
+        return {}
+    try:
+        await collection.insert_many(docs, ordered=False)
+        return {}
+    except BulkWriteError as e:
+        return _failed_indexes(e)
+
+
+async def provision(entries: List[Dict[str, Any]], assign_employee_ids: bool = True) -> Dict[str, Any]:
+    """
+    entries: [{"staff": doc, "user": doc | None, "password": str | None}, ...];
+    an entry with an "error" (failed validation upstream) is only reported.
+    Staff and user docs must already carry their "id"; staff.user_id / has_login
+    and user.staff_id / employee_id are filled in here. Returns per-entry results
+    in input order plus counts.
+    """
+    if len(entries) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} employees per batch")
+
+    results: List[Dict[str, Any]] = [{"index": i, "status": "pending"} for i in range(len(entries))]
+
+    # 1. duplicates: within the batch first, then against existing staff / users
+    seen, raw = set(), set()
+    for i, entry in enumerate(entries):
+        email = _email(entry.get("staff"))
+        if entry.get("error"):
+            results[i].update(status="error", error=entry["error"])
+        elif email and email in seen:
+            results[i].update(status="skipped", error=f"Duplicate email in batch: {email}")
+        elif email:
+            seen.add(email)
+            raw.add(entry["staff"]["email"].strip())
+    taken = await _existing_emails(list(seen | raw))
+    live = []
+    for i, entry in enumerate(entries):
+        if results[i]["status"] != "pending":
+            continue
+        email = _email(entry.get("staff"))
+        if email and email in taken:
+            results[i].update(status="skipped", error=f"Email already registered: {email}")
+        else:
+            live.append(i)
+
+    # 2. employee IDs, one block
+    if assign_employee_ids:
+        needs_id = [i for i in live if not entries[i]["staff"].get("employee_id")]
+        for i, employee_id in zip(needs_id, await reserve_employee_ids(len(needs_id))):
+            entries[i]["staff"]["employee_id"] = employee_id
+
+    # 3. hash every password in parallel
+    with_login = [i for i in live if entries[i].get("user")]
+    hashes = await hash_passwords_async([entries[i].get("password") or "" for i in with_login])
+    for i, hashed in zip(with_login, hashes):
+        staff, user = entries[i]["staff"], entries[i]["user"]
+        user["password"] = hashed
+        user["staff_id"] = staff["id"]
+        user["employee_id"] = staff.get("employee_id")
+        staff["user_id"] = user["id"]
+        staff["has_login"] = True
+
+    # 4. users first; a row whose user failed gets no staff record
+    user_failures = await _insert_many(db.users, [entries[i]["user"] for i in with_login])
+    failed_rows = set()
+    for position, error in user_failures.items():
+        i = with_login[position]
+        results[i].update(status="error", error=f"User insert failed: {error}")
+        failed_rows.add(i)
+
+    staff_rows = [i for i in live if i not in failed_rows]
+    staff_failures = await _insert_many(db.staff, [entries[i]["staff"] for i in staff_rows])
+    orphan_users = []
+    for position, error in staff_failures.items():
+        i = staff_rows[position]
+        results[i].update(status="error", error=f"Staff insert failed: {error}")
+        if entries[i].get("user"):
+            orphan_users.append(entries[i]["user"]["id"])
+    if orphan_users:
+        await db.users.delete_many({"id": {"$in": orphan_users}})
+
+    for i in staff_rows:
+        if results[i]["status"] == "pending":
+            staff = entries[i]["staff"]
+            results[i].update(status="created", id=staff["id"], employee_id=staff.get("employee_id"),
+                              user_id=staff.get("user_id"), name=staff.get("name"))
+
+    counts = {"created": 0, "skipped": 0, "error": 0}
+    for r in results:
+        counts[r["status"]] += 1
+    logger.info(f"Provisioned {counts['created']} staff ({len(with_login)} logins), "
+                f"{counts['skipped']} skipped, {counts['error']} failed")
+    return {"total": len(entries), **counts, "results": results}
@@ -0,0 +1,344 @@
+"""
+Syllabus Search Index
+- The static NCERT + MPBSE syllabus is compiled once (at startup, or on first
+  use) into an inverted token index plus prefix tries
+- Every token is indexed twice: its normalized spelling and a phonetic key
+  shared by Devanagari and Roman spellings, so "kabir", "kabeer" and "कबीर"
+  all find the same chapter. The key drops vowels, so a phonetic hit also
+  needs the spellings with vowels to be close (edit distance) - "prakash"
+  and "parks" share a key but aren't the same word
+- search() ranks by match quality (exact > prefix > phonetic), chapter names
+  above topics, whole-phrase matches first; suggest() serves typeahead
+
+Query semantics: every query word must match the start of a word in the
+chapter name / topic (the last word may be partial). The old scans matched
+any substring of the whole query, so "gebra" no longer finds "Algebra".
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+import re
+import threading
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Match weights per query word
+EXACT = 3.0
+PREFIX = 2.0
+PHONETIC = 1.5
+PHONETIC_PREFIX = 1.0
+SPELLING_DISTANCE = 4        # a phonetic hit may differ by one edit per this many letters
+
+FIELD_WEIGHTS = {"chapter_name": 1.5, "topic": 1.0}
+PHRASE_BONUS = 3.0
+
+_TOKEN_RE = re.compile(r"(?:[^\W_।॥]|[ऀ-ॣ०-ॿ])+")
+
+# ====================== TRANSLITERATION ======================
+
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "ळ": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+_VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ee", "उ": "u", "ऊ": "oo", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o",
+}
+_MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ee", "ु": "u", "ू": "oo", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o",
+}
+_SIGNS = {"ं": "n", "ँ": "n", "ः": "h"}
+_HALANT = "्"
+_NUKTA = "़"
+_DIGITS = {chr(0x0966 + i): str(i) for i in range(10)}
+
+# Roman spelling variants → one form (order matters)
+_LATIN_FOLDS = [
+    ("chh", "c"), ("ch", "c"), ("sh", "s"), ("kh", "k"), ("gh", "g"), ("th", "t"),
+    ("dh", "d"), ("ph", "f"), ("bh", "b"), ("jh", "j"), ("ck", "k"),
+    ("q", "k"), ("x", "ks"), ("z", "j"), ("w", "v"),
+]
+_LONG_VOWELS = [("aa", "a"), ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u")]
+_VOWEL_RE = re.compile(r"(?<=.)[aeiouh]")
+_NASAL_RE = re.compile(r"m(?=[bp])")
+_REPEAT_RE = re.compile(r"(.)\1+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, NFC, drop nukta, chandrabindu → anusvara, drop apostrophes."""
+    text = unicodedata.normalize("NFC", text.lower())
+    return (text.replace(_NUKTA, "").replace("ँ", "ं")
+            .replace("'", "").replace("’", ""))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def transliterate(word: str) -> str:
+    """Devanagari → Roman (ITRANS-like, final schwa dropped); other chars pass through."""
+    out = []
+    chars = list(word)
+    for i, ch in enumerate(chars):
+        if ch in _CONSONANTS:
+            out.append(_CONSONANTS[ch])
+            nxt = chars[i + 1] if i + 1 < len(chars) else ""
+            if nxt not in _MATRAS and nxt != _HALANT and nxt != "":
+                out.append("a")  # inherent vowel
+        elif ch in _MATRAS:
+            out.append(_MATRAS[ch])
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch in _SIGNS:
+            out.append(_SIGNS[ch])
+        elif ch in _DIGITS:
+            out.append(_DIGITS[ch])
+        elif ch == _HALANT:
+            continue
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def spelling_form(word: str) -> str:
+    """Roman spelling with aspirates/variants folded and long vowels shortened ("प्रकाश" → "prakas")."""
+    form = transliterate(word) if any("ऀ" <= c <= "ॿ" for c in word) else word
+    form = "".join(c for c in form if c.isascii() and c.isalnum())
+    for src, dst in _LATIN_FOLDS + _LONG_VOWELS:
+        form = form.replace(src, dst)
+    return _REPEAT_RE.sub(r"\1", form)
+
+
+def phonetic_key(word: str) -> str:
+    """
+    Spelling-insensitive key: spelling_form without non-initial vowels and h,
+    doubles collapsed. "premchand", "prem chand" (per word), "प्रेमचंद" → "prmcnd".
+    """
+    key = _NASAL_RE.sub("n", spelling_form(word))
+    key = _VOWEL_RE.sub("", key)
+    return _REPEAT_RE.sub(r"\1", key)
+
+
+def _close(a: str, b: str) -> bool:
+    """Levenshtein distance within one edit per SPELLING_DISTANCE letters."""
+    limit = max(len(a), len(b)) // SPELLING_DISTANCE
+    if abs(len(a) - len(b)) > limit:
+        return False
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, cb in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ca != cb))
+        if min(row) > limit:
+            return False
+    return row[-1] <= limit
+
+
+# ====================== TRIE ======================
+
+class _Trie:
+    """Prefix → set of values (doc ids / tokens), precomputed on every node at build time."""
+
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root: Dict = {}
+
+    def insert(self, word: str, value):
+        node = self.root
+        for ch in word:
+            node = node.setdefault(ch, {})
+            values = node.get(None)
+            if values is None:
+                node[None] = values = set()
+            values.add(value)
+
+    def docs_with_prefix(self, prefix: str) -> Set:
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return set()
+        return node.get(None, set())
+
+
+# ====================== INDEX ======================
+
+class SyllabusIndex:
+    """Inverted index + tries over chapter names and topics of all boards."""
+
+    def __init__(self):
+        self.docs: List[Dict] = []
+        self.doc_text: List[str] = []
+        self.doc_weight: List[float] = []
+        self.exact: Dict[str, Set[int]] = {}
+        self.spelling: Dict[str, str] = {}              # token → spelling_form
+        self.phonetic: Dict[str, Set[str]] = {}         # key → tokens
+        self.prefix = _Trie()                           # token prefix → doc ids
+        self.phonetic_prefix = _Trie()                  # key prefix → tokens
+
+    def add(self, doc: Dict, text: str):
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.doc_text.append(" ".join(tokenize(text)))
+        self.doc_weight.append(FIELD_WEIGHTS[doc["match_type"]])
+        for token in set(tokenize(text)):
+            self.exact.setdefault(token, set()).add(doc_id)
+            self.prefix.insert(token, doc_id)
+            if token in self.spelling:
+                continue
+            key = phonetic_key(token)
+            self.spelling[token] = spelling_form(token)
+            if key:
+                self.phonetic.setdefault(key, set()).add(token)
+                self.phonetic_prefix.insert(key, token)
+
+    def add_board(self, board: str, data: Dict):
+        for cls, class_data in data.items():
+            for subject, subject_data in class_data["subjects"].items():
+                for chapter in subject_data.get("chapters", []):
+                    base = {
+                        "class": cls,
+                        "subject": subject,
+                        "board": board,
+                        "chapter": chapter["name"],
+                        "chapter_number": chapter["number"],
+                    }
+                    self.add({**base, "match_type": "chapter_name"}, chapter["name"])
+                    for topic in chapter.get("topics", []):
+                        self.add({**base, "topic": topic, "match_type": "topic"}, topic)
+
+    def _match(self, token: str, allow_prefix: bool) -> Dict[int, float]:
+        key = phonetic_key(token)
+        form = spelling_form(token)
+        matches: Dict[int, float] = {}
+        if key:
+            for t in self.phonetic.get(key, ()):
+                if _close(form, self.spelling[t]):
+                    matches.update(dict.fromkeys(self.exact[t], PHONETIC))
+        if allow_prefix:
+            matches.update(dict.fromkeys(self.prefix.docs_with_prefix(token), PREFIX))
+        matches.update(dict.fromkeys(self.exact.get(token, ()), EXACT))
+        # Short phonetic prefixes are noisy ("photo" → "ft" ~ "फटे"), so they
+        # only count from 3 key letters on, or when nothing else matched
+        if allow_prefix and (len(key) >= 3 or (not matches and len(key) >= 2)):
+            for t in self.phonetic_prefix.docs_with_prefix(key):
+                if _close(form, self.spelling[t][:len(form)]):
+                    for d in self.exact[t]:
+                        matches.setdefault(d, PHONETIC_PREFIX)
+        return matches
+
+    def _scored(self, query: str, prefix_last_only: bool) -> List[Tuple[float, int]]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores: Optional[Dict[int, float]] = None
+        last = len(tokens) - 1
+        for i, token in enumerate(tokens):
+            allow_prefix = (i == last or not prefix_last_only) and (len(token) > 1 or len(tokens) == 1)
+            matches = self._match(token, allow_prefix)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {d: s + matches[d] for d, s in scores.items() if d in matches}
+            if not scores:
+                return []
+        phrase = " ".join(tokens)
+        return [
+            (s * self.doc_weight[d] + (PHRASE_BONUS if phrase in self.doc_text[d] else 0.0), d)
+            for d, s in scores.items()
+        ]
+
+    def search(
+        self,
+        query: str,
+        board: Optional[str] = None,
+        class_num: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Ranked matches in the search_topics() result shape (+ score)."""
+        hits = []
+        for score, d in self._scored(query, prefix_last_only=False):
+            doc = self.docs[d]
+            if board and doc["board"] != board:
+                continue
+            if class_num and doc["class"] != class_num:
+                continue
+            hits.append((-score, d))
+        hits.sort()
+        if limit:
+            hits = hits[:limit]
+        return [{**self.docs[d], "score": round(-neg, 2)} for neg, d in hits]
+
+    def suggest(
+        self,
+        prefix: str,
+        board: Optional[str] = None,
+        class_num: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict]:
+        """Typeahead: distinct chapter / topic names for a partly typed query."""
+        hits = []
+        for score, d in self._scored(prefix, prefix_last_only=True):
+            doc = self.docs[d]
+            if board and doc["board"] != board:
+                continue
+            if class_num and doc["class"] != class_num:
+                continue
+            hits.append((-score, d))
+        hits.sort()
+        out, seen = [], set()
+        for _, d in hits:
+            doc = self.docs[d]
+            text = doc.get("topic") or doc["chapter"]
+            if text.lower() in seen:
+                continue
+            seen.add(text.lower())
+            out.append({
+                "text": text,
+                "type": doc["match_type"],
+                "board": doc["board"],
+                "class": doc["class"],
+                "subject": doc["subject"],
+                "chapter": doc["chapter"],
+                "chapter_number": doc["chapter_number"]
+            })
+            if len(out) >= limit:
+                break
+        return out
+
+
+_index: Optional[SyllabusIndex] = None
+_build_lock = threading.Lock()
+
+
+def build_index() -> SyllabusIndex:
+    from services.ncert_syllabus import NCERT_SYLLABUS_DATA
+    from services.mpbse_syllabus import MPBSE_SYLLABUS_DATA
+
+    started = time.perf_counter()
+    index = SyllabusIndex()
+    index.add_board("NCERT", NCERT_SYLLABUS_DATA)
+    index.add_board("MPBSE", MPBSE_SYLLABUS_DATA)
+    logger.info(
+        f"Syllabus index: {len(index.docs)} entries, {len(index.exact)} terms "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return index
+
+
+def get_index() -> SyllabusIndex:
+    global _index
+    if _index is None:
+        with _build_lock:
+            if _index is None:
+                _index = build_index()
+    return _index
@@ -0,0 +1,218 @@
+"""
+TTS Audio Cache
+- Content-addressed: sha256 of (text, voice_id, model_id, settings) → one MP3
+  file under TTS_CACHE_DIR; identical greetings / prompts / notices are
+  synthesized once and served from disk afterwards
+- LRU eviction by total size (TTS_CACHE_MAX_MB); the index is rebuilt from
+  file mtimes at startup and a hit bumps the mtime
+- synthesize(): whole clip as bytes (JSON / base64 endpoints)
+- stream(): chunks as the provider sends them (binary streaming endpoints);
+  the clip is written to the cache once the stream completes
+- Concurrent synthesize() misses for the same key share one provider call;
+  a stream() that finds one in flight waits for it instead of calling again
+
+The provider call is passed in as `convert`, a zero-argument blocking
+callable returning an iterator of audio chunks (ElevenLabs
+text_to_speech.convert); it runs on the offload I/O pool.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+from core.offload import iterate_io, run_io
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.environ.get("TTS_CACHE_DIR", str(Path(__file__).resolve().parent.parent / "cache" / "tts")))
+MAX_BYTES = int(float(os.environ.get("TTS_CACHE_MAX_MB", "512")) * 1024 * 1024)
+READ_CHUNK = 32 * 1024
+MEDIA_TYPE = "audio/mpeg"
+
+Convert = Callable[[], Iterable[bytes]]
+
+
+def cache_key(text: str, voice_id: str, model_id: str, settings: Optional[Dict[str, Any]] = None) -> str:
+    raw = json.dumps([text.strip(), voice_id, model_id, settings or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()   # key → size, oldest first
+        self._size = 0
+        self._loaded = False
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- index ----------
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.mp3"
+
+    def load(self):
+        """Rebuild the LRU index from the files on disk (oldest mtime first)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries: List[Tuple[float, str, int]] = []
+        for path in self.directory.glob("*/*.mp3"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        self._index = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._size = sum(self._index.values())
+        self._loaded = True
+        self._evict()
+        logger.info(f"TTS cache: {len(self._index)} clips, {self._size / 1e6:.1f} MB in {self.directory}")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _touch(self, key: str):
+        self._index.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            self._size -= self._index.pop(key, 0)
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            self._path(key).unlink(missing_ok=True)
+
+    def _store(self, key: str, audio: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_bytes(audio)
+        os.replace(tmp, path)
+
+    async def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        self._ensure_loaded()
+        await run_io(self._store, key, audio)
+        self._size += len(audio) - self._index.pop(key, 0)
+        self._index[key] = len(audio)
+        self._evict()
+
+    def lookup(self, key: str) -> Optional[Path]:
+        self._ensure_loaded()
+        if key not in self._index:
+            return None
+        self._touch(key)
+        return self._path(key) if key in self._index else None
+
+    # ---------- synthesis ----------
+
+    async def synthesize(self, text: str, voice_id: str, model_id: str,
+                         settings: Optional[Dict[str, Any]], convert: Convert) -> bytes:
+        key = cache_key(text, voice_id, model_id, settings)
+        path = self.lookup(key)
+        if path is not None:
+            try:
+                audio = await run_io(path.read_bytes)
+                self.hits += 1
+                return audio
+            except FileNotFoundError:
+                self._size -= self._index.pop(key, 0)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            started = time.perf_counter()
+            audio = await run_io(lambda: b"".join(convert()))
+            logger.info(f"TTS synthesized {len(text)} chars in {time.perf_counter() - started:.2f}s")
+            await self.put(key, audio)
+            future.set_result(audio)
+            return audio
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()   # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def stream(self, text: str, voice_id: str, model_id: str,
+                     settings: Optional[Dict[str, Any]], convert: Convert) -> AsyncIterator[bytes]:
+        key = cache_key(text, voice_id, model_id, settings)
+        path = self.lookup(key)
+        if path is not None:
+            self.hits += 1
+            async for chunk in _read_file(path):
+                yield chunk
+            return
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # someone is already synthesizing this clip - wait for the whole thing
+            yield await asyncio.shield(pending)
+            return
+
+        self.misses += 1
+        chunks: List[bytes] = []
+        async for chunk in iterate_io(convert):
+            chunks.append(chunk)
+            yield chunk
+        # only reached when the client read the whole clip - a disconnect closes the generator at `yield`
+        await self.put(key, b"".join(chunks))
+
+    def stats(self) -> Dict[str, Any]:
+        self._ensure_loaded()
+        return {"clips": len(self._index), "bytes": self._size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+async def _read_file(path: Path) -> AsyncIterator[bytes]:
+    handle = await run_io(open, path, "rb")
+    try:
+        while True:
+            chunk = await run_io(handle.read, READ_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        handle.close()
+
+
+audio_cache = AudioCache()
+
+
+async def prewarm(phrases: List[Tuple[str, str, str, Optional[Dict[str, Any]], Convert]], concurrency: int = 2):
+    """Synthesize (text, voice_id, model_id, settings, convert) phrases not yet cached, a few at a time."""
+    limit = asyncio.Semaphore(concurrency)
+    missing = [p for p in phrases if audio_cache.lookup(cache_key(*p[:4])) is None]
+
+    async def one(text, voice_id, model_id, settings, convert):
+        async with limit:
+            try:
+                await audio_cache.synthesize(text, voice_id, model_id, settings, convert)
+            except Exception as e:
+                logger.warning(f"TTS pre-warm failed for {text[:40]!r}: {e}")
+
+    if missing:
+        started = time.perf_counter()
+        await asyncio.gather(*[one(*p) for p in missing])
+        logger.info(f"TTS pre-warm: {len(missing)} of {len(phrases)} phrases synthesized "
+                    f"in {time.perf_counter() - started:.1f}s")
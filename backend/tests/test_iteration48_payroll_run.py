@@ -0,0 +1,99 @@
+"""
+Iteration 48 - Batched Payroll Run Tests
+Tests for:
+1. Payroll run - POST /api/salary/run
+2. Idempotent re-run for the same month
+3. Run summary download - GET /api/salary/run/{run_id}/download
+4. Bulk credit still reports per-staff errors - POST /api/salary/bulk-credit
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Test credentials
+TEST_EMAIL = "director@test.com"
+TEST_PASSWORD = "test1234"
+TEST_SCHOOL_ID = "SCH-TEST-2026"
+TEST_MONTH = "2099-01"
+
+
+class TestPayrollRun:
+    """Payroll run engine API tests"""
+
+    @pytest.fixture(scope="class")
+    def auth_token(self):
+        """Get authentication token"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TEST_EMAIL,
+            "password": TEST_PASSWORD
+        })
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return response.json()["access_token"]
+
+    @pytest.fixture(scope="class")
+    def first_run(self, auth_token):
+        response = requests.post(
+            f"{BASE_URL}/api/salary/run",
+            json={"school_id": TEST_SCHOOL_ID, "month": TEST_MONTH},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        return response.json()
+
+    def test_run_returns_summary(self, first_run):
+        """Test POST /api/salary/run"""
+        assert first_run["success"] is True
+        assert "run_id" in first_run
+        summary = first_run["summary"]
+        for key in ("requested", "credited", "already_credited", "errors", "total_net"):
+            assert key in summary
+        assert summary["requested"] == len(first_run["items"])
+        print(f"✓ Payroll run credited {summary['credited']} of {summary['requested']}")
+
+    def test_rerun_is_idempotent(self, auth_token, first_run):
+        """Second run for the same month must not credit anyone twice"""
+        response = requests.post(
+            f"{BASE_URL}/api/salary/run",
+            json={"school_id": TEST_SCHOOL_ID, "month": TEST_MONTH},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["summary"]["credited"] == 0
+        assert data["summary"]["already_credited"] >= first_run["summary"]["credited"]
+        print("✓ Re-run credited nobody twice")
+
+    def test_download_summary_csv(self, auth_token, first_run):
+        """Test GET /api/salary/run/{run_id}/download"""
+        response = requests.get(
+            f"{BASE_URL}/api/salary/run/{first_run['run_id']}/download",
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200
+        assert "text/csv" in response.headers.get("content-type", "")
+        assert "attachment" in response.headers.get("content-disposition", "")
+        assert response.text.startswith("Staff ID,Name")
+        print("✓ Payroll run CSV downloaded")
+
+    def test_download_unknown_run(self, auth_token):
+        response = requests.get(
+            f"{BASE_URL}/api/salary/run/does-not-exist/download",
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 404
+
+    def test_bulk_credit_unknown_staff(self, auth_token):
+        """Unknown staff should be reported as errors, not crash the batch"""
+        response = requests.post(
+            f"{BASE_URL}/api/salary/bulk-credit",
+            params={"school_id": TEST_SCHOOL_ID, "month": TEST_MONTH},
+            json=["TEST-NO-SUCH-STAFF"],
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["credited_count"] == 0
+        assert any("No salary structure" in e for e in data["errors"])
+        print("✓ Bulk credit reports missing structures")
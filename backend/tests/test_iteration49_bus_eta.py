@@ -0,0 +1,91 @@
+"""
+Iteration 49 - Bus ETA & Geofence Engine Tests (services/bus_eta.py, in-process)
+Tests for:
+1. Entering a stop's geofence alerts that stop's students once per trip
+2. A bus first seen close to a stop sends one "arriving" alert, not one per threshold
+3. A bus predicted late against the stop's schedule sends a delay alert
+4. Reassigning a student: the old route stops notifying them
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import bus_eta  # noqa: E402
+
+KM_LAT = 0.009   # ~1 km of latitude
+
+ROUTE = {
+    "id": "TEST-ROUTE-ETA",
+    "school_id": "SCH-TEST-2026",
+    "route_name": "Test Route",
+    "vehicle_id": "TEST-VEH-ETA",
+    "stops": [
+        {"name": "Depot", "lat": 26.80, "lng": 80.95, "pickup_time": "07:00"},
+        {"name": "Civil Lines", "lat": 26.80 + KM_LAT, "lng": 80.95, "pickup_time": "07:10"},
+        {"name": "Hazratganj", "lat": 26.80 + 2 * KM_LAT, "lng": 80.95, "pickup_time": "07:15"},
+    ]
+}
+ASSIGNMENTS = [
+    {"student_id": "STU-1", "route_id": ROUTE["id"], "pickup_stop": "Civil Lines", "drop_stop": "Civil Lines"},
+    {"student_id": "STU-2", "route_id": ROUTE["id"], "pickup_stop": "Hazratganj", "drop_stop": "Hazratganj"},
+]
+
+
+def engine():
+    eta = bus_eta.EtaEngine()
+    eta.load_route(ROUTE, ASSIGNMENTS)
+    return eta
+
+
+def ping(lat_km: float, speed: float = 30):
+    return {"vehicle_id": ROUTE["vehicle_id"], "lat": 26.80 + lat_km * KM_LAT, "lng": 80.95, "speed": speed, "epoch": 0}
+
+
+def at(hh: int, mm: int):
+    return datetime(2026, 1, 5, hh, mm, tzinfo=bus_eta.IST)
+
+
+class TestBusEta:
+    """ETA, geofence and dedup behaviour"""
+
+    def test_arrival_once_per_trip(self):
+        """Test the geofence alert goes to the stop's students, once"""
+        eta = engine()
+        alerts = [a for a in eta.evaluate(ping(1.0), at(7, 5)) if a["notification_type"] == "bus_arrived"]
+        assert len(alerts) == 1
+        assert alerts[0]["stop_name"] == "Civil Lines"
+        assert alerts[0]["student_ids"] == ["STU-1"]
+        assert not [a for a in eta.evaluate(ping(1.0), at(7, 6)) if a["notification_type"] == "bus_arrived"]
+        print("✓ One arrival alert per stop per trip")
+
+    def test_eta_single_alert(self):
+        """Test a bus first seen 3 minutes away crosses both thresholds but alerts once"""
+        eta = engine()
+        # 1.5 km from Civil Lines at 30 km/h = 3 min
+        alerts = [a for a in eta.evaluate(ping(-0.5), at(7, 2)) if a["stop_name"] == "Civil Lines"]
+        arriving = [a for a in alerts if a["notification_type"] == "bus_arriving"]
+        assert len(arriving) == 1
+        assert arriving[0]["eta_minutes"] == 3
+        later = eta.evaluate(ping(-0.3), at(7, 3))
+        assert not [a for a in later if a["stop_name"] == "Civil Lines" and a["notification_type"] == "bus_arriving"]
+        print("✓ Crossed thresholds deduplicated")
+
+    def test_delay_alert(self):
+        """Test a bus at the depot at 07:20 is reported late for Civil Lines (due 07:10)"""
+        eta = engine()
+        alerts = [a for a in eta.evaluate(ping(0.0), at(7, 20)) if a["notification_type"] == "bus_late"]
+        late = {a["stop_name"]: a["delay_minutes"] for a in alerts}
+        assert late["Civil Lines"] >= 10
+        assert not [a for a in eta.evaluate(ping(0.05), at(7, 21)) if a["notification_type"] == "bus_late"]
+        print(f"✓ Delay alerts: {late}")
+
+    def test_reassigned_student_not_notified(self):
+        """Test invalidating a route drops its stop → students mapping and vehicle cache"""
+        bus_eta.engine.load_route(ROUTE, ASSIGNMENTS)
+        bus_eta._loaded_at[ROUTE["vehicle_id"]] = 0.0
+        bus_eta.invalidate_route(ROUTE)
+        assert ROUTE["vehicle_id"] not in bus_eta._loaded_at
+        assert not bus_eta.engine.evaluate(ping(1.0), at(7, 5))
+        print("✓ Invalidated route no longer notifies")
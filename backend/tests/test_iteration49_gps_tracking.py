@@ -0,0 +1,111 @@
+"""
+Iteration 49 - GPS Ingestion and Live Tracking Tests
+Tests for:
+1. GPS batch ingest - POST /api/transport/gps/ingest
+2. Track vehicle returns the ingested position - GET /api/transport/track/{vehicle_id}
+3. Unknown devices are counted, not rejected
+4. Live SSE stream - GET /api/transport/live/{vehicle_id}
+5. Epoch timestamps as digit strings are accepted; an unparseable one only rejects its ping
+6. Far-future / pre-2020 times and off-globe positions reject their ping only, and don't block later pings
+"""
+import pytest
+import requests
+import os
+from datetime import datetime, timezone
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+TEST_SCHOOL_ID = "SCH-TEST-2026"
+
+
+class TestGPSIngest:
+    """GPS ingestion API tests"""
+
+    @pytest.fixture(scope="class")
+    def vehicle_id(self):
+        response = requests.post(
+            f"{BASE_URL}/api/transport/vehicles",
+            params={"school_id": TEST_SCHOOL_ID},
+            json={"vehicle_number": "TEST-GPS-01", "capacity": 40,
+                  "driver_name": "Test Driver", "driver_phone": "9999999999"}
+        )
+        assert response.status_code == 200, f"Failed: {response.text}"
+        return response.json()["vehicle"]["id"]
+
+    def test_ingest_batch(self, vehicle_id):
+        """Test POST /api/transport/gps/ingest"""
+        now = datetime.now(timezone.utc).timestamp()
+        response = requests.post(f"{BASE_URL}/api/transport/gps/ingest", json={
+            "pings": [
+                {"vehicle_id": vehicle_id, "lat": 26.85, "lng": 80.95, "speed": 30, "ts": now - 10},
+                {"vehicle_id": vehicle_id, "lat": 26.851, "lng": 80.951, "speed": 32, "ts": now},
+                {"device_imei": "TEST-UNKNOWN-IMEI", "lat": 26.0, "lng": 80.0}
+            ]
+        })
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["received"] == 3
+        assert data["accepted"] == 2
+        assert data["unknown_device"] == 1
+        print(f"✓ Ingested {data['accepted']} pings, persisted {data['persisted']}")
+
+    def test_track_returns_latest(self, vehicle_id):
+        """Test GET /api/transport/track/{vehicle_id}"""
+        response = requests.get(
+            f"{BASE_URL}/api/transport/track/{vehicle_id}",
+            params={"school_id": TEST_SCHOOL_ID}
+        )
+        assert response.status_code == 200
+        location = response.json()["location"]
+        assert location is not None
+        assert abs(location["lat"] - 26.851) < 1e-6
+        assert "live_stream" in response.json()
+        print("✓ Track returns last ingested position (no simulated jitter)")
+
+    def test_live_stream_is_sse(self, vehicle_id):
+        """Test GET /api/transport/live/{vehicle_id}"""
+        with requests.get(
+            f"{BASE_URL}/api/transport/live/{vehicle_id}",
+            params={"school_id": TEST_SCHOOL_ID},
+            stream=True,
+            timeout=10
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            first = next(response.iter_lines(decode_unicode=True))
+            assert first.startswith("retry:")
+        print("✓ Live stream served as text/event-stream")
+
+    def test_string_epoch_and_bad_ts(self, vehicle_id):
+        """Test "ts" as a digit string (s / ms) and a bad "ts" in one batch"""
+        now = datetime.now(timezone.utc).timestamp()
+        response = requests.post(f"{BASE_URL}/api/transport/gps/ingest", json={
+            "pings": [
+                {"vehicle_id": vehicle_id, "lat": 26.852, "lng": 80.952, "ts": str(int(now + 5))},
+                {"vehicle_id": vehicle_id, "lat": 26.853, "lng": 80.953, "ts": str(int((now + 10) * 1000))},
+                {"vehicle_id": vehicle_id, "lat": 26.854, "lng": 80.954, "ts": "yesterday"}
+            ]
+        })
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["accepted"] == 2
+        assert data["rejected"] == 1
+        print("✓ String epochs accepted, bad timestamp rejected per ping")
+
+    def test_out_of_range_pings(self, vehicle_id):
+        """Test ts 1e20, a far-future ts, a 1970 ts and lat 123 are rejected per ping"""
+        now = datetime.now(timezone.utc).timestamp()
+        response = requests.post(f"{BASE_URL}/api/transport/gps/ingest", json={
+            "pings": [
+                {"vehicle_id": vehicle_id, "lat": 26.855, "lng": 80.955, "ts": 1e20},
+                {"vehicle_id": vehicle_id, "lat": 26.855, "lng": 80.955, "ts": now + 86400},
+                {"vehicle_id": vehicle_id, "lat": 26.855, "lng": 80.955, "ts": 1000},
+                {"vehicle_id": vehicle_id, "lat": 123.0, "lng": 80.955, "ts": now + 20},
+                {"vehicle_id": vehicle_id, "lat": 26.856, "lng": 80.956, "ts": now + 30}
+            ]
+        })
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["rejected"] == 4
+        assert data["accepted"] == 1
+        print("✓ Out-of-range pings rejected, the valid one still accepted")
@@ -0,0 +1,82 @@
+"""
+Iteration 50 - Live Updates Channel Tests
+Tests for:
+1. GET /api/live/stream rejects missing / bad tokens
+2. GET /api/live/stream with ?token= opens an SSE stream with a "connected" event
+3. A notice created by the director is pushed on the stream
+"""
+import json
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+TEST_SCHOOL_ID = "SCH-TEST-2026"
+
+
+def _next_event(lines):
+    """Read SSE lines until one full event; returns (event name, data dict)."""
+    name, data = None, None
+    for line in lines:
+        if line.startswith("event:"):
+            name = line[6:].strip()
+        elif line.startswith("data:"):
+            data = json.loads(line[5:])
+        elif line == "" and data is not None:
+            return name, data
+
+
+class TestLiveChannel:
+    """Per-user live stream tests"""
+
+    @pytest.fixture(scope="class")
+    def auth_token(self):
+        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "director@test.com",
+            "password": "test1234"
+        })
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return response.json()["access_token"]
+
+    def test_stream_requires_token(self):
+        """Test GET /api/live/stream without / with bad token"""
+        response = requests.get(f"{BASE_URL}/api/live/stream", timeout=10)
+        assert response.status_code == 401
+        response = requests.get(f"{BASE_URL}/api/live/stream", params={"token": "garbage"}, timeout=10)
+        assert response.status_code == 401
+        print("✓ Live stream rejects missing/invalid tokens")
+
+    def test_stream_pushes_notice(self, auth_token):
+        """Test GET /api/live/stream receives a new notice"""
+        with requests.get(
+            f"{BASE_URL}/api/live/stream",
+            params={"token": auth_token},
+            stream=True,
+            timeout=15
+        ) as stream:
+            assert stream.status_code == 200
+            assert stream.headers["content-type"].startswith("text/event-stream")
+            lines = stream.iter_lines(decode_unicode=True)
+            name, hello = _next_event(lines)
+            assert name == "connected"
+            assert f"school:{TEST_SCHOOL_ID}" in hello["topics"]
+
+            response = requests.post(
+                f"{BASE_URL}/api/notices",
+                headers={"Authorization": f"Bearer {auth_token}"},
+                json={
+                    "title": "TEST Live Notice",
+                    "content": "Pushed over the live channel",
+                    "school_id": TEST_SCHOOL_ID,
+                    "target_audience": ["all"]
+                }
+            )
+            assert response.status_code == 200, f"Failed: {response.text}"
+            notice_id = response.json()["id"]
+
+            name, event = _next_event(lines)
+            while event.get("id") != notice_id:
+                name, event = _next_event(lines)
+            assert name == "notice"
+        print("✓ Notice pushed to connected director")
@@ -0,0 +1,94 @@
+"""
+Iteration 51 - Group Chat Sequence / Unread Tests
+Tests for:
+1. Messages get consecutive per-group seq numbers - POST /api/chat/messages/send
+2. Seq cursor paging - GET /api/chat/messages/{group_id}?after_seq= / before_seq=
+3. Unread counts from read cursors - GET /api/chat/unread/{school_id}
+4. Mark read - POST /api/chat/messages/read
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+TEST_SCHOOL_ID = "SCH-TEST-2026"
+
+
+class TestGroupChatSeq:
+    """Chat seq / cursor / unread tests"""
+
+    @pytest.fixture(scope="class")
+    def group(self):
+        members = [f"TEST-CHAT-{uuid.uuid4().hex[:6]}" for _ in range(2)]
+        response = requests.post(f"{BASE_URL}/api/chat/groups/create", json={
+            "name": "TEST Seq Group",
+            "group_type": "custom",
+            "school_id": TEST_SCHOOL_ID,
+            "members": members,
+            "created_by": members[0]
+        })
+        assert response.status_code == 200, f"Failed: {response.text}"
+        return {"id": response.json()["group_id"], "members": members}
+
+    def test_send_assigns_seq(self, group):
+        """Test POST /api/chat/messages/send"""
+        seqs = []
+        for i in range(3):
+            response = requests.post(f"{BASE_URL}/api/chat/messages/send", json={
+                "group_id": group["id"],
+                "content": f"TEST message {i}",
+                "sender_id": group["members"][0],
+                "sender_name": "Tester",
+                "sender_role": "teacher"
+            })
+            assert response.status_code == 200, f"Failed: {response.text}"
+            seqs.append(response.json()["seq"])
+        assert seqs == [1, 2, 3]
+        print("✓ Messages numbered 1, 2, 3")
+
+    def test_send_unknown_group(self):
+        """Test POST /api/chat/messages/send to a missing group"""
+        response = requests.post(f"{BASE_URL}/api/chat/messages/send", json={
+            "group_id": "does-not-exist",
+            "content": "x",
+            "sender_id": "x",
+            "sender_name": "x",
+            "sender_role": "teacher"
+        })
+        assert response.status_code == 404
+        print("✓ Unknown group rejected")
+
+    def test_seq_paging(self, group):
+        """Test GET /api/chat/messages/{group_id} with seq cursors"""
+        response = requests.get(f"{BASE_URL}/api/chat/messages/{group['id']}", params={"limit": 2})
+        data = response.json()
+        assert [m["seq"] for m in data["messages"]] == [2, 3]
+        assert data["has_more"] is True
+
+        response = requests.get(f"{BASE_URL}/api/chat/messages/{group['id']}",
+                                params={"before_seq": data["first_seq"]})
+        assert [m["seq"] for m in response.json()["messages"]] == [1]
+
+        response = requests.get(f"{BASE_URL}/api/chat/messages/{group['id']}", params={"after_seq": 1})
+        assert [m["seq"] for m in response.json()["messages"]] == [2, 3]
+        print("✓ before_seq / after_seq paging")
+
+    def test_unread_and_mark_read(self, group):
+        """Test GET /api/chat/unread and POST /api/chat/messages/read"""
+        sender, reader = group["members"]
+        unread = requests.get(f"{BASE_URL}/api/chat/unread/{TEST_SCHOOL_ID}",
+                              params={"user_id": reader}).json()["unread"]
+        assert unread[group["id"]] == 3
+        unread = requests.get(f"{BASE_URL}/api/chat/unread/{TEST_SCHOOL_ID}",
+                              params={"user_id": sender}).json()["unread"]
+        assert unread[group["id"]] == 0
+
+        response = requests.post(f"{BASE_URL}/api/chat/messages/read",
+                                 json={"group_id": group["id"], "user_id": reader, "seq": 2})
+        assert response.status_code == 200
+        unread = requests.get(f"{BASE_URL}/api/chat/unread/{TEST_SCHOOL_ID}",
+                              params={"user_id": reader}).json()["unread"]
+        assert unread[group["id"]] == 1
+        print("✓ Unread = last_seq - read cursor")
@@ -0,0 +1,108 @@
+"""
+Iteration 52 - Online Exam Session Tests
+Tests for:
+1. Student exam view hides correct answers - GET /api/exams/{exam_id}
+2. Grading with negative marking - POST /api/exams/{exam_id}/submit
+3. Second submission rejected - POST /api/exams/{exam_id}/submit
+4. Leaderboard order - GET /api/exams/{exam_id}/leaderboard
+"""
+import pytest
+import requests
+import os
+import uuid
+import jwt
+from datetime import datetime, timezone, timedelta
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+JWT_SECRET = os.environ.get('JWT_SECRET', 'schooltino-secret-key-2024')
+
+TEST_SCHOOL_ID = "SCH-TEST-2026"
+
+
+def student_headers(student_id):
+    token = jwt.encode({
+        "sub": student_id,
+        "role": "student",
+        "school_id": TEST_SCHOOL_ID,
+        "exp": datetime.now(timezone.utc) + timedelta(hours=1)
+    }, JWT_SECRET, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestExamSessions:
+    """Exam submit / leaderboard tests"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "director@test.com",
+            "password": "test1234"
+        })
+        if response.status_code != 200:
+            pytest.skip("Authentication failed - skipping tests")
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    @pytest.fixture(scope="class")
+    def exam_id(self, auth_headers):
+        response = requests.post(f"{BASE_URL}/api/exams", json={
+            "title": "TEST Exam Session",
+            "subject": "Mathematics",
+            "class_id": "TEST-CLASS",
+            "school_id": TEST_SCHOOL_ID,
+            "duration": 30,
+            "total_marks": 6,
+            "negative_marking": True,
+            "negative_marks": 0.5,
+            "questions": [
+                {"question": "2 + 2", "options": ["3", "4", "5", "6"], "correct_answer": 1, "marks": 2},
+                {"question": "3 x 3", "options": ["6", "8", "9", "12"], "correct_answer": 2, "marks": 2},
+                {"question": "10 / 2", "options": ["2", "5", "8", "20"], "correct_answer": 1, "marks": 2}
+            ]
+        }, headers=auth_headers)
+        assert response.status_code == 200, f"Failed: {response.text}"
+        return response.json()["id"]
+
+    def test_student_view_hides_answers(self, exam_id):
+        """Test GET /api/exams/{exam_id} as a student"""
+        response = requests.get(f"{BASE_URL}/api/exams/{exam_id}",
+                                headers=student_headers(f"TEST-STU-{uuid.uuid4().hex[:6]}"))
+        assert response.status_code == 200, f"Failed: {response.text}"
+        questions = response.json()["questions"]
+        assert len(questions) == 3
+        assert all("correct_answer" not in q for q in questions)
+        print("✓ Student view has no answer key")
+
+    def test_submit_and_duplicate(self, exam_id):
+        """Test POST /api/exams/{exam_id}/submit twice"""
+        headers = student_headers(f"TEST-STU-{uuid.uuid4().hex[:6]}")
+        body = {"exam_id": exam_id, "answers": {"0": 1, "1": 0}}
+        response = requests.post(f"{BASE_URL}/api/exams/{exam_id}/submit", json=body, headers=headers)
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        # 2 marks for Q1, -0.5 for Q2, Q3 unanswered
+        assert data["score"] == 1.5
+        assert data["correct_answers"] == 1
+        assert data["wrong_answers"] == 1
+        assert data["unanswered"] == 1
+        assert data["rank"] >= 1
+        print(f"✓ Graded: score {data['score']}, rank {data['rank']}/{data['total_students']}")
+
+        response = requests.post(f"{BASE_URL}/api/exams/{exam_id}/submit", json=body, headers=headers)
+        assert response.status_code == 400
+        print("✓ Second submission rejected")
+
+    def test_leaderboard(self, exam_id, auth_headers):
+        """Test GET /api/exams/{exam_id}/leaderboard"""
+        full = {"exam_id": exam_id, "answers": {"0": 1, "1": 2, "2": 1}}
+        response = requests.post(f"{BASE_URL}/api/exams/{exam_id}/submit", json=full,
+                                 headers=student_headers(f"TEST-STU-{uuid.uuid4().hex[:6]}"))
+        assert response.status_code == 200, f"Failed: {response.text}"
+        assert response.json()["rank"] == 1
+
+        response = requests.get(f"{BASE_URL}/api/exams/{exam_id}/leaderboard", headers=auth_headers)
+        assert response.status_code == 200
+        board = response.json()
+        assert board[0]["score"] == 6 and board[0]["rank"] == 1
+        scores = [r["score"] for r in board]
+        assert scores == sorted(scores, reverse=True)
+        print(f"✓ Leaderboard: {scores}")
@@ -0,0 +1,61 @@
+"""
+Iteration 54 - Cursor Pagination Tests
+Tests for:
+1. Keyset pages cover the list exactly once - GET /api/students?limit=&cursor=
+2. Streamed export matches the paged list - GET /api/students?stream=ndjson
+3. Bad cursor rejected - GET /api/fees/invoices?cursor=garbage
+"""
+import json
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestPagination:
+    """Keyset cursor / streaming tests"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "director@test.com",
+            "password": "test1234"
+        })
+        if response.status_code != 200:
+            pytest.skip("Authentication failed - skipping tests")
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def test_pages_cover_list(self, auth_headers):
+        """Test GET /api/students in pages of 2"""
+        full = requests.get(f"{BASE_URL}/api/students", params={"limit": 1000}, headers=auth_headers)
+        assert full.status_code == 200, f"Failed: {full.text}"
+        expected = [s["id"] for s in full.json()]
+
+        seen, cursor = [], None
+        for _ in range(len(expected) + 1):
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = requests.get(f"{BASE_URL}/api/students", params=params, headers=auth_headers)
+            assert response.status_code == 200, f"Failed: {response.text}"
+            seen += [s["id"] for s in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == expected
+        print(f"✓ {len(seen)} students over {max(1, (len(seen) + 1) // 2)} pages")
+
+    def test_stream_matches(self, auth_headers):
+        """Test GET /api/students?stream=ndjson"""
+        response = requests.get(f"{BASE_URL}/api/students", params={"stream": "ndjson"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines() if line]
+        paged = requests.get(f"{BASE_URL}/api/students", params={"limit": 1000}, headers=auth_headers).json()
+        assert [r["id"] for r in rows] == [s["id"] for s in paged]
+        print(f"✓ Streamed {len(rows)} students")
+
+    def test_bad_cursor(self, auth_headers):
+        """Test GET /api/fees/invoices with an invalid cursor"""
+        response = requests.get(f"{BASE_URL}/api/fees/invoices", params={"cursor": "garbage"}, headers=auth_headers)
+        assert response.status_code == 400
+        print("✓ Invalid cursor rejected")
@@ -0,0 +1,48 @@
+"""
+Iteration 56 - Offload Pool Tests
+Tests for:
+1. Concurrent logins don't stall other requests - POST /api/auth/login x8 + GET /api/health
+2. Offload / event-loop series exposed - GET /metrics
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+class TestOffload:
+    """bcrypt on the CPU pool / loop monitor tests"""
+
+    def _login(self, _):
+        return requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "director@test.com",
+            "password": "test1234"
+        })
+
+    def test_login_burst(self):
+        """Test health stays fast while 8 logins hash passwords"""
+        with ThreadPoolExecutor(max_workers=9) as pool:
+            logins = [pool.submit(self._login, i) for i in range(8)]
+            time.sleep(0.05)
+            started = time.perf_counter()
+            health = requests.get(f"{BASE_URL}/api/health")
+            health_seconds = time.perf_counter() - started
+            results = [f.result() for f in logins]
+        if any(r.status_code != 200 for r in results):
+            pytest.skip("Authentication failed - skipping tests")
+        assert health.status_code == 200
+        assert health_seconds < 1.0, f"health took {health_seconds:.2f}s during login burst"
+        print(f"✓ 8 logins, health answered in {health_seconds * 1000:.0f} ms")
+
+    def test_metrics_series(self):
+        """Test GET /metrics has offload and loop series"""
+        headers = {"Authorization": f"Bearer {METRICS_TOKEN}"} if METRICS_TOKEN else {}
+        response = requests.get(f"{BASE_URL}/metrics", headers=headers)
+        assert response.status_code == 200
+        assert "event_loop_lag_seconds_count" in response.text
+        assert "event_loop_stalls_total" in response.text
+        print("✓ Loop lag and offload metrics exposed")
@@ -0,0 +1,70 @@
+"""
+Iteration 57 - Bulk Employee Provisioning Tests
+Tests for:
+1. Batch create with logins, per-row outcomes - POST /api/employees/bulk
+2. Provisioned login works - POST /api/auth/login with a bulk-created teacher
+3. Re-sending the batch skips every row as already registered
+"""
+import uuid
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestBulkEmployees:
+    """Bulk staff provisioning tests"""
+
+    @pytest.fixture(scope="class")
+    def director(self):
+        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "director@test.com",
+            "password": "test1234"
+        })
+        if response.status_code != 200:
+            pytest.skip("Authentication failed - skipping tests")
+        data = response.json()
+        return {"Authorization": f"Bearer {data['access_token']}"}, data["user"]["school_id"]
+
+    @pytest.fixture(scope="class")
+    def batch(self):
+        tag = uuid.uuid4().hex[:8]
+        return [
+            {"name": "Bulk Teacher A", "mobile": "9000000001", "email": f"bulk-a-{tag}@test.com",
+             "designation": "teacher", "password": "bulkpass1"},
+            {"name": "Bulk Teacher B", "mobile": "9000000002", "email": f"bulk-b-{tag}@test.com",
+             "designation": "teacher"},
+            {"name": "Bulk Duplicate", "mobile": "9000000003", "email": f"bulk-a-{tag}@test.com",
+             "designation": "teacher"},
+            {"name": "Bulk Invalid", "mobile": "9000000004", "email": "not-an-email", "designation": "teacher"},
+        ]
+
+    def test_bulk_create(self, director, batch):
+        """Test POST /api/employees/bulk"""
+        headers, school_id = director
+        response = requests.post(f"{BASE_URL}/api/employees/bulk", headers=headers,
+                                 json={"school_id": school_id, "employees": batch})
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert [r["status"] for r in data["results"]] == ["created", "created", "skipped", "error"]
+        assert data["results"][0]["user_id"] and data["results"][0]["employee_id"]
+        print(f"✓ created {data['created']}, skipped {data['skipped']}, errors {data['error']}")
+
+    def test_provisioned_login(self, director, batch):
+        """Test login as a bulk-created teacher"""
+        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": batch[0]["email"],
+            "password": "bulkpass1"
+        })
+        assert response.status_code == 200, f"Failed: {response.text}"
+        print("✓ Bulk-created teacher can log in")
+
+    def test_resend_skips(self, director, batch):
+        """Test the same batch again is skipped row by row"""
+        headers, school_id = director
+        response = requests.post(f"{BASE_URL}/api/employees/bulk", headers=headers,
+                                 json={"school_id": school_id, "employees": batch[:2]})
+        assert response.status_code == 200
+        assert response.json()["skipped"] == 2
+        print("✓ Already registered emails skipped")
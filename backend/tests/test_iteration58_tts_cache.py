@@ -0,0 +1,56 @@
+"""
+Iteration 58 - TTS Audio Cache Tests
+Tests for:
+1. Cache stats reported - GET /api/tino-voice/status
+2. Streamed MP3 - POST /api/tino-voice/tts/stream (503 when ElevenLabs is not configured)
+3. Repeated text served from the cache - POST /api/tino-voice/tts twice, identical audio
+"""
+import time
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+GREETING = {"text": "Welcome to the school!", "voice_type": "male_hindi"}
+
+
+class TestTTSCache:
+    """TTS audio cache and streaming tests"""
+
+    @pytest.fixture(scope="class")
+    def status(self):
+        response = requests.get(f"{BASE_URL}/api/tino-voice/status")
+        assert response.status_code == 200, f"Failed: {response.text}"
+        return response.json()
+
+    def test_cache_stats(self, status):
+        """Test GET /api/tino-voice/status includes cache stats"""
+        stats = status["tts_cache"]
+        assert {"clips", "bytes", "max_bytes", "hits", "misses"} <= set(stats)
+        print(f"✓ TTS cache: {stats['clips']} clips, {stats['bytes']} bytes")
+
+    def test_stream(self, status):
+        """Test POST /api/tino-voice/tts/stream"""
+        response = requests.post(f"{BASE_URL}/api/tino-voice/tts/stream", json=GREETING, stream=True)
+        if not status["tts_enabled"]:
+            assert response.status_code == 503
+            print("✓ Stream endpoint returns 503 without ElevenLabs")
+            return
+        assert response.status_code == 200, f"Failed: {response.text}"
+        assert response.headers["content-type"].startswith("audio/mpeg")
+        audio = b"".join(response.iter_content(chunk_size=8192))
+        assert len(audio) > 1000
+        print(f"✓ Streamed {len(audio)} bytes of MP3")
+
+    def test_repeat_is_cached(self, status):
+        """Test the same /tts request twice returns the same audio, the second from cache"""
+        if not status["tts_enabled"]:
+            pytest.skip("ElevenLabs not configured")
+        first = requests.post(f"{BASE_URL}/api/tino-voice/tts", json=GREETING).json()
+        started = time.perf_counter()
+        second = requests.post(f"{BASE_URL}/api/tino-voice/tts", json=GREETING).json()
+        elapsed = time.perf_counter() - started
+        assert first["success"] and second["success"]
+        assert first["audio_base64"] == second["audio_base64"]
+        print(f"✓ Cached clip served in {elapsed * 1000:.0f} ms")
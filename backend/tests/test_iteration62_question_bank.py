@@ -0,0 +1,69 @@
+"""
+Iteration 62 - Question Bank Tests
+Tests for:
+1. A generated paper fills the bank - POST /api/ai/generate-paper
+2. The same paper again is assembled from the bank, marks still exact - POST /api/ai/generate-paper
+3. Streamed generation announces bank questions - POST /api/ai/generate-paper/stream
+"""
+import json
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+PAPER = {
+    "subject": "Science",
+    "class_name": "Class 8",
+    "chapter": "Light",
+    "difficulty": "medium",
+    "question_types": ["mcq", "short"],
+    "total_marks": 10,
+    "time_duration": 30,
+    "language": "english"
+}
+
+
+class TestQuestionBank:
+    """Question bank reuse tests"""
+
+    @pytest.fixture(scope="class")
+    def headers(self):
+        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "director@test.com",
+            "password": "test1234"
+        })
+        if response.status_code != 200:
+            pytest.skip("Authentication failed - skipping tests")
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def test_first_paper(self, headers):
+        """Test a paper is generated (and its questions banked)"""
+        response = requests.post(f"{BASE_URL}/api/ai/generate-paper", json=PAPER, headers=headers, timeout=180)
+        if response.status_code == 500 and "API key" in response.text:
+            pytest.skip("LLM key not configured")
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["questions"]
+        print(f"✓ {len(data['questions'])} questions, {data['bank_questions']} from the bank")
+
+    def test_second_paper_from_bank(self, headers):
+        """Test the same request reuses banked questions"""
+        response = requests.post(f"{BASE_URL}/api/ai/generate-paper", json=PAPER, headers=headers, timeout=180)
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["bank_questions"] > 0
+        assert sum(q["marks"] for q in data["questions"]) == PAPER["total_marks"]
+        print(f"✓ {data['bank_questions']} of {len(data['questions'])} questions from the bank")
+
+    def test_stream_from_bank(self, headers):
+        """Test POST /api/ai/generate-paper/stream reports bank questions"""
+        response = requests.post(f"{BASE_URL}/api/ai/generate-paper/stream", json=PAPER, headers=headers,
+                                 stream=True, timeout=180)
+        assert response.status_code == 200
+        events = [json.loads(line[5:]) for line in response.iter_lines(decode_unicode=True)
+                  if line and line.startswith("data:")]
+        result = next(e for e in events if e["type"] == "result")
+        assert result["bank_questions"] > 0
+        assert any(e["type"] == "status" and "question bank" in e["message"] for e in events)
+        print("✓ Streamed paper assembled from the bank")
@@ -0,0 +1,99 @@
+"""
+Iteration 63 - Chapter Summary Pre-generation Tests
+Tests for:
+1. Pre-generation job requires auth - POST /api/syllabus-progress/ai/pregenerate-summaries
+2. Unknown board rejected - POST /api/syllabus-progress/ai/pregenerate-summaries
+3. Job queued for one class and reports progress - GET /api/syllabus-progress/ai/pregenerate-summaries/{job_id}
+4. Concurrent requests for one chapter get the same summary - POST /api/syllabus-progress/ai/summarize-chapter
+5. Cached summary requires auth and a known language - GET /api/syllabus-progress/ai/summary/{board}/{class_num}/{subject}/{chapter_num}
+"""
+from concurrent.futures import ThreadPoolExecutor
+import uuid
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+PREGEN_URL = f"{BASE_URL}/api/syllabus-progress/ai/pregenerate-summaries"
+SUMMARY_URL = f"{BASE_URL}/api/syllabus-progress/ai/summary/NCERT/10/Mathematics/1"
+
+
+class TestSummaryPregeneration:
+    """Chapter summary pre-generation tests"""
+
+    @pytest.fixture(scope="class")
+    def headers(self):
+        response = requests.post(f"{BASE_URL}/api/auth/login", json={
+            "email": "director@test.com",
+            "password": "test1234"
+        })
+        if response.status_code != 200:
+            pytest.skip("Authentication failed - skipping tests")
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def test_requires_auth(self):
+        """Test POST /ai/pregenerate-summaries without a token"""
+        response = requests.post(PREGEN_URL, json={"boards": ["NCERT"]})
+        assert response.status_code in (401, 403)
+        print("✓ Anonymous callers rejected")
+
+    def test_unknown_board(self, headers):
+        """Test an unknown board is a 400"""
+        response = requests.post(PREGEN_URL, json={"boards": ["ICSE"]}, headers=headers)
+        if response.status_code == 500:
+            pytest.skip("AI service not configured")
+        assert response.status_code == 400
+        print("✓ Unknown board rejected")
+
+    def test_job_progress(self, headers):
+        """Test a one-class job is queued and its progress can be polled"""
+        response = requests.post(PREGEN_URL, json={
+            "boards": ["NCERT"], "languages": ["english"], "class_nums": ["1"]
+        }, headers=headers)
+        if response.status_code == 500:
+            pytest.skip("AI service not configured")
+        assert response.status_code == 200, f"Failed: {response.text}"
+        job = response.json()
+        assert job["status"] == "queued"
+        assert job["total"] > 0
+
+        response = requests.get(f"{PREGEN_URL}/{job['id']}", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] in ("queued", "running", "completed")
+        print(f"✓ Job {data['status']}: {data.get('generated', 0)} of {data['total']} generated")
+
+    def test_cached_summary_requires_auth(self):
+        """Test GET /ai/summary without a token"""
+        response = requests.get(SUMMARY_URL, params={"language": "english"})
+        assert response.status_code in (401, 403)
+        print("✓ Anonymous summary reads rejected")
+
+    def test_cached_summary_unknown_language(self, headers):
+        """Test an unsupported language is a 400, not a new generation"""
+        response = requests.get(SUMMARY_URL, params={"language": "klingon"}, headers=headers)
+        assert response.status_code == 400
+        print("✓ Unknown language rejected")
+
+    def test_single_flight(self):
+        """Test concurrent requests for a not-yet-generated chapter return one summary"""
+        chapter = {
+            "board": "NCERT",
+            "class_num": "8",
+            "subject": "Science",
+            "chapter_number": 900 + uuid.uuid4().int % 99,   # not in the syllabus, never pre-generated
+            "chapter_name": "Crop Production and Management",
+            "language": "english"
+        }
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(
+                lambda _: requests.post(f"{BASE_URL}/api/syllabus-progress/ai/summarize-chapter",
+                                        json=chapter, timeout=180),
+                range(4)
+            ))
+        if responses[0].status_code == 500:
+            pytest.skip("AI service not configured")
+        assert all(r.status_code == 200 for r in responses)
+        summaries = {r.json()["summary"] for r in responses}
+        assert len(summaries) == 1
+        print("✓ 4 concurrent requests, 1 summary")
@@ -0,0 +1,54 @@
+"""
+Iteration 65 - Local Photo Quality Analyzer Tests
+Tests for:
+1. Photos without a face aren't enrolled - POST /api/face-recognition/enroll-multiple
+2. Data that isn't an image is skipped, not enrolled - POST /api/face-recognition/enroll-multiple
+"""
+import base64
+import io
+import uuid
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+ENROLL_URL = f"{BASE_URL}/api/face-recognition/enroll-multiple"
+
+
+def jpeg_photo(shade: int) -> str:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (480, 640), (shade, shade, shade)).save(buffer, format="JPEG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def enrollment(photos):
+    return {
+        "person_id": f"TEST-PARENT-{uuid.uuid4().hex[:6]}",
+        "person_type": "parent",
+        "person_name": "TEST Parent",
+        "school_id": "SCH-TEST-2026",
+        "photos": photos
+    }
+
+
+class TestPhotoQuality:
+    """Enrollment photo quality tests"""
+
+    def test_no_face_not_enrolled(self):
+        """Test blank photos of every angle are all rejected"""
+        photos = [{"angle": angle, "photo_data": jpeg_photo(shade)}
+                  for angle, shade in (("front", 90), ("left", 120), ("right", 150), ("passport", 180))]
+        response = requests.post(ENROLL_URL, json=enrollment(photos), timeout=120)
+        assert response.status_code == 200, f"Failed: {response.text}"
+        data = response.json()
+        assert data["success"] is False
+        assert "error" in data
+        print(f"✓ {data['error']}")
+
+    def test_invalid_photo_skipped(self):
+        """Test a payload that isn't an image is never enrolled"""
+        photos = [{"angle": "front", "photo_data": base64.b64encode(b"not a jpeg").decode()}]
+        response = requests.post(ENROLL_URL, json=enrollment(photos), timeout=60)
+        assert response.status_code == 200
+        assert response.json()["success"] is False
+        print("✓ Invalid photo skipped")
@@ -0,0 +1,125 @@
+"""
+Iteration 66 - Audit Log Write-behind Buffer Tests (core/audit_buffer.py, in-process)
+Tests for:
+1. Buffered entries are written in one insert_many
+2. Mongo down: the batch is spilled and replayed on the next successful flush
+3. A document Mongo rejects is quarantined, not re-spilled; the rest of its batch is kept
+4. A transiently failed document is spilled alone and retried
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import audit_buffer as audit_module  # noqa: E402
+from core.audit_buffer import AuditBuffer, make_entry  # noqa: E402
+
+
+class FakeAuditLogs:
+    """audit_logs stand-in: fails the documents / calls it is told to."""
+
+    def __init__(self):
+        self.docs = {}
+        self.down = False
+        self.fail = {}   # action → write error code
+
+    async def insert_many(self, batch, ordered=False):
+        if self.down:
+            raise AutoReconnect("connection refused")
+        errors = []
+        for i, doc in enumerate(batch):
+            code = self.fail.get(doc["action"])
+            if code is None and doc["id"] in self.docs:
+                code = 11000
+            if code is None:
+                self.docs[doc["id"]] = doc
+            else:
+                errors.append({"index": i, "code": code, "errmsg": f"error {code}"})
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], "nInserted": len(batch) - len(errors)})
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+
+class FakeDB:
+    def __init__(self):
+        self.audit_logs = FakeAuditLogs()
+
+
+def buffer(tmp_path, monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(audit_module, "db", fake)
+    buf = AuditBuffer(batch_size=10, spill_path=tmp_path / "spill.jsonl",
+                      quarantine_path=tmp_path / "rejected.jsonl")
+    buf._indexes_ready = True
+    return buf, fake.audit_logs
+
+
+def entries(*actions):
+    return [make_entry("U1", action, "test") for action in actions]
+
+
+def spill_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+class TestAuditBuffer:
+    """Write-behind flush, spill and quarantine"""
+
+    def test_flush_writes_batch(self, tmp_path, monkeypatch):
+        """Test buffered entries go to Mongo"""
+        buf, logs = buffer(tmp_path, monkeypatch)
+        for entry in entries("create", "update", "delete"):
+            buf.pending.append(entry)
+        assert asyncio.run(buf.flush()) == 3
+        assert len(logs.docs) == 3
+        print("✓ 3 entries in one flush")
+
+    def test_spill_and_replay(self, tmp_path, monkeypatch):
+        """Test a batch spilled while Mongo is down is replayed by the next good flush"""
+        buf, logs = buffer(tmp_path, monkeypatch)
+        logs.down = True
+        buf.pending.extend(entries("create", "update"))
+        assert asyncio.run(buf.flush()) == 0
+        assert len(spill_lines(buf.spill_path)) == 2
+
+        logs.down = False
+        buf.pending.extend(entries("delete"))
+        assert asyncio.run(buf.flush()) == 1
+        assert len(logs.docs) == 3
+        assert not buf.spill_path.exists()
+        print("✓ Spilled entries replayed after Mongo came back")
+
+    def test_poison_document_quarantined(self, tmp_path, monkeypatch):
+        """Test a document failing validation is quarantined, the others written"""
+        buf, logs = buffer(tmp_path, monkeypatch)
+        logs.fail["poison"] = 121   # DocumentValidationFailure
+        buf.pending.extend(entries("create", "poison", "update"))
+        assert asyncio.run(buf.flush()) == 2
+        assert not spill_lines(buf.spill_path)
+        rejected = spill_lines(buf.quarantine_path)
+        assert [r["action"] for r in rejected] == ["poison"]
+        assert rejected[0]["audit_error"]["code"] == 121
+
+        buf.pending.extend(entries("later"))
+        asyncio.run(buf.flush())
+        assert buf.stats()["rejected"] == 1
+        print("✓ Rejected document quarantined once, batch kept")
+
+    def test_transient_failure_spills_only_that_document(self, tmp_path, monkeypatch):
+        """Test a stepped-down error spills that document only"""
+        buf, logs = buffer(tmp_path, monkeypatch)
+        logs.fail["flaky"] = 189   # PrimarySteppedDown
+        buf.pending.extend(entries("create", "flaky", "update"))
+        assert asyncio.run(buf.flush()) == 2
+        assert [e["action"] for e in spill_lines(buf.spill_path)] == ["flaky"]
+
+        del logs.fail["flaky"]
+        assert asyncio.run(buf.replay_spill()) == 1
+        assert len(logs.docs) == 3
+        print("✓ Only the failed document spilled and retried")
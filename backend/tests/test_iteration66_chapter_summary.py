@@ -0,0 +1,117 @@
+"""
+Iteration 66 - Chapter Summary Generation Tests (routes/syllabus_progress.py, in-process)
+Tests for:
+1. A generated summary is stored in chapter_summaries
+2. A failed generation ("AI Error: ..." or empty reply) raises and stores nothing
+3. A pre-generation job counts the failed chapter as failed, not generated
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "schooltino")
+
+from routes import syllabus_progress  # noqa: E402
+from routes.syllabus_progress import ChapterSummaryRequest  # noqa: E402
+
+CHAPTER = {"board": "NCERT", "class_num": "8", "subject": "Science", "chapter_number": 1,
+           "chapter_name": "Crop Production and Management", "language": "english"}
+
+
+def matches(doc, query):
+    return all(doc.get(k) == v for k, v in query.items())
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    async def find(self, query, projection=None):
+        for doc in list(self.docs):   # the job's $in filter isn't needed: one board and language
+            yield dict(doc)
+
+    async def find_one(self, query, projection=None):
+        return next((dict(d) for d in self.docs if matches(d, query)), None)
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if matches(d, query)), None)
+        if doc is None:
+            if not upsert:
+                return
+            doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            doc.update(update.get("$setOnInsert", {}))
+            self.docs.append(doc)
+        doc.update(update.get("$set", {}))
+        for k, n in update.get("$inc", {}).items():
+            doc[k] = doc.get(k, 0) + n
+
+
+class FakeDB:
+    def __init__(self):
+        self.chapter_summaries = FakeCollection()
+        self.summary_jobs = FakeCollection()
+
+
+class FakeChat:
+    def __init__(self, reply):
+        self.reply = reply
+
+    async def send_message(self, message):
+        return self.reply
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(syllabus_progress, "db", db)
+    return db
+
+
+def use_reply(monkeypatch, reply):
+    monkeypatch.setattr(syllabus_progress, "chapter_summary_chat", lambda request: FakeChat(reply))
+
+
+class TestChapterSummary:
+    """Only successful generations are cached"""
+
+    def test_summary_stored(self, fake_db, monkeypatch):
+        """Test a real reply is returned and saved"""
+        use_reply(monkeypatch, "## Crop Production\n- Key point")
+        body = asyncio.run(syllabus_progress.summarize_chapter(ChapterSummaryRequest(**CHAPTER)))
+        assert body["summary"].startswith("## Crop Production")
+        assert len(fake_db.chapter_summaries.docs) == 1
+        print("✓ Summary stored")
+
+    @pytest.mark.parametrize("reply", ["AI Error: Rate limit reached", "", "Partial text\n\nAI Error: timeout"])
+    def test_failed_generation_not_stored(self, fake_db, monkeypatch, reply):
+        """Test an error reply raises and leaves no chapter_summaries row"""
+        use_reply(monkeypatch, reply)
+        with pytest.raises(ValueError):
+            asyncio.run(syllabus_progress.summarize_chapter(ChapterSummaryRequest(**CHAPTER)))
+        assert fake_db.chapter_summaries.docs == []
+        print(f"✓ {reply!r} not cached")
+
+    def test_job_counts_failure(self, fake_db, monkeypatch):
+        """Test the pre-generation job records the error so a re-run retries the chapter"""
+        use_reply(monkeypatch, "AI Error: Rate limit reached")
+        job = {"id": "JOB-1", "status": "running", "boards": ["NCERT"], "languages": ["english"], "class_nums": ["8"]}
+        fake_db.summary_jobs.docs.append(dict(job))
+
+        async def claim(job_id):
+            return job
+
+        monkeypatch.setattr(syllabus_progress, "_claim_summary_job", claim)
+        monkeypatch.setattr(syllabus_progress, "syllabus_chapters", lambda boards, class_nums: [
+            {k: v for k, v in CHAPTER.items() if k != "language"}])
+        asyncio.run(syllabus_progress.run_summary_job("JOB-1"))
+
+        stored = fake_db.summary_jobs.docs[0]
+        assert stored["failed"] == 1
+        assert not stored.get("generated")
+        assert fake_db.chapter_summaries.docs == []
+        print("✓ Failed chapter counted as failed")
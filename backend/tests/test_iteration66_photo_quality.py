@@ -0,0 +1,134 @@
+"""
+Iteration 66 - Photo Quality Without a Face Detector (services/photo_quality.py, in-process)
+Tests for:
+1. A sharp, well-lit photo is accepted locally
+2. Blurred, dark and overexposed photos are rejected locally
+3. A blank photo is "no face", not sent on as ambiguous
+4. A photo accepted without a face detector goes to the vision API when a key
+   is set (routes/face_recognition.py) and is never stored as AI-verified
+"""
+import asyncio
+import base64
+import os
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "schooltino")
+
+from PIL import Image  # noqa: E402
+
+from routes import face_recognition  # noqa: E402
+from services import photo_quality  # noqa: E402
+
+
+def portrait():
+    """A drawn head and shoulders: enough edges and contrast to stand in for a face."""
+    from PIL import ImageDraw
+    image = Image.new("L", (480, 640), 170)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 420, 480, 640), fill=60)
+    draw.ellipse((150, 150, 330, 390), fill=200, outline=90, width=3)
+    for x in (195, 265):
+        draw.ellipse((x, 230, x + 25, 245), fill=40)
+    draw.line((240, 260, 230, 310, 250, 310), fill=110, width=3)
+    draw.arc((200, 320, 280, 360), 20, 160, fill=70, width=4)
+    draw.rectangle((140, 120, 340, 170), fill=50)
+    return image
+
+
+def jpeg(image) -> bytes:
+    buffer = BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def no_detector(monkeypatch):
+    monkeypatch.setattr(photo_quality, "detector_kind", lambda: None)
+
+
+class TestWholeImageQuality:
+    """Clear cases decided locally with no face box"""
+
+    def test_sharp_photo_accepted(self):
+        """Test a sharp, evenly lit portrait passes without the vision API"""
+        result = photo_quality.analyze_photo(jpeg(portrait()), "front")
+        assert not result["ambiguous"]
+        assert result["quality_score"] >= photo_quality.ACCEPT_SCORE + photo_quality.AMBIGUOUS_BAND
+        assert result["issues"] == []
+        assert result["metrics"]["face_verified"] is False
+        print(f"✓ Accepted locally ({result['quality_score']}/100)")
+
+    @pytest.mark.parametrize("variant, issue", [("blurred", "Photo is blurry"), ("dark", "Photo is too dark"),
+                                                ("overexposed", "Photo is overexposed")])
+    def test_bad_photo_rejected(self, variant, issue):
+        """Test a blurred / dark / overexposed portrait is rejected without the vision API"""
+        from PIL import ImageEnhance, ImageFilter
+        image = {
+            "blurred": lambda p: p.filter(ImageFilter.GaussianBlur(4)),
+            "dark": lambda p: ImageEnhance.Brightness(p).enhance(0.25),
+            "overexposed": lambda p: ImageEnhance.Brightness(p).enhance(2.2),
+        }[variant](portrait())
+        result = photo_quality.analyze_photo(jpeg(image), "front")
+        assert not result["ambiguous"]
+        assert result["quality_score"] < photo_quality.ACCEPT_SCORE - photo_quality.AMBIGUOUS_BAND
+        assert issue in result["issues"]
+        print(f"✓ {variant} rejected locally ({result['quality_score']}/100)")
+
+    def test_blank_photo_no_face(self):
+        """Test a plain grey photo is decided as no face"""
+        result = photo_quality.analyze_photo(jpeg(Image.new("L", (480, 640), 120)), "passport")
+        assert not result["ambiguous"]
+        assert result["face_detected"] is False
+        print("✓ Blank photo has no face")
+
+
+class TestUnverifiedFace:
+    """Local acceptance without a face box is not a verified face"""
+
+    @pytest.fixture(autouse=True)
+    def in_process(self, monkeypatch):
+        async def run_cpu(fn, *args):
+            return fn(*args)
+        monkeypatch.setattr(face_recognition, "run_cpu", run_cpu)
+        monkeypatch.setattr(face_recognition, "observe_photo_quality", lambda analyzer: None)
+
+    def analyze(self, image):
+        photo = base64.b64encode(jpeg(image)).decode()
+        return asyncio.run(face_recognition.analyze_photo_quality(photo, "front"))
+
+    def test_sent_to_vision(self, monkeypatch):
+        """Test a sharp, well-lit photo is checked by the vision API when a key is set"""
+        async def vision(photo_base64, photo_type):
+            return {"success": True, "face_detected": False, "quality_score": 0}
+        monkeypatch.setattr(face_recognition, "OPENAI_API_KEY", "sk-test")
+        monkeypatch.setattr(face_recognition, "vision_photo_quality", vision)
+        result = self.analyze(portrait())
+        assert result["source"] == "vision"
+        assert result["face_detected"] is False
+        assert face_recognition.face_verified(result)
+        print("✓ Unverified photo sent to vision")
+
+    def test_not_ai_verified_without_key(self, monkeypatch):
+        """Test the local verdict is kept without a key, but the face isn't marked verified"""
+        monkeypatch.setattr(face_recognition, "OPENAI_API_KEY", None)
+        result = self.analyze(portrait())
+        assert result["source"] == "local"
+        assert result["face_detected"] is True
+        assert not face_recognition.face_verified(result)
+        print("✓ Local acceptance stored as not AI-verified")
+
+    def test_blank_photo_stays_local(self, monkeypatch):
+        """Test a blank photo is rejected without a vision call"""
+        async def vision(photo_base64, photo_type):
+            raise AssertionError("vision API called for a blank photo")
+        monkeypatch.setattr(face_recognition, "OPENAI_API_KEY", "sk-test")
+        monkeypatch.setattr(face_recognition, "vision_photo_quality", vision)
+        result = self.analyze(Image.new("L", (480, 640), 120))
+        assert result["face_detected"] is False
+        print("✓ Blank photo decided locally")
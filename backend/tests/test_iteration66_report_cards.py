@@ -0,0 +1,82 @@
+"""
+Iteration 66 - Batch Report Card Computation Tests (services/report_cards.py, in-process)
+Tests for:
+1. A subject only another section takes doesn't count towards a student's maximum
+2. A subject the student's own section takes but they missed counts as AB with full marks
+3. Ranks across sections of a class and within a section, ties shared
+4. Non-numeric marks ("AB") are absent, not an error
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.report_cards import compute_cards  # noqa: E402
+
+CLASSES = {
+    "8A": {"id": "8A", "name": "Class 8", "section": "A"},
+    "8B": {"id": "8B", "name": "Class 8", "section": "B"},
+}
+EXAMS = [{"id": f"EX-{c}", "school_id": "SCH-TEST-2026", "class_id": c, "name": "Half Yearly", "max_marks": 100}
+         for c in CLASSES]
+SUBJECTS = {"MATH": "Mathematics", "HIN": "Hindi", "SCI": "Science"}
+STUDENTS = {sid: {"id": sid, "name": sid} for sid in ("A1", "A2", "B1", "B2")}
+
+
+def mark(student_id, class_id, subject_id, marks):
+    return {"student_id": student_id, "class_id": class_id, "subject_id": subject_id, "marks": marks}
+
+
+def cards_by_student(marks):
+    return {c["student_id"]: c for c in compute_cards(EXAMS, marks, STUDENTS, SUBJECTS, CLASSES)}
+
+
+class TestComputeCards:
+    """Totals, absent subjects and ranks"""
+
+    def test_other_sections_subjects_not_counted(self):
+        """Test 90/100 in the only subject 8A sat is 90%, though 8B also took Hindi"""
+        cards = cards_by_student([
+            mark("A1", "8A", "MATH", 90),
+            mark("B1", "8B", "MATH", 80), mark("B1", "8B", "HIN", 70),
+        ])
+        assert cards["A1"]["total_marks"] == 100
+        assert cards["A1"]["percentage"] == 90.0
+        assert cards["A1"]["grade"] == "A+"
+        assert [s["subject_id"] for s in cards["A1"]["subjects"]] == ["MATH"]
+        assert cards["B1"]["total_marks"] == 200
+        print("✓ Maximum marks per section")
+
+    def test_missed_subject_is_absent(self):
+        """Test a subject classmates sat but the student didn't is AB and still counts"""
+        cards = cards_by_student([
+            mark("A1", "8A", "MATH", 90), mark("A1", "8A", "SCI", 70),
+            mark("A2", "8A", "MATH", 60),
+        ])
+        science = next(s for s in cards["A2"]["subjects"] if s["subject_id"] == "SCI")
+        assert science["absent"] and science["grade"] == "AB"
+        assert cards["A2"]["total_marks"] == 200
+        assert cards["A2"]["percentage"] == 30.0
+        print("✓ Missed subject counted as AB")
+
+    def test_ranks(self):
+        """Test class rank spans sections, section rank doesn't, ties share a rank"""
+        cards = cards_by_student([
+            mark("A1", "8A", "MATH", 90), mark("A2", "8A", "MATH", 70),
+            mark("B1", "8B", "MATH", 90), mark("B2", "8B", "MATH", 50),
+        ])
+        assert [cards[s]["class_rank"] for s in ("A1", "B1", "A2", "B2")] == [1, 1, 3, 4]
+        assert [cards[s]["section_rank"] for s in ("A1", "A2", "B1", "B2")] == [1, 2, 1, 2]
+        assert cards["A1"]["class_size"] == 4 and cards["A1"]["section_size"] == 2
+        print("✓ Class and section ranks")
+
+    def test_non_numeric_marks(self):
+        """Test "AB" in the marks column marks the subject absent"""
+        cards = cards_by_student([
+            mark("A1", "8A", "MATH", "AB"), mark("A1", "8A", "SCI", "45"),
+        ])
+        subjects = {s["subject_id"]: s for s in cards["A1"]["subjects"]}
+        assert subjects["MATH"]["absent"]
+        assert subjects["SCI"]["marks_obtained"] == 45
+        assert cards["A1"]["percentage"] == 22.5
+        print("✓ Non-numeric marks treated as absent")
@@ -0,0 +1,47 @@
+"""
+Iteration 66 - Class Risk Scoring Tests (services/risk_scoring.py, in-process)
+Tests for:
+1. Weighted score matches the original per-student formula
+2. Defaults when a student has no attendance rows / results yet
+3. Bands and clipping
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.risk_scoring import score_arrays  # noqa: E402
+
+
+def scores(present, total, marks, has_marks, incidents):
+    return score_arrays(np.array(present, dtype=float), np.array(total, dtype=float), np.array(marks, dtype=float),
+                        np.array(has_marks, dtype=bool), np.array(incidents, dtype=float))
+
+
+class TestRiskScoring:
+    """Vectorised risk scores"""
+
+    def test_weighted_formula(self):
+        """Test 0.3 × attendance% + 0.5 × marks% + 0.2 × (100 − 10 × incidents)"""
+        result = scores([45], [50], [70], [True], [1])
+        assert result["attendance_rate"][0] == 90
+        assert abs(result["score"][0] - (0.3 * 90 + 0.5 * 70 + 0.2 * 90)) < 1e-9
+        print(f"✓ Score {result['score'][0]:.1f}")
+
+    def test_defaults_without_data(self):
+        """Test no attendance counts as 100% and no results as 50 marks"""
+        result = scores([0], [0], [0], [False], [0])
+        assert result["attendance_rate"][0] == 100
+        assert result["avg_marks"][0] == 50
+        assert result["score"][0] == 75
+        print("✓ Defaults applied")
+
+    def test_bands_and_clipping(self):
+        """Test weak / at_risk / ok / excellent and a score clipped at 0"""
+        result = scores([5, 20, 40, 50, 0], [50, 50, 50, 50, 50], [20, 50, 75, 100, 0],
+                        [True] * 5, [0, 0, 0, 0, 30])
+        assert list(result["band"]) == ["weak", "at_risk", "ok", "excellent", "weak"]
+        assert result["score"][4] == 0
+        print(f"✓ Bands {list(result['band'])}")
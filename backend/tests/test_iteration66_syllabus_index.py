@@ -0,0 +1,58 @@
+"""
+Iteration 66 - Syllabus Search Index Tests (services/syllabus_index.py, in-process)
+Tests for:
+1. Roman and Devanagari spellings of a name find the same chapters
+2. Words that only share consonants ("prakash" / "parks") don't match
+3. A prefix hit ranks above a phonetic one
+4. Typeahead completes a partly typed word
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.syllabus_index import SyllabusIndex, get_index  # noqa: E402
+
+
+def titles(hits):
+    return [h.get("topic") or h["chapter"] for h in hits]
+
+
+def small_index():
+    index = SyllabusIndex()
+    index.add_board("NCERT", {"8": {"subjects": {
+        "Hindi": {"chapters": [{"name": "कबीर की साखियाँ", "number": 1, "topics": ["प्रकृति प्रेम"]}]},
+        "Science": {"chapters": [{"name": "Parks and Sanctuaries", "number": 2, "topics": ["Prakriti Park"]}]},
+    }}})
+    return index
+
+
+class TestSyllabusIndex:
+    """Search and typeahead over the syllabus"""
+
+    def test_cross_script(self):
+        """Test "kabir", "kabeer" and "कबीर" return the same chapters"""
+        index = get_index()
+        results = [set(titles(index.search(q))) for q in ("kabir", "kabeer", "कबीर")]
+        assert results[0] and results[0] == results[1] == results[2]
+        print(f"✓ {sorted(results[0])}")
+
+    def test_consonant_only_lookalikes(self):
+        """Test "प्रकाश" doesn't return "National parks" and "park" doesn't return "प्रकृति\""""
+        index = get_index()
+        assert not [t for t in titles(index.search("प्रकाश")) if "parks" in t.lower()]
+        assert not [t for t in titles(index.search("park")) if "प्रक" in t]
+        print("✓ No consonant-skeleton false positives")
+
+    def test_prefix_above_phonetic(self):
+        """Test "prak" ranks the Roman prefix hit above the Devanagari phonetic one"""
+        hits = small_index().search("prak")
+        assert titles(hits)[0] == "Prakriti Park"
+        assert "प्रकृति प्रेम" in titles(hits)
+        print(f"✓ {titles(hits)}")
+
+    def test_suggest(self):
+        """Test typeahead for a partial word"""
+        suggestions = [s["text"] for s in get_index().suggest("photosyn", limit=5)]
+        assert suggestions and all("hotosynthesis" in s for s in suggestions)
+        print(f"✓ {suggestions}")